@@ -0,0 +1,37 @@
+"""add image_summary table
+
+Revision ID: 5f3c2e1d9a47
+Revises: a5d73b136c2a
+Create Date: 2026-10-16 21:40:12.318094
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "5f3c2e1d9a47"
+down_revision = "a5d73b136c2a"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "image_summary",
+        sa.Column("image_hash", sa.String(), nullable=False),
+        sa.Column("model_fingerprint", sa.String(), nullable=False),
+        sa.Column("summary", sa.Text(), nullable=False),
+        sa.Column(
+            "time_created",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.PrimaryKeyConstraint("image_hash", "model_fingerprint"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("image_summary")
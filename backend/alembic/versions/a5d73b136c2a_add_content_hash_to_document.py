@@ -0,0 +1,28 @@
+"""add content_hash to document
+
+Revision ID: a5d73b136c2a
+Revises: 09995b8811eb
+Create Date: 2026-10-16 10:12:41.532177
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "a5d73b136c2a"
+down_revision = "09995b8811eb"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "document",
+        sa.Column("content_hash", sa.String(), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("document", "content_hash")
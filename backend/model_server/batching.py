@@ -0,0 +1,233 @@
+import asyncio
+import time
+from collections.abc import Callable
+from collections.abc import Hashable
+from collections.abc import Sequence
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from dataclasses import field
+from typing import Any
+from typing import Generic
+from typing import TypeVar
+
+from onyx.utils.logger import setup_logger
+from shared_configs.configs import MODEL_SERVER_BATCH_FORWARD_SIZE
+from shared_configs.configs import MODEL_SERVER_BATCH_MAX_SIZE
+from shared_configs.configs import MODEL_SERVER_BATCH_MAX_WAIT_MS
+
+logger = setup_logger()
+
+T = TypeVar("T")
+
+
+@dataclass
+class _PendingRequest(Generic[T]):
+    items: list[T]
+    future: asyncio.Future
+    enqueued_at: float = field(default_factory=time.monotonic)
+
+
+@dataclass
+class BatcherStats:
+    requests: int = 0
+    items: int = 0
+    batches: int = 0
+    forward_passes: int = 0
+    last_batch_size: int = 0
+    max_batch_size_seen: int = 0
+    total_queue_wait: float = 0.0
+    total_inference_time: float = 0.0
+
+    def to_dict(self, queue_depth: int) -> dict[str, float | int]:
+        return {
+            "queue_depth": queue_depth,
+            "requests": self.requests,
+            "items": self.items,
+            "batches": self.batches,
+            "forward_passes": self.forward_passes,
+            "last_batch_size": self.last_batch_size,
+            "max_batch_size": self.max_batch_size_seen,
+            "avg_batch_size": self.items / self.batches if self.batches else 0.0,
+            "avg_queue_wait_ms": (
+                self.total_queue_wait / self.requests * 1000 if self.requests else 0.0
+            ),
+            "avg_inference_ms": (
+                self.total_inference_time / self.batches * 1000 if self.batches else 0.0
+            ),
+        }
+
+
+class DynamicBatcher(Generic[T]):
+    """Coalesces concurrent requests against the same model.
+
+    Requests are queued, and a single consumer collects everything that arrives
+    within `max_wait_ms` of the first request (up to `max_batch_size` items). The
+    items are split by `group_key` (e.g. per request settings such as normalization),
+    sorted by length within each group, run in forward passes of `forward_batch_size`
+    on one dedicated thread for this model and the results are fanned back out to the
+    waiting requests in their original order. Since only one thread ever touches
+    the model, concurrent requests no longer contend on the tokenizer.
+
+    `run_batch` is only ever called with items sharing the same `group_key`.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        run_batch: Callable[[list[T]], Sequence[Any]],
+        item_length: Callable[[T], int],
+        group_key: Callable[[T], Hashable] | None = None,
+        max_batch_size: int = MODEL_SERVER_BATCH_MAX_SIZE,
+        max_wait_ms: float = MODEL_SERVER_BATCH_MAX_WAIT_MS,
+        forward_batch_size: int = MODEL_SERVER_BATCH_FORWARD_SIZE,
+    ) -> None:
+        self.name = name
+        self._run_batch = run_batch
+        self._item_length = item_length
+        self._group_key = group_key
+        self._max_batch_size = max_batch_size
+        self._max_wait = max_wait_ms / 1000
+        self._forward_batch_size = forward_batch_size
+
+        self._executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix=f"batcher-{name}"
+        )
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._queue: asyncio.Queue[_PendingRequest[T]] | None = None
+        self._consumer: asyncio.Task | None = None
+        self._queued_items = 0
+        self.stats = BatcherStats()
+
+    def _ensure_consumer(self) -> asyncio.Queue[_PendingRequest[T]]:
+        loop = asyncio.get_running_loop()
+        if (
+            self._queue is None
+            or self._loop is not loop
+            or self._consumer is None
+            or self._consumer.done()
+        ):
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._queued_items = 0
+            self._consumer = loop.create_task(self._consume(self._queue))
+        return self._queue
+
+    async def submit(self, items: list[T]) -> list[Any]:
+        if not items:
+            return []
+
+        queue = self._ensure_consumer()
+        future: asyncio.Future = asyncio.get_running_loop().create_future()
+        self._queued_items += len(items)
+        queue.put_nowait(_PendingRequest(items=items, future=future))
+        return await future
+
+    async def _collect_batch(
+        self, queue: asyncio.Queue[_PendingRequest[T]]
+    ) -> list[_PendingRequest[T]]:
+        batch = [await queue.get()]
+        num_items = len(batch[0].items)
+        deadline = time.monotonic() + self._max_wait
+
+        while num_items < self._max_batch_size:
+            if queue.empty():
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    request = await asyncio.wait_for(queue.get(), timeout=remaining)
+                except asyncio.TimeoutError:
+                    break
+            else:
+                request = queue.get_nowait()
+            batch.append(request)
+            num_items += len(request.items)
+
+        return batch
+
+    def _run_sorted(self, items: list[T]) -> list[Any]:
+        """Runs on the dedicated model thread. Groups similar length items into the
+        same forward pass to minimize padding, then restores the input order."""
+        groups: dict[Hashable, list[int]] = {}
+        for ind, item in enumerate(items):
+            group = self._group_key(item) if self._group_key else None
+            groups.setdefault(group, []).append(ind)
+
+        results: list[Any] = [None] * len(items)
+        for group_indices in groups.values():
+            order = sorted(group_indices, key=lambda ind: self._item_length(items[ind]))
+            for start in range(0, len(order), self._forward_batch_size):
+                bucket = order[start : start + self._forward_batch_size]
+                bucket_results = self._run_batch([items[ind] for ind in bucket])
+                for ind, result in zip(bucket, bucket_results):
+                    results[ind] = result
+                self.stats.forward_passes += 1
+        return results
+
+    async def _consume(self, queue: asyncio.Queue[_PendingRequest[T]]) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect_batch(queue)
+            all_items = [item for request in batch for item in request.items]
+            self._queued_items -= len(all_items)
+
+            now = time.monotonic()
+            self.stats.requests += len(batch)
+            self.stats.items += len(all_items)
+            self.stats.batches += 1
+            self.stats.last_batch_size = len(all_items)
+            self.stats.max_batch_size_seen = max(
+                self.stats.max_batch_size_seen, len(all_items)
+            )
+            self.stats.total_queue_wait += sum(
+                now - request.enqueued_at for request in batch
+            )
+
+            try:
+                results = await loop.run_in_executor(
+                    self._executor, self._run_sorted, all_items
+                )
+            except Exception as e:
+                logger.exception(f"Batched inference failed for {self.name}")
+                for request in batch:
+                    if not request.future.done():
+                        request.future.set_exception(e)
+                continue
+            finally:
+                self.stats.total_inference_time += time.monotonic() - now
+
+            offset = 0
+            for request in batch:
+                num_items = len(request.items)
+                if not request.future.done():
+                    request.future.set_result(results[offset : offset + num_items])
+                offset += num_items
+
+    def get_stats(self) -> dict[str, float | int]:
+        return self.stats.to_dict(queue_depth=max(self._queued_items, 0))
+
+
+_BATCHERS: dict[str, DynamicBatcher] = {}
+
+
+def get_batcher(
+    key: str,
+    run_batch: Callable[[list[T]], Sequence[Any]],
+    item_length: Callable[[T], int],
+    group_key: Callable[[T], Hashable] | None = None,
+) -> DynamicBatcher[T]:
+    """Returns the batcher registered for `key`, creating it on first use. There
+    should be exactly one key per model so that a model is only ever used from its one
+    inference thread, anything else that changes the output belongs in `group_key`."""
+    if key not in _BATCHERS:
+        _BATCHERS[key] = DynamicBatcher(
+            name=key,
+            run_batch=run_batch,
+            item_length=item_length,
+            group_key=group_key,
+        )
+    return _BATCHERS[key]
+
+
+def get_all_batcher_stats() -> dict[str, dict[str, float | int]]:
+    return {key: batcher.get_stats() for key, batcher in _BATCHERS.items()}
@@ -1,16 +1,26 @@
 import asyncio
 import time
+from dataclasses import dataclass
+from functools import partial
 from typing import Any
 from typing import Optional
 from typing import TYPE_CHECKING
 
+import numpy as np
 from fastapi import APIRouter
 from fastapi import HTTPException
 from fastapi import Request
+from fastapi import Response
 
+from model_server.batching import get_batcher
 from model_server.utils import simple_log_function_time
 from onyx.utils.logger import setup_logger
 from shared_configs.configs import INDEXING_ONLY
+from shared_configs.configs import MODEL_SERVER_DYNAMIC_BATCHING
+from shared_configs.embedding_transport import EMBEDDING_BINARY_CONTENT_TYPE
+from shared_configs.embedding_transport import EMBEDDING_BINARY_DTYPE_HEADER
+from shared_configs.embedding_transport import encode_embeddings
+from shared_configs.enums import EmbeddingTransportDtype
 from shared_configs.enums import EmbedTextType
 from shared_configs.model_server_models import Embedding
 from shared_configs.model_server_models import EmbedRequest
@@ -121,7 +131,24 @@ def _concurrent_embedding(
     return model.encode(texts, normalize_embeddings=normalize_embeddings)
 
 
-@simple_log_function_time()
+@dataclass(frozen=True)
+class _EmbedItem:
+    text: str
+    max_context_length: int
+    normalize_embeddings: bool
+
+
+def _embed_batch(model_name: str, items: list[_EmbedItem]) -> Any:
+    """Runs on the model's dedicated batching thread. All items share the same
+    context length and normalization (see the batcher's group key)."""
+    local_model = get_embedding_model(
+        model_name=model_name, max_context_length=items[0].max_context_length
+    )
+    return _concurrent_embedding(
+        [item.text for item in items], local_model, items[0].normalize_embeddings
+    )
+
+
 async def embed_text(
     texts: list[str],
     model_name: str | None,
@@ -130,6 +157,31 @@ async def embed_text(
     prefix: str | None,
     gpu_type: str = "UNKNOWN",
 ) -> list[Embedding]:
+    embeddings_vectors = await embed_text_vectors(
+        texts=texts,
+        model_name=model_name,
+        max_context_length=max_context_length,
+        normalize_embeddings=normalize_embeddings,
+        prefix=prefix,
+        gpu_type=gpu_type,
+    )
+    return [
+        embedding if isinstance(embedding, list) else embedding.tolist()
+        for embedding in embeddings_vectors
+    ]
+
+
+@simple_log_function_time()
+async def embed_text_vectors(
+    texts: list[str],
+    model_name: str | None,
+    max_context_length: int,
+    normalize_embeddings: bool,
+    prefix: str | None,
+    gpu_type: str = "UNKNOWN",
+) -> np.ndarray | list[Embedding]:
+    """Same as `embed_text` but returns the raw model output (usually a 2D numpy
+    array) so callers that don't need Python floats can skip the conversion."""
     if not all(texts):
         logger.error("Empty strings provided for embedding")
         raise ValueError("Empty strings are not allowed for embedding.")
@@ -154,20 +206,39 @@ async def embed_text(
 
         prefixed_texts = [f"{prefix}{text}" for text in texts] if prefix else texts
 
-        local_model = get_embedding_model(
-            model_name=model_name, max_context_length=max_context_length
-        )
-        # Run CPU-bound embedding in a thread pool
-        embeddings_vectors = await asyncio.get_event_loop().run_in_executor(
-            None,
-            lambda: _concurrent_embedding(
-                prefixed_texts, local_model, normalize_embeddings
-            ),
-        )
-        embeddings = [
-            embedding if isinstance(embedding, list) else embedding.tolist()
-            for embedding in embeddings_vectors
-        ]
+        if MODEL_SERVER_DYNAMIC_BATCHING:
+            # Coalesced with other concurrent requests for the same model. The model is
+            # loaded and configured on its dedicated inference thread only
+            embedding_rows = await get_batcher(
+                key=f"embed:{model_name}",
+                run_batch=partial(_embed_batch, model_name),
+                item_length=lambda item: len(item.text),
+                group_key=lambda item: (
+                    item.max_context_length,
+                    item.normalize_embeddings,
+                ),
+            ).submit(
+                [
+                    _EmbedItem(
+                        text=text,
+                        max_context_length=max_context_length,
+                        normalize_embeddings=normalize_embeddings,
+                    )
+                    for text in prefixed_texts
+                ]
+            )
+            embeddings_vectors: np.ndarray | list[Embedding] = np.stack(embedding_rows)
+        else:
+            local_model = get_embedding_model(
+                model_name=model_name, max_context_length=max_context_length
+            )
+            # Run CPU-bound embedding in a thread pool
+            embeddings_vectors = await asyncio.get_event_loop().run_in_executor(
+                None,
+                lambda: _concurrent_embedding(
+                    prefixed_texts, local_model, normalize_embeddings
+                ),
+            )
 
         elapsed = time.monotonic() - start
         logger.info(
@@ -186,12 +257,27 @@ async def embed_text(
         logger.error("Model name not specified for embedding")
         raise ValueError("Model name must be provided to run embeddings.")
 
-    return embeddings
+    return embeddings_vectors
+
+
+def _rerank_batch(
+    cross_encoder: "CrossEncoder", pairs: list[tuple[str, str]]
+) -> list[float]:
+    scores = cross_encoder.predict(pairs, convert_to_numpy=True)
+    return [float(score) for score in scores]
 
 
 @simple_log_function_time()
 async def local_rerank(query: str, docs: list[str], model_name: str) -> list[float]:
     cross_encoder = get_local_reranking_model(model_name)
+    if MODEL_SERVER_DYNAMIC_BATCHING:
+        scores = await get_batcher(
+            key=f"rerank:{model_name}",
+            run_batch=partial(_rerank_batch, cross_encoder),
+            item_length=lambda pair: len(pair[0]) + len(pair[1]),
+        ).submit([(query, doc) for doc in docs])
+        return [float(score) for score in scores]
+
     # Run CPU-bound reranking in a thread pool
     return await asyncio.get_event_loop().run_in_executor(
         None,
@@ -199,17 +285,48 @@ async def local_rerank(query: str, docs: list[str], model_name: str) -> list[flo
     )
 
 
-@router.post("/bi-encoder-embed")
+@router.post("/bi-encoder-embed", response_model=EmbedResponse)
 async def route_bi_encoder_embed(
     request: Request,
     embed_request: EmbedRequest,
-) -> EmbedResponse:
+) -> EmbedResponse | Response:
+    # Binary transport is opt-in, old clients don't send this and keep getting JSON
+    if EMBEDDING_BINARY_CONTENT_TYPE in request.headers.get("accept", ""):
+        try:
+            dtype = EmbeddingTransportDtype(
+                request.headers.get(
+                    EMBEDDING_BINARY_DTYPE_HEADER, EmbeddingTransportDtype.FLOAT32
+                )
+            )
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Unsupported embedding dtype")
+
+        embeddings_vectors = await _process_embed_request_vectors(
+            embed_request, request.app.state.gpu_type
+        )
+        return Response(
+            content=encode_embeddings(embeddings_vectors, dtype=dtype),
+            media_type=EMBEDDING_BINARY_CONTENT_TYPE,
+        )
+
     return await process_embed_request(embed_request, request.app.state.gpu_type)
 
 
 async def process_embed_request(
     embed_request: EmbedRequest, gpu_type: str = "UNKNOWN"
 ) -> EmbedResponse:
+    embeddings_vectors = await _process_embed_request_vectors(embed_request, gpu_type)
+    return EmbedResponse(
+        embeddings=[
+            embedding if isinstance(embedding, list) else embedding.tolist()
+            for embedding in embeddings_vectors
+        ]
+    )
+
+
+async def _process_embed_request_vectors(
+    embed_request: EmbedRequest, gpu_type: str = "UNKNOWN"
+) -> np.ndarray | list[Embedding]:
     from litellm.exceptions import RateLimitError
 
     # Only local models should use this endpoint - API providers should make direct API calls
@@ -233,7 +350,7 @@ async def process_embed_request(
         else:
             prefix = None
 
-        embeddings = await embed_text(
+        return await embed_text_vectors(
             texts=embed_request.texts,
             model_name=embed_request.model_name,
             max_context_length=embed_request.max_context_length,
@@ -241,7 +358,6 @@ async def process_embed_request(
             prefix=prefix,
             gpu_type=gpu_type,
         )
-        return EmbedResponse(embeddings=embeddings)
     except RateLimitError as e:
         raise HTTPException(
             status_code=429,
@@ -1,6 +1,7 @@
 from fastapi import APIRouter
 from fastapi import Response
 
+from model_server.batching import get_all_batcher_stats
 from model_server.constants import GPUStatus
 from model_server.utils import get_gpu_type
 
@@ -17,3 +18,9 @@ async def route_gpu_status() -> dict[str, bool | str]:
     gpu_type = get_gpu_type()
     gpu_available = gpu_type != GPUStatus.NONE
     return {"gpu_available": gpu_available, "type": gpu_type}
+
+
+@router.get("/batching-stats")
+async def route_batching_stats() -> dict[str, dict[str, float | int]]:
+    """Queue depth and batch size metrics for each dynamic batcher, keyed by model"""
+    return get_all_batcher_stats()
@@ -6,14 +6,22 @@ from sqlalchemy.orm import Session
 
 from onyx.access.models import DocumentAccess
 from onyx.access.utils import prefix_user_email
+from onyx.configs.app_configs import USER_ACL_CACHE_TTL_SECONDS
 from onyx.configs.constants import DocumentSource
 from onyx.configs.constants import PUBLIC_DOC_PAT
 from onyx.db.document import get_access_info_for_document
 from onyx.db.document import get_access_info_for_documents
 from onyx.db.models import User
 from onyx.db.models import UserFile
+from onyx.redis.redis_pool import get_redis_client
+from onyx.redis.redis_user_acl import cache_user_acl
+from onyx.redis.redis_user_acl import fetch_cached_user_acl
+from onyx.utils.logger import setup_logger
 from onyx.utils.variable_functionality import fetch_ee_implementation_or_noop
 from onyx.utils.variable_functionality import fetch_versioned_implementation
+from shared_configs.contextvars import get_current_tenant_id
+
+logger = setup_logger()
 
 
 def _get_access_for_document(
@@ -113,7 +121,30 @@ def get_acl_for_user(user: User | None, db_session: Session | None = None) -> se
     versioned_acl_for_user_fn = fetch_versioned_implementation(
         "onyx.access.access", "_get_acl_for_user"
     )
-    return versioned_acl_for_user_fn(user, db_session)  # type: ignore
+    if user is None or USER_ACL_CACHE_TTL_SECONDS <= 0:
+        return versioned_acl_for_user_fn(user, db_session)  # type: ignore
+
+    # the ACL of a user in many external groups is expensive to load, so it is
+    # cached until group memberships change. Redis failures only skip the cache
+    tenant_id = get_current_tenant_id()
+    generation: int | None = None
+    try:
+        redis_client = get_redis_client(tenant_id=tenant_id)
+        cached_acl, generation = fetch_cached_user_acl(
+            redis_client, tenant_id, user.id
+        )
+        if cached_acl is not None:
+            return cached_acl
+    except Exception:
+        logger.exception("Failed to read the cached ACL of the user")
+
+    acl = versioned_acl_for_user_fn(user, db_session)  # type: ignore
+    if generation is not None:
+        try:
+            cache_user_acl(redis_client, tenant_id, user.id, acl, generation)
+        except Exception:
+            logger.exception("Failed to cache the ACL of the user")
+    return acl
 
 
 def source_should_fetch_permissions_during_indexing(source: DocumentSource) -> bool:
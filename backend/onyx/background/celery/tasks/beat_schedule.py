@@ -135,6 +135,16 @@ beat_task_templates: list[dict] = [
             "expires": BEAT_EXPIRES_DEFAULT,
         },
     },
+    {
+        "name": "reconcile-token-usage-counters",
+        "task": OnyxCeleryTask.RECONCILE_TOKEN_USAGE_COUNTERS,
+        # well within TOKEN_USAGE_RECONCILED_TTL, so that the counters stay trusted
+        "schedule": timedelta(minutes=5),
+        "options": {
+            "priority": OnyxCeleryPriority.LOW,
+            "expires": BEAT_EXPIRES_DEFAULT,
+        },
+    },
     {
         "name": "monitor-background-processes",
         "task": OnyxCeleryTask.MONITOR_BACKGROUND_PROCESSES,
@@ -23,6 +23,7 @@ from onyx.configs.constants import OnyxCeleryTask
 from onyx.configs.constants import OnyxRedisConstants
 from onyx.configs.constants import OnyxRedisLocks
 from onyx.configs.constants import OnyxRedisSignals
+from onyx.connectors.web.crawl_cache import delete_crawl_cache
 from onyx.db.connector import fetch_connector_by_id
 from onyx.db.connector_credential_pair import add_deletion_failure_message
 from onyx.db.connector_credential_pair import (
@@ -551,6 +552,11 @@ def monitor_connector_deletion_taskset(
         f"docs_deleted={fence_data.num_tasks}"
     )
 
+    try:
+        delete_crawl_cache(tenant_id, cc_pair_id)
+    except Exception:
+        task_logger.exception(f"Failed to delete web crawl cache: cc_pair={cc_pair_id}")
+
     redis_connector.delete.reset()
 
 
@@ -1378,6 +1378,11 @@ def _docprocessing_task(
                 credential_id=index_attempt.connector_credential_pair.credential.id,
                 tenant_id=tenant_id,
                 index_attempt_metadata=index_attempt_metadata,
+                # full re-indexes and new indices need every doc indexed again
+                skip_unchanged_content=not (
+                    index_attempt.from_beginning
+                    or index_attempt.search_settings.status.is_future()
+                ),
             )
 
             # real work happens here!
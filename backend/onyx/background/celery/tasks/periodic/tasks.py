@@ -2,20 +2,34 @@
 # Periodic Tasks
 #####
 import json
+from datetime import datetime
+from datetime import timedelta
+from datetime import timezone
 from typing import Any
 
 from celery import shared_task
+from celery import Task
 from celery.contrib.abortable import AbortableTask  # type: ignore
 from celery.exceptions import TaskRevokedError
+from redis.lock import Lock as RedisLock
 from sqlalchemy import inspect
 from sqlalchemy import text
 from sqlalchemy.orm import Session
 
 from onyx.background.celery.apps.app_base import task_logger
 from onyx.configs.app_configs import JOB_TIMEOUT
+from onyx.configs.app_configs import TOKEN_USAGE_COUNTER_RETENTION_DAYS
+from onyx.configs.constants import CELERY_GENERIC_BEAT_LOCK_TIMEOUT
 from onyx.configs.constants import OnyxCeleryTask
+from onyx.configs.constants import OnyxRedisLocks
 from onyx.configs.constants import PostgresAdvisoryLocks
 from onyx.db.engine.sql_engine import get_session_with_current_tenant
+from onyx.db.token_limit import fetch_global_token_usage
+from onyx.db.token_limit import fetch_max_token_rate_limit_period_hours
+from onyx.redis.redis_pool import get_redis_client
+from onyx.redis.redis_token_usage import mark_token_usage_reconciled
+from onyx.redis.redis_token_usage import replace_token_usage
+from onyx.redis.redis_token_usage import TOKEN_USAGE_GLOBAL_SCOPE
 
 
 @shared_task(
@@ -136,3 +150,61 @@ def kombu_message_cleanup_task_helper(ctx: dict, db_session: Session) -> bool:
         ctx["last_processed_id"] = msg[0]
 
     return True
+
+
+@shared_task(
+    name=OnyxCeleryTask.RECONCILE_TOKEN_USAGE_COUNTERS,
+    soft_time_limit=300,
+    bind=True,
+)
+def reconcile_token_usage_counters(self: Task, *, tenant_id: str) -> None:
+    """Rebuilds the token usage counters that token rate limits are checked against
+    from the chat message table. Backfills the counters when they are first used and
+    corrects any increments that were lost or counted for rolled back messages."""
+    redis_client = get_redis_client(tenant_id=tenant_id)
+    lock: RedisLock = redis_client.lock(
+        OnyxRedisLocks.RECONCILE_TOKEN_USAGE_BEAT_LOCK,
+        timeout=CELERY_GENERIC_BEAT_LOCK_TIMEOUT,
+    )
+
+    # these tasks should never overlap
+    if not lock.acquire(blocking=False):
+        return None
+
+    try:
+        with get_session_with_current_tenant() as db_session:
+            max_period_hours = fetch_max_token_rate_limit_period_hours(db_session)
+            if max_period_hours is None:
+                return None
+
+            # longer periods are always checked in Postgres
+            period_hours = min(
+                max_period_hours, TOKEN_USAGE_COUNTER_RETENTION_DAYS * 24
+            )
+            cutoff_time = datetime.now(tz=timezone.utc) - timedelta(hours=period_hours)
+            global_usage = fetch_global_token_usage(db_session, cutoff_time)
+
+        replace_token_usage(
+            redis_client=redis_client,
+            tenant_id=tenant_id,
+            scope=TOKEN_USAGE_GLOBAL_SCOPE,
+            usage=global_usage,
+            cutoff_time=cutoff_time,
+        )
+        mark_token_usage_reconciled(
+            redis_client=redis_client,
+            tenant_id=tenant_id,
+            scope=TOKEN_USAGE_GLOBAL_SCOPE,
+        )
+        task_logger.info(
+            f"Reconciled token usage counters: "
+            f"minutes={len(global_usage)} period_hours={period_hours}"
+        )
+    except Exception:
+        task_logger.exception("Unexpected exception during token usage reconciliation")
+        return None
+    finally:
+        if lock.owned():
+            lock.release()
+
+    return None
@@ -0,0 +1,109 @@
+import heapq
+import json
+import os
+import tempfile
+from collections.abc import Generator
+from collections.abc import Iterable
+from collections.abc import Iterator
+from types import TracebackType
+
+
+class SortedIdSpool:
+    """Collects document ids with bounded memory and hands them back sorted and
+    deduplicated.
+
+    Up to max_in_memory ids are kept in a set, beyond that they are sorted and spilled
+    to a temporary file (a "run"). Iterating merges the runs with what is still in
+    memory. Ids are stored as json strings, one per line, so ids containing newlines
+    survive the round trip.
+    """
+
+    def __init__(self, max_in_memory: int) -> None:
+        self.max_in_memory = max(1, max_in_memory)
+        self._ids: set[str] = set()
+        self._runs: list[str] = []
+        self._tmp_dir: tempfile.TemporaryDirectory[str] | None = None
+
+    def __enter__(self) -> "SortedIdSpool":
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        self.close()
+
+    @property
+    def num_runs(self) -> int:
+        return len(self._runs)
+
+    def add_all(self, ids: Iterable[str]) -> None:
+        self._ids.update(ids)
+        if len(self._ids) >= self.max_in_memory:
+            self._spill()
+
+    def _spill(self) -> None:
+        if self._tmp_dir is None:
+            self._tmp_dir = tempfile.TemporaryDirectory(prefix="onyx_pruning_")
+
+        path = os.path.join(self._tmp_dir.name, f"run_{len(self._runs)}.jsonl")
+        with open(path, "w", encoding="utf-8") as f:
+            for doc_id in sorted(self._ids):
+                f.write(json.dumps(doc_id, ensure_ascii=False))
+                f.write("\n")
+
+        self._runs.append(path)
+        self._ids = set()
+
+    @staticmethod
+    def _read_run(path: str) -> Generator[str, None, None]:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                yield json.loads(line)
+
+    def __iter__(self) -> Iterator[str]:
+        runs: list[Iterable[str]] = [self._read_run(path) for path in self._runs]
+        runs.append(sorted(self._ids))
+
+        last: str | None = None
+        for doc_id in heapq.merge(*runs):
+            # the same id can be in several runs
+            if doc_id != last:
+                yield doc_id
+            last = doc_id
+
+    def close(self) -> None:
+        self._ids = set()
+        self._runs = []
+        if self._tmp_dir is not None:
+            self._tmp_dir.cleanup()
+            self._tmp_dir = None
+
+
+def iter_ids_to_prune(
+    indexed_ids: Iterable[str], source_ids: Iterable[str]
+) -> Generator[str, None, None]:
+    """Yields the indexed ids that are not in the source anymore.
+
+    Both inputs must be sorted in ascending (python string) order, this is checked
+    for the indexed ids since deleting documents based on a misordered stream would be
+    destructive.
+    """
+    source_iter = iter(source_ids)
+    source_id = next(source_iter, None)
+    last_indexed_id: str | None = None
+    for indexed_id in indexed_ids:
+        if last_indexed_id is not None and indexed_id <= last_indexed_id:
+            raise RuntimeError(
+                f"Indexed document ids are not sorted: "
+                f"{last_indexed_id!r} came before {indexed_id!r}"
+            )
+        last_indexed_id = indexed_id
+
+        while source_id is not None and source_id < indexed_id:
+            source_id = next(source_iter, None)
+
+        if source_id != indexed_id:
+            yield indexed_id
@@ -1,4 +1,7 @@
 import time
+from collections.abc import Callable
+from concurrent.futures import as_completed
+from concurrent.futures import ThreadPoolExecutor
 from enum import Enum
 from http import HTTPStatus
 
@@ -10,18 +13,28 @@ from redis import Redis
 from tenacity import RetryError
 
 from onyx.access.access import get_access_for_document
+from onyx.access.access import get_access_for_documents
 from onyx.background.celery.apps.app_base import task_logger
 from onyx.background.celery.tasks.shared.RetryDocumentIndex import RetryDocumentIndex
+from onyx.configs.app_configs import VESPA_METADATA_SYNC_CONCURRENCY
 from onyx.configs.constants import ONYX_CELERY_BEAT_HEARTBEAT_KEY
 from onyx.configs.constants import OnyxCeleryTask
 from onyx.db.document import delete_document_by_connector_credential_pair__no_commit
+from onyx.db.document import (
+    delete_documents_by_connector_credential_pair__no_commit,
+)
 from onyx.db.document import delete_documents_complete__no_commit
 from onyx.db.document import fetch_chunk_count_for_document
 from onyx.db.document import get_document
 from onyx.db.document import get_document_connector_count
+from onyx.db.document import get_document_connector_counts
+from onyx.db.document import get_documents_by_ids
 from onyx.db.document import mark_document_as_modified
 from onyx.db.document import mark_document_as_synced
+from onyx.db.document import mark_documents_as_modified
+from onyx.db.document import mark_documents_as_synced
 from onyx.db.document_set import fetch_document_sets_for_document
+from onyx.db.document_set import fetch_document_sets_for_documents
 from onyx.db.engine.sql_engine import get_session_with_current_tenant
 from onyx.db.relationships import delete_document_references_from_kg
 from onyx.db.search_settings import get_active_search_settings
@@ -38,6 +51,10 @@ DOCUMENT_BY_CC_PAIR_CLEANUP_MAX_RETRIES = 3
 LIGHT_SOFT_TIME_LIMIT = 105
 LIGHT_TIME_LIMIT = LIGHT_SOFT_TIME_LIMIT + 15
 
+# a batch of documents gets more time than a single one
+CLEANUP_BATCH_SOFT_TIME_LIMIT = 300
+CLEANUP_BATCH_TIME_LIMIT = CLEANUP_BATCH_SOFT_TIME_LIMIT + 15
+
 
 class OnyxCeleryTaskCompletionStatus(str, Enum):
     """The different statuses the watchdog can finish with.
@@ -57,6 +74,73 @@ class OnyxCeleryTaskCompletionStatus(str, Enum):
     RETRYABLE_EXCEPTION = "retryable_exception"
 
 
+def _unwrap_retry_error(ex: BaseException) -> BaseException:
+    if isinstance(ex, RetryError):
+        inner = ex.last_attempt.exception()
+        if isinstance(inner, Exception):
+            return inner
+    return ex
+
+
+def apply_to_documents_concurrently(
+    fn: Callable[[str], int],
+    document_ids: list[str],
+    max_workers: int = VESPA_METADATA_SYNC_CONCURRENCY,
+) -> tuple[int, list[str], dict[str, BaseException]]:
+    """Runs a document index operation (e.g. update_single) for every document.
+
+    Returns the sum of what fn returned (the number of chunks affected), the ids of
+    the documents it succeeded for and the exception for each document it failed for.
+    """
+    chunks_affected = 0
+    succeeded_doc_ids: list[str] = []
+    failures: dict[str, BaseException] = {}
+    if not document_ids:
+        return chunks_affected, succeeded_doc_ids, failures
+
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+    try:
+        future_to_doc_id = {
+            executor.submit(fn, doc_id): doc_id for doc_id in document_ids
+        }
+        for future in as_completed(future_to_doc_id):
+            doc_id = future_to_doc_id[future]
+            exception = future.exception()
+            if exception is not None:
+                failures[doc_id] = _unwrap_retry_error(exception)
+                continue
+
+            chunks_affected += future.result()
+            succeeded_doc_ids.append(doc_id)
+    finally:
+        # don't keep going after e.g. a soft time limit
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    return chunks_affected, succeeded_doc_ids, failures
+
+
+def get_retryable_failures(
+    failures: dict[str, BaseException], task_name: str
+) -> dict[str, BaseException]:
+    """Logs the failures of a batch task and returns the ones worth retrying. An
+    HTTPStatusError (e.g. a 400 for a malformed request) won't get better by
+    retrying."""
+    retryable: dict[str, BaseException] = {}
+    for doc_id, e in failures.items():
+        if isinstance(e, httpx.HTTPStatusError):
+            if e.response.status_code == HTTPStatus.BAD_REQUEST:
+                task_logger.error(
+                    f"Non-retryable HTTPStatusError: "
+                    f"doc={doc_id} "
+                    f"status={e.response.status_code}"
+                )
+            continue
+
+        task_logger.error(f"{task_name} doc failed: doc={doc_id} exception={e!r}")
+        retryable[doc_id] = e
+    return retryable
+
+
 @shared_task(
     name=OnyxCeleryTask.DOCUMENT_BY_CC_PAIR_CLEANUP_TASK,
     soft_time_limit=LIGHT_SOFT_TIME_LIMIT,
@@ -268,6 +352,220 @@ def document_by_cc_pair_cleanup_task(
     return True
 
 
+@shared_task(
+    name=OnyxCeleryTask.DOCUMENT_BY_CC_PAIR_CLEANUP_BATCH_TASK,
+    soft_time_limit=CLEANUP_BATCH_SOFT_TIME_LIMIT,
+    time_limit=CLEANUP_BATCH_TIME_LIMIT,
+    max_retries=DOCUMENT_BY_CC_PAIR_CLEANUP_MAX_RETRIES,
+    bind=True,
+)
+def document_by_cc_pair_cleanup_batch_task(
+    self: Task,
+    document_ids: list[str],
+    connector_id: int,
+    credential_id: int,
+    tenant_id: str,
+) -> bool:
+    """Batch version of document_by_cc_pair_cleanup_task, used by connector pruning.
+
+    Documents only referenced by this cc pair are deleted from Vespa and Postgres, the
+    others have their Vespa fields refreshed and lose their relationship to the cc pair.
+    Lookups and Postgres writes are done once for the whole batch, the Vespa calls run
+    concurrently. Documents that fail with a retryable error are retried on their own.
+    """
+    start = time.monotonic()
+
+    completion_status = OnyxCeleryTaskCompletionStatus.UNDEFINED
+    cc_pair_identifier = ConnectorCredentialPairIdentifier(
+        connector_id=connector_id,
+        credential_id=credential_id,
+    )
+    # the documents to retry and the exception to report for them
+    retry_doc_ids: list[str] = []
+    retry_exc: BaseException | None = None
+
+    try:
+        with get_session_with_current_tenant() as db_session:
+            active_search_settings = get_active_search_settings(db_session)
+            doc_index = get_default_document_index(
+                active_search_settings.primary,
+                active_search_settings.secondary,
+                httpx_client=HttpxPool.get("vespa"),
+            )
+
+            doc_id_to_connector_count = dict(
+                get_document_connector_counts(db_session, document_ids)
+            )
+            docs = {
+                doc.id: doc
+                for doc in get_documents_by_ids(
+                    db_session, list(doc_id_to_connector_count)
+                )
+            }
+
+            # count == 1 means this is the only remaining cc_pair reference to the doc
+            # delete it from vespa and the db
+            doc_ids_to_delete = [
+                doc_id
+                for doc_id in document_ids
+                if doc_id_to_connector_count.get(doc_id) == 1
+            ]
+            doc_id_to_chunk_count = {
+                doc_id: docs[doc_id].chunk_count if doc_id in docs else None
+                for doc_id in doc_ids_to_delete
+            }
+
+            # count > 1 means the document still has cc_pair references
+            doc_ids_to_update = [
+                doc_id
+                for doc_id in document_ids
+                if doc_id_to_connector_count.get(doc_id, 0) > 1 and doc_id in docs
+            ]
+            doc_id_to_fields: dict[str, VespaDocumentFields] = {}
+            if doc_ids_to_update:
+                # the below functions do not include cc_pairs being deleted.
+                # i.e. they will correctly omit access for the current cc_pair
+                doc_id_to_access = get_access_for_documents(
+                    doc_ids_to_update, db_session
+                )
+                doc_id_to_doc_sets = dict(
+                    fetch_document_sets_for_documents(doc_ids_to_update, db_session)
+                )
+                doc_id_to_fields = {
+                    doc_id: VespaDocumentFields(
+                        document_sets=set(doc_id_to_doc_sets.get(doc_id, [])),
+                        access=doc_id_to_access[doc_id],
+                        boost=docs[doc_id].boost,
+                        hidden=docs[doc_id].hidden,
+                    )
+                    for doc_id in doc_ids_to_update
+                }
+
+            retry_index = RetryDocumentIndex(doc_index)
+
+            def _delete(doc_id: str) -> int:
+                return retry_index.delete_single(
+                    doc_id,
+                    tenant_id=tenant_id,
+                    chunk_count=doc_id_to_chunk_count[doc_id],
+                )
+
+            def _update(doc_id: str) -> int:
+                # OK if doc doesn't exist. Raises exception otherwise.
+                return retry_index.update_single(
+                    doc_id,
+                    tenant_id=tenant_id,
+                    chunk_count=docs[doc_id].chunk_count,
+                    fields=doc_id_to_fields[doc_id],
+                    user_fields=None,
+                )
+
+            # the refcounts read above and the writes below are done in the same
+            # transaction, so that the documents are deleted / updated based on the
+            # refcounts the Vespa calls were made for
+            deleted_chunks, deleted_doc_ids, delete_failures = (
+                apply_to_documents_concurrently(_delete, doc_ids_to_delete)
+            )
+            updated_chunks, updated_doc_ids, update_failures = (
+                apply_to_documents_concurrently(_update, doc_ids_to_update)
+            )
+
+            if deleted_doc_ids:
+                delete_documents_complete__no_commit(
+                    db_session=db_session,
+                    document_ids=deleted_doc_ids,
+                )
+            if updated_doc_ids:
+                # there are still other cc_pair references to the docs, so they were
+                # just resynced to Vespa
+                delete_documents_by_connector_credential_pair__no_commit(
+                    db_session=db_session,
+                    document_ids=updated_doc_ids,
+                    connector_credential_pair_identifier=cc_pair_identifier,
+                )
+            mark_documents_as_synced(updated_doc_ids, db_session)
+            db_session.commit()
+
+        failures = {**delete_failures, **update_failures}
+        retryable = get_retryable_failures(
+            failures, "document_by_cc_pair_cleanup_batch_task"
+        )
+        if retryable:
+            retry_doc_ids = list(retryable)
+            retry_exc = next(iter(retryable.values()))
+
+        elapsed = time.monotonic() - start
+        task_logger.info(
+            f"cc_pair={connector_id}/{credential_id} "
+            f"docs={len(document_ids)} "
+            f"deleted={len(deleted_doc_ids)} "
+            f"updated={len(updated_doc_ids)} "
+            f"failed={len(failures)} "
+            f"chunks={deleted_chunks + updated_chunks} "
+            f"elapsed={elapsed:.2f}"
+        )
+
+        if failures and not retryable:
+            completion_status = OnyxCeleryTaskCompletionStatus.NON_RETRYABLE_EXCEPTION
+        elif not doc_ids_to_delete and not doc_ids_to_update:
+            completion_status = OnyxCeleryTaskCompletionStatus.SKIPPED
+        elif not failures:
+            completion_status = OnyxCeleryTaskCompletionStatus.SUCCEEDED
+    except SoftTimeLimitExceeded:
+        task_logger.info(f"SoftTimeLimitExceeded exception. docs={len(document_ids)}")
+        completion_status = OnyxCeleryTaskCompletionStatus.SOFT_TIME_LIMIT
+    except Exception as e:
+        task_logger.exception(
+            f"document_by_cc_pair_cleanup_batch_task exceptioned: "
+            f"docs={len(document_ids)}"
+        )
+        retry_doc_ids = document_ids
+        retry_exc = e
+
+    if retry_exc is not None:
+        completion_status = OnyxCeleryTaskCompletionStatus.RETRYABLE_EXCEPTION
+        if self.max_retries is not None and self.request.retries >= self.max_retries:
+            # This is the last attempt! mark the documents as dirty in the db so that
+            # they eventually get fixed out of band via stale document reconciliation
+            task_logger.warning(
+                f"Max celery task retries reached. Marking docs as dirty for "
+                f"reconciliation: docs={len(retry_doc_ids)}"
+            )
+            with get_session_with_current_tenant() as db_session:
+                # delete the cc pair relationship now and let reconciliation clean it
+                # up in vespa
+                delete_documents_by_connector_credential_pair__no_commit(
+                    db_session=db_session,
+                    document_ids=retry_doc_ids,
+                    connector_credential_pair_identifier=cc_pair_identifier,
+                )
+                mark_documents_as_modified(retry_doc_ids, db_session)
+            completion_status = OnyxCeleryTaskCompletionStatus.NON_RETRYABLE_EXCEPTION
+            retry_exc = None
+
+    task_logger.info(
+        f"document_by_cc_pair_cleanup_batch_task completed: "
+        f"status={completion_status.value} docs={len(document_ids)}"
+    )
+
+    if retry_exc is not None:
+        # Exponential backoff from 2^4 to 2^6 ... i.e. 16, 32, 64
+        # only the documents that failed are retried
+        countdown = 2 ** (self.request.retries + 4)
+        self.retry(
+            exc=retry_exc,
+            countdown=countdown,
+            kwargs=dict(
+                document_ids=retry_doc_ids,
+                connector_id=connector_id,
+                credential_id=credential_id,
+                tenant_id=tenant_id,
+            ),
+        )
+
+    return completion_status == OnyxCeleryTaskCompletionStatus.SUCCEEDED
+
+
 @shared_task(name=OnyxCeleryTask.CELERY_BEAT_HEARTBEAT, ignore_result=True, bind=True)
 def celery_beat_heartbeat(self: Task, *, tenant_id: str) -> None:
     """When this task runs, it writes a key to Redis with a TTL.
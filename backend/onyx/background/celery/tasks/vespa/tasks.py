@@ -15,8 +15,11 @@ from sqlalchemy.orm import Session
 from tenacity import RetryError
 
 from onyx.access.access import get_access_for_document
+from onyx.access.access import get_access_for_documents
 from onyx.background.celery.apps.app_base import task_logger
 from onyx.background.celery.tasks.shared.RetryDocumentIndex import RetryDocumentIndex
+from onyx.background.celery.tasks.shared.tasks import apply_to_documents_concurrently
+from onyx.background.celery.tasks.shared.tasks import get_retryable_failures
 from onyx.background.celery.tasks.shared.tasks import LIGHT_SOFT_TIME_LIMIT
 from onyx.background.celery.tasks.shared.tasks import LIGHT_TIME_LIMIT
 from onyx.background.celery.tasks.shared.tasks import OnyxCeleryTaskCompletionStatus
@@ -34,10 +37,13 @@ from onyx.configs.constants import OnyxCeleryTask
 from onyx.configs.constants import OnyxRedisConstants
 from onyx.configs.constants import OnyxRedisLocks
 from onyx.db.document import get_document
+from onyx.db.document import get_documents_by_ids
 from onyx.db.document import mark_document_as_synced
+from onyx.db.document import mark_documents_as_synced
 from onyx.db.document_set import delete_document_set
 from onyx.db.document_set import fetch_document_sets
 from onyx.db.document_set import fetch_document_sets_for_document
+from onyx.db.document_set import fetch_document_sets_for_documents
 from onyx.db.document_set import get_document_set_by_id
 from onyx.db.document_set import mark_document_set_as_synced
 from onyx.db.engine.sql_engine import get_session_with_current_tenant
@@ -67,6 +73,10 @@ from onyx.utils.variable_functionality import noop_fallback
 
 logger = setup_logger()
 
+# a batch task syncs many documents, give it more time than the single document task
+VESPA_METADATA_SYNC_BATCH_SOFT_TIME_LIMIT = 300
+VESPA_METADATA_SYNC_BATCH_TIME_LIMIT = VESPA_METADATA_SYNC_BATCH_SOFT_TIME_LIMIT + 15
+
 
 # celery auto associates tasks created inside another task,
 # which bloats the result metadata considerably. trail=False prevents this.
@@ -458,6 +468,8 @@ def monitor_document_set_taskset(
     max_retries=3,
 )
 def vespa_metadata_sync_task(self: Task, document_id: str, *, tenant_id: str) -> bool:
+    """Single document version of `vespa_metadata_sync_batch_task`. Nothing enqueues
+    this anymore, it is kept to drain tasks queued before an upgrade."""
     start = time.monotonic()
 
     completion_status = OnyxCeleryTaskCompletionStatus.UNDEFINED
@@ -574,3 +586,136 @@ def vespa_metadata_sync_task(self: Task, document_id: str, *, tenant_id: str) ->
         )
 
     return completion_status == OnyxCeleryTaskCompletionStatus.SUCCEEDED
+
+
+@shared_task(
+    name=OnyxCeleryTask.VESPA_METADATA_SYNC_BATCH_TASK,
+    bind=True,
+    soft_time_limit=VESPA_METADATA_SYNC_BATCH_SOFT_TIME_LIMIT,
+    time_limit=VESPA_METADATA_SYNC_BATCH_TIME_LIMIT,
+    max_retries=3,
+)
+def vespa_metadata_sync_batch_task(
+    self: Task, document_ids: list[str], *, tenant_id: str
+) -> bool:
+    """Syncs the document sets, access and boost of a batch of documents to Vespa.
+
+    Everything is loaded from Postgres with one query per kind of data instead of one
+    per document, the Vespa updates are issued concurrently over the shared vespa
+    client and the synced documents are marked in one statement. Documents that fail
+    with a retryable error are retried on their own."""
+    start = time.monotonic()
+
+    completion_status = OnyxCeleryTaskCompletionStatus.UNDEFINED
+    num_synced = 0
+    # the documents to retry and the exception to report for them
+    retry_doc_ids: list[str] = []
+    retry_exc: BaseException | None = None
+
+    try:
+        with get_session_with_current_tenant() as db_session:
+            active_search_settings = get_active_search_settings(db_session)
+            doc_index = get_default_document_index(
+                search_settings=active_search_settings.primary,
+                secondary_search_settings=active_search_settings.secondary,
+                httpx_client=HttpxPool.get("vespa"),
+            )
+
+            docs = get_documents_by_ids(db_session, document_ids)
+            found_doc_ids = [doc.id for doc in docs]
+            doc_id_to_doc_sets = dict(
+                fetch_document_sets_for_documents(found_doc_ids, db_session)
+            )
+            doc_id_to_access = get_access_for_documents(found_doc_ids, db_session)
+
+            doc_id_to_fields = {
+                doc.id: (
+                    VespaDocumentFields(
+                        document_sets=set(doc_id_to_doc_sets.get(doc.id, [])),
+                        access=doc_id_to_access[doc.id],
+                        boost=doc.boost,
+                        hidden=doc.hidden,
+                    ),
+                    doc.chunk_count,
+                )
+                for doc in docs
+            }
+
+        retry_index = RetryDocumentIndex(doc_index)
+
+        def _update(doc_id: str) -> int:
+            fields, chunk_count = doc_id_to_fields[doc_id]
+            return retry_index.update_single(
+                doc_id,
+                tenant_id=tenant_id,
+                chunk_count=chunk_count,
+                fields=fields,
+                user_fields=None,
+            )
+
+        # no db connection is held while talking to Vespa
+        chunks_affected, synced_doc_ids, failures = apply_to_documents_concurrently(
+            _update, list(doc_id_to_fields)
+        )
+
+        # update db last. Worst case = we crash right before this and
+        # the sync might repeat again later
+        with get_session_with_current_tenant() as db_session:
+            mark_documents_as_synced(synced_doc_ids, db_session)
+        num_synced = len(synced_doc_ids)
+
+        retryable = get_retryable_failures(failures, "vespa_metadata_sync_batch_task")
+        if retryable:
+            retry_doc_ids = list(retryable)
+            retry_exc = next(iter(retryable.values()))
+
+        elapsed = time.monotonic() - start
+        task_logger.info(
+            f"docs={len(document_ids)} "
+            f"skipped={len(document_ids) - len(docs)} "
+            f"synced={num_synced} "
+            f"failed={len(failures)} "
+            f"chunks={chunks_affected} "
+            f"elapsed={elapsed:.2f}"
+        )
+
+        if failures and not retry_doc_ids:
+            completion_status = OnyxCeleryTaskCompletionStatus.NON_RETRYABLE_EXCEPTION
+        elif not docs:
+            completion_status = OnyxCeleryTaskCompletionStatus.SKIPPED
+        elif not failures:
+            completion_status = OnyxCeleryTaskCompletionStatus.SUCCEEDED
+    except SoftTimeLimitExceeded:
+        task_logger.info(
+            f"SoftTimeLimitExceeded exception. docs={len(document_ids)} "
+            f"synced={num_synced}"
+        )
+        completion_status = OnyxCeleryTaskCompletionStatus.SOFT_TIME_LIMIT
+    except Exception as e:
+        task_logger.exception(
+            f"vespa_metadata_sync_batch_task exceptioned: docs={len(document_ids)}"
+        )
+        retry_doc_ids = document_ids
+        retry_exc = e
+
+    if retry_exc is not None:
+        completion_status = OnyxCeleryTaskCompletionStatus.RETRYABLE_EXCEPTION
+        if self.max_retries is not None and self.request.retries >= self.max_retries:
+            completion_status = OnyxCeleryTaskCompletionStatus.NON_RETRYABLE_EXCEPTION
+
+    task_logger.info(
+        f"vespa_metadata_sync_batch_task completed: "
+        f"status={completion_status.value} docs={len(document_ids)}"
+    )
+
+    if retry_exc is not None:
+        # Exponential backoff from 2^4 to 2^6 ... i.e. 16, 32, 64
+        # only the documents that failed are retried
+        countdown = 2 ** (self.request.retries + 4)
+        self.retry(
+            exc=retry_exc,
+            countdown=countdown,
+            kwargs=dict(document_ids=retry_doc_ids, tenant_id=tenant_id),
+        )
+
+    return completion_status == OnyxCeleryTaskCompletionStatus.SUCCEEDED
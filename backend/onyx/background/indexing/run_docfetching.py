@@ -113,6 +113,14 @@ def _get_connector_runner(
             connector_specific_config=attempt.connector_credential_pair.connector.connector_specific_config,
             credential=attempt.connector_credential_pair.credential,
         )
+        # full re-indexes and new indices need every document, so they don't get to
+        # skip content that was already indexed for the cc pair
+        if not (
+            attempt.from_beginning
+            or attempt.search_settings is None
+            or attempt.search_settings.status == IndexModelStatus.FUTURE
+        ):
+            runnable_connector.set_cc_pair_id(attempt.connector_credential_pair.id)
 
         # validate the connector settings
         if not INTEGRATION_TESTS_MODE:
@@ -572,21 +580,22 @@ def _run_indexing(
                 index_attempt_md.batch_num = batch_num + 1  # use 1-index for this
 
                 # real work happens here!
+                ignore_time_skip = ctx.from_beginning or (
+                    ctx.search_settings_status == IndexModelStatus.FUTURE
+                )
                 adapter = DocumentIndexingBatchAdapter(
                     db_session=db_session,
                     connector_id=ctx.connector_id,
                     credential_id=ctx.credential_id,
                     tenant_id=tenant_id,
                     index_attempt_metadata=index_attempt_md,
+                    skip_unchanged_content=not ignore_time_skip,
                 )
                 index_pipeline_result = run_indexing_pipeline(
                     embedder=embedding_model,
                     information_content_classification_model=information_content_classification_model,
                     document_index=document_index,
-                    ignore_time_skip=(
-                        ctx.from_beginning
-                        or (ctx.search_settings_status == IndexModelStatus.FUTURE)
-                    ),
+                    ignore_time_skip=ignore_time_skip,
                     db_session=db_session,
                     tenant_id=tenant_id,
                     document_batch=doc_batch_cleaned,
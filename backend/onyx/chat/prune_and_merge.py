@@ -1,6 +1,7 @@
 import json
+import threading
 from collections import defaultdict
-from copy import deepcopy
+from collections import OrderedDict
 from typing import TypeVar
 
 from pydantic import BaseModel
@@ -12,11 +13,13 @@ from onyx.chat.models import (
 from onyx.chat.models import PromptConfig
 from onyx.chat.prompt_builder.citations_prompt import compute_max_document_tokens
 from onyx.configs.app_configs import MAX_FEDERATED_SECTIONS
+from onyx.configs.chat_configs import PRUNING_TOKEN_COUNT_CACHE_SIZE
 from onyx.configs.constants import IGNORE_FOR_QA
 from onyx.configs.model_configs import DOC_EMBEDDING_CONTEXT_SIZE
 from onyx.context.search.models import InferenceChunk
 from onyx.context.search.models import InferenceSection
 from onyx.llm.interfaces import LLMConfig
+from onyx.natural_language_processing.utils import BaseTokenizer
 from onyx.natural_language_processing.utils import get_tokenizer
 from onyx.natural_language_processing.utils import tokenizer_trim_content
 from onyx.prompts.prompt_utils import build_doc_context_str
@@ -38,6 +41,53 @@ class PruningError(Exception):
     pass
 
 
+class _ContentTokenCountCache:
+    """Bounded LRU of the token counts of section contents, shared by all chat turns and
+    agent sub-searches of the process since they keep pruning the same retrieved
+    sections. Keyed by the tokenizer, the center chunk and a hash of the exact text, so
+    differently expanded or trimmed contents of the same chunk don't share a count."""
+
+    def __init__(self, max_entries: int) -> None:
+        self.max_entries = max_entries
+        self._counts: OrderedDict[tuple, int] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def count(
+        self,
+        tokenizer: BaseTokenizer,
+        tokenizer_key: tuple[str, str],
+        unique_id: str,
+        text: str,
+    ) -> int:
+        key = (tokenizer_key, unique_id, len(text), hash(text))
+        with self._lock:
+            count = self._counts.get(key)
+            if count is not None:
+                self._counts.move_to_end(key)
+                self.hits += 1
+                return count
+            self.misses += 1
+
+        count = len(tokenizer.encode(text))
+        if self.max_entries > 0:
+            with self._lock:
+                self._counts[key] = count
+                if len(self._counts) > self.max_entries:
+                    self._counts.popitem(last=False)
+        return count
+
+    def clear(self) -> None:
+        with self._lock:
+            self._counts.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+_CONTENT_TOKEN_COUNT_CACHE = _ContentTokenCountCache(PRUNING_TOKEN_COUNT_CACHE_SIZE)
+
+
 class ChunkRange(BaseModel):
     chunks: list[InferenceChunk]
     start: int
@@ -163,6 +213,45 @@ def _remove_sections_to_ignore(
     ]
 
 
+def _count_section_tokens(
+    section: InferenceSection,
+    ind: int,
+    using_tool_message: bool,
+    llm_tokenizer: BaseTokenizer,
+    tokenizer_key: tuple[str, str],
+) -> int:
+    """Token count of the section as it is put into the prompt at position ind. Only the
+    wrapper around the content (document number, title, metadata) is encoded every
+    time, the count of the content comes from the cache. Encoding the two separately
+    can be off by a token at the boundary, which the pruning estimates absorb."""
+    if using_tool_message:
+        # If using tool message, it will be a bit of an overestimate as the extra json text around the section
+        # will be counted towards the token count. However, once the Sections are merged, the extra json parts
+        # that overlap will not be counted multiple times like it is in the pruning step.
+        section_dict = section_to_dict(section, ind)
+        section_dict["content"] = ""
+        wrapper_str = json.dumps(section_dict)
+        # the content as it appears in the json, without the surrounding quotes
+        content_str = json.dumps(section.combined_content)[1:-1]
+    else:
+        wrapper_str = build_doc_context_str(
+            semantic_identifier=section.center_chunk.semantic_identifier,
+            source_type=section.center_chunk.source_type,
+            content="",
+            metadata_dict=section.center_chunk.metadata,
+            updated_at=section.center_chunk.updated_at,
+            ind=ind,
+        )
+        content_str = section.combined_content.strip()
+
+    return len(llm_tokenizer.encode(wrapper_str)) + _CONTENT_TOKEN_COUNT_CACHE.count(
+        tokenizer=llm_tokenizer,
+        tokenizer_key=tokenizer_key,
+        unique_id=section.center_chunk.unique_id,
+        text=content_str,
+    )
+
+
 def _apply_pruning(
     sections: list[InferenceSection],
     section_relevance_list: list[bool] | None,
@@ -177,9 +266,12 @@ def _apply_pruning(
         provider_type=llm_config.model_provider,
         model_name=llm_config.model_name,
     )
+    tokenizer_key = (llm_config.model_provider, llm_config.model_name)
 
-    # combine the section lists, making sure to add the keep_sections first
-    sections = deepcopy(keep_sections) + deepcopy(sections)
+    # combine the section lists, making sure to add the keep_sections first.
+    # NOTE: the sections are not copied, a section whose content gets trimmed below is
+    # replaced by a copy instead so the caller's sections stay untouched
+    sections = keep_sections + sections
 
     # build combined relevance list, treating the keep_sections as relevant
     if section_relevance_list is not None:
@@ -204,23 +296,13 @@ def _apply_pruning(
     final_section_ind = None
     total_tokens = 0
     for ind, section in enumerate(sections):
-        section_str = (
-            # If using tool message, it will be a bit of an overestimate as the extra json text around the section
-            # will be counted towards the token count. However, once the Sections are merged, the extra json parts
-            # that overlap will not be counted multiple times like it is in the pruning step.
-            json.dumps(section_to_dict(section, ind))
-            if using_tool_message
-            else build_doc_context_str(
-                semantic_identifier=section.center_chunk.semantic_identifier,
-                source_type=section.center_chunk.source_type,
-                content=section.combined_content,
-                metadata_dict=section.center_chunk.metadata,
-                updated_at=section.center_chunk.updated_at,
-                ind=ind,
-            )
+        section_token_count = _count_section_tokens(
+            section=section,
+            ind=ind,
+            using_tool_message=using_tool_message,
+            llm_tokenizer=llm_tokenizer,
+            tokenizer_key=tokenizer_key,
         )
-
-        section_token_count = len(llm_tokenizer.encode(section_str))
         # if not using sections (specifically, using Sections where each section maps exactly to the one center chunk),
         # truncate chunks that are way too long. This can happen if the embedding model tokenizer is different
         # than the LLM tokenizer
@@ -242,10 +324,14 @@ def _apply_pruning(
                     "Found more tokens in Section than expected, "
                     "likely mismatch between embedding and LLM tokenizers. Trimming content..."
                 )
-            section.combined_content = tokenizer_trim_content(
-                content=section.combined_content,
-                desired_length=DOC_EMBEDDING_CONTEXT_SIZE,
-                tokenizer=llm_tokenizer,
+            sections[ind] = section = section.model_copy(
+                update={
+                    "combined_content": tokenizer_trim_content(
+                        content=section.combined_content,
+                        desired_length=DOC_EMBEDDING_CONTEXT_SIZE,
+                        tokenizer=llm_tokenizer,
+                    )
+                }
             )
             section_token_count = DOC_EMBEDDING_CONTEXT_SIZE
 
@@ -286,8 +372,12 @@ def _apply_pruning(
             amount_to_truncate = total_tokens - token_limit
             # NOTE: need to recalculate the length here, since the previous calculation included
             # overhead from JSON-fying the doc / the metadata
-            final_doc_content_length = len(
-                llm_tokenizer.encode(sections[final_section_ind].combined_content)
+            final_section = sections[final_section_ind]
+            final_doc_content_length = _CONTENT_TOKEN_COUNT_CACHE.count(
+                tokenizer=llm_tokenizer,
+                tokenizer_key=tokenizer_key,
+                unique_id=final_section.center_chunk.unique_id,
+                text=final_section.combined_content,
             ) - (amount_to_truncate)
             # this could occur if we only have space for the title / metadata
             # not ideal, but it's the most reasonable thing to do
@@ -301,10 +391,14 @@ def _apply_pruning(
                 )
                 sections.pop()
             else:
-                sections[final_section_ind].combined_content = tokenizer_trim_content(
-                    content=sections[final_section_ind].combined_content,
-                    desired_length=final_doc_content_length,
-                    tokenizer=llm_tokenizer,
+                sections[final_section_ind] = final_section.model_copy(
+                    update={
+                        "combined_content": tokenizer_trim_content(
+                            content=final_section.combined_content,
+                            desired_length=final_doc_content_length,
+                            tokenizer=llm_tokenizer,
+                        )
+                    }
                 )
         else:
             # For search on chunk level (Section is just a chunk), don't truncate the final Chunk/Section unless it's the only one
@@ -312,12 +406,17 @@ def _apply_pruning(
             if final_section_ind != 0:
                 sections = sections[:final_section_ind]
             else:
-                sections[0].combined_content = tokenizer_trim_content(
-                    content=sections[0].combined_content,
-                    desired_length=token_limit - _METADATA_TOKEN_ESTIMATE,
-                    tokenizer=llm_tokenizer,
-                )
-                sections = [sections[0]]
+                sections = [
+                    sections[0].model_copy(
+                        update={
+                            "combined_content": tokenizer_trim_content(
+                                content=sections[0].combined_content,
+                                desired_length=token_limit - _METADATA_TOKEN_ESTIMATE,
+                                tokenizer=llm_tokenizer,
+                            )
+                        }
+                    )
+                ]
 
     # sort by relevance, then by score (as we added the keep_sections first)
     sections.sort(
@@ -46,6 +46,51 @@ def in_code_block(llm_text: str) -> bool:
     return count % 2 != 0
 
 
+class CodeFenceTracker:
+    """Streaming equivalent of `in_code_block` over everything fed so far, without
+    rescanning the whole output for every token. A run of backticks counts as
+    len // 3 fences, just like `str.count`, and the trailing run may still be extended
+    by the next token."""
+
+    def __init__(self) -> None:
+        self._completed_fences = 0  # fences in backtick runs that have ended
+        self._backtick_run = 0  # length of the backtick run at the end so far
+
+    def feed(self, text: str) -> None:
+        if "`" not in text:
+            if text:
+                self._completed_fences += self._backtick_run // 3
+                self._backtick_run = 0
+            return
+
+        without_leading = text.lstrip("`")
+        leading = len(text) - len(without_leading)
+        if not without_leading:
+            self._backtick_run += leading
+            return
+
+        self._completed_fences += (self._backtick_run + leading) // 3
+        middle = without_leading.rstrip("`")
+        # the middle starts and ends with non backticks, so its runs are all complete
+        self._completed_fences += middle.count(TRIPLE_BACKTICK)
+        self._backtick_run = len(without_leading) - len(middle)
+
+    @property
+    def in_code_block(self) -> bool:
+        return (self._completed_fences + self._backtick_run // 3) % 2 != 0
+
+
+def ends_with_possible_citation(segment: str, citation_body: re.Pattern[str]) -> bool:
+    """Whether the segment ends in what could become a citation, e.g. '[', '[[1' or
+    '[1, 2,'. Any such suffix has to start at a run of '[' that contains the last '['
+    and only citation characters can follow it, so only the tail is checked instead of
+    searching the whole held segment."""
+    last_bracket = segment.rfind("[")
+    if last_bracket == -1:
+        return False
+    return citation_body.fullmatch(segment, last_bracket + 1) is not None
+
+
 class CitationProcessor:
     def __init__(
         self,
@@ -58,7 +103,7 @@ class CitationProcessor:
         self.max_citation_num = len(context_docs)
         self.stop_stream = stop_stream
 
-        self.llm_out = ""  # entire output so far
+        self.code_fences = CodeFenceTracker()  # code block state of the output so far
         self.curr_segment = ""  # tokens held for citation processing
         self.hold = ""  # tokens held for stop token processing
 
@@ -66,8 +111,10 @@ class CitationProcessor:
         self.cited_documents: set[str] = set()  # docs cited in the entire stream
         self.non_citation_count = 0
 
+        # what may follow the last '[' of a possible citation (a single trailing
+        # newline is tolerated, as with `$`)
         # '[', '[[', '[1', '[[1', '[1,', '[1, ', '[1,2', '[1, 2,', etc.
-        self.possible_citation_pattern = re.compile(r"(\[+(?:\d+,? ?)*$)")
+        self.possible_citation_body = re.compile(r"(?:\d+,? ?)*\n?")
 
         # group 1: '[[1]]', [[2]], etc.
         # group 2: '[1]', '[1, 2]', '[1,2,16]', etc.
@@ -92,7 +139,7 @@ class CitationProcessor:
             self.hold = ""
 
         self.curr_segment += token
-        self.llm_out += token
+        self.code_fences.feed(token)
 
         # Handle code blocks without language tags
         if "`" in self.curr_segment:
@@ -100,16 +147,16 @@ class CitationProcessor:
                 pass
             elif "```" in self.curr_segment:
                 piece_that_comes_after = self.curr_segment.split("```")[1][0]
-                if piece_that_comes_after == "\n" and in_code_block(self.llm_out):
+                if piece_that_comes_after == "\n" and self.code_fences.in_code_block:
                     self.curr_segment = self.curr_segment.replace("```", "```plaintext")
 
         citation_matches = list(self.citation_pattern.finditer(self.curr_segment))
-        possible_citation_found = bool(
-            re.search(self.possible_citation_pattern, self.curr_segment)
+        possible_citation_found = ends_with_possible_citation(
+            self.curr_segment, self.possible_citation_body
         )
 
         result = ""
-        if citation_matches and not in_code_block(self.llm_out):
+        if citation_matches and not self.code_fences.in_code_block:
             match_idx = 0
             for match in citation_matches:
                 match_span = match.span()
@@ -211,7 +258,7 @@ class CitationProcessorGraph:
         self.max_citation_num = len(context_docs)
         self.stop_stream = stop_stream
 
-        self.llm_out = ""  # entire output so far
+        self.code_fences = CodeFenceTracker()  # code block state of the output so far
         self.curr_segment = ""  # tokens held for citation processing
         self.hold = ""  # tokens held for stop token processing
 
@@ -219,9 +266,11 @@ class CitationProcessorGraph:
         self.cited_documents: set[str] = set()  # docs cited in the entire stream
         self.non_citation_count = 0
 
+        # what may follow the last '[' of a possible citation (a single trailing
+        # newline is tolerated, as with `$`)
         # '[', '[[', '[1', '[[1', '[1,', '[1, ', '[1,2', '[1, 2,', etc.
         # Also supports '[D1', '[D1, D3' type patterns
-        self.possible_citation_pattern = re.compile(r"(\[+(?:(?:\d+|D\d+),? ?)*$)")
+        self.possible_citation_body = re.compile(r"(?:(?:\d+|D\d+),? ?)*\n?")
 
         # group 1: '[[1]]', [[2]], etc.
         # group 2: '[1]', '[1, 2]', '[1,2,16]', etc.
@@ -248,7 +297,7 @@ class CitationProcessorGraph:
             self.hold = ""
 
         self.curr_segment += token
-        self.llm_out += token
+        self.code_fences.feed(token)
 
         # Handle code blocks without language tags
         if "`" in self.curr_segment:
@@ -256,16 +305,16 @@ class CitationProcessorGraph:
                 pass
             elif "```" in self.curr_segment:
                 piece_that_comes_after = self.curr_segment.split("```")[1][0]
-                if piece_that_comes_after == "\n" and in_code_block(self.llm_out):
+                if piece_that_comes_after == "\n" and self.code_fences.in_code_block:
                     self.curr_segment = self.curr_segment.replace("```", "```plaintext")
 
         citation_matches = list(self.citation_pattern.finditer(self.curr_segment))
-        possible_citation_found = bool(
-            re.search(self.possible_citation_pattern, self.curr_segment)
+        possible_citation_found = ends_with_possible_citation(
+            self.curr_segment, self.possible_citation_body
         )
 
         result = ""
-        if citation_matches and not in_code_block(self.llm_out):
+        if citation_matches and not self.code_fences.in_code_block:
             match_idx = 0
             citation_infos = []
             for match in citation_matches:
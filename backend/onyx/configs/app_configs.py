@@ -204,6 +204,17 @@ VESPA_DEPLOYMENT_ZIP = (
 )
 VESPA_CLOUD_CERT_PATH = os.environ.get("VESPA_CLOUD_CERT_PATH")
 VESPA_CLOUD_KEY_PATH = os.environ.get("VESPA_CLOUD_KEY_PATH")
+# ACLs with at least this many entries (e.g. users in many permission synced external
+# groups) are passed to Vespa as a single weightedSet query input instead of an OR of
+# `contains` clauses in the YQL. 0 always uses the OR of `contains` clauses
+VESPA_COMPACT_ACL_FILTER_MIN_ENTRIES = int(
+    os.environ.get("VESPA_COMPACT_ACL_FILTER_MIN_ENTRIES") or 20
+)
+# How long the ACL of a user is cached in Redis, 0 (the default) disables the cache.
+# Every sync of external groups and every change of user group memberships has to
+# invalidate the cached ACLs of the tenant (invalidate_current_tenant_user_acl_cache),
+# so only enable it if all code changing group memberships does
+USER_ACL_CACHE_TTL_SECONDS = int(os.environ.get("USER_ACL_CACHE_TTL_SECONDS") or 0)
 
 # Number of documents in a batch during indexing (further batching done by chunks before passing to bi-encoder)
 INDEX_BATCH_SIZE = int(os.environ.get("INDEX_BATCH_SIZE") or 16)
@@ -306,6 +317,19 @@ REDIS_POOL_MAX_CONNECTIONS = int(os.environ.get("REDIS_POOL_MAX_CONNECTIONS", 12
 REDIS_SSL_CERT_REQS = os.getenv("REDIS_SSL_CERT_REQS", "none")
 REDIS_SSL_CA_CERTS = os.getenv("REDIS_SSL_CA_CERTS", None)
 
+# Per process cache in front of the Postgres / Redis backed key value store. Writes
+# invalidate the entry in every process via Redis pub/sub, the TTL bounds how stale a
+# value can get if an invalidation is missed
+KV_STORE_LOCAL_CACHE_ENABLED = (
+    os.environ.get("KV_STORE_LOCAL_CACHE_ENABLED", "").lower() == "true"
+)
+KV_STORE_LOCAL_CACHE_TTL_SECONDS = float(
+    os.environ.get("KV_STORE_LOCAL_CACHE_TTL_SECONDS") or 30
+)
+KV_STORE_LOCAL_CACHE_MAX_ENTRIES = int(
+    os.environ.get("KV_STORE_LOCAL_CACHE_MAX_ENTRIES") or 1024
+)
+
 CELERY_RESULT_EXPIRES = int(os.environ.get("CELERY_RESULT_EXPIRES", 86400))  # seconds
 
 # https://docs.celeryq.dev/en/stable/userguide/configuration.html#broker-pool-limit
@@ -404,6 +428,15 @@ CELERY_WORKER_USER_FILE_PROCESSING_CONCURRENCY = int(
 # The maximum number of tasks that can be queued up to sync to Vespa in a single pass
 VESPA_SYNC_MAX_TASKS = 8192
 
+# Number of documents synced to Vespa by a single metadata sync task and how many of
+# them are updated concurrently by that task
+VESPA_METADATA_SYNC_BATCH_SIZE = int(
+    os.environ.get("VESPA_METADATA_SYNC_BATCH_SIZE") or 64
+)
+VESPA_METADATA_SYNC_CONCURRENCY = int(
+    os.environ.get("VESPA_METADATA_SYNC_CONCURRENCY") or 16
+)
+
 DB_YIELD_PER_DEFAULT = 64
 
 #####
@@ -440,6 +473,19 @@ WEB_CONNECTOR_OAUTH_CLIENT_ID = os.environ.get("WEB_CONNECTOR_OAUTH_CLIENT_ID")
 WEB_CONNECTOR_OAUTH_CLIENT_SECRET = os.environ.get("WEB_CONNECTOR_OAUTH_CLIENT_SECRET")
 WEB_CONNECTOR_OAUTH_TOKEN_URL = os.environ.get("WEB_CONNECTOR_OAUTH_TOKEN_URL")
 WEB_CONNECTOR_VALIDATE_URLS = os.environ.get("WEB_CONNECTOR_VALIDATE_URLS")
+# Crawler mode fetches pages concurrently over plain HTTP, only rendering the ones that
+# need javascript in a browser, and skips pages that haven't changed since the last run.
+# Can also be turned on per connector with the `crawler_mode` connector config.
+WEB_CONNECTOR_CRAWLER_MODE = (
+    os.environ.get("WEB_CONNECTOR_CRAWLER_MODE", "").lower() == "true"
+)
+WEB_CONNECTOR_CRAWL_CONCURRENCY = int(
+    os.environ.get("WEB_CONNECTOR_CRAWL_CONCURRENCY") or 8
+)
+# Unchanged pages are still re-indexed once this many days after they were last indexed
+WEB_CONNECTOR_CRAWL_CACHE_TTL_DAYS = float(
+    os.environ.get("WEB_CONNECTOR_CRAWL_CACHE_TTL_DAYS") or 7
+)
 
 HTML_BASED_CONNECTOR_TRANSFORM_LINKS_STRATEGY = os.environ.get(
     "HTML_BASED_CONNECTOR_TRANSFORM_LINKS_STRATEGY",
@@ -573,6 +619,15 @@ LINEAR_CLIENT_SECRET = os.getenv("LINEAR_CLIENT_SECRET")
 # Slack specific configs
 SLACK_NUM_THREADS = int(os.getenv("SLACK_NUM_THREADS") or 8)
 MAX_SLACK_QUERY_EXPANSIONS = int(os.environ.get("MAX_SLACK_QUERY_EXPANSIONS", "5"))
+# Max number of threads fetched / users resolved at once by federated Slack search
+SLACK_FEDERATED_CONCURRENCY = int(os.environ.get("SLACK_FEDERATED_CONCURRENCY") or 8)
+# How long federated Slack search remembers the name of a user
+SLACK_FEDERATED_USER_CACHE_TTL_SECONDS = int(
+    os.environ.get("SLACK_FEDERATED_USER_CACHE_TTL_SECONDS") or 60 * 60
+)
+SLACK_FEDERATED_USER_CACHE_MAX_ENTRIES = int(
+    os.environ.get("SLACK_FEDERATED_USER_CACHE_MAX_ENTRIES") or 50_000
+)
 
 DASK_JOB_CLIENT_ENABLED = (
     os.environ.get("DASK_JOB_CLIENT_ENABLED", "").lower() == "true"
@@ -598,6 +653,13 @@ MAX_PRUNING_DOCUMENT_RETRIEVAL_PER_MINUTE = int(
     os.environ.get("MAX_PRUNING_DOCUMENT_RETRIEVAL_PER_MINUTE", 0)
 )
 
+# Number of pruned documents cleaned up from Postgres and Vespa by a single task
+PRUNING_CLEANUP_BATCH_SIZE = int(os.environ.get("PRUNING_CLEANUP_BATCH_SIZE") or 100)
+
+# Number of source document ids a pruning job keeps in memory, beyond that they are
+# sorted and spilled to temporary files
+PRUNING_MAX_IDS_IN_MEMORY = int(os.environ.get("PRUNING_MAX_IDS_IN_MEMORY") or 200_000)
+
 # comma delimited list of zendesk article labels to skip indexing for
 ZENDESK_CONNECTOR_SKIP_ARTICLE_LABELS = os.environ.get(
     "ZENDESK_CONNECTOR_SKIP_ARTICLE_LABELS", ""
@@ -635,6 +697,26 @@ MINI_CHUNK_SIZE = 150
 # This is the number of regular chunks per large chunk
 LARGE_CHUNK_RATIO = 4
 
+# Max number of sentence token counts the chunker remembers while chunking a batch, the
+# blurb, chunk and mini chunk splitters all count the same sentences
+CHUNKER_TOKEN_COUNT_CACHE_SIZE = int(
+    os.environ.get("CHUNKER_TOKEN_COUNT_CACHE_SIZE") or 20_000
+)
+# Chunks are handed to the embedder as soon as the documents chunked so far have at
+# least this many chunks instead of after the whole batch was chunked. 0 chunks the
+# whole batch first
+INDEXING_CHUNK_STREAM_SIZE = int(os.environ.get("INDEXING_CHUNK_STREAM_SIZE") or 256)
+# Run chunking, contextual RAG, embedding and content classification of a batch
+# concurrently, each stage working on the next window of chunks while the following
+# stage handles the previous one
+ENABLE_PIPELINED_INDEXING = (
+    os.environ.get("ENABLE_PIPELINED_INDEXING", "").lower() == "true"
+)
+# Max number of chunk windows waiting between two pipelined indexing stages
+INDEXING_PIPELINE_QUEUE_SIZE = int(
+    os.environ.get("INDEXING_PIPELINE_QUEUE_SIZE") or 2
+)
+
 # Include the document level metadata in each chunk. If the metadata is too long, then it is thrown out
 # We don't want the metadata to overwhelm the actual contents of the chunk
 SKIP_METADATA_IN_CHUNK = os.environ.get("SKIP_METADATA_IN_CHUNK", "").lower() == "true"
@@ -672,6 +754,14 @@ MAX_FILE_SIZE_BYTES = int(
     os.environ.get("MAX_FILE_SIZE_BYTES") or 2 * 1024 * 1024 * 1024
 )  # 2GB in bytes
 
+# Per file budgets of pdf extraction, checked between pages: how long it may take and
+# how many characters of text it may produce. A pdf over either budget fails to extract,
+# its pages extracted so far are not used. 0 (the default) disables them
+PDF_EXTRACTION_TIMEOUT_SECONDS = int(
+    os.environ.get("PDF_EXTRACTION_TIMEOUT_SECONDS") or 0
+)
+PDF_EXTRACTION_MAX_CHARS = int(os.environ.get("PDF_EXTRACTION_MAX_CHARS") or 0)
+
 # Use document summary for contextual rag
 USE_DOCUMENT_SUMMARY = os.environ.get("USE_DOCUMENT_SUMMARY", "true").lower() == "true"
 # Use chunk summary for contextual rag
@@ -744,6 +834,11 @@ LANGFUSE_HOST = os.environ.get("LANGFUSE_HOST") or "https://cloud.langfuse.com"
 TOKEN_BUDGET_GLOBALLY_ENABLED = (
     os.environ.get("TOKEN_BUDGET_GLOBALLY_ENABLED", "").lower() == "true"
 )
+# Token rate limits are checked against token usage counters kept in Redis, which
+# hold this many days of usage. Limits with a longer period are checked in Postgres
+TOKEN_USAGE_COUNTER_RETENTION_DAYS = int(
+    os.environ.get("TOKEN_USAGE_COUNTER_RETENTION_DAYS") or 8
+)
 
 # Defined custom query/answer conditions to validate the query and the LLM answer.
 # Format: list of strings
@@ -753,6 +848,18 @@ CUSTOM_ANSWER_VALIDITY_CONDITIONS = json.loads(
 
 VESPA_REQUEST_TIMEOUT = int(os.environ.get("VESPA_REQUEST_TIMEOUT") or "15")
 
+# Connection pool shared by all Vespa queries of a process (search, id based
+# retrieval, admin search), instead of a new client / TLS handshake per query
+VESPA_QUERY_POOL_MAX_CONNECTIONS = int(
+    os.environ.get("VESPA_QUERY_POOL_MAX_CONNECTIONS") or 100
+)
+VESPA_QUERY_POOL_MAX_KEEPALIVE_CONNECTIONS = int(
+    os.environ.get("VESPA_QUERY_POOL_MAX_KEEPALIVE_CONNECTIONS") or 20
+)
+VESPA_QUERY_POOL_KEEPALIVE_EXPIRY = float(
+    os.environ.get("VESPA_QUERY_POOL_KEEPALIVE_EXPIRY") or 60
+)
+
 SYSTEM_RECURSION_LIMIT = int(os.environ.get("SYSTEM_RECURSION_LIMIT") or "1000")
 
 PARSE_WITH_TRAFILATURA = os.environ.get("PARSE_WITH_TRAFILATURA", "").lower() == "true"
@@ -890,6 +997,16 @@ IMAGE_ANALYSIS_SYSTEM_PROMPT = os.environ.get(
     DEFAULT_IMAGE_ANALYSIS_SYSTEM_PROMPT,
 )
 
+# Store image summaries by image content, vision model and prompts so that images
+# that were already summarized (repeated logos, re-indexed pages) skip the vision LLM
+ENABLE_IMAGE_SUMMARY_CACHE = (
+    os.environ.get("ENABLE_IMAGE_SUMMARY_CACHE", "true").lower() == "true"
+)
+# Max number of images of a batch that are summarized at the same time
+IMAGE_SUMMARIZATION_MAX_CONCURRENCY = int(
+    os.environ.get("IMAGE_SUMMARIZATION_MAX_CONCURRENCY") or 4
+)
+
 DISABLE_AUTO_AUTH_REFRESH = (
     os.environ.get("DISABLE_AUTO_AUTH_REFRESH", "").lower() == "true"
 )
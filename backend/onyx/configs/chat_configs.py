@@ -17,6 +17,11 @@ CHAT_TARGET_CHUNK_PERCENTAGE = 512 * 3 / 3072
 
 # Maximum percentage of the context window to fill with selected sections
 SELECTED_SECTIONS_MAX_WINDOW_PERCENTAGE = 0.8
+# Max number of section content token counts remembered between chat turns and agent
+# sub-searches when pruning sections to fit the context window
+PRUNING_TOKEN_COUNT_CACHE_SIZE = int(
+    os.environ.get("PRUNING_TOKEN_COUNT_CACHE_SIZE") or 10_000
+)
 
 # 1 / (1 + DOC_TIME_DECAY * doc-age-in-years), set to 0 to have no decay
 # Capped in Vespa at 0.5
@@ -120,6 +120,10 @@ CELERY_VESPA_SYNC_BEAT_LOCK_TIMEOUT = 120
 
 CELERY_PRIMARY_WORKER_LOCK_TIMEOUT = 120
 
+# the token usage counters are only trusted for this long after they were last
+# reconciled with the chat message table
+TOKEN_USAGE_RECONCILED_TTL = 15 * 60  # 15 minutes
+
 
 # hard timeout applied by the watchdog to the indexing connector run
 # to handle hung connectors
@@ -380,6 +384,7 @@ class OnyxRedisLocks:
     CHECK_INDEXING_BEAT_LOCK = "da_lock:check_indexing_beat"
     CHECK_CHECKPOINT_CLEANUP_BEAT_LOCK = "da_lock:check_checkpoint_cleanup_beat"
     CHECK_INDEX_ATTEMPT_CLEANUP_BEAT_LOCK = "da_lock:check_index_attempt_cleanup_beat"
+    RECONCILE_TOKEN_USAGE_BEAT_LOCK = "da_lock:reconcile_token_usage_beat"
     CHECK_CONNECTOR_DOC_PERMISSIONS_SYNC_BEAT_LOCK = (
         "da_lock:check_connector_doc_permissions_sync_beat"
     )
@@ -505,6 +510,7 @@ class OnyxCeleryTask:
     CELERY_BEAT_HEARTBEAT = "celery_beat_heartbeat"
 
     KOMBU_MESSAGE_CLEANUP_TASK = "kombu_message_cleanup_task"
+    RECONCILE_TOKEN_USAGE_COUNTERS = "reconcile_token_usage_counters"
     CONNECTOR_PERMISSION_SYNC_GENERATOR_TASK = (
         "connector_permission_sync_generator_task"
     )
@@ -521,7 +527,9 @@ class OnyxCeleryTask:
 
     CONNECTOR_PRUNING_GENERATOR_TASK = "connector_pruning_generator_task"
     DOCUMENT_BY_CC_PAIR_CLEANUP_TASK = "document_by_cc_pair_cleanup_task"
+    DOCUMENT_BY_CC_PAIR_CLEANUP_BATCH_TASK = "document_by_cc_pair_cleanup_batch_task"
     VESPA_METADATA_SYNC_TASK = "vespa_metadata_sync_task"
+    VESPA_METADATA_SYNC_BATCH_TASK = "vespa_metadata_sync_batch_task"
     USER_FILE_DOCID_MIGRATION = "user_file_docid_migration"
 
     # chat retention
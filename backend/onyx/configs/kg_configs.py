@@ -135,6 +135,12 @@ KG_CLUSTERING_THRESHOLD: float = float(
     os.environ.get("KG_CLUSTERING_THRESHOLD", "0.96")
 )
 
+# number of staged grounded entities clustered with one candidate query per entity
+# type and one transaction
+KG_CLUSTERING_ENTITY_BATCH_SIZE: int = int(
+    os.environ.get("KG_CLUSTERING_ENTITY_BATCH_SIZE", "256")
+)
+
 KG_MAX_SEARCH_DOCUMENTS: int = int(os.environ.get("KG_MAX_SEARCH_DOCUMENTS", "15"))
 
 KG_MAX_DECOMPOSITION_SEGMENTS: int = int(
@@ -1,6 +1,8 @@
 import json
 import os
 
+from shared_configs.enums import EmbeddingTransportDtype
+
 #####
 # Embedding/Reranking Model Configs
 #####
@@ -46,6 +48,58 @@ EMBEDDING_BATCH_SIZE = int(os.environ.get("EMBEDDING_BATCH_SIZE") or 0) or None
 BATCH_SIZE_ENCODE_CHUNKS = EMBEDDING_BATCH_SIZE or 8
 # don't send over too many chunks at once, as sending too many could cause timeouts
 BATCH_SIZE_ENCODE_CHUNKS_FOR_API_EMBEDDING_SERVICES = EMBEDDING_BATCH_SIZE or 512
+# Local embedding models are fed texts sorted by token length so that each batch needs
+# as little padding as possible, results are returned in the original order regardless
+DISABLE_EMBEDDING_LENGTH_BUCKETING = (
+    os.environ.get("DISABLE_EMBEDDING_LENGTH_BUCKETING", "").lower() == "true"
+)
+# Ask the model server for embeddings as a raw binary matrix instead of JSON floats.
+# float16 halves the payload again at a small precision cost
+USE_BINARY_EMBEDDING_TRANSPORT = (
+    os.environ.get("USE_BINARY_EMBEDDING_TRANSPORT", "").lower() == "true"
+)
+BINARY_EMBEDDING_TRANSPORT_DTYPE = EmbeddingTransportDtype.FLOAT32
+_BINARY_EMBEDDING_TRANSPORT_DTYPE_RAW = os.environ.get(
+    "BINARY_EMBEDDING_TRANSPORT_DTYPE"
+)
+if _BINARY_EMBEDDING_TRANSPORT_DTYPE_RAW:
+    try:
+        BINARY_EMBEDDING_TRANSPORT_DTYPE = EmbeddingTransportDtype(
+            _BINARY_EMBEDDING_TRANSPORT_DTYPE_RAW.lower()
+        )
+    except ValueError:
+        # need to import here to avoid circular imports
+        from onyx.utils.logger import setup_logger
+
+        logger = setup_logger()
+        logger.warning(
+            f"Invalid BINARY_EMBEDDING_TRANSPORT_DTYPE "
+            f"'{_BINARY_EMBEDDING_TRANSPORT_DTYPE_RAW}', falling back to float32"
+        )
+# Query embeddings are cached per tenant / search settings. The in-process tier is an
+# LRU in front of a shared Redis tier so repeated queries across API workers are cheap
+DISABLE_QUERY_EMBEDDING_CACHE = (
+    os.environ.get("DISABLE_QUERY_EMBEDDING_CACHE", "").lower() == "true"
+)
+QUERY_EMBEDDING_CACHE_MAX_ENTRIES = int(
+    os.environ.get("QUERY_EMBEDDING_CACHE_MAX_ENTRIES") or 2048
+)
+QUERY_EMBEDDING_CACHE_TTL_SECONDS = int(
+    os.environ.get("QUERY_EMBEDDING_CACHE_TTL_SECONDS") or 60 * 60 * 24
+)
+# Chunk embeddings keyed by a hash of the exact text sent to the model, so re-indexing
+# unchanged documents skips the embedding model. Opt-in since it can take a lot of
+# Redis memory (roughly 4 bytes per dimension per entry). The maximum is across all
+# tenants, the default is ~150MB for 768 dimensional embeddings
+ENABLE_CHUNK_EMBEDDING_CACHE = (
+    os.environ.get("ENABLE_CHUNK_EMBEDDING_CACHE", "").lower() == "true"
+)
+CHUNK_EMBEDDING_CACHE_MAX_ENTRIES = int(
+    os.environ.get("CHUNK_EMBEDDING_CACHE_MAX_ENTRIES") or 50_000
+)
+CHUNK_EMBEDDING_CACHE_TTL_SECONDS = int(
+    os.environ.get("CHUNK_EMBEDDING_CACHE_TTL_SECONDS") or 60 * 60 * 24 * 30
+)
 # For score display purposes, only way is to know the expected ranges
 CROSS_ENCODER_RANGE_MAX = 1
 CROSS_ENCODER_RANGE_MIN = 0
@@ -76,6 +76,11 @@ class BaseConnector(abc.ABC, Generic[CT]):
         """Implement if the underlying connector wants to skip/allow image downloading
         based on the application level image analysis setting."""
 
+    def set_cc_pair_id(self, cc_pair_id: int) -> None:
+        """Implement if the underlying connector keeps state across runs of the same
+        cc pair, e.g. to skip content that was already indexed for it. Not called for
+        runs that need every document, like re-indexes from the beginning."""
+
     def build_dummy_checkpoint(self) -> CT:
         # TODO: find a way to make this work without type: ignore
         return ConnectorCheckpoint(has_more=True)  # type: ignore
@@ -15,6 +15,7 @@ from onyx.connectors.salesforce.utils import NAME_FIELD
 from onyx.connectors.salesforce.utils import SalesforceObject
 from onyx.connectors.salesforce.utils import USER_OBJECT_TYPE
 from onyx.connectors.salesforce.utils import validate_salesforce_id
+from onyx.utils.batching import batch_generator
 from onyx.utils.logger import setup_logger
 from shared_configs.utils import batch_list
 
@@ -33,6 +34,20 @@ class OnyxSalesforceSQLite:
     # might be appropriate here.
     NULL_ID_STRING = "N/A"
 
+    # The db is rebuilt in a temporary directory for every sync, so durability is
+    # traded for speed. These are per connection settings and have to be applied on
+    # every connect, journal_mode is the only one that is persisted in the file.
+    CONNECTION_PRAGMAS = [
+        "PRAGMA journal_mode=WAL",
+        "PRAGMA synchronous=OFF",
+        "PRAGMA temp_store=MEMORY",
+        "PRAGMA cache_size=-2000000",  # Use up to 2GB memory for cache
+        "PRAGMA mmap_size=268435456",  # memory map up to 256MB of the db
+    ]
+
+    # number of csv rows written (and committed) at once
+    CSV_INSERT_BATCH_SIZE = 1024
+
     def __init__(self, filename: str, isolation_level: str | None = None):
         self.filename = filename
         self.isolation_level = isolation_level
@@ -71,6 +86,9 @@ class OnyxSalesforceSQLite:
         if self.isolation_level is not None:
             conn.isolation_level = self.isolation_level
 
+        for pragma in self.CONNECTION_PRAGMAS:
+            conn.execute(pragma)
+
         self._conn = conn
 
     def close(self) -> None:
@@ -113,14 +131,6 @@ class OnyxSalesforceSQLite:
                 file_path = Path(self.filename)
                 file_size = file_path.stat().st_size
                 logger.info(f"init_db - found existing sqlite db: len={file_size}")
-            else:
-                # NOTE(rkuo): why is this only if the db doesn't exist?
-
-                # Enable WAL mode for better concurrent access and write performance
-                cursor.execute("PRAGMA journal_mode=WAL")
-                cursor.execute("PRAGMA synchronous=NORMAL")
-                cursor.execute("PRAGMA temp_store=MEMORY")
-                cursor.execute("PRAGMA cache_size=-2000000")  # Use 2GB memory for cache
 
             # Main table for storing Salesforce objects
             cursor.execute(
@@ -521,61 +531,82 @@ class OnyxSalesforceSQLite:
     def update_from_csv(
         self, object_type: str, csv_download_path: str, remove_ids: bool = True
     ) -> list[str]:
-        """Update the SF DB with a CSV file using SQLite storage."""
+        """Update the SF DB with a CSV file using SQLite storage.
+
+        Objects are written CSV_INSERT_BATCH_SIZE rows at a time. Their relationships
+        are staged in temp tables and applied with a few set based statements once
+        the whole file is loaded."""
         if self._conn is None:
             raise RuntimeError("Database connection is closed")
 
         # some customers need this to be larger than the default 128KB, go with 16MB
         csv.field_size_limit(16 * 1024 * 1024)
 
+        start = time.monotonic()
         updated_ids = []
+        seen_ids: set[str] = set()
 
         with self._conn:
             cursor = self._conn.cursor()
+            OnyxSalesforceSQLite._create_staging_tables(cursor)
 
             with open(csv_download_path, "r", newline="", encoding="utf-8") as f:
                 reader = csv.DictReader(f)
-                uncommitted_rows = 0
-                for row in reader:
-                    if ID_FIELD not in row:
-                        logger.warning(
-                            f"Row {row} does not have an {ID_FIELD} field in {csv_download_path}"
+                for rows in batch_generator(reader, self.CSV_INSERT_BATCH_SIZE):
+                    objects: list[tuple[str, str, str]] = []
+                    # the last row wins if an id is in the file more than once
+                    child_to_parent_ids: dict[str, set[str]] = {}
+                    for row in rows:
+                        if ID_FIELD not in row:
+                            logger.warning(
+                                f"Row {row} does not have an {ID_FIELD} field in {csv_download_path}"
+                            )
+                            continue
+
+                        row_id = row[ID_FIELD]
+
+                        normalized_record, parent_ids = (
+                            OnyxSalesforceSQLite.normalize_record(row, remove_ids)
                         )
-                        continue
-
-                    row_id = row[ID_FIELD]
-
-                    normalized_record, parent_ids = (
-                        OnyxSalesforceSQLite.normalize_record(row, remove_ids)
-                    )
-                    normalized_record_json_str = json.dumps(normalized_record)
+                        # NOTE(rkuo): looks like we take a list and dump it as json into the db
+                        objects.append(
+                            (row_id, object_type, json.dumps(normalized_record))
+                        )
+                        child_to_parent_ids[row_id] = parent_ids
+                        updated_ids.append(row_id)
 
                     # Update main object data
-                    # NOTE(rkuo): looks like we take a list and dump it as json into the db
-                    cursor.execute(
+                    cursor.executemany(
                         """
                         INSERT OR REPLACE INTO salesforce_objects (id, object_type, data)
                         VALUES (?, ?, ?)
                         """,
-                        (row_id, object_type, normalized_record_json_str),
+                        objects,
                     )
 
-                    # Update relationships using the same connection
-                    OnyxSalesforceSQLite._update_relationship_tables(
-                        cursor, row_id, parent_ids
+                    OnyxSalesforceSQLite._stage_relationships(
+                        cursor,
+                        child_to_parent_ids,
+                        restaged_ids=seen_ids.intersection(child_to_parent_ids),
                     )
-                    updated_ids.append(row_id)
+                    seen_ids.update(child_to_parent_ids)
 
                     # periodically commit or else memory will balloon
-                    uncommitted_rows += 1
-                    if uncommitted_rows >= 1024:
-                        self._conn.commit()
-                        uncommitted_rows = 0
+                    self._conn.commit()
+
+            OnyxSalesforceSQLite._apply_staged_relationships(cursor)
 
             # If we're updating User objects, update the email map
             if object_type == USER_OBJECT_TYPE:
                 OnyxSalesforceSQLite._update_user_email_map(cursor)
 
+        elapsed = time.monotonic() - start
+        logger.info(
+            f"update_from_csv: object_type={object_type} "
+            f"rows={len(updated_ids)} "
+            f"elapsed={elapsed:.2f} "
+            f"rows_per_sec={len(updated_ids) / max(elapsed, 1e-6):.0f}"
+        )
         return updated_ids
 
     def get_child_ids(self, parent_id: str) -> set[str]:
@@ -678,71 +709,99 @@ class OnyxSalesforceSQLite:
             return [row[0] for row in cursor.fetchall()]
 
     @staticmethod
-    def _update_relationship_tables(
-        cursor: sqlite3.Cursor, child_id: str, parent_ids: set[str]
+    def _create_staging_tables(cursor: sqlite3.Cursor) -> None:
+        """(Re)creates the empty, connection local tables update_from_csv stages the
+        relationships of the loaded objects in."""
+        cursor.execute(
+            """
+            CREATE TEMP TABLE IF NOT EXISTS staged_children (
+                child_id TEXT PRIMARY KEY
+            ) WITHOUT ROWID
+            """
+        )
+        cursor.execute(
+            """
+            CREATE TEMP TABLE IF NOT EXISTS staged_relationships (
+                child_id TEXT NOT NULL,
+                parent_id TEXT NOT NULL,
+                PRIMARY KEY (child_id, parent_id)
+            ) WITHOUT ROWID
+            """
+        )
+        cursor.execute("DELETE FROM temp.staged_children")
+        cursor.execute("DELETE FROM temp.staged_relationships")
+
+    @staticmethod
+    def _stage_relationships(
+        cursor: sqlite3.Cursor,
+        child_to_parent_ids: dict[str, set[str]],
+        restaged_ids: set[str],
     ) -> None:
-        """Given a child id and a set of parent id's, updates the
-        relationships of the child to the parents in the db and removes old relationships.
+        """Stages the parents of the given children.
 
         Args:
-            conn: The database connection to use (must be in a transaction)
-            child_id: The ID of the child record
-            parent_ids: Set of parent IDs to link to
+            cursor: The cursor to use (must be in a transaction)
+            child_to_parent_ids: The complete set of parent IDs of each child
+            restaged_ids: Children staged before, their old parents are replaced
         """
-
-        try:
-            # Get existing parent IDs
-            cursor.execute(
-                "SELECT parent_id FROM relationships WHERE child_id = ?", (child_id,)
+        if restaged_ids:
+            cursor.executemany(
+                "DELETE FROM temp.staged_relationships WHERE child_id = ?",
+                [(child_id,) for child_id in restaged_ids],
             )
-            old_parent_ids = {row[0] for row in cursor.fetchall()}
 
-            # Calculate differences
-            parent_ids_to_remove = old_parent_ids - parent_ids
-            parent_ids_to_add = parent_ids - old_parent_ids
+        cursor.executemany(
+            "INSERT OR IGNORE INTO temp.staged_children (child_id) VALUES (?)",
+            [(child_id,) for child_id in child_to_parent_ids],
+        )
+        cursor.executemany(
+            """
+            INSERT OR IGNORE INTO temp.staged_relationships (child_id, parent_id)
+            VALUES (?, ?)
+            """,
+            [
+                (child_id, parent_id)
+                for child_id, parent_ids in child_to_parent_ids.items()
+                for parent_id in parent_ids
+            ],
+        )
 
-            # Remove old relationships
-            if parent_ids_to_remove:
-                cursor.executemany(
-                    "DELETE FROM relationships WHERE child_id = ? AND parent_id = ?",
-                    [(child_id, parent_id) for parent_id in parent_ids_to_remove],
-                )
-                # Also remove from relationship_types
-                cursor.executemany(
-                    "DELETE FROM relationship_types WHERE child_id = ? AND parent_id = ?",
-                    [(child_id, parent_id) for parent_id in parent_ids_to_remove],
-                )
+    @staticmethod
+    def _apply_staged_relationships(cursor: sqlite3.Cursor) -> None:
+        """Makes the relationships of every staged child match the staged parents,
+        removing the relationships to parents it no longer has.
 
-            # Add new relationships
-            if parent_ids_to_add:
-                # First add to relationships table
-                cursor.executemany(
-                    "INSERT INTO relationships (child_id, parent_id) VALUES (?, ?)",
-                    [(child_id, parent_id) for parent_id in parent_ids_to_add],
+        relationship_types is only filled for parents that are in the db, same as
+        the relationships of a child are only typed once its parents are loaded.
+        """
+        for table in ("relationships", "relationship_types"):
+            cursor.execute(
+                f"""
+                DELETE FROM {table}
+                WHERE child_id IN (SELECT child_id FROM temp.staged_children)
+                AND (child_id, parent_id) NOT IN (
+                    SELECT child_id, parent_id FROM temp.staged_relationships
                 )
+                """
+            )
 
-                # Then get the types of the parent objects and add to relationship_types
-                for parent_id in parent_ids_to_add:
-                    cursor.execute(
-                        "SELECT object_type FROM salesforce_objects WHERE id = ?",
-                        (parent_id,),
-                    )
-                    result = cursor.fetchone()
-                    if result:
-                        parent_type = result[0]
-                        cursor.execute(
-                            """
-                            INSERT INTO relationship_types (child_id, parent_id, parent_type)
-                            VALUES (?, ?, ?)
-                            """,
-                            (child_id, parent_id, parent_type),
-                        )
+        cursor.execute(
+            """
+            INSERT OR IGNORE INTO relationships (child_id, parent_id)
+            SELECT child_id, parent_id FROM temp.staged_relationships
+            """
+        )
+        cursor.execute(
+            """
+            INSERT OR IGNORE INTO relationship_types (child_id, parent_id, parent_type)
+            SELECT staged.child_id, staged.parent_id, parent.object_type
+            FROM temp.staged_relationships AS staged
+            JOIN salesforce_objects AS parent ON parent.id = staged.parent_id
+            """
+        )
 
-        except Exception:
-            logger.exception(
-                f"Error updating relationship tables: child_id={child_id} parent_ids={parent_ids}"
-            )
-            raise
+        cursor.execute("DELETE FROM temp.staged_children")
+        cursor.execute("DELETE FROM temp.staged_relationships")
 
     @staticmethod
     def _update_user_email_map(cursor: sqlite3.Cursor) -> None:
@@ -2,7 +2,13 @@ import io
 import ipaddress
 import random
 import socket
+import threading
 import time
+from collections.abc import Generator
+from concurrent.futures import FIRST_COMPLETED
+from concurrent.futures import Future
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import wait
 from datetime import datetime
 from datetime import timezone
 from enum import Enum
@@ -22,6 +28,9 @@ from requests_oauthlib import OAuth2Session  # type:ignore
 from urllib3.exceptions import MaxRetryError
 
 from onyx.configs.app_configs import INDEX_BATCH_SIZE
+from onyx.configs.app_configs import WEB_CONNECTOR_CRAWL_CACHE_TTL_DAYS
+from onyx.configs.app_configs import WEB_CONNECTOR_CRAWL_CONCURRENCY
+from onyx.configs.app_configs import WEB_CONNECTOR_CRAWLER_MODE
 from onyx.configs.app_configs import WEB_CONNECTOR_OAUTH_CLIENT_ID
 from onyx.configs.app_configs import WEB_CONNECTOR_OAUTH_CLIENT_SECRET
 from onyx.configs.app_configs import WEB_CONNECTOR_OAUTH_TOKEN_URL
@@ -32,11 +41,18 @@ from onyx.connectors.exceptions import CredentialExpiredError
 from onyx.connectors.exceptions import InsufficientPermissionsError
 from onyx.connectors.exceptions import UnexpectedValidationError
 from onyx.connectors.interfaces import GenerateDocumentsOutput
+from onyx.connectors.interfaces import GenerateSlimDocumentOutput
 from onyx.connectors.interfaces import LoadConnector
+from onyx.connectors.interfaces import SlimConnector
 from onyx.connectors.models import Document
+from onyx.connectors.models import SlimDocument
 from onyx.connectors.models import TextSection
+from onyx.connectors.web.crawl_cache import CrawlCacheEntry
+from onyx.connectors.web.crawl_cache import get_content_hash
+from onyx.connectors.web.crawl_cache import WebCrawlCache
 from onyx.file_processing.extract_file_text import read_pdf_file
 from onyx.file_processing.html_utils import web_html_cleanup
+from onyx.indexing.content_hash import compute_document_content_hash
 from onyx.utils.logger import setup_logger
 from onyx.utils.sitemap import list_pages_for_site
 from shared_configs.configs import MULTI_TENANT
@@ -51,7 +67,7 @@ class ScrapeSessionContext:
         self.base_url = base_url
         self.to_visit = to_visit
         self.visited_links: set[str] = set()
-        self.content_hashes: set[int] = set()
+        self.content_hashes: set[str] = set()
 
         self.doc_batch: list[Document] = []
 
@@ -78,14 +94,66 @@ class ScrapeSessionContext:
 
 class ScrapeResult:
     doc: Document | None = None
+    content_hash: str | None = None
     retry: bool = False
 
 
+class PageFetchResult:
+    """Result of fetching a page over plain HTTP in crawler mode"""
+
+    def __init__(self, url: str) -> None:
+        # the final url, after redirects
+        self.url = url
+        self.etag: str | None = None
+        self.last_modified: str | None = None
+        self.doc: Document | None = None
+        self.content_hash: str | None = None
+        self.links: set[str] = set()
+        # the server answered 304 Not Modified
+        self.not_modified: bool = False
+        # the page has to be rendered in a browser to get its content
+        self.needs_render: bool = False
+        self.error: str | None = None
+
+
+class CrawlStats:
+    def __init__(self) -> None:
+        self.start_time = time.monotonic()
+        self.pages = 0
+        self.not_modified = 0
+        self.unchanged = 0
+        self.rendered = 0
+        self.failed = 0
+        self.indexed = 0
+
+    @property
+    def skipped(self) -> int:
+        return self.not_modified + self.unchanged
+
+    def log(self) -> None:
+        elapsed = max(time.monotonic() - self.start_time, 1e-6)
+        logger.info(
+            f"Web crawl finished: pages={self.pages} "
+            f"crawl_rate={self.pages / elapsed:.2f}/s "
+            f"indexed={self.indexed} "
+            f"skipped={self.skipped} "
+            f"skip_rate={self.skipped / max(self.pages, 1):.1%} "
+            f"not_modified={self.not_modified} "
+            f"unchanged={self.unchanged} "
+            f"rendered={self.rendered} "
+            f"failed={self.failed} "
+            f"elapsed={elapsed:.2f}s"
+        )
+
+
 WEB_CONNECTOR_MAX_SCROLL_ATTEMPTS = 20
 # Threshold for determining when to replace vs append iframe content
 IFRAME_TEXT_LENGTH_THRESHOLD = 700
 # Message indicating JavaScript is disabled, which often appears when scraping fails
 JAVASCRIPT_DISABLED_MESSAGE = "You have JavaScript disabled in your browser"
+# Pages fetched over plain HTTP with less text than this are assumed to be rendered
+# client side and are loaded in the browser instead
+STATIC_PAGE_MIN_TEXT_LENGTH = 200
 
 # Define common headers that mimic a real browser
 DEFAULT_USER_AGENT = (
@@ -329,23 +397,41 @@ def start_playwright() -> Tuple[Playwright, BrowserContext]:
     """
     )
 
-    if (
+    oauth_headers = get_oauth_headers()
+    if oauth_headers:
+        context.set_extra_http_headers(oauth_headers)
+
+    return playwright, context
+
+
+def get_oauth_headers() -> dict[str, str]:
+    if not (
         WEB_CONNECTOR_OAUTH_CLIENT_ID
         and WEB_CONNECTOR_OAUTH_CLIENT_SECRET
         and WEB_CONNECTOR_OAUTH_TOKEN_URL
     ):
-        client = BackendApplicationClient(client_id=WEB_CONNECTOR_OAUTH_CLIENT_ID)
-        oauth = OAuth2Session(client=client)
-        token = oauth.fetch_token(
-            token_url=WEB_CONNECTOR_OAUTH_TOKEN_URL,
-            client_id=WEB_CONNECTOR_OAUTH_CLIENT_ID,
-            client_secret=WEB_CONNECTOR_OAUTH_CLIENT_SECRET,
-        )
-        context.set_extra_http_headers(
-            {"Authorization": "Bearer {}".format(token["access_token"])}
-        )
+        return {}
+
+    client = BackendApplicationClient(client_id=WEB_CONNECTOR_OAUTH_CLIENT_ID)
+    oauth = OAuth2Session(client=client)
+    token = oauth.fetch_token(
+        token_url=WEB_CONNECTOR_OAUTH_TOKEN_URL,
+        client_id=WEB_CONNECTOR_OAUTH_CLIENT_ID,
+        client_secret=WEB_CONNECTOR_OAUTH_CLIENT_SECRET,
+    )
+    return {"Authorization": "Bearer {}".format(token["access_token"])}
 
-    return playwright, context
+
+_thread_local = threading.local()
+
+
+def _get_http_session() -> requests.Session:
+    """One session per crawler thread so connections to the site are reused"""
+    session: requests.Session | None = getattr(_thread_local, "session", None)
+    if session is None:
+        session = requests.Session()
+        _thread_local.session = session
+    return session
 
 
 def extract_urls_from_sitemap(sitemap_url: str) -> list[str]:
@@ -406,6 +492,27 @@ def _get_datetime_from_last_modified_header(last_modified: str) -> datetime | No
         return None
 
 
+def _build_document(
+    url: str,
+    semantic_identifier: str,
+    text: str,
+    last_modified: str | None,
+    metadata: dict[str, Any] | None = None,
+) -> Document:
+    return Document(
+        id=url,
+        sections=[TextSection(link=url, text=text)],
+        source=DocumentSource.WEB,
+        semantic_identifier=semantic_identifier,
+        metadata=metadata or {},
+        doc_updated_at=(
+            _get_datetime_from_last_modified_header(last_modified)
+            if last_modified
+            else None
+        ),
+    )
+
+
 def _handle_cookies(context: BrowserContext, url: str) -> None:
     """Handle cookies for the given URL to help with bot detection"""
     try:
@@ -447,7 +554,7 @@ def _handle_cookies(context: BrowserContext, url: str) -> None:
         )
 
 
-class WebConnector(LoadConnector):
+class WebConnector(LoadConnector, SlimConnector):
     MAX_RETRIES = 3
 
     def __init__(
@@ -457,6 +564,8 @@ class WebConnector(LoadConnector):
         mintlify_cleanup: bool = True,  # Mostly ok to apply to other websites as well
         batch_size: int = INDEX_BATCH_SIZE,
         scroll_before_scraping: bool = False,
+        crawler_mode: bool = WEB_CONNECTOR_CRAWLER_MODE,
+        crawl_concurrency: int = WEB_CONNECTOR_CRAWL_CONCURRENCY,
         **kwargs: Any,
     ) -> None:
         self.mintlify_cleanup = mintlify_cleanup
@@ -464,6 +573,11 @@ class WebConnector(LoadConnector):
         self.recursive = False
         self.scroll_before_scraping = scroll_before_scraping
         self.web_connector_type = web_connector_type
+        self.crawler_mode = crawler_mode
+        self.crawl_concurrency = max(1, crawl_concurrency)
+        self.crawl_cache = WebCrawlCache(
+            ttl_seconds=WEB_CONNECTOR_CRAWL_CACHE_TTL_DAYS * 24 * 60 * 60,
+        )
         if web_connector_type == WEB_CONNECTOR_VALID_SETTINGS.RECURSIVE.value:
             self.recursive = True
             self.to_visit_list = [_ensure_valid_url(base_url)]
@@ -498,13 +612,21 @@ class WebConnector(LoadConnector):
             logger.warning("Unexpected credentials provided for Web Connector")
         return None
 
+    def set_cc_pair_id(self, cc_pair_id: int) -> None:
+        # enables the crawl cache of the cc pair in crawler mode
+        self.crawl_cache.cc_pair_id = cc_pair_id
+
     def _do_scrape(
         self,
         index: int,
         initial_url: str,
         session_ctx: ScrapeSessionContext,
+        is_pdf: bool | None = None,
     ) -> ScrapeResult:
-        """Returns a ScrapeResult object with a doc and retry flag."""
+        """Returns a ScrapeResult object with a doc and retry flag.
+
+        is_pdf can be passed when the content type is already known, otherwise a HEAD
+        request is made to find out."""
 
         if session_ctx.playwright is None:
             raise RuntimeError("scrape_context.playwright is None")
@@ -517,11 +639,12 @@ class WebConnector(LoadConnector):
         # Handle cookies for the URL
         _handle_cookies(session_ctx.playwright_context, initial_url)
 
-        # First do a HEAD request to check content type without downloading the entire content
-        head_response = requests.head(
-            initial_url, headers=DEFAULT_HEADERS, allow_redirects=True
-        )
-        is_pdf = is_pdf_content(head_response)
+        if is_pdf is None:
+            # First do a HEAD request to check content type without downloading the entire content
+            head_response = requests.head(
+                initial_url, headers=DEFAULT_HEADERS, allow_redirects=True
+            )
+            is_pdf = is_pdf_content(head_response)
 
         if is_pdf or initial_url.lower().endswith(".pdf"):
             # PDF files are not checked for links
@@ -529,20 +652,14 @@ class WebConnector(LoadConnector):
             page_text, metadata, images = read_pdf_file(
                 file=io.BytesIO(response.content)
             )
-            last_modified = response.headers.get("Last-Modified")
-
-            result.doc = Document(
-                id=initial_url,
-                sections=[TextSection(link=initial_url, text=page_text)],
-                source=DocumentSource.WEB,
-                semantic_identifier=initial_url.split("/")[-1],
-                metadata=metadata,
-                doc_updated_at=(
-                    _get_datetime_from_last_modified_header(last_modified)
-                    if last_modified
-                    else None
-                ),
+            result.doc = _build_document(
+                initial_url,
+                initial_url.split("/")[-1],
+                page_text,
+                response.headers.get("Last-Modified"),
+                metadata,
             )
+            result.content_hash = get_content_hash(None, page_text)
 
             return result
 
@@ -630,7 +747,7 @@ class WebConnector(LoadConnector):
 
             # Sometimes pages with #! will serve duplicate content
             # There are also just other ways this can happen
-            hashed_text = hash((parsed_html.title, parsed_html.cleaned_text))
+            hashed_text = get_content_hash(parsed_html.title, parsed_html.cleaned_text)
             if hashed_text in session_ctx.content_hashes:
                 logger.info(
                     f"{index}: Skipping duplicate title + content for {initial_url}"
@@ -639,23 +756,54 @@ class WebConnector(LoadConnector):
 
             session_ctx.content_hashes.add(hashed_text)
 
-            result.doc = Document(
-                id=initial_url,
-                sections=[TextSection(link=initial_url, text=parsed_html.cleaned_text)],
-                source=DocumentSource.WEB,
-                semantic_identifier=parsed_html.title or initial_url,
-                metadata={},
-                doc_updated_at=(
-                    _get_datetime_from_last_modified_header(last_modified)
-                    if last_modified
-                    else None
-                ),
+            result.doc = _build_document(
+                initial_url,
+                parsed_html.title or initial_url,
+                parsed_html.cleaned_text,
+                last_modified,
             )
+            result.content_hash = hashed_text
         finally:
             page.close()
 
         return result
 
+    def _scrape_with_retries(
+        self,
+        index: int,
+        initial_url: str,
+        session_ctx: ScrapeSessionContext,
+        is_pdf: bool | None = None,
+    ) -> ScrapeResult | None:
+        """Scrapes the page in the browser, returns None if every attempt failed."""
+        # Add retry mechanism with exponential backoff
+        retry_count = 0
+
+        while retry_count < self.MAX_RETRIES:
+            if retry_count > 0:
+                # Add a random delay between retries (exponential backoff)
+                delay = min(2**retry_count + random.uniform(0, 1), 10)
+                logger.info(
+                    f"Retry {retry_count}/{self.MAX_RETRIES} for {initial_url} after {delay:.2f}s delay"
+                )
+                time.sleep(delay)
+
+            try:
+                result = self._do_scrape(index, initial_url, session_ctx, is_pdf)
+                if result.retry:
+                    continue
+
+                return result
+            except Exception as e:
+                session_ctx.last_error = f"Failed to fetch '{initial_url}': {e}"
+                logger.exception(session_ctx.last_error)
+                session_ctx.initialize()
+                continue
+            finally:
+                retry_count += 1
+
+        return None
+
     def load_from_state(self) -> GenerateDocumentsOutput:
         """Traverses through all pages found on the website
         and converts them into documents"""
@@ -663,6 +811,10 @@ class WebConnector(LoadConnector):
         if not self.to_visit_list:
             raise ValueError("No URLs to visit")
 
+        if self.crawler_mode:
+            yield from self._load_from_state_crawler()
+            return
+
         base_url = self.to_visit_list[0]  # For the recursive case
         check_internet_connection(base_url)  # make sure we can connect to the base url
 
@@ -685,34 +837,9 @@ class WebConnector(LoadConnector):
             index = len(session_ctx.visited_links)
             logger.info(f"{index}: Visiting {initial_url}")
 
-            # Add retry mechanism with exponential backoff
-            retry_count = 0
-
-            while retry_count < self.MAX_RETRIES:
-                if retry_count > 0:
-                    # Add a random delay between retries (exponential backoff)
-                    delay = min(2**retry_count + random.uniform(0, 1), 10)
-                    logger.info(
-                        f"Retry {retry_count}/{self.MAX_RETRIES} for {initial_url} after {delay:.2f}s delay"
-                    )
-                    time.sleep(delay)
-
-                try:
-                    result = self._do_scrape(index, initial_url, session_ctx)
-                    if result.retry:
-                        continue
-
-                    if result.doc:
-                        session_ctx.doc_batch.append(result.doc)
-                except Exception as e:
-                    session_ctx.last_error = f"Failed to fetch '{initial_url}': {e}"
-                    logger.exception(session_ctx.last_error)
-                    session_ctx.initialize()
-                    continue
-                finally:
-                    retry_count += 1
-
-                break  # success / don't retry
+            result = self._scrape_with_retries(index, initial_url, session_ctx)
+            if result and result.doc:
+                session_ctx.doc_batch.append(result.doc)
 
             if len(session_ctx.doc_batch) >= self.batch_size:
                 session_ctx.initialize()
@@ -732,6 +859,259 @@ class WebConnector(LoadConnector):
 
         session_ctx.stop()
 
+    def retrieve_all_slim_docs(self) -> GenerateSlimDocumentOutput:
+        if not self.crawler_mode:
+            for doc_batch in self.load_from_state():
+                yield [SlimDocument(id=doc.id) for doc in doc_batch]
+            return
+
+        # unchanged pages aren't loaded in crawler mode, pruning still needs their ids
+        slim_batch: list[SlimDocument] = []
+        for doc_id, _ in self._crawl():
+            slim_batch.append(SlimDocument(id=doc_id))
+            if len(slim_batch) >= self.batch_size:
+                yield slim_batch
+                slim_batch = []
+
+        if slim_batch:
+            yield slim_batch
+
+    def _load_from_state_crawler(self) -> GenerateDocumentsOutput:
+        doc_batch: list[Document] = []
+        for _, doc in self._crawl():
+            if doc is None:
+                continue
+
+            doc_batch.append(doc)
+            if len(doc_batch) >= self.batch_size:
+                yield doc_batch
+                doc_batch = []
+
+        if doc_batch:
+            yield doc_batch
+
+    def _crawl(self) -> Generator[tuple[str, Document | None], None, None]:
+        """Crawls the site with up to crawl_concurrency concurrent HTTP fetches.
+
+        Yields the id and document of every page found, the document is None if the
+        page didn't change since it was last indexed. Pages that need javascript are
+        rendered in the browser on this thread, since playwright's sync api can't be
+        shared between threads."""
+        base_url = self.to_visit_list[0]  # For the recursive case
+        check_internet_connection(base_url)  # make sure we can connect to the base url
+
+        self.crawl_cache.load()
+        headers = {**DEFAULT_HEADERS, **get_oauth_headers()}
+
+        session_ctx = ScrapeSessionContext(base_url, list(self.to_visit_list))
+        stats = CrawlStats()
+        try:
+            with ThreadPoolExecutor(max_workers=self.crawl_concurrency) as executor:
+                in_flight: dict[Future[PageFetchResult], str] = {}
+                while session_ctx.to_visit or in_flight:
+                    while (
+                        session_ctx.to_visit and len(in_flight) < self.crawl_concurrency
+                    ):
+                        url = session_ctx.to_visit.pop()
+                        if url in session_ctx.visited_links:
+                            continue
+                        session_ctx.visited_links.add(url)
+
+                        future = executor.submit(
+                            self._fetch_page, url, headers, self.crawl_cache.get(url)
+                        )
+                        in_flight[future] = url
+
+                    done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        url = in_flight.pop(future)
+                        yield from self._process_fetch_result(
+                            url, future.result(), session_ctx, stats
+                        )
+        finally:
+            session_ctx.stop()
+            stats.log()
+
+        if stats.indexed + stats.skipped == 0:
+            if session_ctx.last_error:
+                raise RuntimeError(session_ctx.last_error)
+            raise RuntimeError("No valid pages found.")
+
+    def _fetch_page(
+        self, url: str, headers: dict[str, str], cached: CrawlCacheEntry | None
+    ) -> PageFetchResult:
+        """Fetches the page over plain HTTP, runs in the crawler's thread pool."""
+        result = PageFetchResult(url)
+        try:
+            protected_url_check(url)
+        except Exception as e:
+            result.error = f"Invalid URL {url} due to {e}"
+            return result
+
+        request_headers = dict(headers)
+        # a 304 has no body to find links in, so recursive crawls always fetch
+        if cached and not self.recursive:
+            if cached.etag:
+                request_headers["If-None-Match"] = cached.etag
+            if cached.last_modified:
+                request_headers["If-Modified-Since"] = cached.last_modified
+
+        for retry_count in range(self.MAX_RETRIES):
+            if retry_count > 0:
+                delay = min(2**retry_count + random.uniform(0, 1), 10)
+                time.sleep(delay)
+
+            try:
+                self._fetch_page_once(result, request_headers)
+                result.error = None
+                break
+            except Exception as e:
+                result.error = f"Failed to fetch '{url}': {e}"
+                logger.warning(result.error)
+
+        return result
+
+    def _fetch_page_once(
+        self, result: PageFetchResult, headers: dict[str, str]
+    ) -> None:
+        response = _get_http_session().get(
+            result.url, headers=headers, timeout=30, allow_redirects=True
+        )
+        if response.url != result.url:
+            protected_url_check(response.url)
+            result.url = response.url
+
+        result.etag = response.headers.get("ETag")
+        result.last_modified = response.headers.get("Last-Modified")
+
+        if response.status_code == 304:
+            result.not_modified = True
+            return
+
+        if response.status_code == 403:
+            # usually bot detection, the browser tends to get past it
+            result.needs_render = True
+            return
+
+        response.raise_for_status()
+
+        if is_pdf_content(response) or result.url.lower().endswith(".pdf"):
+            page_text, metadata, _ = read_pdf_file(file=io.BytesIO(response.content))
+            result.doc = _build_document(
+                result.url,
+                result.url.split("/")[-1],
+                page_text,
+                result.last_modified,
+                metadata,
+            )
+            result.content_hash = get_content_hash(None, page_text)
+            return
+
+        soup = BeautifulSoup(response.text, "html.parser")
+        if self.recursive:
+            result.links = get_internal_links(self.to_visit_list[0], result.url, soup)
+
+        if self.scroll_before_scraping:
+            result.needs_render = True
+            return
+
+        parsed_html = web_html_cleanup(soup, self.mintlify_cleanup)
+        if (
+            JAVASCRIPT_DISABLED_MESSAGE in parsed_html.cleaned_text
+            or len(parsed_html.cleaned_text) < STATIC_PAGE_MIN_TEXT_LENGTH
+        ):
+            result.needs_render = True
+            return
+
+        result.doc = _build_document(
+            result.url,
+            parsed_html.title or result.url,
+            parsed_html.cleaned_text,
+            result.last_modified,
+        )
+        result.content_hash = get_content_hash(
+            parsed_html.title, parsed_html.cleaned_text
+        )
+
+    def _process_fetch_result(
+        self,
+        url: str,
+        result: PageFetchResult,
+        session_ctx: ScrapeSessionContext,
+        stats: CrawlStats,
+    ) -> Generator[tuple[str, Document | None], None, None]:
+        stats.pages += 1
+        index = len(session_ctx.visited_links)
+
+        if result.error:
+            session_ctx.last_error = result.error
+            stats.failed += 1
+            return
+
+        if result.url != url:
+            if result.url in session_ctx.visited_links:
+                logger.info(f"{index}: {url} redirected to {result.url} - already seen")
+                return
+            session_ctx.visited_links.add(result.url)
+
+        for link in result.links:
+            if link not in session_ctx.visited_links:
+                session_ctx.to_visit.append(link)
+
+        if result.not_modified:
+            stats.not_modified += 1
+            yield result.url, None
+            return
+
+        doc = result.doc
+        content_hash = result.content_hash
+        if result.needs_render:
+            logger.info(f"{index}: Rendering {result.url}")
+            stats.rendered += 1
+            if session_ctx.playwright is None:
+                session_ctx.initialize()
+
+            # links of rendered pages are added to the frontier by _do_scrape
+            scrape_result = self._scrape_with_retries(
+                index, result.url, session_ctx, is_pdf=False
+            )
+            if scrape_result is None:
+                stats.failed += 1
+                return
+            doc, content_hash = scrape_result.doc, scrape_result.content_hash
+        elif content_hash in session_ctx.content_hashes:
+            logger.info(f"{index}: Skipping duplicate content for {result.url}")
+            return
+
+        if doc is None or content_hash is None:
+            return
+        session_ctx.content_hashes.add(content_hash)
+
+        # cached entries are only loaded for documents that were indexed for the cc
+        # pair with the content hash of the entry
+        doc_content_hash = compute_document_content_hash(doc)
+        cached = self.crawl_cache.get(url)
+        unchanged = cached is not None and cached.content_hash == doc_content_hash
+        self.crawl_cache.record(
+            url,
+            CrawlCacheEntry(
+                document_id=doc.id,
+                etag=result.etag,
+                last_modified=result.last_modified,
+                content_hash=doc_content_hash,
+                # unchanged pages keep their age so they expire with the TTL
+                crawled_at=(cached.crawled_at if cached and unchanged else time.time()),
+            ),
+        )
+
+        if unchanged:
+            stats.unchanged += 1
+            yield doc.id, None
+            return
+
+        stats.indexed += 1
+        yield doc.id, doc
+
     def validate_connector_settings(self) -> None:
         # Make sure we have at least one valid URL to check
         if not self.to_visit_list:
@@ -0,0 +1,119 @@
+"""Per url validators (ETag / Last-Modified) of the pages a web connector fetched, so
+that re-crawls can send conditional requests and skip pages that didn't change.
+
+Entries are kept per cc pair in a Redis hash with one field per url, so recording a
+page doesn't rewrite the others. An entry holds the content hash (see
+compute_document_content_hash) of the document built from the page and is only used
+once that document was indexed for the cc pair with the same hash, which the indexing
+pipeline records after a successful index. A page that failed to index is therefore
+fetched and returned again by the next run. Entries older than the TTL are dropped,
+which forces a full fetch of every page once per TTL.
+"""
+
+import hashlib
+import time
+from typing import cast
+
+from pydantic import BaseModel
+
+from onyx.db.document import get_indexed_content_hashes_for_cc_pair
+from onyx.db.engine.sql_engine import get_session_with_current_tenant
+from onyx.redis.redis_pool import get_redis_client
+from onyx.redis.redis_pool import tenant_key
+from onyx.utils.logger import setup_logger
+from shared_configs.contextvars import get_current_tenant_id
+
+logger = setup_logger()
+
+_KEY_PREFIX = "web_crawl_cache"
+
+
+class CrawlCacheEntry(BaseModel):
+    # the id of the document built from the page, the url may have redirected
+    document_id: str
+    etag: str | None = None
+    last_modified: str | None = None
+    # compute_document_content_hash of the document built from the page
+    content_hash: str
+    # when the content was last handed off for indexing
+    crawled_at: float
+
+
+def get_content_hash(title: str | None, text: str) -> str:
+    return hashlib.sha256(f"{title or ''}\0{text}".encode("utf-8")).hexdigest()
+
+
+def get_crawl_cache_key(tenant_id: str, cc_pair_id: int) -> str:
+    return tenant_key(tenant_id, f"{_KEY_PREFIX}:{cc_pair_id}")
+
+
+def delete_crawl_cache(tenant_id: str, cc_pair_id: int) -> None:
+    get_redis_client(tenant_id=tenant_id).delete(
+        get_crawl_cache_key(tenant_id, cc_pair_id)
+    )
+
+
+class WebCrawlCache:
+    """Disabled (nothing is read or recorded) until a cc pair is set, see
+    BaseConnector.set_cc_pair_id."""
+
+    def __init__(self, ttl_seconds: float) -> None:
+        self.ttl_seconds = ttl_seconds
+        self.cc_pair_id: int | None = None
+        self._entries: dict[str, CrawlCacheEntry] = {}
+
+    def _get_key(self, cc_pair_id: int) -> tuple[str, str]:
+        tenant_id = get_current_tenant_id()
+        return tenant_id, get_crawl_cache_key(tenant_id, cc_pair_id)
+
+    def load(self) -> None:
+        self._entries = {}
+        if self.cc_pair_id is None:
+            return
+
+        tenant_id, key = self._get_key(self.cc_pair_id)
+        try:
+            redis_client = get_redis_client(tenant_id=tenant_id)
+            raw = cast(dict[bytes, bytes], redis_client.hgetall(key))
+
+            now = time.time()
+            entries: dict[str, CrawlCacheEntry] = {}
+            expired_urls: list[bytes] = []
+            for url, value in raw.items():
+                entry = CrawlCacheEntry.model_validate_json(value)
+                if now - entry.crawled_at < self.ttl_seconds:
+                    entries[url.decode("utf-8")] = entry
+                else:
+                    expired_urls.append(url)
+            if expired_urls:
+                redis_client.hdel(key, *expired_urls)
+
+            with get_session_with_current_tenant() as db_session:
+                indexed_content_hashes = get_indexed_content_hashes_for_cc_pair(
+                    db_session, self.cc_pair_id
+                )
+        except Exception:
+            # the cache is an optimization, a broken one just means a full crawl
+            logger.exception(f"Failed to load web crawl cache {key}")
+            return
+
+        self._entries = {
+            url: entry
+            for url, entry in entries.items()
+            if indexed_content_hashes.get(entry.document_id) == entry.content_hash
+        }
+
+    def get(self, url: str) -> CrawlCacheEntry | None:
+        return self._entries.get(url)
+
+    def record(self, url: str, entry: CrawlCacheEntry) -> None:
+        if self.cc_pair_id is None:
+            return
+
+        tenant_id, key = self._get_key(self.cc_pair_id)
+        try:
+            get_redis_client(tenant_id=tenant_id).hset(
+                key, url, entry.model_dump_json(exclude_none=True)
+            )
+        except Exception:
+            logger.exception(f"Failed to record {url} in web crawl cache {key}")
@@ -2,6 +2,7 @@ import re
 from datetime import datetime
 from datetime import timedelta
 from typing import Any
+from urllib.parse import urlparse
 
 from langchain_core.messages import HumanMessage
 from slack_sdk import WebClient
@@ -10,11 +11,15 @@ from sqlalchemy.orm import Session
 
 from onyx.configs.app_configs import ENABLE_CONTEXTUAL_RAG
 from onyx.configs.app_configs import MAX_SLACK_QUERY_EXPANSIONS
+from onyx.configs.app_configs import SLACK_FEDERATED_CONCURRENCY
 from onyx.configs.chat_configs import DOC_TIME_DECAY
 from onyx.configs.model_configs import DOC_EMBEDDING_CONTEXT_SIZE
 from onyx.connectors.models import IndexingDocument
 from onyx.connectors.models import TextSection
 from onyx.context.search.federated.models import SlackMessage
+from onyx.context.search.federated.slack_user_directory import (
+    get_slack_user_directory,
+)
 from onyx.context.search.models import InferenceChunk
 from onyx.context.search.models import SearchQuery
 from onyx.db.document import DocumentSource
@@ -40,6 +45,8 @@ logger = setup_logger()
 HIGHLIGHT_START_CHAR = "\ue000"
 HIGHLIGHT_END_CHAR = "\ue001"
 
+_SLACK_USER_ID_PATTERN = re.compile(r"<@([A-Z0-9]+)>")
+
 
 def _should_skip_channel(
     channel_id: str,
@@ -276,11 +283,14 @@ def merge_slack_messages(
     return merged_messages, docid_to_message
 
 
-def get_contextualized_thread_text(message: SlackMessage, access_token: str) -> str:
+def get_contextualized_thread_text(
+    message: SlackMessage, slack_client: WebClient
+) -> str:
     """
     Retrieves the initial thread message as well as the text following the message
     and combines them into a single string. If the slack query fails, returns the
-    original message text.
+    original message text. Users are mentioned by id (<@U123>), see
+    replace_user_ids_with_names.
 
     The idea is that the message (the one that actually matched the search), the
     initial thread message, and the replies to the message are important in answering
@@ -295,7 +305,6 @@ def get_contextualized_thread_text(message: SlackMessage, access_token: str) ->
         return message.text
 
     # get the thread messages
-    slack_client = WebClient(token=access_token)
     try:
         response = slack_client.conversations_replies(
             channel=channel_id,
@@ -347,22 +356,38 @@ def get_contextualized_thread_text(message: SlackMessage, access_token: str) ->
             thread_text += "\n..."
             break
 
-    # replace user ids with names in the thread text
-    userids: set[str] = set(re.findall(r"<@([A-Z0-9]+)>", thread_text))
-    for userid in userids:
-        try:
-            response = slack_client.users_profile_get(user=userid)
-            response.validate()
-            profile: dict[str, Any] = response.get("profile", {})
-            name: str | None = profile.get("real_name") or profile.get("email")
-        except SlackApiError as e:
-            logger.error(f"Slack API error in get_contextualized_thread_text: {e}")
-            continue
-        if not name:
+    return thread_text
+
+
+def replace_user_ids_with_names(
+    slack_messages: list[SlackMessage], slack_client: WebClient
+) -> None:
+    """Replaces the user mentions in the text of thread messages with the users'
+    names. The users of all messages are resolved at once, through a cache shared
+    by all searches of the workspace."""
+    workspace_to_user_ids: dict[str, set[str]] = {}
+    for message in slack_messages:
+        if message.thread_id is None:
             continue
-        thread_text = thread_text.replace(f"<@{userid}>", name)
+        workspace_to_user_ids.setdefault(urlparse(message.link).netloc, set()).update(
+            _SLACK_USER_ID_PATTERN.findall(message.text)
+        )
 
-    return thread_text
+    workspace_to_names = {
+        workspace: get_slack_user_directory().get_names(
+            workspace, user_ids, slack_client, SLACK_FEDERATED_CONCURRENCY
+        )
+        for workspace, user_ids in workspace_to_user_ids.items()
+        if user_ids
+    }
+
+    for message in slack_messages:
+        names = workspace_to_names.get(urlparse(message.link).netloc)
+        if message.thread_id is None or not names:
+            continue
+        message.text = _SLACK_USER_ID_PATTERN.sub(
+            lambda match: names.get(match.group(1), match.group(0)), message.text
+        )
 
 
 def convert_slack_score(slack_score: float) -> float:
@@ -422,14 +447,18 @@ def slack_retrieval(
     if not slack_messages:
         return []
 
+    # one client for all the threads, so connections get reused
+    slack_client = WebClient(token=access_token)
     thread_texts: list[str] = run_functions_tuples_in_parallel(
         [
-            (get_contextualized_thread_text, (slack_message, access_token))
+            (get_contextualized_thread_text, (slack_message, slack_client))
             for slack_message in slack_messages
-        ]
+        ],
+        max_workers=SLACK_FEDERATED_CONCURRENCY,
     )
     for slack_message, thread_text in zip(slack_messages, thread_texts):
         slack_message.text = thread_text
+    replace_user_ids_with_names(slack_messages, slack_client)
 
     # get the highlighted texts from shortest to longest
     highlighted_texts: set[str] = set()
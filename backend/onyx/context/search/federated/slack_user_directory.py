@@ -0,0 +1,113 @@
+import threading
+import time
+from typing import Any
+
+from slack_sdk import WebClient
+from slack_sdk.errors import SlackApiError
+
+from onyx.configs.app_configs import SLACK_FEDERATED_USER_CACHE_MAX_ENTRIES
+from onyx.configs.app_configs import SLACK_FEDERATED_USER_CACHE_TTL_SECONDS
+from onyx.utils.logger import setup_logger
+from onyx.utils.threadpool_concurrency import run_functions_tuples_in_parallel
+from shared_configs.contextvars import get_current_tenant_id
+
+logger = setup_logger()
+
+# errors that mean the user can't be resolved, worth remembering
+_PERMANENT_ERRORS = {"user_not_found", "user_not_visible"}
+
+
+class SlackUserDirectory:
+    """Process wide cache of Slack user id -> name, per tenant and workspace.
+
+    Federated search resolves the user mentions of every thread it retrieves, the
+    cache means a user is looked up once per TTL instead of once per thread and
+    search. Lookups that are not cached yet are done concurrently."""
+
+    def __init__(self, ttl_seconds: float, max_entries: int) -> None:
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        # (tenant_id, workspace, user_id) -> (name, expires_at)
+        self._names: dict[tuple[str, str, str], tuple[str | None, float]] = {}
+
+    def _get_cached(
+        self, key: tuple[str, str, str], now: float
+    ) -> tuple[bool, str | None]:
+        entry = self._names.get(key)
+        if entry is None:
+            return False, None
+        name, expires_at = entry
+        if expires_at <= now:
+            del self._names[key]
+            return False, None
+        return True, name
+
+    def _set_cached(self, key: tuple[str, str, str], name: str | None) -> None:
+        self._names.pop(key, None)
+        self._names[key] = (name, time.monotonic() + self.ttl_seconds)
+        # dicts keep insertion order, so the first entries are the oldest
+        while len(self._names) > self.max_entries:
+            del self._names[next(iter(self._names))]
+
+    @staticmethod
+    def _fetch_name(slack_client: WebClient, user_id: str) -> tuple[bool, str | None]:
+        """Returns whether the result should be cached and the user's name."""
+        try:
+            response = slack_client.users_profile_get(user=user_id)
+            response.validate()
+        except SlackApiError as e:
+            logger.error(f"Slack API error in SlackUserDirectory: {e}")
+            return e.response.get("error") in _PERMANENT_ERRORS, None
+
+        profile: dict[str, Any] = response.get("profile", {})
+        return True, profile.get("real_name") or profile.get("email") or None
+
+    def get_names(
+        self,
+        workspace: str,
+        user_ids: set[str],
+        slack_client: WebClient,
+        max_workers: int,
+    ) -> dict[str, str]:
+        """Returns the names of the users that could be resolved."""
+        tenant_id = get_current_tenant_id()
+        names: dict[str, str] = {}
+        missing: list[str] = []
+
+        now = time.monotonic()
+        with self._lock:
+            for user_id in user_ids:
+                found, name = self._get_cached((tenant_id, workspace, user_id), now)
+                if not found:
+                    missing.append(user_id)
+                elif name:
+                    names[user_id] = name
+
+        results: list[tuple[bool, str | None]] = run_functions_tuples_in_parallel(
+            [(self._fetch_name, (slack_client, user_id)) for user_id in missing],
+            max_workers=max_workers,
+        )
+
+        with self._lock:
+            for user_id, (cacheable, name) in zip(missing, results):
+                if cacheable:
+                    self._set_cached((tenant_id, workspace, user_id), name)
+                if name:
+                    names[user_id] = name
+
+        return names
+
+    def clear(self) -> None:
+        with self._lock:
+            self._names = {}
+
+
+_SLACK_USER_DIRECTORY = SlackUserDirectory(
+    ttl_seconds=SLACK_FEDERATED_USER_CACHE_TTL_SECONDS,
+    max_entries=SLACK_FEDERATED_USER_CACHE_MAX_ENTRIES,
+)
+
+
+def get_slack_user_directory() -> SlackUserDirectory:
+    return _SLACK_USER_DIRECTORY
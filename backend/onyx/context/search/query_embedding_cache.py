@@ -0,0 +1,168 @@
+"""Two tier cache for query embeddings.
+
+Tier 1 is a bounded in-process LRU, tier 2 is Redis so that repeated queries are
+shared across API workers / replicas. Keys include the tenant, the search settings id
+and a fingerprint of every setting that changes the produced vector (model, provider,
+normalization, prefix, reduced dimension), so an index swap or a change of embedding
+settings naturally stops hitting old entries without explicit invalidation.
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import cast
+
+from prometheus_client import Counter
+
+from onyx.configs.model_configs import QUERY_EMBEDDING_CACHE_MAX_ENTRIES
+from onyx.configs.model_configs import QUERY_EMBEDDING_CACHE_TTL_SECONDS
+from onyx.db.models import SearchSettings
+from onyx.redis.redis_pool import get_redis_client
+from onyx.redis.redis_pool import tenant_key
+from onyx.utils.logger import setup_logger
+from shared_configs.contextvars import get_current_tenant_id
+from shared_configs.embedding_transport import pack_embedding
+from shared_configs.embedding_transport import unpack_embedding
+from shared_configs.model_server_models import Embedding
+
+logger = setup_logger()
+
+_REDIS_KEY_PREFIX = "query_embedding"
+
+_CACHE_HITS = Counter(
+    "onyx_query_embedding_cache_hits_total",
+    "Query embeddings served from cache",
+    ["tier"],
+)
+_CACHE_MISSES = Counter(
+    "onyx_query_embedding_cache_misses_total",
+    "Query embeddings that had to be computed by the embedding model",
+)
+
+
+def get_search_settings_fingerprint(search_settings: SearchSettings) -> str:
+    fingerprint_parts = [
+        str(search_settings.id),
+        search_settings.model_name,
+        str(search_settings.provider_type),
+        str(search_settings.normalize),
+        search_settings.query_prefix or "",
+        str(search_settings.reduced_dimension),
+        search_settings.api_url or "",
+        search_settings.deployment_name or "",
+    ]
+    return hashlib.sha256("\x1f".join(fingerprint_parts).encode()).hexdigest()[:16]
+
+
+class QueryEmbeddingCache:
+    def __init__(
+        self,
+        max_entries: int = QUERY_EMBEDDING_CACHE_MAX_ENTRIES,
+        ttl_seconds: int = QUERY_EMBEDDING_CACHE_TTL_SECONDS,
+    ) -> None:
+        self._max_entries = max_entries
+        self._ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[str, bytes] = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _build_key(tenant_id: str, settings_fingerprint: str, text: str) -> str:
+        text_hash = hashlib.sha256(text.encode()).hexdigest()
+        return tenant_key(
+            tenant_id, f"{_REDIS_KEY_PREFIX}:{settings_fingerprint}:{text_hash}"
+        )
+
+    def _get_local(self, key: str) -> bytes | None:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
+
+    def _set_local(self, key: str, value: bytes) -> None:
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+
+    def clear_local(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def get_many(
+        self, search_settings: SearchSettings, texts: list[str]
+    ) -> dict[str, Embedding]:
+        """Returns the cached embeddings for whichever of `texts` are available.
+        Redis failures are logged and treated as misses."""
+        tenant_id = get_current_tenant_id()
+        fingerprint = get_search_settings_fingerprint(search_settings)
+
+        found: dict[str, Embedding] = {}
+        redis_lookups: dict[str, str] = {}
+        for text in dict.fromkeys(texts):
+            key = self._build_key(tenant_id, fingerprint, text)
+            local_value = self._get_local(key)
+            if local_value is not None:
+                found[text] = unpack_embedding(local_value)
+                _CACHE_HITS.labels(tier="memory").inc()
+            else:
+                redis_lookups[text] = key
+
+        if redis_lookups:
+            try:
+                redis_client = get_redis_client(tenant_id=tenant_id)
+                redis_values = cast(
+                    list[bytes | None],
+                    redis_client.mget(list(redis_lookups.values())),
+                )
+            except Exception:
+                logger.exception("Failed to read query embeddings from Redis")
+                redis_values = [None] * len(redis_lookups)
+
+            num_misses = 0
+            for (text, key), redis_value in zip(redis_lookups.items(), redis_values):
+                if redis_value is None:
+                    num_misses += 1
+                    continue
+                value = bytes(redis_value)
+                self._set_local(key, value)
+                found[text] = unpack_embedding(value)
+                _CACHE_HITS.labels(tier="redis").inc()
+
+            if num_misses:
+                _CACHE_MISSES.inc(num_misses)
+
+        return found
+
+    def set_many(
+        self, search_settings: SearchSettings, embeddings: dict[str, Embedding]
+    ) -> None:
+        if not embeddings:
+            return
+
+        tenant_id = get_current_tenant_id()
+        fingerprint = get_search_settings_fingerprint(search_settings)
+
+        packed: dict[str, bytes] = {}
+        for text, embedding in embeddings.items():
+            key = self._build_key(tenant_id, fingerprint, text)
+            value = pack_embedding(embedding)
+            self._set_local(key, value)
+            packed[key] = value
+
+        try:
+            redis_client = get_redis_client(tenant_id=tenant_id)
+            pipe = redis_client.pipeline(transaction=False)
+            for key, value in packed.items():
+                pipe.set(key, value, ex=self._ttl_seconds)
+            pipe.execute()
+        except Exception:
+            logger.exception("Failed to write query embeddings to Redis")
+
+
+_query_embedding_cache = QueryEmbeddingCache()
+
+
+def get_query_embedding_cache() -> QueryEmbeddingCache:
+    return _query_embedding_cache
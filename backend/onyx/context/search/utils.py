@@ -5,11 +5,13 @@ from typing import TypeVar
 from sqlalchemy.orm import Session
 
 from onyx.chat.models import SectionRelevancePiece
+from onyx.configs.model_configs import DISABLE_QUERY_EMBEDDING_CACHE
 from onyx.context.search.models import InferenceChunk
 from onyx.context.search.models import InferenceSection
 from onyx.context.search.models import SavedSearchDoc
 from onyx.context.search.models import SavedSearchDocWithContent
 from onyx.context.search.models import SearchDoc
+from onyx.context.search.query_embedding_cache import get_query_embedding_cache
 from onyx.db.models import SearchDoc as DBSearchDoc
 from onyx.db.search_settings import get_current_search_settings
 from onyx.natural_language_processing.search_nlp_models import EmbeddingModel
@@ -139,15 +141,35 @@ def remove_stop_words_and_punctuation(keywords: list[str]) -> list[str]:
 def get_query_embeddings(queries: list[str], db_session: Session) -> list[Embedding]:
     search_settings = get_current_search_settings(db_session)
 
-    model = EmbeddingModel.from_db_model(
-        search_settings=search_settings,
-        # The below are globally set, this flow always uses the indexing one
-        server_host=MODEL_SERVER_HOST,
-        server_port=MODEL_SERVER_PORT,
+    cache = get_query_embedding_cache()
+    query_to_embedding: dict[str, Embedding] = (
+        {}
+        if DISABLE_QUERY_EMBEDDING_CACHE
+        else cache.get_many(search_settings, queries)
     )
 
-    query_embedding = model.encode(queries, text_type=EmbedTextType.QUERY)
-    return query_embedding
+    uncached_queries = [
+        query for query in dict.fromkeys(queries) if query not in query_to_embedding
+    ]
+    if uncached_queries:
+        model = EmbeddingModel.from_db_model(
+            search_settings=search_settings,
+            # The below are globally set, this flow always uses the indexing one
+            server_host=MODEL_SERVER_HOST,
+            server_port=MODEL_SERVER_PORT,
+        )
+
+        new_embeddings = dict(
+            zip(
+                uncached_queries,
+                model.encode(uncached_queries, text_type=EmbedTextType.QUERY),
+            )
+        )
+        if not DISABLE_QUERY_EMBEDDING_CACHE:
+            cache.set_many(search_settings, new_embeddings)
+        query_to_embedding.update(new_embeddings)
+
+    return [query_to_embedding[query] for query in queries]
 
 
 def get_query_embedding(query: str, db_session: Session) -> Embedding:
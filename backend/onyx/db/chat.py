@@ -50,12 +50,16 @@ from onyx.file_store.file_store import get_default_file_store
 from onyx.file_store.models import FileDescriptor
 from onyx.llm.override_models import LLMOverride
 from onyx.llm.override_models import PromptOverride
+from onyx.redis.redis_pool import get_redis_client
+from onyx.redis.redis_token_usage import record_token_usage
 from onyx.server.query_and_chat.models import ChatMessageDetail
 from onyx.server.query_and_chat.models import SubQueryDetail
 from onyx.server.query_and_chat.models import SubQuestionDetail
 from onyx.tools.models import ToolCallFinalResult
 from onyx.utils.logger import setup_logger
 from onyx.utils.special_types import JSON_ro
+from onyx.utils.variable_functionality import fetch_versioned_implementation
+from shared_configs.contextvars import get_current_tenant_id
 
 
 logger = setup_logger()
@@ -647,6 +651,32 @@ def reserve_message_id(
     return new_id
 
 
+def _record_token_usage(
+    db_session: Session, chat_session_id: UUID, token_count: int
+) -> None:
+    """Adds the tokens of a chat message to the token usage counters that token rate
+    limits are checked against. Failures only make the check fall back to Postgres."""
+    if not token_count:
+        return
+
+    try:
+        chat_session = db_session.get(ChatSession, chat_session_id)
+        get_token_usage_scopes = fetch_versioned_implementation(
+            "onyx.redis.redis_token_usage", "get_token_usage_scopes"
+        )
+        tenant_id = get_current_tenant_id()
+        record_token_usage(
+            redis_client=get_redis_client(tenant_id=tenant_id),
+            tenant_id=tenant_id,
+            scopes=get_token_usage_scopes(
+                chat_session.user_id if chat_session else None
+            ),
+            token_count=token_count,
+        )
+    except Exception:
+        logger.exception("Failed to record token usage")
+
+
 def create_new_chat_message(
     chat_session_id: UUID,
     parent_message: ChatMessage,
@@ -679,6 +709,7 @@ def create_new_chat_message(
         existing_message.parent_message = parent_message.id
         existing_message.message = message
         existing_message.rephrased_query = rephrased_query
+        token_count_delta = token_count - (existing_message.token_count or 0)
         existing_message.token_count = token_count
         existing_message.message_type = message_type
         existing_message.citations = citations
@@ -712,6 +743,7 @@ def create_new_chat_message(
             research_plan=research_plan,
         )
         db_session.add(new_chat_message)
+        token_count_delta = token_count
 
     # SQL Alchemy will propagate this to update the reference_docs' foreign keys
     if reference_docs:
@@ -724,6 +756,8 @@ def create_new_chat_message(
     if commit:
         db_session.commit()
 
+    _record_token_usage(db_session, chat_session_id, token_count_delta)
+
     return new_chat_message
 
 
@@ -1215,6 +1249,9 @@ def update_db_session_with_messages(
     if message_type:
         chat_message.message_type = MessageType(message_type)
     if token_count:
+        _record_token_usage(
+            db_session, chat_session_id, token_count - (chat_message.token_count or 0)
+        )
         chat_message.token_count = token_count
     if rephrased_query:
         chat_message.rephrased_query = rephrased_query
@@ -18,6 +18,7 @@ from onyx.db.models import ConnectorCredentialPair
 from onyx.db.models import FederatedConnector
 from onyx.db.models import IndexAttempt
 from onyx.kg.models import KGConnectorData
+from onyx.redis.redis_user_acl import invalidate_current_tenant_user_acl_cache
 from onyx.server.documents.models import ConnectorBase
 from onyx.server.documents.models import ObjectCreationIdResponse
 from onyx.server.models import StatusResponse
@@ -321,6 +322,9 @@ def mark_cc_pair_as_external_group_synced(db_session: Session, cc_pair_id: int)
     cc_pair.last_time_external_group_sync = datetime.now(timezone.utc)
     db_session.commit()
 
+    # the group memberships changed, so the cached ACLs of the users may be stale
+    invalidate_current_tenant_user_acl_cache()
+
 
 def mark_ccpair_with_indexing_trigger(
     cc_pair_id: int, indexing_mode: IndexingMode | None, db_session: Session
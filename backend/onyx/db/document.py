@@ -2,6 +2,7 @@ import contextlib
 import time
 from collections.abc import Generator
 from collections.abc import Iterable
+from collections.abc import Iterator
 from collections.abc import Sequence
 from datetime import datetime
 from datetime import timedelta
@@ -23,6 +24,7 @@ from sqlalchemy.orm import Session
 from sqlalchemy.sql.expression import null
 
 from onyx.agents.agent_search.kb_search.models import KGEntityDocInfo
+from onyx.configs.app_configs import DB_YIELD_PER_DEFAULT
 from onyx.configs.constants import DEFAULT_BOOST
 from onyx.configs.constants import DocumentSource
 from onyx.configs.kg_configs import KG_SIMPLE_ANSWER_MAX_DISPLAYED_SOURCES
@@ -162,6 +164,29 @@ def get_document_ids_for_connector_credential_pair(
     return list(db_session.execute(doc_ids_stmt).scalars().all())
 
 
+def stream_sorted_document_ids_for_connector_credential_pair(
+    db_session: Session,
+    connector_id: int,
+    credential_id: int,
+    yield_per: int = DB_YIELD_PER_DEFAULT,
+) -> Iterator[str]:
+    """Streams the ids of the cc pair's documents without loading them all at once.
+
+    The ids are ordered with the "C" collation, i.e. by code point, which is the same
+    order python sorts strings in."""
+    doc_ids_stmt = (
+        select(DocumentByConnectorCredentialPair.id)
+        .where(
+            and_(
+                DocumentByConnectorCredentialPair.connector_id == connector_id,
+                DocumentByConnectorCredentialPair.credential_id == credential_id,
+            )
+        )
+        .order_by(DocumentByConnectorCredentialPair.id.collate("C"))
+    )
+    return iter(db_session.scalars(doc_ids_stmt).yield_per(yield_per))
+
+
 def get_documents_for_connector_credential_pair_limited_columns(
     db_session: Session,
     connector_id: int,
@@ -518,6 +543,55 @@ def mark_document_as_indexed_for_cc_pair__no_commit(
     )
 
 
+def get_indexed_document_ids_for_cc_pair(
+    db_session: Session,
+    connector_id: int,
+    credential_id: int,
+    document_ids: list[str],
+) -> set[str]:
+    """Returns the given ids that were already successfully indexed for the cc pair."""
+    stmt = select(DocumentByConnectorCredentialPair.id).where(
+        DocumentByConnectorCredentialPair.connector_id == connector_id,
+        DocumentByConnectorCredentialPair.credential_id == credential_id,
+        DocumentByConnectorCredentialPair.id.in_(document_ids),
+        DocumentByConnectorCredentialPair.has_been_indexed.is_(True),
+    )
+    return set(db_session.scalars(stmt))
+
+
+def get_indexed_content_hashes_for_cc_pair(
+    db_session: Session,
+    cc_pair_id: int,
+) -> dict[str, str]:
+    """Returns the content hash of every document that was successfully indexed for
+    the cc pair (and has one)."""
+    stmt = (
+        select(DbDocument.id, DbDocument.content_hash)
+        .join(
+            DocumentByConnectorCredentialPair,
+            DocumentByConnectorCredentialPair.id == DbDocument.id,
+        )
+        .join(
+            ConnectorCredentialPair,
+            and_(
+                ConnectorCredentialPair.connector_id
+                == DocumentByConnectorCredentialPair.connector_id,
+                ConnectorCredentialPair.credential_id
+                == DocumentByConnectorCredentialPair.credential_id,
+            ),
+        )
+        .where(
+            ConnectorCredentialPair.id == cc_pair_id,
+            DocumentByConnectorCredentialPair.has_been_indexed.is_(True),
+            DbDocument.content_hash.is_not(None),
+        )
+    )
+    return {
+        doc_id: content_hash
+        for doc_id, content_hash in db_session.execute(stmt).all()
+    }
+
+
 def update_docs_updated_at__no_commit(
     ids_to_new_updated_at: dict[str, datetime],
     db_session: Session,
@@ -556,6 +630,19 @@ def update_docs_chunk_count__no_commit(
         doc.chunk_count = doc_id_to_chunk_count[doc.id]
 
 
+def update_docs_content_hash__no_commit(
+    ids_to_content_hash: dict[str, str],
+    db_session: Session,
+) -> None:
+    documents_to_update = (
+        db_session.query(DbDocument)
+        .filter(DbDocument.id.in_(ids_to_content_hash.keys()))
+        .all()
+    )
+    for doc in documents_to_update:
+        doc.content_hash = ids_to_content_hash[doc.id]
+
+
 def mark_document_as_modified(
     document_id: str,
     db_session: Session,
@@ -570,6 +657,20 @@ def mark_document_as_modified(
     db_session.commit()
 
 
+def mark_documents_as_modified(document_ids: list[str], db_session: Session) -> None:
+    """Bulk version of `mark_document_as_modified`, ids that don't exist are ignored."""
+    if not document_ids:
+        return
+
+    stmt = (
+        update(DbDocument)
+        .where(DbDocument.id.in_(document_ids))
+        .values(last_modified=datetime.now(timezone.utc))
+    )
+    db_session.execute(stmt)
+    db_session.commit()
+
+
 def mark_document_as_synced(document_id: str, db_session: Session) -> None:
     stmt = select(DbDocument).where(DbDocument.id == document_id)
     doc = db_session.scalar(stmt)
@@ -581,6 +682,20 @@ def mark_document_as_synced(document_id: str, db_session: Session) -> None:
     db_session.commit()
 
 
+def mark_documents_as_synced(document_ids: list[str], db_session: Session) -> None:
+    """Bulk version of `mark_document_as_synced`, ids that don't exist are ignored."""
+    if not document_ids:
+        return
+
+    stmt = (
+        update(DbDocument)
+        .where(DbDocument.id.in_(document_ids))
+        .values(last_synced=datetime.now(timezone.utc))
+    )
+    db_session.execute(stmt)
+    db_session.commit()
+
+
 def delete_document_by_connector_credential_pair__no_commit(
     db_session: Session,
     document_id: str,
@@ -0,0 +1,41 @@
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from onyx.db.models import ImageSummary
+
+
+def get_image_summaries(
+    db_session: Session, model_fingerprint: str, image_hashes: list[str]
+) -> dict[str, str]:
+    """Returns the stored summaries by image hash for whichever images have one."""
+    if not image_hashes:
+        return {}
+
+    stmt = select(ImageSummary.image_hash, ImageSummary.summary).where(
+        ImageSummary.model_fingerprint == model_fingerprint,
+        ImageSummary.image_hash.in_(image_hashes),
+    )
+    return {image_hash: summary for image_hash, summary in db_session.execute(stmt)}
+
+
+def upsert_image_summaries(
+    db_session: Session, model_fingerprint: str, image_hash_to_summary: dict[str, str]
+) -> None:
+    if not image_hash_to_summary:
+        return
+
+    insert_stmt = insert(ImageSummary).values(
+        [
+            {
+                "image_hash": image_hash,
+                "model_fingerprint": model_fingerprint,
+                "summary": summary,
+            }
+            for image_hash, summary in image_hash_to_summary.items()
+        ]
+    )
+    # another worker summarizing the same image at the same time is fine, both
+    # summaries are equally valid
+    db_session.execute(insert_stmt.on_conflict_do_nothing())
+    db_session.commit()
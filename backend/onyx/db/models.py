@@ -622,6 +622,10 @@ class Document(Base):
     # Only null for documents indexed prior to this change
     chunk_count: Mapped[int | None] = mapped_column(Integer, nullable=True)
 
+    # Fingerprint of the indexed content (see compute_document_content_hash), set after
+    # the doc was successfully indexed. Lets unchanged docs skip re-indexing.
+    content_hash: Mapped[str | None] = mapped_column(String, nullable=True)
+
     # last time any vespa relevant row metadata or the doc changed.
     # does not include last_synced
     last_modified: Mapped[datetime.datetime | None] = mapped_column(
@@ -3884,3 +3888,20 @@ class ExternalGroupPermissionSyncAttempt(Base):
 
     def is_finished(self) -> bool:
         return self.status.is_terminal()
+
+
+class ImageSummary(Base):
+    """Vision LLM summaries of images, so that an image that shows up again (e.g. a
+    logo embedded in many pages, or any image on a re-index) is only summarized once
+    per vision model and prompt."""
+
+    __tablename__ = "image_summary"
+
+    # sha256 of the image bytes
+    image_hash: Mapped[str] = mapped_column(String, primary_key=True)
+    # hash of the vision model and the prompts used for the summary
+    model_fingerprint: Mapped[str] = mapped_column(String, primary_key=True)
+    summary: Mapped[str] = mapped_column(Text, nullable=False)
+    time_created: Mapped[datetime.datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now()
+    )
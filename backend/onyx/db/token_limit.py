@@ -1,9 +1,13 @@
 from collections.abc import Sequence
+from datetime import datetime
 
+from sqlalchemy import func
 from sqlalchemy import select
 from sqlalchemy.orm import Session
 
 from onyx.configs.constants import TokenRateLimitScope
+from onyx.db.models import ChatMessage
+from onyx.db.models import ChatSession
 from onyx.db.models import TokenRateLimit
 from onyx.db.models import TokenRateLimit__UserGroup
 from onyx.server.token_rate_limits.models import TokenRateLimitArgs
@@ -46,6 +50,36 @@ def fetch_all_global_token_rate_limits(
     return token_rate_limits
 
 
+def fetch_max_token_rate_limit_period_hours(db_session: Session) -> int | None:
+    """Longest period of any enabled token rate limit, None if there are none."""
+    return db_session.scalar(
+        select(func.max(TokenRateLimit.period_hours)).where(
+            TokenRateLimit.enabled.is_(True)
+        )
+    )
+
+
+def fetch_global_token_usage(
+    db_session: Session, cutoff_time: datetime
+) -> Sequence[tuple[datetime, int]]:
+    """
+    Fetch global token usage within the cutoff time, grouped by minute
+    """
+    result = db_session.execute(
+        select(
+            func.date_trunc("minute", ChatMessage.time_sent),
+            func.sum(ChatMessage.token_count),
+        )
+        .join(ChatSession, ChatMessage.chat_session_id == ChatSession.id)
+        .filter(
+            ChatMessage.time_sent >= cutoff_time,
+        )
+        .group_by(func.date_trunc("minute", ChatMessage.time_sent))
+    ).all()
+
+    return [(row[0], row[1]) for row in result]
+
+
 def insert_user_token_rate_limit(
     db_session: Session,
     token_rate_limit_settings: TokenRateLimitArgs,
@@ -20,6 +20,7 @@ from onyx.db.models import Persona__User
 from onyx.db.models import SamlAccount
 from onyx.db.models import User
 from onyx.db.models import User__UserGroup
+from onyx.redis.redis_user_acl import invalidate_current_tenant_user_acl_cache
 from onyx.utils.variable_functionality import fetch_ee_implementation_or_noop
 
 
@@ -338,6 +339,7 @@ def delete_user_from_db(
     ).delete()
     db_session.delete(user_to_delete)
     db_session.commit()
+    invalidate_current_tenant_user_acl_cache()
 
     # NOTE: edge case may exist with race conditions
     # with this `invited user` scheme generally.
@@ -15,10 +15,15 @@ from onyx.configs.app_configs import VESPA_LANGUAGE_OVERRIDE
 from onyx.context.search.models import IndexFilters
 from onyx.context.search.models import InferenceChunkUncleaned
 from onyx.document_index.interfaces import VespaChunkRequest
-from onyx.document_index.vespa.shared_utils.utils import get_vespa_http_client
+from onyx.document_index.vespa.shared_utils.query_client import (
+    get_vespa_query_client,
+)
 from onyx.document_index.vespa.shared_utils.vespa_request_builders import (
     build_vespa_filters,
 )
+from onyx.document_index.vespa.shared_utils.vespa_request_builders import (
+    build_vespa_filter_params,
+)
 from onyx.document_index.vespa.shared_utils.vespa_request_builders import (
     build_vespa_id_based_retrieval_yql,
 )
@@ -216,13 +221,15 @@ def get_chunks_via_visit_api(
         "fieldSet": field_set,
     }
 
+    # documents only need to share a single ACL entry with the user
+    user_acl = set(filters.access_control_list or [])
+
     document_chunks: list[dict] = []
     while True:
         try:
             filtered_params = {k: v for k, v in params.items() if v is not None}
-            with get_vespa_http_client() as http_client:
-                response = http_client.get(url, params=filtered_params)
-                response.raise_for_status()
+            response = get_vespa_query_client().get(url, params=filtered_params)
+            response.raise_for_status()
         except httpx.HTTPError as e:
             error_base = "Failed to query Vespa"
             logger.error(
@@ -241,10 +248,7 @@ def get_chunks_via_visit_api(
             for document in response_data["documents"]:
                 if filters.access_control_list:
                     document_acl = document["fields"].get(ACCESS_CONTROL_LIST)
-                    if not document_acl or not any(
-                        user_acl_entry in document_acl
-                        for user_acl_entry in filters.access_control_list
-                    ):
+                    if not document_acl or user_acl.isdisjoint(document_acl):
                         continue
 
                 if MULTI_TENANT:
@@ -343,9 +347,8 @@ def query_vespa(
         params["language"] = VESPA_LANGUAGE_OVERRIDE
 
     try:
-        with get_vespa_http_client() as http_client:
-            response = http_client.post(SEARCH_ENDPOINT, json=params)
-            response.raise_for_status()
+        response = get_vespa_query_client().post(SEARCH_ENDPOINT, json=params)
+        response.raise_for_status()
     except httpx.HTTPError as e:
         error_base = "Failed to query Vespa"
         logger.error(
@@ -426,6 +429,7 @@ def _get_chunks_via_batch_search(
     params: dict[str, str | int | float] = {
         "yql": yql,
         "hits": MAX_ID_SEARCH_QUERY_SIZE,
+        **build_vespa_filter_params(filters),
     }
 
     inference_chunks = query_vespa(params)
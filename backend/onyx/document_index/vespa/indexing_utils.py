@@ -7,6 +7,7 @@ from collections.abc import Callable
 from datetime import datetime
 from datetime import timezone
 from http import HTTPStatus
+from typing import Any
 
 import httpx
 from retry import retry
@@ -35,6 +36,7 @@ from onyx.document_index.vespa_constants import DOCUMENT_ID
 from onyx.document_index.vespa_constants import DOCUMENT_ID_ENDPOINT
 from onyx.document_index.vespa_constants import DOCUMENT_SETS
 from onyx.document_index.vespa_constants import EMBEDDINGS
+from onyx.document_index.vespa_constants import ENRICH_CHUNK_INFO_GROUP_SIZE
 from onyx.document_index.vespa_constants import IMAGE_FILE_NAME
 from onyx.document_index.vespa_constants import LARGE_CHUNK_REFERENCE_IDS
 from onyx.document_index.vespa_constants import METADATA
@@ -42,6 +44,7 @@ from onyx.document_index.vespa_constants import METADATA_LIST
 from onyx.document_index.vespa_constants import METADATA_SUFFIX
 from onyx.document_index.vespa_constants import NUM_THREADS
 from onyx.document_index.vespa_constants import PRIMARY_OWNERS
+from onyx.document_index.vespa_constants import SEARCH_ENDPOINT
 from onyx.document_index.vespa_constants import SECONDARY_OWNERS
 from onyx.document_index.vespa_constants import SECTION_CONTINUATION
 from onyx.document_index.vespa_constants import SEMANTIC_IDENTIFIER
@@ -52,6 +55,8 @@ from onyx.document_index.vespa_constants import TENANT_ID
 from onyx.document_index.vespa_constants import TITLE
 from onyx.document_index.vespa_constants import TITLE_EMBEDDING
 from onyx.document_index.vespa_constants import USER_PROJECT
+from onyx.document_index.vespa_constants import VESPA_TIMEOUT
+from onyx.document_index.vespa_constants import YQL_BASE
 from onyx.indexing.models import DocMetadataAwareIndexChunk
 from onyx.utils.logger import setup_logger
 
@@ -299,6 +304,123 @@ def check_for_final_chunk_existence(
         index += 1
 
 
+def _escape_yql_string(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"')
+
+
+def _extract_max_chunk_ids(grouping_node: dict[str, Any]) -> dict[str, int]:
+    """Walks a Vespa grouping response and collects the `max(chunk_id)` output
+    for every `document_id` group found anywhere in the tree."""
+    max_chunk_ids: dict[str, int] = {}
+    for child in grouping_node.get("children", []):
+        if str(child.get("id", "")).startswith("grouplist:"):
+            for group in child.get("children", []):
+                max_chunk_id = group.get("fields", {}).get(f"max({CHUNK_ID})")
+                if max_chunk_id is not None:
+                    max_chunk_ids[str(group["value"])] = int(max_chunk_id)
+        else:
+            max_chunk_ids.update(_extract_max_chunk_ids(child))
+    return max_chunk_ids
+
+
+@retry(tries=3, delay=1, backoff=2)
+def get_max_chunk_ids_for_documents(
+    document_ids: list[str],
+    index_name: str,
+    http_client: httpx.Client,
+) -> dict[str, int]:
+    """Resolves the highest indexed chunk id for each of the given documents with a
+    single grouping query. Documents with no chunks in the index are omitted."""
+    if not document_ids:
+        return {}
+
+    id_conditions = " or ".join(
+        f'{DOCUMENT_ID} contains "{_escape_yql_string(document_id)}"'
+        for document_id in document_ids
+    )
+    yql = (
+        YQL_BASE.format(index_name=index_name)
+        + f"({id_conditions}) limit 0 | all(group({DOCUMENT_ID}) "
+        + f"max({len(document_ids)}) each(output(max({CHUNK_ID}))))"
+    )
+    response = http_client.post(
+        SEARCH_ENDPOINT,
+        json={"yql": yql, "hits": 0, "timeout": VESPA_TIMEOUT},
+    )
+    response.raise_for_status()
+    return _extract_max_chunk_ids(response.json().get("root", {}))
+
+
+def get_final_chunk_indices(
+    doc_id_to_start_index: dict[str, int],
+    index_name: str,
+    http_client: httpx.Client,
+    executor: concurrent.futures.ThreadPoolExecutor | None = None,
+) -> dict[str, int]:
+    """Batched alternative to `check_for_final_chunk_existence`. Instead of probing
+    chunk ids one GET at a time per document, documents are grouped and each group
+    is resolved with one grouping query, with the groups running concurrently.
+
+    Returns, for each document, the index one past its last indexed chunk, never lower
+    than the provided start index. If a grouping query fails, the documents in that
+    group fall back to the per-chunk existence check."""
+    external_executor = True
+
+    if not executor:
+        external_executor = False
+        executor = concurrent.futures.ThreadPoolExecutor(max_workers=NUM_THREADS)
+
+    doc_ids = list(doc_id_to_start_index.keys())
+    final_chunk_indices: dict[str, int] = {}
+    try:
+        group_futures = {
+            executor.submit(
+                get_max_chunk_ids_for_documents,
+                doc_id_group,
+                index_name,
+                http_client,
+            ): doc_id_group
+            for doc_id_group in [
+                doc_ids[i : i + ENRICH_CHUNK_INFO_GROUP_SIZE]
+                for i in range(0, len(doc_ids), ENRICH_CHUNK_INFO_GROUP_SIZE)
+            ]
+        }
+        for future in concurrent.futures.as_completed(group_futures):
+            doc_id_group = group_futures[future]
+            try:
+                max_chunk_ids = future.result()
+            except Exception:
+                logger.exception(
+                    f"Grouped chunk count lookup failed for {len(doc_id_group)} "
+                    "documents, falling back to per-chunk existence checks"
+                )
+                for doc_id in doc_id_group:
+                    final_chunk_indices[doc_id] = check_for_final_chunk_existence(
+                        minimal_doc_info=MinimalDocumentIndexingInfo(
+                            doc_id=doc_id,
+                            chunk_start_index=doc_id_to_start_index[doc_id],
+                        ),
+                        start_index=doc_id_to_start_index[doc_id],
+                        index_name=index_name,
+                        http_client=http_client,
+                    )
+                continue
+
+            for doc_id in doc_id_group:
+                start_index = doc_id_to_start_index[doc_id]
+                max_chunk_id = max_chunk_ids.get(doc_id)
+                final_chunk_indices[doc_id] = (
+                    start_index
+                    if max_chunk_id is None
+                    else max(start_index, max_chunk_id + 1)
+                )
+    finally:
+        if not external_executor:
+            executor.shutdown(wait=True)
+
+    return final_chunk_indices
+
+
 class BaseHTTPXClientContext(ABC):
     """Abstract base class for an HTTPX client context manager."""
 
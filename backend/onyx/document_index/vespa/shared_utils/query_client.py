@@ -0,0 +1,177 @@
+"""Process wide, pooled HTTP clients for Vespa query traffic.
+
+Searches and id based retrievals used to build a new client per call, paying for the
+connection (and with Vespa Cloud the TLS handshake) on every query and every
+parallel retrieval thread. These clients are created once per process and reused so
+that connections are kept alive between queries and, with HTTP/2, multiplexed.
+
+Sockets must never be shared across a fork, so a forked child (e.g. a prefork celery
+worker) drops the parent's clients and lazily builds its own.
+"""
+
+import asyncio
+import os
+import threading
+import weakref
+from typing import Any
+from typing import cast
+
+import httpx
+from prometheus_client import Gauge
+
+from onyx.configs.app_configs import MANAGED_VESPA
+from onyx.configs.app_configs import VESPA_CLOUD_CERT_PATH
+from onyx.configs.app_configs import VESPA_CLOUD_KEY_PATH
+from onyx.configs.app_configs import VESPA_QUERY_POOL_KEEPALIVE_EXPIRY
+from onyx.configs.app_configs import VESPA_QUERY_POOL_MAX_CONNECTIONS
+from onyx.configs.app_configs import VESPA_QUERY_POOL_MAX_KEEPALIVE_CONNECTIONS
+from onyx.configs.app_configs import VESPA_REQUEST_TIMEOUT
+
+_POOL_CONNECTIONS = Gauge(
+    "onyx_vespa_query_pool_connections",
+    "Open connections of this process' Vespa query client by state",
+    ["state"],
+)
+_POOL_MAX_CONNECTIONS = Gauge(
+    "onyx_vespa_query_pool_max_connections",
+    "Connection limit of this process' Vespa query client",
+)
+
+
+def _default_client_kwargs() -> dict[str, Any]:
+    return {
+        "cert": (
+            cast(tuple[str, str], (VESPA_CLOUD_CERT_PATH, VESPA_CLOUD_KEY_PATH))
+            if MANAGED_VESPA
+            else None
+        ),
+        "verify": MANAGED_VESPA,
+        "timeout": VESPA_REQUEST_TIMEOUT,
+        "http2": True,
+        "limits": httpx.Limits(
+            max_connections=VESPA_QUERY_POOL_MAX_CONNECTIONS,
+            max_keepalive_connections=VESPA_QUERY_POOL_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=VESPA_QUERY_POOL_KEEPALIVE_EXPIRY,
+        ),
+    }
+
+
+def _pool_connections(client: httpx.Client | httpx.AsyncClient) -> list[Any]:
+    # httpx doesn't expose its connection pool, this is only used for metrics
+    pool = getattr(getattr(client, "_transport", None), "_pool", None)
+    return list(getattr(pool, "connections", []))
+
+
+class VespaQueryClientPool:
+    """Hands out one long lived sync client per process and one async client per
+    process and event loop (an async client can't be used across loops)."""
+
+    def __init__(self, **client_kwargs: Any) -> None:
+        self._client_kwargs = client_kwargs
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+        self._client: httpx.Client | None = None
+        self._async_clients: weakref.WeakKeyDictionary[
+            asyncio.AbstractEventLoop, httpx.AsyncClient
+        ] = weakref.WeakKeyDictionary()
+
+    def _kwargs(self) -> dict[str, Any]:
+        return {**_default_client_kwargs(), **self._client_kwargs}
+
+    def _check_pid(self) -> None:
+        if self._pid != os.getpid():
+            self.reset_after_fork()
+
+    def reset_after_fork(self) -> None:
+        """Forget the parent's clients without closing them, closing would also shut
+        down the connections the parent is still using."""
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+        self._client = None
+        self._async_clients = weakref.WeakKeyDictionary()
+
+    def get_client(self) -> httpx.Client:
+        self._check_pid()
+        client = self._client
+        if client is None or client.is_closed:
+            with self._lock:
+                client = self._client
+                if client is None or client.is_closed:
+                    client = httpx.Client(**self._kwargs())
+                    self._client = client
+        return client
+
+    def get_async_client(self) -> httpx.AsyncClient:
+        self._check_pid()
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            client = self._async_clients.get(loop)
+            if client is None or client.is_closed:
+                client = httpx.AsyncClient(**self._kwargs())
+                self._async_clients[loop] = client
+        return client
+
+    def close(self) -> None:
+        """Closes the sync client. Async clients have to be closed from their own
+        loop, see `aclose`."""
+        with self._lock:
+            if self._client is not None:
+                self._client.close()
+                self._client = None
+
+    async def aclose(self) -> None:
+        with self._lock:
+            client = self._async_clients.pop(asyncio.get_running_loop(), None)
+        if client is not None:
+            await client.aclose()
+
+    def get_stats(self) -> dict[str, int]:
+        with self._lock:
+            clients: list[httpx.Client | httpx.AsyncClient] = list(
+                self._async_clients.values()
+            )
+            if self._client is not None:
+                clients.append(self._client)
+
+        connections = [
+            connection
+            for client in clients
+            if not client.is_closed
+            for connection in _pool_connections(client)
+        ]
+        idle = sum(1 for connection in connections if connection.is_idle())
+        limits: httpx.Limits = self._kwargs()["limits"]
+        return {
+            "active_connections": len(connections) - idle,
+            "idle_connections": idle,
+            "max_connections": limits.max_connections or 0,
+        }
+
+
+_VESPA_QUERY_POOL = VespaQueryClientPool()
+os.register_at_fork(after_in_child=_VESPA_QUERY_POOL.reset_after_fork)
+
+_POOL_CONNECTIONS.labels(state="active").set_function(
+    lambda: _VESPA_QUERY_POOL.get_stats()["active_connections"]
+)
+_POOL_CONNECTIONS.labels(state="idle").set_function(
+    lambda: _VESPA_QUERY_POOL.get_stats()["idle_connections"]
+)
+_POOL_MAX_CONNECTIONS.set_function(
+    lambda: _VESPA_QUERY_POOL.get_stats()["max_connections"]
+)
+
+
+def get_vespa_query_client() -> httpx.Client:
+    """Shared client for Vespa queries. Don't close it or use it as a context
+    manager, it lives for the whole process."""
+    return _VESPA_QUERY_POOL.get_client()
+
+
+def get_async_vespa_query_client() -> httpx.AsyncClient:
+    """Async flavor of `get_vespa_query_client`, shared per event loop."""
+    return _VESPA_QUERY_POOL.get_async_client()
+
+
+def get_vespa_query_pool_stats() -> dict[str, int]:
+    return _VESPA_QUERY_POOL.get_stats()
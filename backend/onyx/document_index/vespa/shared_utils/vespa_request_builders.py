@@ -1,7 +1,9 @@
+import json
 from datetime import datetime
 from datetime import timedelta
 from datetime import timezone
 
+from onyx.configs.app_configs import VESPA_COMPACT_ACL_FILTER_MIN_ENTRIES
 from onyx.configs.constants import INDEX_SEPARATOR
 from onyx.context.search.models import IndexFilters
 from onyx.document_index.interfaces import VespaChunkRequest
@@ -21,6 +23,33 @@ from shared_configs.configs import MULTI_TENANT
 
 logger = setup_logger()
 
+# name of the query input holding the ACL of a compact ACL filter
+ACL_FILTER_QUERY_INPUT = "access_control_list_filter"
+
+
+def _get_compact_acl(access_control_list: list[str] | None) -> list[str] | None:
+    """The ACL entries if the ACL is large enough to be passed as a weightedSet query
+    input, None if it should be an OR of `contains` clauses."""
+    if not access_control_list or VESPA_COMPACT_ACL_FILTER_MIN_ENTRIES <= 0:
+        return None
+    acl = [entry for entry in access_control_list if entry]
+    if len(acl) < VESPA_COMPACT_ACL_FILTER_MIN_ENTRIES:
+        return None
+    return acl
+
+
+def build_vespa_filter_params(filters: IndexFilters) -> dict[str, str]:
+    """Query inputs referenced by the YQL from build_vespa_filters, they have to be
+    sent along with it."""
+    compact_acl = _get_compact_acl(filters.access_control_list)
+    if compact_acl is None:
+        return {}
+    return {
+        ACL_FILTER_QUERY_INPUT: json.dumps(
+            {entry: 1 for entry in compact_acl}, ensure_ascii=False
+        )
+    }
+
 
 def build_tenant_id_filter(tenant_id: str, include_trailing_and: bool = False) -> str:
     filter_str = f'({TENANT_ID} contains "{tenant_id}")'
@@ -159,8 +188,13 @@ def build_vespa_filters(
             filters.tenant_id, include_trailing_and=True
         )
 
-    # ACL filters
-    if filters.access_control_list is not None:
+    # ACL filters, large ACLs are passed as a query input (see
+    # build_vespa_filter_params) instead of growing the YQL by a clause per entry
+    if _get_compact_acl(filters.access_control_list) is not None:
+        filter_str += (
+            f"weightedSet({ACCESS_CONTROL_LIST}, @{ACL_FILTER_QUERY_INPUT}) and "
+        )
+    elif filters.access_control_list is not None:
         filter_str += _build_or_filters(
             ACCESS_CONTROL_LIST, filters.access_control_list
         )
@@ -37,6 +37,10 @@ MAX_OR_CONDITIONS = 10
 # in the long term, we are looking to improve the performance of Vespa
 # so that we can bring this back to default
 VESPA_TIMEOUT = "10s"
+# number of documents resolved per grouping query when looking up the indexed chunk
+# range of `old_version` documents. `document_id` is a fast-search attribute so this
+# can be considerably larger than MAX_OR_CONDITIONS
+ENRICH_CHUNK_INFO_GROUP_SIZE = 50
 BATCH_SIZE = 128  # Specific to Vespa
 
 TENANT_ID = "tenant_id"
@@ -21,12 +21,13 @@ from zipfile import BadZipFile
 
 import chardet
 import openpyxl
-from PIL import Image
 
 from onyx.configs.constants import ONYX_METADATA_FILENAME
 from onyx.configs.llm_configs import get_image_extraction_and_analysis_enabled
 from onyx.file_processing.file_validation import TEXT_MIME_TYPE
 from onyx.file_processing.html_utils import parse_html_page_basic
+from onyx.file_processing.pdf_extraction import iter_pdf_pages
+from onyx.file_processing.pdf_extraction import PdfExtractionBudgetExceededError
 from onyx.file_processing.unstructured import get_unstructured_api_key
 from onyx.file_processing.unstructured import unstructured_to_text
 from onyx.utils.file_types import PRESENTATION_MIME_TYPE
@@ -303,30 +304,23 @@ def read_pdf_file(
                 ):
                     metadata[clean_key] = ", ".join(value)
 
-        text = TEXT_SECTION_SEPARATOR.join(
-            page.extract_text() for page in pdf_reader.pages
-        )
-
-        if extract_images:
-            for page_num, page in enumerate(pdf_reader.pages):
-                for image_file_object in page.images:
-                    image = Image.open(io.BytesIO(image_file_object.data))
-                    img_byte_arr = io.BytesIO()
-                    image.save(img_byte_arr, format=image.format)
-                    img_bytes = img_byte_arr.getvalue()
-
-                    image_format = image.format.lower() if image.format else "png"
-                    image_name = f"page_{page_num + 1}_image_{image_file_object.name}.{image_format}"
-                    if image_callback is not None:
-                        # Stream image out immediately
-                        image_callback(img_bytes, image_name)
-                    else:
-                        extracted_images.append((img_bytes, image_name))
-
+        page_texts: list[str] = []
+        for pdf_page in iter_pdf_pages(pdf_reader, extract_images):
+            page_texts.append(pdf_page.text)
+            for img_bytes, image_name in pdf_page.images:
+                if image_callback is not None:
+                    # Stream image out immediately
+                    image_callback(img_bytes, image_name)
+                else:
+                    extracted_images.append((img_bytes, image_name))
+
+        text = TEXT_SECTION_SEPARATOR.join(page_texts)
         return text, metadata, extracted_images
 
     except PdfStreamError:
         logger.exception("Invalid PDF file")
+    except PdfExtractionBudgetExceededError as e:
+        logger.warning(f"Skipping PDF over its extraction budget: {e}")
     except Exception:
         logger.exception("Failed to read PDF")
 
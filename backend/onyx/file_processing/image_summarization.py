@@ -1,4 +1,5 @@
 import base64
+import hashlib
 from io import BytesIO
 
 from langchain_core.messages import BaseMessage
@@ -31,6 +32,26 @@ def prepare_image_bytes(image_data: bytes) -> str:
     return encoded_image
 
 
+def hash_image(image_data: bytes) -> str:
+    return hashlib.sha256(image_data).hexdigest()
+
+
+def get_image_summary_fingerprint(
+    llm: LLM,
+    system_prompt: str = IMAGE_SUMMARIZATION_SYSTEM_PROMPT,
+    user_prompt_template: str = IMAGE_SUMMARIZATION_USER_PROMPT,
+) -> str:
+    """Identifies everything besides the image that determines its summary, so that
+    changing the vision model or the prompts invalidates previously stored summaries."""
+    fingerprint_parts = [
+        llm.config.model_provider,
+        llm.config.model_name,
+        system_prompt,
+        user_prompt_template,
+    ]
+    return hashlib.sha256("\x1f".join(fingerprint_parts).encode()).hexdigest()[:16]
+
+
 def summarize_image_pipeline(
     llm: LLM,
     image_data: bytes,
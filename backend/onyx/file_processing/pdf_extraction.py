@@ -0,0 +1,86 @@
+import io
+import time
+from collections.abc import Generator
+from typing import NamedTuple
+from typing import TYPE_CHECKING
+
+from PIL import Image
+
+from onyx.configs.app_configs import PDF_EXTRACTION_MAX_CHARS
+from onyx.configs.app_configs import PDF_EXTRACTION_TIMEOUT_SECONDS
+from onyx.utils.logger import setup_logger
+
+if TYPE_CHECKING:
+    from pypdf import PdfReader
+
+logger = setup_logger()
+
+
+class PdfExtractionBudgetExceededError(Exception):
+    pass
+
+
+class PdfPage(NamedTuple):
+    page_number: int
+    text: str
+    # (image bytes, image name)
+    images: list[tuple[bytes, str]]
+
+
+def _extract_page(
+    pdf_reader: "PdfReader", page_index: int, extract_images: bool
+) -> PdfPage:
+    page = pdf_reader.pages[page_index]
+    images: list[tuple[bytes, str]] = []
+    if extract_images:
+        for image_file_object in page.images:
+            image = Image.open(io.BytesIO(image_file_object.data))
+            img_byte_arr = io.BytesIO()
+            image.save(img_byte_arr, format=image.format)
+
+            image_format = image.format.lower() if image.format else "png"
+            image_name = (
+                f"page_{page_index + 1}_image_{image_file_object.name}.{image_format}"
+            )
+            images.append((img_byte_arr.getvalue(), image_name))
+
+    return PdfPage(page_number=page_index + 1, text=page.extract_text(), images=images)
+
+
+def iter_pdf_pages(
+    pdf_reader: "PdfReader",
+    extract_images: bool = False,
+    timeout_seconds: float = PDF_EXTRACTION_TIMEOUT_SECONDS,
+    max_chars: int = PDF_EXTRACTION_MAX_CHARS,
+) -> Generator[PdfPage, None, None]:
+    """Yields the pages of an opened (and decrypted) pdf in order, one page at a time.
+
+    Raises PdfExtractionBudgetExceededError once the file takes longer than
+    timeout_seconds or its text gets longer than max_chars (0 disables either), both
+    are checked between pages. Callers must not use the pages yielded so far as if they
+    were the whole file."""
+    num_pages = len(pdf_reader.pages)
+    start_time = time.monotonic()
+    deadline = start_time + timeout_seconds if timeout_seconds > 0 else None
+
+    num_chars = 0
+    for page_index in range(num_pages):
+        page = _extract_page(pdf_reader, page_index, extract_images)
+        yield page
+
+        num_chars += len(page.text)
+        if max_chars and num_chars > max_chars:
+            raise PdfExtractionBudgetExceededError(
+                f"text is over {max_chars} chars after page "
+                f"{page.page_number}/{num_pages}"
+            )
+
+        if deadline is not None and time.monotonic() > deadline:
+            raise PdfExtractionBudgetExceededError(
+                f"took longer than {timeout_seconds}s, stopped after page "
+                f"{page.page_number}/{num_pages}"
+            )
+
+    logger.debug(
+        f"Extracted pdf with {num_pages} pages in {time.monotonic() - start_time:.2f}s"
+    )
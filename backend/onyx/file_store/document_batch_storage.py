@@ -1,8 +1,12 @@
+import gzip
 import json
+import tempfile
 from abc import ABC
 from abc import abstractmethod
+from collections.abc import Iterator
+from contextlib import closing
 from enum import Enum
-from io import StringIO
+from typing import IO
 from typing import List
 from typing import Optional
 from typing import TypeAlias
@@ -33,6 +37,22 @@ STATE_TYPE_TO_MODEL: dict[str, type[DocumentStorageState]] = {
 }
 
 
+# Batches are stored as gzipped newline delimited JSON: a header line followed by one
+# document per line, so they can be written and validated one document at a time.
+# Batches written before this format are a single pretty printed JSON array
+BATCH_FORMAT_NAME = "onyx-document-batch"
+BATCH_FORMAT_VERSION = 1
+BATCH_FILE_EXTENSION = ".jsonl.gz"
+BATCH_FILE_TYPE = "application/gzip"
+LEGACY_BATCH_FILE_EXTENSION = ".json"
+LEGACY_BATCH_FILE_TYPE = "application/json"
+
+# fast levels already get most of the size reduction on document text
+_BATCH_COMPRESS_LEVEL = 1
+# batches are built in memory up to this size, larger ones spill to a temp file
+_BATCH_SPOOL_MAX_BYTES = 16 * 1024 * 1024
+
+
 class BatchStoragePathInfo(BaseModel):
     cc_pair_id: int
     index_attempt_id: int
@@ -83,13 +103,38 @@ class DocumentBatchStorage(ABC):
     def extract_path_info(self, path: str) -> BatchStoragePathInfo | None:
         """Extract path info from a path."""
 
-    def _serialize_documents(self, documents: list[Document]) -> str:
-        """Serialize documents to JSON string."""
-        # Use mode='json' to properly serialize datetime and other complex types
-        return json.dumps([doc.model_dump(mode="json") for doc in documents], indent=2)
+    def _write_documents(self, documents: list[Document], fileobj: IO[bytes]) -> None:
+        """Write documents to the file object in the batch format."""
+        header = {
+            "format": BATCH_FORMAT_NAME,
+            "version": BATCH_FORMAT_VERSION,
+            "document_count": len(documents),
+        }
+        with gzip.GzipFile(
+            fileobj=fileobj, mode="wb", compresslevel=_BATCH_COMPRESS_LEVEL, mtime=0
+        ) as gzip_file:
+            gzip_file.write(json.dumps(header).encode() + b"\n")
+            for doc in documents:
+                gzip_file.write(doc.model_dump_json().encode() + b"\n")
+
+    def _iter_documents(self, fileobj: IO[bytes]) -> Iterator[Document]:
+        """Read documents in the batch format, validating each one as soon as its
+        line has been read from the file object."""
+        with gzip.GzipFile(fileobj=fileobj, mode="rb") as gzip_file:
+            header = json.loads(gzip_file.readline() or "{}")
+            if header.get("format") != BATCH_FORMAT_NAME:
+                raise ValueError("Not a document batch")
+            if header.get("version") != BATCH_FORMAT_VERSION:
+                raise ValueError(
+                    f"Unsupported document batch version {header.get('version')}"
+                )
+
+            for line in gzip_file:
+                if line.strip():
+                    yield Document.model_validate_json(line)
 
     def _deserialize_documents(self, data: str) -> list[Document]:
-        """Deserialize documents from JSON string."""
+        """Deserialize documents from the legacy JSON array format."""
         doc_dicts = json.loads(data)
         return [Document.model_validate(doc_dict) for doc_dict in doc_dicts]
 
@@ -105,28 +150,40 @@ class FileStoreDocumentBatchStorage(DocumentBatchStorage):
         super().__init__(cc_pair_id, index_attempt_id)
         self.file_store = file_store
 
-    def _get_batch_file_name(self, batch_num: int) -> str:
+    def _get_batch_file_name(
+        self, batch_num: int, extension: str = BATCH_FILE_EXTENSION
+    ) -> str:
         """Generate file name for a document batch."""
-        return f"{self.base_path}/{batch_num}.json"
+        return f"{self.base_path}/{batch_num}{extension}"
+
+    def _has_batch_file(self, file_name: str, file_type: str) -> bool:
+        return self.file_store.has_file(
+            file_id=file_name,
+            file_origin=FileOrigin.OTHER,
+            file_type=file_type,
+        )
 
     def store_batch(self, batch_num: int, documents: list[Document]) -> None:
         """Store a batch of documents using FileStore."""
         file_name = self._get_batch_file_name(batch_num)
         try:
-            data = self._serialize_documents(documents)
-            content = StringIO(data)
-
-            self.file_store.save_file(
-                file_id=file_name,
-                content=content,
-                display_name=f"Document Batch {batch_num}",
-                file_origin=FileOrigin.OTHER,
-                file_type="application/json",
-                file_metadata={
-                    "batch_num": batch_num,
-                    "document_count": str(len(documents)),
-                },
-            )
+            with tempfile.SpooledTemporaryFile(
+                max_size=_BATCH_SPOOL_MAX_BYTES
+            ) as content:
+                self._write_documents(documents, content)
+                content.seek(0)
+
+                self.file_store.save_file(
+                    file_id=file_name,
+                    content=content,
+                    display_name=f"Document Batch {batch_num}",
+                    file_origin=FileOrigin.OTHER,
+                    file_type=BATCH_FILE_TYPE,
+                    file_metadata={
+                        "batch_num": batch_num,
+                        "document_count": str(len(documents)),
+                    },
+                )
 
             logger.debug(
                 f"Stored batch {batch_num} with {len(documents)} documents to FileStore as {file_name}"
@@ -138,22 +195,25 @@ class FileStoreDocumentBatchStorage(DocumentBatchStorage):
     def get_batch(self, batch_num: int) -> list[Document] | None:
         """Retrieve a batch of documents from FileStore."""
         file_name = self._get_batch_file_name(batch_num)
+        legacy_file_name = self._get_batch_file_name(
+            batch_num, LEGACY_BATCH_FILE_EXTENSION
+        )
         try:
-            # Check if file exists
-            if not self.file_store.has_file(
-                file_id=file_name,
-                file_origin=FileOrigin.OTHER,
-                file_type="application/json",
-            ):
+            if self._has_batch_file(file_name, BATCH_FILE_TYPE):
+                # documents are validated while the rest of the batch downloads
+                with closing(self.file_store.read_file_stream(file_name)) as stream:
+                    documents = list(self._iter_documents(stream))
+            elif self._has_batch_file(legacy_file_name, LEGACY_BATCH_FILE_TYPE):
+                # stored before the batch format changed
+                content_io = self.file_store.read_file(legacy_file_name)
+                data = content_io.read().decode("utf-8")
+                documents = self._deserialize_documents(data)
+            else:
                 logger.warning(
                     f"Batch {batch_num} not found in FileStore with name {file_name}"
                 )
                 return None
 
-            content_io = self.file_store.read_file(file_name)
-            data = content_io.read().decode("utf-8")
-
-            documents = self._deserialize_documents(data)
             logger.debug(
                 f"Retrieved batch {batch_num} with {len(documents)} documents from FileStore"
             )
@@ -170,6 +230,10 @@ class FileStoreDocumentBatchStorage(DocumentBatchStorage):
     def delete_batch_by_num(self, batch_num: int) -> None:
         """Delete a specific batch from FileStore."""
         batch_file_name = self._get_batch_file_name(batch_num)
+        if not self._has_batch_file(batch_file_name, BATCH_FILE_TYPE):
+            batch_file_name = self._get_batch_file_name(
+                batch_num, LEGACY_BATCH_FILE_EXTENSION
+            )
         self.delete_batch_by_name(batch_file_name)
         logger.debug(f"Deleted batch num {batch_num} {batch_file_name} from FileStore")
 
@@ -200,7 +264,11 @@ class FileStoreDocumentBatchStorage(DocumentBatchStorage):
                     f"Could not extract path info from batch file: {batch_file_name}"
                 )
                 continue
-            new_batch_file_name = self._get_batch_file_name(path_info.batch_num)
+            # keep the extension, it tells the batch format apart
+            extension = "." + batch_file_name.split("/")[-1].partition(".")[2]
+            new_batch_file_name = self._get_batch_file_name(
+                path_info.batch_num, extension
+            )
             self.file_store.change_file_id(batch_file_name, new_batch_file_name)
 
     def extract_path_info(self, path: str) -> BatchStoragePathInfo | None:
@@ -214,7 +282,7 @@ class FileStoreDocumentBatchStorage(DocumentBatchStorage):
             return BatchStoragePathInfo(
                 cc_pair_id=int(cc_pair_id),
                 index_attempt_id=int(index_attempt_id),
-                batch_num=int(batch_num.split(".")[0]),  # remove .json
+                batch_num=int(batch_num.split(".")[0]),  # remove the extension
             )
         except Exception as e:
             logger.error(f"Failed to extract path info from {path}: {e}")
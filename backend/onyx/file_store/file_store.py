@@ -120,6 +120,18 @@ class FileStore(ABC):
             Contents of the file and metadata dict
         """
 
+    def read_file_stream(self, file_id: str) -> IO[bytes]:
+        """
+        Read the content of a given file by the ID as a stream. Unlike `read_file`,
+        implementations may return before the whole file has been downloaded so that
+        the caller can start processing the beginning of the file early.
+        The caller is responsible for closing the returned stream.
+
+        Parameters:
+        - file_id: Unique ID of file to read
+        """
+        return self.read_file(file_id, mode="b")
+
     @abstractmethod
     def read_file_record(self, file_id: str) -> FileStoreModel:
         """
@@ -403,6 +415,26 @@ class S3BackedFileStore(FileStore):
         else:
             return BytesIO(file_content)
 
+    def read_file_stream(
+        self, file_id: str, db_session: Session | None = None
+    ) -> IO[bytes]:
+        with get_session_with_current_tenant_if_none(db_session) as db_session:
+            file_record = get_filerecord_by_file_id(
+                file_id=file_id, db_session=db_session
+            )
+
+        s3_client = self._get_s3_client()
+        try:
+            response = s3_client.get_object(
+                Bucket=file_record.bucket_name, Key=file_record.object_key
+            )
+        except ClientError:
+            logger.error(f"Failed to read file {file_id} from S3")
+            raise
+
+        # botocore's StreamingBody reads from the open connection as it is consumed
+        return cast(IO[bytes], response["Body"])
+
     def read_file_record(
         self, file_id: str, db_session: Session | None = None
     ) -> FileStoreModel:
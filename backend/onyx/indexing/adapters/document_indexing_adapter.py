@@ -14,6 +14,7 @@ from onyx.db.document import fetch_chunk_counts_for_documents
 from onyx.db.document import mark_document_as_indexed_for_cc_pair__no_commit
 from onyx.db.document import prepare_to_modify_documents
 from onyx.db.document import update_docs_chunk_count__no_commit
+from onyx.db.document import update_docs_content_hash__no_commit
 from onyx.db.document import update_docs_last_modified__no_commit
 from onyx.db.document import update_docs_updated_at__no_commit
 from onyx.db.document_set import fetch_document_sets_for_documents
@@ -41,12 +42,15 @@ class DocumentIndexingBatchAdapter:
         credential_id: int,
         tenant_id: str,
         index_attempt_metadata: IndexAttemptMetadata,
+        skip_unchanged_content: bool = False,
     ):
         self.db_session = db_session
         self.connector_id = connector_id
         self.credential_id = credential_id
         self.tenant_id = tenant_id
         self.index_attempt_metadata = index_attempt_metadata
+        # skip docs whose content didn't change since they were last indexed
+        self.skip_unchanged_content = skip_unchanged_content
 
     def prepare(
         self, documents: list[Document], ignore_time_skip: bool
@@ -57,6 +61,7 @@ class DocumentIndexingBatchAdapter:
             index_attempt_metadata=self.index_attempt_metadata,
             db_session=self.db_session,
             ignore_time_skip=ignore_time_skip,
+            skip_unchanged_content=self.skip_unchanged_content,
         )
 
         if not context:
@@ -191,6 +196,11 @@ class DocumentIndexingBatchAdapter:
             db_session=self.db_session,
         )
 
+        update_docs_content_hash__no_commit(
+            ids_to_content_hash=context.id_to_content_hash,
+            db_session=self.db_session,
+        )
+
         # these documents can now be counted as part of the CC Pairs
         # document count, so we need to mark them as indexed
         # NOTE: even documents we skipped since they were already up
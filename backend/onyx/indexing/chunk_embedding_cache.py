@@ -0,0 +1,167 @@
+"""Content addressed cache of chunk embeddings.
+
+Re-indexing a source re-embeds every chunk even though most documents did not change
+since the last run. Entries are keyed by the tenant, everything about the embedding
+model that changes the produced vector, and a hash of the exact text that would be
+sent to the model, so an unchanged chunk is a hit regardless of which document,
+connector or index attempt it comes from.
+
+Entries live in Redis. A single sorted set shared by all tenants holds the keys scored
+by last use, once it grows past the configured maximum the least recently used entries
+are evicted, so the total memory used by the cache is bounded regardless of the number
+of tenants.
+"""
+
+import hashlib
+import time
+from typing import cast
+
+from prometheus_client import Counter
+
+from onyx.configs.model_configs import CHUNK_EMBEDDING_CACHE_MAX_ENTRIES
+from onyx.configs.model_configs import CHUNK_EMBEDDING_CACHE_TTL_SECONDS
+from onyx.redis.redis_pool import get_redis_client
+from onyx.redis.redis_pool import tenant_key
+from onyx.utils.logger import setup_logger
+from shared_configs.configs import DEFAULT_REDIS_PREFIX
+from shared_configs.contextvars import get_current_tenant_id
+from shared_configs.embedding_transport import pack_embedding
+from shared_configs.embedding_transport import unpack_embedding
+from shared_configs.enums import EmbeddingProvider
+from shared_configs.model_server_models import Embedding
+
+logger = setup_logger()
+
+_REDIS_KEY_PREFIX = "chunk_embedding"
+# NOTE: the LRU is shared by all tenants, its members are the full (tenant prefixed)
+# keys of the entries
+_LRU_KEY = tenant_key(DEFAULT_REDIS_PREFIX, f"{_REDIS_KEY_PREFIX}:lru")
+
+_CACHE_HITS = Counter(
+    "onyx_chunk_embedding_cache_hits_total",
+    "Chunk embeddings served from cache instead of the embedding model",
+)
+_CACHE_MISSES = Counter(
+    "onyx_chunk_embedding_cache_misses_total",
+    "Chunk embeddings that had to be computed by the embedding model",
+)
+
+
+def get_embedding_model_fingerprint(
+    model_name: str,
+    provider_type: EmbeddingProvider | None,
+    normalize: bool,
+    passage_prefix: str | None,
+    reduced_dimension: int | None,
+    api_url: str | None,
+    deployment_name: str | None,
+    large_chunks_present: bool,
+) -> str:
+    # large chunks raise the context length the texts are trimmed to
+    fingerprint_parts = [
+        model_name,
+        str(provider_type),
+        str(normalize),
+        passage_prefix or "",
+        str(reduced_dimension),
+        api_url or "",
+        deployment_name or "",
+        str(large_chunks_present),
+    ]
+    return hashlib.sha256("\x1f".join(fingerprint_parts).encode()).hexdigest()[:16]
+
+
+class ChunkEmbeddingCache:
+    def __init__(
+        self,
+        max_entries: int = CHUNK_EMBEDDING_CACHE_MAX_ENTRIES,
+        ttl_seconds: int = CHUNK_EMBEDDING_CACHE_TTL_SECONDS,
+    ) -> None:
+        self._max_entries = max_entries
+        self._ttl_seconds = ttl_seconds
+
+    @staticmethod
+    def _build_key(tenant_id: str, model_fingerprint: str, text: str) -> str:
+        text_hash = hashlib.sha256(text.encode()).hexdigest()
+        return tenant_key(
+            tenant_id, f"{_REDIS_KEY_PREFIX}:{model_fingerprint}:{text_hash}"
+        )
+
+    def get_many(
+        self, model_fingerprint: str, texts: list[str]
+    ) -> dict[str, Embedding]:
+        """Returns the cached embeddings for whichever of `texts` are available and
+        marks them as recently used. Redis failures are logged and treated as misses."""
+        tenant_id = get_current_tenant_id()
+        lookups = {
+            text: self._build_key(tenant_id, model_fingerprint, text)
+            for text in dict.fromkeys(texts)
+        }
+        if not lookups:
+            return {}
+
+        found: dict[str, Embedding] = {}
+        try:
+            redis_client = get_redis_client(tenant_id=tenant_id)
+            values = cast(list[bytes | None], redis_client.mget(list(lookups.values())))
+
+            used_keys: dict[str, float] = {}
+            now = time.time()
+            for (text, key), value in zip(lookups.items(), values):
+                if value is not None:
+                    found[text] = unpack_embedding(bytes(value))
+                    used_keys[key] = now
+
+            if used_keys:
+                pipe = redis_client.pipeline(transaction=False)
+                pipe.zadd(_LRU_KEY, used_keys)
+                for key in used_keys:
+                    pipe.expire(key, self._ttl_seconds)
+                pipe.execute()
+        except Exception:
+            logger.exception("Failed to read chunk embeddings from Redis")
+
+        _CACHE_HITS.inc(len(found))
+        _CACHE_MISSES.inc(len(lookups) - len(found))
+        return found
+
+    def set_many(
+        self, model_fingerprint: str, embeddings: dict[str, Embedding]
+    ) -> None:
+        if not embeddings:
+            return
+
+        tenant_id = get_current_tenant_id()
+        now = time.time()
+        try:
+            redis_client = get_redis_client(tenant_id=tenant_id)
+            pipe = redis_client.pipeline(transaction=False)
+            used_keys: dict[str, float] = {}
+            for text, embedding in embeddings.items():
+                key = self._build_key(tenant_id, model_fingerprint, text)
+                pipe.set(key, pack_embedding(embedding), ex=self._ttl_seconds)
+                used_keys[key] = now
+            pipe.zadd(_LRU_KEY, used_keys)
+            pipe.expire(_LRU_KEY, self._ttl_seconds)
+            pipe.zcard(_LRU_KEY)
+            num_entries = pipe.execute()[-1]
+
+            num_to_evict = int(num_entries) - self._max_entries
+            if num_to_evict > 0:
+                evicted = cast(
+                    list[tuple[bytes, float]],
+                    redis_client.zpopmin(_LRU_KEY, num_to_evict),
+                )
+                if evicted:
+                    pipe = redis_client.pipeline(transaction=False)
+                    pipe.delete(*[key for key, _ in evicted])
+                    pipe.execute()
+        except Exception:
+            logger.exception("Failed to write chunk embeddings to Redis")
+
+
+_chunk_embedding_cache = ChunkEmbeddingCache()
+
+
+def get_chunk_embedding_cache() -> ChunkEmbeddingCache:
+    return _chunk_embedding_cache
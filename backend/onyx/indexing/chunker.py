@@ -1,9 +1,12 @@
+from collections import OrderedDict
+from collections.abc import Generator
 from typing import cast
 
 from chonkie import SentenceChunker
 
 from onyx.configs.app_configs import AVERAGE_SUMMARY_EMBEDDINGS
 from onyx.configs.app_configs import BLURB_SIZE
+from onyx.configs.app_configs import CHUNKER_TOKEN_COUNT_CACHE_SIZE
 from onyx.configs.app_configs import LARGE_CHUNK_RATIO
 from onyx.configs.app_configs import MINI_CHUNK_SIZE
 from onyx.configs.app_configs import SKIP_METADATA_IN_CHUNK
@@ -34,6 +37,9 @@ CHUNK_OVERLAP = 0
 # overwhelm the actual contents of the chunk
 MAX_METADATA_PERCENTAGE = 0.25
 CHUNK_MIN_CONTENT = 256
+# Sentences are short, longer texts are rarely counted twice and would only bloat the
+# token count cache
+TOKEN_COUNT_CACHE_MAX_TEXT_LENGTH = 2048
 
 logger = setup_logger()
 
@@ -121,6 +127,39 @@ def generate_large_chunks(chunks: list[DocAwareChunk]) -> list[DocAwareChunk]:
     return large_chunks
 
 
+class TokenCountCache:
+    """Bounded LRU of token counts by text. The blurb, chunk and mini chunk splitters
+    split the same text into the same sentences, so most sentences would otherwise be
+    encoded two or three times."""
+
+    def __init__(self, tokenizer: BaseTokenizer, max_entries: int) -> None:
+        self.tokenizer = tokenizer
+        self.max_entries = max_entries
+        self._counts: OrderedDict[str, int] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def count(self, text: str) -> int:
+        count = self._counts.get(text)
+        if count is not None:
+            self._counts.move_to_end(text)
+            self.hits += 1
+            return count
+
+        self.misses += 1
+        count = len(self.tokenizer.encode(text))
+        if self.max_entries > 0 and len(text) <= TOKEN_COUNT_CACHE_MAX_TEXT_LENGTH:
+            self._counts[text] = count
+            if len(self._counts) > self.max_entries:
+                self._counts.popitem(last=False)
+        return count
+
+    def clear(self) -> None:
+        self._counts.clear()
+        self.hits = 0
+        self.misses = 0
+
+
 class Chunker:
     """
     Chunks documents into smaller chunks for indexing.
@@ -138,6 +177,7 @@ class Chunker:
         chunk_overlap: int = CHUNK_OVERLAP,
         mini_chunk_size: int = MINI_CHUNK_SIZE,
         callback: IndexingHeartbeatInterface | None = None,
+        token_count_cache_size: int = CHUNKER_TOKEN_COUNT_CACHE_SIZE,
     ) -> None:
         self.include_metadata = include_metadata
         self.chunk_token_limit = chunk_token_limit
@@ -157,9 +197,9 @@ class Chunker:
         self.max_context = 0
         self.prompt_tokens = 0
 
-        # Create a token counter function that returns the count instead of the tokens
-        def token_counter(text: str) -> int:
-            return len(tokenizer.encode(text))
+        # Shared by the splitters so that every sentence is only encoded once per batch
+        self.token_counts = TokenCountCache(tokenizer, token_count_cache_size)
+        token_counter = self.token_counts.count
 
         self.blurb_splitter = SentenceChunker(
             tokenizer_or_token_counter=token_counter,
@@ -321,7 +361,7 @@ class Chunker:
                 continue
 
             # CASE 2: Normal text section
-            section_token_count = len(self.tokenizer.encode(section_text))
+            section_token_count = self.token_counts.count(section_text)
 
             # If the section is large on its own, split it separately
             if section_token_count > content_token_limit:
@@ -345,7 +385,7 @@ class Chunker:
                     # If even the split_text is bigger than strict limit, further split
                     if (
                         STRICT_CHUNK_TOKEN_LIMIT
-                        and len(self.tokenizer.encode(split_text)) > content_token_limit
+                        and self.token_counts.count(split_text) > content_token_limit
                     ):
                         smaller_chunks = self._split_oversized_chunk(
                             split_text, content_token_limit
@@ -378,7 +418,7 @@ class Chunker:
             current_token_count = len(self.tokenizer.encode(chunk_text))
             current_offset = len(shared_precompare_cleanup(chunk_text))
             next_section_tokens = (
-                len(self.tokenizer.encode(SECTION_SEPARATOR)) + section_token_count
+                self.token_counts.count(SECTION_SEPARATOR) + section_token_count
             )
 
             if next_section_tokens + current_token_count <= content_token_limit:
@@ -511,6 +551,32 @@ class Chunker:
 
         return normal_chunks
 
+    def chunk_iter(
+        self, documents: list[IndexingDocument]
+    ) -> Generator[list[DocAwareChunk], None, None]:
+        """
+        Same as chunk, but yields the chunks of every document as soon as the document
+        is chunked so that they can be embedded without waiting for the rest of the batch.
+        """
+        self.token_counts.clear()
+        try:
+            for document in documents:
+                if self.callback and self.callback.should_stop():
+                    raise RuntimeError("Chunker.chunk: Stop signal detected")
+
+                chunks = self._handle_single_document(document)
+                if self.callback:
+                    self.callback.progress("Chunker.chunk", len(chunks))
+
+                yield chunks
+        finally:
+            logger.debug(
+                f"Chunker token count cache: hits={self.token_counts.hits} "
+                f"misses={self.token_counts.misses}"
+            )
+            # don't hold on to the texts of the batch between batches
+            self.token_counts.clear()
+
     def chunk(self, documents: list[IndexingDocument]) -> list[DocAwareChunk]:
         """
         Takes in a list of documents and chunks them into smaller chunks for indexing
@@ -518,15 +584,8 @@ class Chunker:
 
         Works with both standard Document objects and IndexingDocument objects with processed_sections.
         """
-        final_chunks: list[DocAwareChunk] = []
-        for document in documents:
-            if self.callback and self.callback.should_stop():
-                raise RuntimeError("Chunker.chunk: Stop signal detected")
-
-            chunks = self._handle_single_document(document)
-            final_chunks.extend(chunks)
-
-            if self.callback:
-                self.callback.progress("Chunker.chunk", len(chunks))
-
-        return final_chunks
+        return [
+            chunk
+            for doc_chunks in self.chunk_iter(documents)
+            for chunk in doc_chunks
+        ]
@@ -0,0 +1,33 @@
+import hashlib
+import json
+
+from onyx.connectors.models import Document
+
+
+def compute_document_content_hash(document: Document) -> str:
+    """Fingerprint of everything that ends up in the document index for a document,
+    except for access / document sets / boosts which are synced separately."""
+    hasher = hashlib.sha256()
+    hasher.update(
+        json.dumps(
+            [
+                document.source,
+                document.semantic_identifier,
+                document.title,
+                sorted(document.metadata.items()),
+                (
+                    document.doc_updated_at.isoformat()
+                    if document.doc_updated_at
+                    else None
+                ),
+                [owner.model_dump() for owner in document.primary_owners or []],
+                [owner.model_dump() for owner in document.secondary_owners or []],
+            ],
+            default=str,
+        ).encode()
+    )
+    for section in document.sections:
+        hasher.update(
+            json.dumps([section.link, section.text, section.image_file_id]).encode()
+        )
+    return hasher.hexdigest()
@@ -3,10 +3,13 @@ from abc import ABC
 from abc import abstractmethod
 from collections import defaultdict
 
+from onyx.configs.model_configs import ENABLE_CHUNK_EMBEDDING_CACHE
 from onyx.connectors.models import ConnectorFailure
 from onyx.connectors.models import ConnectorStopSignal
 from onyx.connectors.models import DocumentFailure
 from onyx.db.models import SearchSettings
+from onyx.indexing.chunk_embedding_cache import get_chunk_embedding_cache
+from onyx.indexing.chunk_embedding_cache import get_embedding_model_fingerprint
 from onyx.indexing.indexing_heartbeat import IndexingHeartbeatInterface
 from onyx.indexing.models import ChunkEmbedding
 from onyx.indexing.models import DocAwareChunk
@@ -51,6 +54,7 @@ class IndexingEmbedder(ABC):
         self.api_url = api_url
         self.api_version = api_version
         self.deployment_name = deployment_name
+        self.reduced_dimension = reduced_dimension
 
         self.embedding_model = EmbeddingModel(
             model_name=model_name,
@@ -144,14 +148,6 @@ class DefaultIndexingEmbedder(IndexingEmbedder):
                     raise RuntimeError("Large chunk contains mini chunks")
                 flat_chunk_texts.extend(chunk.mini_chunk_texts)
 
-        embeddings = self.embedding_model.encode(
-            texts=flat_chunk_texts,
-            text_type=EmbedTextType.PASSAGE,
-            large_chunks_present=large_chunks_present,
-            tenant_id=tenant_id,
-            request_id=request_id,
-        )
-
         chunk_titles = {
             chunk.source_document.get_title_for_document_index() for chunk in chunks
         }
@@ -161,9 +157,32 @@ class DefaultIndexingEmbedder(IndexingEmbedder):
         # which is ok, it just won't contribute at all to the scoring.
         chunk_titles_list = [title for title in chunk_titles if title]
 
+        # Local models embed the titles in the same call as the chunks so that the
+        # length bucketing of the embedding model can pack the short titles together.
+        # Large chunks raise the context length, titles must keep the default one
+        embed_titles_with_chunks = (
+            self.provider_type is None and not large_chunks_present
+        )
+
+        embeddings = self._encode_passages(
+            texts=(
+                flat_chunk_texts + chunk_titles_list
+                if embed_titles_with_chunks
+                else flat_chunk_texts
+            ),
+            large_chunks_present=large_chunks_present,
+            tenant_id=tenant_id,
+            request_id=request_id,
+        )
+
         # Cache the Title embeddings to only have to do it once
         title_embed_dict: dict[str, Embedding] = {}
-        if chunk_titles_list:
+        if embed_titles_with_chunks:
+            title_embed_dict.update(
+                zip(chunk_titles_list, embeddings[len(flat_chunk_texts) :])
+            )
+            embeddings = embeddings[: len(flat_chunk_texts)]
+        elif chunk_titles_list:
             title_embeddings = self.embedding_model.encode(
                 chunk_titles_list,
                 text_type=EmbedTextType.PASSAGE,
@@ -220,6 +239,62 @@ class DefaultIndexingEmbedder(IndexingEmbedder):
 
         return embedded_chunks
 
+    def _encode_passages(
+        self,
+        texts: list[str],
+        large_chunks_present: bool,
+        tenant_id: str | None = None,
+        request_id: str | None = None,
+    ) -> list[Embedding]:
+        """Embeds the texts, only sending the ones without a cached embedding to the
+        embedding model when the chunk embedding cache is enabled."""
+        if not ENABLE_CHUNK_EMBEDDING_CACHE:
+            return self.embedding_model.encode(
+                texts=texts,
+                text_type=EmbedTextType.PASSAGE,
+                large_chunks_present=large_chunks_present,
+                tenant_id=tenant_id,
+                request_id=request_id,
+            )
+
+        cache = get_chunk_embedding_cache()
+        model_fingerprint = get_embedding_model_fingerprint(
+            model_name=self.model_name,
+            provider_type=self.provider_type,
+            normalize=self.normalize,
+            passage_prefix=self.passage_prefix,
+            reduced_dimension=self.reduced_dimension,
+            api_url=self.api_url,
+            deployment_name=self.deployment_name,
+            large_chunks_present=large_chunks_present,
+        )
+        text_to_embedding = cache.get_many(model_fingerprint, texts)
+
+        uncached_texts = [
+            text for text in dict.fromkeys(texts) if text not in text_to_embedding
+        ]
+        logger.info(
+            f"Chunk embedding cache: texts={len(texts)} "
+            f"hits={len(text_to_embedding)} misses={len(uncached_texts)}"
+        )
+        if uncached_texts:
+            new_embeddings = dict(
+                zip(
+                    uncached_texts,
+                    self.embedding_model.encode(
+                        texts=uncached_texts,
+                        text_type=EmbedTextType.PASSAGE,
+                        large_chunks_present=large_chunks_present,
+                        tenant_id=tenant_id,
+                        request_id=request_id,
+                    ),
+                )
+            )
+            cache.set_many(model_fingerprint, new_embeddings)
+            text_to_embedding.update(new_embeddings)
+
+        return [text_to_embedding[text] for text in texts]
+
     @classmethod
     def from_db_search_settings(
         cls,
@@ -1,5 +1,8 @@
+import time
 from collections import defaultdict
 from collections.abc import Callable
+from collections.abc import Generator
+from collections.abc import Iterable
 from typing import Protocol
 
 from pydantic import BaseModel
@@ -9,6 +12,11 @@ from sqlalchemy.orm import Session
 from onyx.configs.app_configs import DEFAULT_CONTEXTUAL_RAG_LLM_NAME
 from onyx.configs.app_configs import DEFAULT_CONTEXTUAL_RAG_LLM_PROVIDER
 from onyx.configs.app_configs import ENABLE_CONTEXTUAL_RAG
+from onyx.configs.app_configs import ENABLE_IMAGE_SUMMARY_CACHE
+from onyx.configs.app_configs import ENABLE_PIPELINED_INDEXING
+from onyx.configs.app_configs import IMAGE_SUMMARIZATION_MAX_CONCURRENCY
+from onyx.configs.app_configs import INDEXING_CHUNK_STREAM_SIZE
+from onyx.configs.app_configs import INDEXING_PIPELINE_QUEUE_SIZE
 from onyx.configs.app_configs import MAX_DOCUMENT_CHARS
 from onyx.configs.app_configs import MAX_TOKENS_FOR_FULL_INCLUSION
 from onyx.configs.app_configs import USE_CHUNK_SUMMARY
@@ -28,8 +36,12 @@ from onyx.connectors.models import IndexingDocument
 from onyx.connectors.models import Section
 from onyx.connectors.models import TextSection
 from onyx.db.document import get_documents_by_ids
+from onyx.db.document import get_indexed_document_ids_for_cc_pair
 from onyx.db.document import upsert_document_by_connector_credential_pair
 from onyx.db.document import upsert_documents
+from onyx.db.engine.sql_engine import get_session_with_current_tenant
+from onyx.db.image_summary import get_image_summaries
+from onyx.db.image_summary import upsert_image_summaries
 from onyx.db.models import Document as DBDocument
 from onyx.db.models import IndexModelStatus
 from onyx.db.search_settings import get_active_search_settings
@@ -40,15 +52,21 @@ from onyx.document_index.document_index_utils import (
 from onyx.document_index.interfaces import DocumentIndex
 from onyx.document_index.interfaces import DocumentMetadata
 from onyx.document_index.interfaces import IndexBatchParams
+from onyx.file_processing.image_summarization import get_image_summary_fingerprint
+from onyx.file_processing.image_summarization import hash_image
 from onyx.file_processing.image_summarization import summarize_image_with_error_handling
 from onyx.file_store.file_store import get_default_file_store
 from onyx.indexing.chunker import Chunker
+from onyx.indexing.content_hash import compute_document_content_hash
 from onyx.indexing.embedder import embed_chunks_with_failure_handling
 from onyx.indexing.embedder import IndexingEmbedder
 from onyx.indexing.models import DocAwareChunk
 from onyx.indexing.models import IndexChunk
 from onyx.indexing.models import IndexingBatchAdapter
 from onyx.indexing.models import UpdatableChunkData
+from onyx.indexing.stage_pipeline import format_stage_timings
+from onyx.indexing.stage_pipeline import run_stage_pipeline
+from onyx.indexing.stage_pipeline import StageTiming
 from onyx.indexing.vector_db_insertion import write_chunks_to_vector_db_with_backoff
 from onyx.llm.chat_llm import LLMRateLimitError
 from onyx.llm.factory import get_default_llm_with_vision
@@ -79,6 +97,8 @@ logger = setup_logger()
 class DocumentBatchPrepareContext(BaseModel):
     updatable_docs: list[Document]
     id_to_boost_map: dict[str, int]
+    # content hashes to store once the docs are indexed
+    id_to_content_hash: dict[str, str] = {}
     indexable_docs: list[IndexingDocument] = []
     model_config = ConfigDict(arbitrary_types_allowed=True)
 
@@ -232,6 +252,47 @@ def get_doc_ids_to_update(
     return updatable_docs
 
 
+def _external_access_changed(document: Document, db_doc: DBDocument) -> bool:
+    if document.external_access is None:
+        return False
+
+    return (
+        document.external_access.is_public != db_doc.is_public
+        or set(document.external_access.external_user_emails)
+        != set(db_doc.external_user_emails or [])
+        or set(document.external_access.external_user_group_ids)
+        != set(db_doc.external_user_group_ids or [])
+    )
+
+
+def get_docs_with_changed_content(
+    documents: list[Document],
+    db_docs: list[DBDocument],
+    id_to_content_hash: dict[str, str],
+    indexed_doc_ids: set[str],
+) -> list[Document]:
+    """Filters out documents whose content is identical to what was last indexed.
+
+    Only docs already indexed for the current cc pair are skipped, docs that are new to
+    it or whose permissions changed still go through the pipeline so their access is
+    updated in the document index."""
+    id_to_db_doc = {db_doc.id: db_doc for db_doc in db_docs}
+
+    changed_docs: list[Document] = []
+    for doc in documents:
+        db_doc = id_to_db_doc.get(doc.id)
+        if (
+            db_doc is not None
+            and db_doc.content_hash == id_to_content_hash[doc.id]
+            and doc.id in indexed_doc_ids
+            and not _external_access_changed(doc, db_doc)
+        ):
+            continue
+        changed_docs.append(doc)
+
+    return changed_docs
+
+
 def index_doc_batch_with_handler(
     *,
     chunker: Chunker,
@@ -296,9 +357,14 @@ def index_doc_batch_prepare(
     index_attempt_metadata: IndexAttemptMetadata,
     db_session: Session,
     ignore_time_skip: bool = False,
+    skip_unchanged_content: bool = False,
 ) -> DocumentBatchPrepareContext | None:
     """Sets up the documents in the relational DB (source of truth) for permissions, metadata, etc.
-    This preceeds indexing it into the actual document index."""
+    This preceeds indexing it into the actual document index.
+
+    skip_unchanged_content also skips docs whose content hash matches the one stored
+    when they were last indexed, should be off when (re)building an index from scratch.
+    """
     # Create a trimmed list of docs that don't have a newer updated at
     # Shortcuts the time-consuming flow on connector index retries
     document_ids: list[str] = [document.id for document in documents]
@@ -322,6 +388,28 @@ def index_doc_batch_prepare(
             f"because they are up to date. Skipped doc IDs: {skipped_doc_ids}"
         )
 
+    id_to_content_hash = {
+        doc.id: compute_document_content_hash(doc) for doc in updatable_docs
+    }
+    if skip_unchanged_content and updatable_docs:
+        num_updatable_docs = len(updatable_docs)
+        updatable_docs = get_docs_with_changed_content(
+            documents=updatable_docs,
+            db_docs=db_docs,
+            id_to_content_hash=id_to_content_hash,
+            indexed_doc_ids=get_indexed_document_ids_for_cc_pair(
+                db_session=db_session,
+                connector_id=index_attempt_metadata.connector_id,
+                credential_id=index_attempt_metadata.credential_id,
+                document_ids=[doc.id for doc in updatable_docs],
+            ),
+        )
+        if len(updatable_docs) != num_updatable_docs:
+            logger.info(
+                f"Skipping {num_updatable_docs - len(updatable_docs)} documents "
+                "because their content is unchanged"
+            )
+
     # for all updatable docs, upsert into the DB
     # Does not include doc_updated_at which is also used to indicate a successful update
     if updatable_docs:
@@ -350,7 +438,11 @@ def index_doc_batch_prepare(
 
     id_to_boost_map = {doc.id: doc.boost for doc in db_docs}
     return DocumentBatchPrepareContext(
-        updatable_docs=updatable_docs, id_to_boost_map=id_to_boost_map
+        updatable_docs=updatable_docs,
+        id_to_boost_map=id_to_boost_map,
+        id_to_content_hash={
+            doc.id: id_to_content_hash[doc.id] for doc in updatable_docs
+        },
     )
 
 
@@ -453,54 +545,29 @@ def process_image_sections(documents: list[Document]) -> list[IndexingDocument]:
             for document in documents
         ]
 
+    image_file_id_to_summary = _summarize_images(
+        llm=llm,
+        image_file_ids=[
+            section.image_file_id
+            for document in documents
+            for section in document.sections
+            if isinstance(section, ImageSection)
+        ],
+    )
+
     indexed_documents: list[IndexingDocument] = []
 
     for document in documents:
         processed_sections: list[Section] = []
 
         for section in document.sections:
-            # For ImageSection, process and create base Section with both text and image_file_id
+            # For ImageSection, create base Section with both the image summary and image_file_id
             if isinstance(section, ImageSection):
-                # Default section with image path preserved - ensure text is always a string
                 processed_section = Section(
                     link=section.link,
                     image_file_id=section.image_file_id,
-                    text="",  # Initialize with empty string
+                    text=image_file_id_to_summary[section.image_file_id],
                 )
-
-                # Try to get image summary
-                try:
-                    file_store = get_default_file_store()
-
-                    file_record = file_store.read_file_record(
-                        file_id=section.image_file_id
-                    )
-                    if not file_record:
-                        logger.warning(
-                            f"Image file {section.image_file_id} not found in FileStore"
-                        )
-
-                        processed_section.text = "[Image could not be processed]"
-                    else:
-                        # Get the image data
-                        image_data_io = file_store.read_file(
-                            file_id=section.image_file_id
-                        )
-                        image_data = image_data_io.read()
-                        summary = summarize_image_with_error_handling(
-                            llm=llm,
-                            image_data=image_data,
-                            context_name=file_record.display_name or "Image",
-                        )
-
-                        if summary:
-                            processed_section.text = summary
-                        else:
-                            processed_section.text = "[Image could not be summarized]"
-                except Exception as e:
-                    logger.error(f"Error processing image section: {e}")
-                    processed_section.text = "[Error processing image]"
-
                 processed_sections.append(processed_section)
 
             # For TextSection, create a base Section with text and link
@@ -521,6 +588,108 @@ def process_image_sections(documents: list[Document]) -> list[IndexingDocument]:
     return indexed_documents
 
 
+def _summarize_images(llm: LLM, image_file_ids: list[str]) -> dict[str, str]:
+    """Returns the text to index for every image, its summary or a placeholder if it
+    could not be summarized.
+
+    Every distinct image (by content) is only summarized once per batch, images that
+    were summarized before with the same vision model and prompts are served from the
+    image summary table, and the rest are summarized concurrently."""
+    image_file_id_to_text: dict[str, str] = {}
+    image_file_id_to_hash: dict[str, str] = {}
+    image_hash_to_data: dict[str, bytes] = {}
+    image_hash_to_name: dict[str, str] = {}
+
+    file_store = get_default_file_store()
+    for image_file_id in dict.fromkeys(image_file_ids):
+        try:
+            file_record = file_store.read_file_record(file_id=image_file_id)
+            if not file_record:
+                logger.warning(f"Image file {image_file_id} not found in FileStore")
+                image_file_id_to_text[image_file_id] = "[Image could not be processed]"
+                continue
+
+            image_data = file_store.read_file(file_id=image_file_id).read()
+        except Exception as e:
+            logger.error(f"Error processing image section: {e}")
+            image_file_id_to_text[image_file_id] = "[Error processing image]"
+            continue
+
+        image_hash = hash_image(image_data)
+        image_file_id_to_hash[image_file_id] = image_hash
+        image_hash_to_data.setdefault(image_hash, image_data)
+        image_hash_to_name.setdefault(image_hash, file_record.display_name or "Image")
+
+    fingerprint = get_image_summary_fingerprint(llm)
+    image_hash_to_summary: dict[str, str] = {}
+    if ENABLE_IMAGE_SUMMARY_CACHE and image_hash_to_data:
+        try:
+            with get_session_with_current_tenant() as db_session:
+                image_hash_to_summary = get_image_summaries(
+                    db_session=db_session,
+                    model_fingerprint=fingerprint,
+                    image_hashes=list(image_hash_to_data),
+                )
+        except Exception:
+            logger.exception("Failed to read cached image summaries")
+
+    missed_hashes = [
+        image_hash
+        for image_hash in image_hash_to_data
+        if image_hash not in image_hash_to_summary
+    ]
+    logger.debug(
+        f"Image summaries: {len(image_hash_to_data)} distinct images, "
+        f"{len(image_hash_to_data) - len(missed_hashes)} cached"
+    )
+
+    failed_hashes: set[str] = set()
+
+    def _summarize(image_hash: str) -> str | None:
+        try:
+            return summarize_image_with_error_handling(
+                llm=llm,
+                image_data=image_hash_to_data[image_hash],
+                context_name=image_hash_to_name[image_hash],
+            )
+        except Exception as e:
+            logger.error(f"Error processing image section: {e}")
+            failed_hashes.add(image_hash)
+            return None
+
+    new_summaries = run_functions_tuples_in_parallel(
+        [(_summarize, (image_hash,)) for image_hash in missed_hashes],
+        max_workers=IMAGE_SUMMARIZATION_MAX_CONCURRENCY,
+    )
+    image_hash_to_new_summary = {
+        image_hash: summary
+        for image_hash, summary in zip(missed_hashes, new_summaries)
+        if summary
+    }
+    image_hash_to_summary.update(image_hash_to_new_summary)
+
+    if ENABLE_IMAGE_SUMMARY_CACHE and image_hash_to_new_summary:
+        try:
+            with get_session_with_current_tenant() as db_session:
+                upsert_image_summaries(
+                    db_session=db_session,
+                    model_fingerprint=fingerprint,
+                    image_hash_to_summary=image_hash_to_new_summary,
+                )
+        except Exception:
+            logger.exception("Failed to store image summaries")
+
+    for image_file_id, image_hash in image_file_id_to_hash.items():
+        if image_hash in image_hash_to_summary:
+            image_file_id_to_text[image_file_id] = image_hash_to_summary[image_hash]
+        elif image_hash in failed_hashes:
+            image_file_id_to_text[image_file_id] = "[Error processing image]"
+        else:
+            image_file_id_to_text[image_file_id] = "[Image could not be summarized]"
+
+    return image_file_id_to_text
+
+
 def add_document_summaries(
     chunks_by_doc: list[DocAwareChunk],
     llm: LLM,
@@ -657,6 +826,24 @@ def add_contextual_summaries(
     return chunks
 
 
+def iter_chunk_windows(
+    chunks_per_doc: Iterable[list[DocAwareChunk]], window_size: int
+) -> Generator[list[DocAwareChunk], None, None]:
+    """Groups the chunks of consecutive documents into windows of at least window_size
+    chunks (except for the last one). A document is never split across windows, so
+    embedding failures can still be isolated to a document. A window_size <= 0 puts
+    everything in a single window."""
+    window: list[DocAwareChunk] = []
+    for doc_chunks in chunks_per_doc:
+        window.extend(doc_chunks)
+        if 0 < window_size <= len(window):
+            yield window
+            window = []
+
+    if window:
+        yield window
+
+
 @log_function_time(debug_only=True)
 def index_doc_batch(
     *,
@@ -672,6 +859,7 @@ def index_doc_batch(
     llm: LLM | None = None,
     ignore_time_skip: bool = False,
     filter_fnc: Callable[[list[Document]], list[Document]] = filter_documents,
+    pipelined: bool = ENABLE_PIPELINED_INDEXING,
 ) -> IndexingPipelineResult:
     """End-to-end indexing for a pre-batched set of documents."""
     """Takes different pieces of the indexing pipeline and applies it to a batch of documents
@@ -704,13 +892,7 @@ def index_doc_batch(
     ]
     logger.debug(f"Starting indexing process for documents: {doc_descriptors}")
 
-    logger.debug("Starting chunking")
-    # NOTE: no special handling for failures here, since the chunker is not
-    # a common source of failure for the indexing pipeline
-    chunks: list[DocAwareChunk] = chunker.chunk(context.indexable_docs)
     llm_tokenizer: BaseTokenizer | None = None
-
-    # contextual RAG
     if enable_contextual_rag:
         assert llm is not None, "must provide an LLM for contextual RAG"
         llm_tokenizer = get_tokenizer(
@@ -718,34 +900,92 @@ def index_doc_batch(
             provider_type=llm.config.model_provider,
         )
 
+    def _contextualize(chunks: list[DocAwareChunk]) -> list[DocAwareChunk]:
+        if not llm or not llm_tokenizer:
+            return chunks
+
         # Because the chunker's tokens are different from the LLM's tokens,
         # We add a fudge factor to ensure we truncate prompts to the LLM's token limit
-        chunks = add_contextual_summaries(
+        return add_contextual_summaries(
             chunks=chunks,
             llm=llm,
             tokenizer=llm_tokenizer,
             chunk_token_limit=chunker.chunk_token_limit * 2,
         )
 
-    logger.debug("Starting embedding")
-    chunks_with_embeddings, embedding_failures = (
-        embed_chunks_with_failure_handling(
+    def _embed(
+        chunks: list[DocAwareChunk],
+    ) -> tuple[list[IndexChunk], list[ConnectorFailure]]:
+        return embed_chunks_with_failure_handling(
             chunks=chunks,
             embedder=embedder,
             tenant_id=tenant_id,
             request_id=request_id,
         )
-        if chunks
-        else ([], [])
-    )
 
-    chunk_content_scores = (
-        _get_aggregated_chunk_boost_factor(
-            chunks_with_embeddings, information_content_classification_model
+    def _classify(embedded_chunks: list[IndexChunk]) -> list[float]:
+        return (
+            _get_aggregated_chunk_boost_factor(
+                embedded_chunks, information_content_classification_model
+            )
+            if USE_INFORMATION_CONTENT_CLASSIFICATION and embedded_chunks
+            else [1.0] * len(embedded_chunks)
         )
-        if USE_INFORMATION_CONTENT_CLASSIFICATION
-        else [1.0] * len(chunks_with_embeddings)
+
+    # NOTE: no special handling for failures in the chunker, since it is not
+    # a common source of failure for the indexing pipeline.
+    # Chunks are embedded as soon as enough of them were produced instead of after
+    # the whole batch was chunked
+    chunk_windows = iter_chunk_windows(
+        chunker.chunk_iter(context.indexable_docs), INDEXING_CHUNK_STREAM_SIZE
     )
+    chunks_with_embeddings: list[IndexChunk] = []
+    embedding_failures: list[ConnectorFailure] = []
+    chunk_content_scores: list[float] = []
+    stage_timings: list[StageTiming] = []
+    if pipelined:
+        logger.debug("Starting pipelined chunking, embedding and classification")
+
+        def _classify_window(
+            embedded: tuple[list[IndexChunk], list[ConnectorFailure]],
+        ) -> tuple[list[IndexChunk], list[ConnectorFailure], list[float]]:
+            window_chunks_with_embeddings, window_embedding_failures = embedded
+            return (
+                window_chunks_with_embeddings,
+                window_embedding_failures,
+                _classify(window_chunks_with_embeddings),
+            )
+
+        stages: list[tuple[str, Callable]] = []
+        if llm and llm_tokenizer:
+            stages.append(("contextual_rag", _contextualize))
+        stages.append(("embed", _embed))
+        stages.append(("classify", _classify_window))
+
+        window_results, stage_timings = run_stage_pipeline(
+            source=chunk_windows,
+            stages=stages,
+            source_name="chunk",
+            queue_size=INDEXING_PIPELINE_QUEUE_SIZE,
+        )
+        for (
+            window_chunks_with_embeddings,
+            window_embedding_failures,
+            window_scores,
+        ) in window_results:
+            chunks_with_embeddings.extend(window_chunks_with_embeddings)
+            embedding_failures.extend(window_embedding_failures)
+            chunk_content_scores.extend(window_scores)
+    else:
+        logger.debug("Starting chunking and embedding")
+        for chunks in chunk_windows:
+            window_chunks_with_embeddings, window_embedding_failures = _embed(
+                _contextualize(chunks)
+            )
+            chunks_with_embeddings.extend(window_chunks_with_embeddings)
+            embedding_failures.extend(window_embedding_failures)
+
+        chunk_content_scores = _classify(chunks_with_embeddings)
 
     updatable_ids = [doc.id for doc in context.updatable_docs]
     updatable_chunk_data = [
@@ -757,6 +997,7 @@ def index_doc_batch(
         for chunk, score in zip(chunks_with_embeddings, chunk_content_scores)
     ]
 
+    write_start = time.monotonic()
     # Acquires a lock on the documents so that no other process can modify them
     # NOTE: don't need to acquire till here, since this is when the actual race condition
     # with Vespa can occur.
@@ -819,6 +1060,13 @@ def index_doc_batch(
                 "This should never happen."
             )
 
+        # failed docs have to be indexed again next time
+        for failure in vector_db_write_failures + embedding_failures:
+            if failure.failed_document:
+                context.id_to_content_hash.pop(
+                    failure.failed_document.document_id, None
+                )
+
         adapter.post_index(
             context=context,
             updatable_chunk_data=updatable_chunk_data,
@@ -826,6 +1074,22 @@ def index_doc_batch(
             result=result,
         )
 
+    if pipelined:
+        # the write stage stays sequential since only one commit is allowed while the
+        # documents are locked, it overlaps with the other stages of concurrently
+        # processed batches instead
+        stage_timings.append(
+            StageTiming(
+                name="write",
+                busy_seconds=time.monotonic() - write_start,
+                items=1,
+            )
+        )
+        logger.info(
+            f"Indexing stage timings for {len(context.indexable_docs)} documents: "
+            f"{format_stage_timings(stage_timings)}"
+        )
+
     return IndexingPipelineResult(
         new_docs=len([r for r in insertion_records if not r.already_existed]),
         total_docs=len(filtered_documents),
@@ -0,0 +1,169 @@
+import contextvars
+import queue
+import threading
+import time
+from collections.abc import Callable
+from collections.abc import Iterable
+from collections.abc import Iterator
+from collections.abc import Sequence
+from typing import Any
+
+from pydantic import BaseModel
+
+from onyx.utils.logger import setup_logger
+
+logger = setup_logger()
+
+# how often blocked stages check whether another stage failed
+_POLL_INTERVAL = 0.1
+
+_DONE = object()
+
+
+class StageTiming(BaseModel):
+    name: str
+    # time spent doing the stage's work
+    busy_seconds: float = 0.0
+    # time spent waiting for the previous stage or for the next one to catch up
+    idle_seconds: float = 0.0
+    items: int = 0
+
+
+def format_stage_timings(timings: Sequence[StageTiming]) -> str:
+    return " ".join(
+        f"{timing.name}(busy={timing.busy_seconds:.2f}s "
+        f"idle={timing.idle_seconds:.2f}s items={timing.items})"
+        for timing in timings
+    )
+
+
+def _put(out_queue: queue.Queue, item: Any, stop: threading.Event) -> bool:
+    while not stop.is_set():
+        try:
+            out_queue.put(item, timeout=_POLL_INTERVAL)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _get(in_queue: queue.Queue, stop: threading.Event) -> Any:
+    while not stop.is_set():
+        try:
+            return in_queue.get(timeout=_POLL_INTERVAL)
+        except queue.Empty:
+            continue
+    return _DONE
+
+
+def run_stage_pipeline(
+    source: Iterable[Any],
+    stages: Sequence[tuple[str, Callable[[Any], Any]]],
+    source_name: str = "source",
+    queue_size: int = 1,
+) -> tuple[list[Any], list[StageTiming]]:
+    """Runs every item of source through the stages in order, each stage (and the
+    iteration of source) in its own thread, connected by bounded queues so that a
+    stage works on the next item while the following stage handles the previous one.
+
+    Returns the outputs of the last stage in the order of source and the busy / idle
+    time of every stage. The first exception raised by a stage stops the pipeline and
+    is re-raised."""
+    timings = [StageTiming(name=source_name)] + [
+        StageTiming(name=name) for name, _ in stages
+    ]
+    queues: list[queue.Queue] = [
+        queue.Queue(maxsize=max(queue_size, 1)) for _ in stages
+    ]
+    outputs: list[Any] = []
+    errors: list[BaseException] = []
+    stop = threading.Event()
+
+    def _run_source() -> None:
+        timing = timings[0]
+        items: Iterator[Any] = iter(source)
+        try:
+            while True:
+                start = time.monotonic()
+                try:
+                    item = next(items)
+                except StopIteration:
+                    break
+                finally:
+                    timing.busy_seconds += time.monotonic() - start
+
+                timing.items += 1
+                start = time.monotonic()
+                if not _put(queues[0], item, stop):
+                    return
+                timing.idle_seconds += time.monotonic() - start
+
+            _put(queues[0], _DONE, stop)
+        except BaseException as e:
+            errors.append(e)
+            stop.set()
+        finally:
+            # run the cleanup of generators that were stopped early in this thread
+            close = getattr(items, "close", None)
+            if close is not None:
+                close()
+
+    def _run_stage(stage_num: int) -> None:
+        _, func = stages[stage_num]
+        timing = timings[stage_num + 1]
+        in_queue = queues[stage_num]
+        out_queue = queues[stage_num + 1] if stage_num + 1 < len(stages) else None
+        try:
+            while True:
+                start = time.monotonic()
+                item = _get(in_queue, stop)
+                timing.idle_seconds += time.monotonic() - start
+                if item is _DONE:
+                    if out_queue is not None:
+                        _put(out_queue, _DONE, stop)
+                    return
+
+                start = time.monotonic()
+                result = func(item)
+                timing.busy_seconds += time.monotonic() - start
+                timing.items += 1
+
+                if out_queue is None:
+                    outputs.append(result)
+                    continue
+
+                start = time.monotonic()
+                if not _put(out_queue, result, stop):
+                    return
+                timing.idle_seconds += time.monotonic() - start
+        except BaseException as e:
+            errors.append(e)
+            stop.set()
+
+    # propagate contextvars (e.g. the tenant id) to the stages like
+    # run_functions_tuples_in_parallel does
+    threads = [
+        threading.Thread(
+            target=contextvars.copy_context().run,
+            args=(_run_source,),
+            name=f"indexing-stage-{source_name}",
+            daemon=True,
+        )
+    ] + [
+        threading.Thread(
+            target=contextvars.copy_context().run,
+            args=(_run_stage, stage_num),
+            name=f"indexing-stage-{name}",
+            daemon=True,
+        )
+        for stage_num, (name, _) in enumerate(stages)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    if errors:
+        raise errors[0]
+
+    return outputs, timings
@@ -0,0 +1,165 @@
+"""Per process cache in front of PgRedisKVStore.
+
+Values are kept as their JSON serialization, bounded in number (LRU) and in age (TTL).
+Every write or delete publishes the (tenant, key) on a Redis channel and each process
+listens on it from a daemon thread to drop its copy, so a value changed by one API
+replica is not served stale by the others. If the subscription breaks the whole cache
+is cleared since invalidations may have been missed, and the TTL bounds staleness in
+the window where a message is lost.
+
+Nothing is cached before the subscription is established, and a fill is dropped if any
+invalidation was processed since it started (see `start_fill`), so a value read just
+before a concurrent write can't be cached after the write's invalidation was handled.
+"""
+
+import json
+import threading
+import time
+from collections import OrderedDict
+
+from prometheus_client import Counter
+
+from onyx.configs.app_configs import KV_STORE_LOCAL_CACHE_MAX_ENTRIES
+from onyx.configs.app_configs import KV_STORE_LOCAL_CACHE_TTL_SECONDS
+from onyx.redis.redis_pool import get_shared_redis_client
+from onyx.utils.logger import setup_logger
+
+logger = setup_logger()
+
+KV_STORE_INVALIDATION_CHANNEL = "onyx_kv_store:invalidate"
+_LISTENER_RETRY_DELAY_SECONDS = 5
+# how long the first fill waits for the subscription, later fills don't wait
+_SUBSCRIBE_TIMEOUT_SECONDS = 1.0
+
+_CACHE_HITS = Counter(
+    "onyx_kv_store_local_cache_hits_total",
+    "Key value store loads served from the in-process cache",
+)
+_CACHE_MISSES = Counter(
+    "onyx_kv_store_local_cache_misses_total",
+    "Key value store loads that had to go to Redis / Postgres",
+)
+
+
+class KVStoreLocalCache:
+    def __init__(
+        self,
+        max_entries: int = KV_STORE_LOCAL_CACHE_MAX_ENTRIES,
+        ttl_seconds: float = KV_STORE_LOCAL_CACHE_TTL_SECONDS,
+    ) -> None:
+        self._max_entries = max_entries
+        self._ttl_seconds = ttl_seconds
+        # (tenant_id, key) -> (expires_at, serialized value)
+        self._entries: OrderedDict[tuple[str, str], tuple[float, str]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._listener: threading.Thread | None = None
+        self._subscribed = threading.Event()
+        # bumped on every invalidation, fills started before one are not cached
+        self._epoch = 0
+
+    def get(self, tenant_id: str, key: str) -> str | None:
+        with self._lock:
+            entry = self._entries.get((tenant_id, key))
+            if entry is None or entry[0] <= time.monotonic():
+                if entry is not None:
+                    del self._entries[(tenant_id, key)]
+                _CACHE_MISSES.inc()
+                return None
+            self._entries.move_to_end((tenant_id, key))
+        _CACHE_HITS.inc()
+        return entry[1]
+
+    def start_fill(self) -> int | None:
+        """To be called before the value to cache is fetched, the result is passed to
+        `set`. None means nothing may be cached (we aren't subscribed to
+        invalidations)."""
+        if self._ensure_listener():
+            self._subscribed.wait(_SUBSCRIBE_TIMEOUT_SECONDS)
+        if not self._subscribed.is_set():
+            return None
+        with self._lock:
+            return self._epoch
+
+    def set(
+        self, tenant_id: str, key: str, serialized_value: str, fill_epoch: int | None
+    ) -> None:
+        with self._lock:
+            if fill_epoch is None or fill_epoch != self._epoch:
+                return
+            self._entries[(tenant_id, key)] = (
+                time.monotonic() + self._ttl_seconds,
+                serialized_value,
+            )
+            self._entries.move_to_end((tenant_id, key))
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate_local(self, tenant_id: str, key: str) -> None:
+        with self._lock:
+            self._epoch += 1
+            self._entries.pop((tenant_id, key), None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._epoch += 1
+            self._entries.clear()
+
+    def invalidate(self, tenant_id: str, key: str) -> None:
+        """Drops the entry in this process and asks every other process to do so."""
+        self.invalidate_local(tenant_id, key)
+        try:
+            get_shared_redis_client().publish(
+                KV_STORE_INVALIDATION_CHANNEL,
+                json.dumps({"tenant_id": tenant_id, "key": key}),
+            )
+        except Exception as e:
+            logger.error(f"Failed to publish kv store invalidation for '{key}': {e}")
+
+    def handle_invalidation_message(self, data: bytes | str) -> None:
+        try:
+            message = json.loads(data)
+            self.invalidate_local(message["tenant_id"], message["key"])
+        except Exception:
+            logger.exception("Malformed kv store invalidation, clearing local cache")
+            self.clear()
+
+    def _ensure_listener(self) -> bool:
+        """Returns whether the listener was started by this call."""
+        if self._listener is not None:
+            return False
+        with self._lock:
+            if self._listener is not None:
+                return False
+            self._listener = threading.Thread(
+                target=self._listen,
+                name="kv-store-cache-invalidation",
+                daemon=True,
+            )
+            self._listener.start()
+            return True
+
+    def _listen(self) -> None:
+        while True:
+            try:
+                pubsub = get_shared_redis_client().pubsub()
+                pubsub.subscribe(KV_STORE_INVALIDATION_CHANNEL)
+                for message in pubsub.listen():
+                    if message["type"] == "subscribe":
+                        self._subscribed.set()
+                    elif message["type"] == "message":
+                        self.handle_invalidation_message(message["data"])
+            except Exception as e:
+                logger.warning(
+                    f"KV store invalidation subscription failed, retrying: {e}"
+                )
+            # anything may have changed while we were not listening
+            self._subscribed.clear()
+            self.clear()
+            time.sleep(_LISTENER_RETRY_DELAY_SECONDS)
+
+
+_kv_store_local_cache = KVStoreLocalCache()
+
+
+def get_kv_store_local_cache() -> KVStoreLocalCache:
+    return _kv_store_local_cache
@@ -3,19 +3,25 @@ from typing import cast
 
 from redis.client import Redis
 
+from onyx.configs.app_configs import KV_STORE_LOCAL_CACHE_ENABLED
 from onyx.db.engine.sql_engine import get_session_with_current_tenant
 from onyx.db.models import KVStore
 from onyx.key_value_store.interface import KeyValueStore
 from onyx.key_value_store.interface import KvKeyNotFoundError
+from onyx.key_value_store.local_cache import get_kv_store_local_cache
 from onyx.redis.redis_pool import get_redis_client
 from onyx.utils.logger import setup_logger
 from onyx.utils.special_types import JSON_ro
+from shared_configs.contextvars import get_current_tenant_id
 
 
 logger = setup_logger()
 
 
 REDIS_KEY_PREFIX = "onyx_kv_store:"
+# incremented on every write of the key, a local cache fill that saw the version change
+# while it was fetching the value may hold a stale value and is dropped
+REDIS_VERSION_KEY_PREFIX = "onyx_kv_store_version:"
 KV_REDIS_KEY_EXPIRATION = 60 * 60 * 24  # 1 Day
 
 
@@ -27,6 +33,10 @@ class PgRedisKVStore(KeyValueStore):
         else:
             self.redis_client = get_redis_client()
 
+        self.local_cache = (
+            get_kv_store_local_cache() if KV_STORE_LOCAL_CACHE_ENABLED else None
+        )
+
     def store(self, key: str, val: JSON_ro, encrypt: bool = False) -> None:
         # Not encrypted in Redis, but encrypted in Postgres
         try:
@@ -52,7 +62,64 @@ class PgRedisKVStore(KeyValueStore):
                 db_session.add(obj)
             db_session.commit()
 
+        if self.local_cache:
+            self._bump_version(key)
+            self.local_cache.invalidate(get_current_tenant_id(), key)
+
+    def _bump_version(self, key: str) -> None:
+        try:
+            # NOTE: incrby, since incr is not tenant prefixed by TenantRedis
+            self.redis_client.incrby(REDIS_VERSION_KEY_PREFIX + key, 1)
+        except Exception as e:
+            logger.error(f"Failed to bump version in Redis for key '{key}': {str(e)}")
+
+    def _start_cache_fill(self, key: str) -> tuple[int, bytes | None] | None:
+        """The local cache epoch and the Redis version of the key before the value is
+        fetched, None if the value must not be cached."""
+        if not self.local_cache:
+            return None
+
+        fill_epoch = self.local_cache.start_fill()
+        if fill_epoch is None:
+            return None
+
+        try:
+            version = cast(
+                bytes | None, self.redis_client.get(REDIS_VERSION_KEY_PREFIX + key)
+            )
+        except Exception as e:
+            logger.error(f"Failed to get version from Redis for key '{key}': {str(e)}")
+            return None
+        return fill_epoch, version
+
+    def _fill_local_cache(
+        self,
+        key: str,
+        serialized_value: str,
+        cache_fill: tuple[int, bytes | None] | None,
+    ) -> None:
+        if not self.local_cache or cache_fill is None:
+            return
+
+        fill_epoch, version = cache_fill
+        try:
+            if self.redis_client.get(REDIS_VERSION_KEY_PREFIX + key) != version:
+                # written while we were fetching it
+                return
+        except Exception as e:
+            logger.error(f"Failed to get version from Redis for key '{key}': {str(e)}")
+            return
+        self.local_cache.set(get_current_tenant_id(), key, serialized_value, fill_epoch)
+
     def load(self, key: str, refresh_cache: bool = False) -> JSON_ro:
+        if self.local_cache and not refresh_cache:
+            # stored serialized so that callers can't mutate the cached value
+            local_value = self.local_cache.get(get_current_tenant_id(), key)
+            if local_value is not None:
+                return json.loads(local_value)
+
+        cache_fill = self._start_cache_fill(key)
+
         if not refresh_cache:
             try:
                 redis_value = self.redis_client.get(REDIS_KEY_PREFIX + key)
@@ -61,7 +128,9 @@ class PgRedisKVStore(KeyValueStore):
                         raise ValueError(
                             f"Redis value for key '{key}' is not a bytes object"
                         )
-                    return json.loads(redis_value.decode("utf-8"))
+                    serialized_value = redis_value.decode("utf-8")
+                    self._fill_local_cache(key, serialized_value, cache_fill)
+                    return json.loads(serialized_value)
             except Exception as e:
                 logger.error(
                     f"Failed to get value from Redis for key '{key}': {str(e)}"
@@ -79,11 +148,14 @@ class PgRedisKVStore(KeyValueStore):
             else:
                 value = None
 
+            serialized_value = json.dumps(value)
             try:
-                self.redis_client.set(REDIS_KEY_PREFIX + key, json.dumps(value))
+                self.redis_client.set(REDIS_KEY_PREFIX + key, serialized_value)
             except Exception as e:
                 logger.error(f"Failed to set value in Redis for key '{key}': {str(e)}")
 
+            self._fill_local_cache(key, serialized_value, cache_fill)
+
             return cast(JSON_ro, value)
 
     def delete(self, key: str) -> None:
@@ -92,8 +164,14 @@ class PgRedisKVStore(KeyValueStore):
         except Exception as e:
             logger.error(f"Failed to delete value from Redis for key '{key}': {str(e)}")
 
-        with get_session_with_current_tenant() as db_session:
-            result = db_session.query(KVStore).filter_by(key=key).delete()  # type: ignore
-            if result == 0:
-                raise KvKeyNotFoundError
-            db_session.commit()
+        try:
+            with get_session_with_current_tenant() as db_session:
+                result = db_session.query(KVStore).filter_by(key=key).delete()  # type: ignore
+                if result == 0:
+                    raise KvKeyNotFoundError
+                db_session.commit()
+        finally:
+            # also when the key was only left in Redis
+            if self.local_cache:
+                self._bump_version(key)
+                self.local_cache.invalidate(get_current_tenant_id(), key)
@@ -1,14 +1,25 @@
 import time
+from collections import defaultdict
 from collections.abc import Generator
 from typing import cast
 
+from rapidfuzz import process
 from rapidfuzz.fuzz import ratio
 from redis.lock import Lock as RedisLock
+from sqlalchemy import and_
+from sqlalchemy import Boolean
+from sqlalchemy import column
 from sqlalchemy import func
+from sqlalchemy import or_
+from sqlalchemy import select
+from sqlalchemy import String
 from sqlalchemy import text
+from sqlalchemy import values
+from sqlalchemy.orm import Session
 
 from onyx.background.celery.tasks.kg_processing.utils import extend_lock
 from onyx.configs.constants import CELERY_GENERIC_BEAT_LOCK_TIMEOUT
+from onyx.configs.kg_configs import KG_CLUSTERING_ENTITY_BATCH_SIZE
 from onyx.configs.kg_configs import KG_CLUSTERING_RETRIEVE_THRESHOLD
 from onyx.configs.kg_configs import KG_CLUSTERING_THRESHOLD
 from onyx.db.engine.sql_engine import get_session_with_current_tenant
@@ -144,78 +155,161 @@ def _get_batch_kg_processed_documents(
             offset += batch_size
 
 
-def _cluster_one_grounded_entity(
-    entity: KGEntityExtractionStaging,
-) -> tuple[KGEntity, bool]:
+def _has_digits(name: str) -> bool:
+    # we skip those with numbers so we don't cluster version1 and version2, etc.
+    return any(char.isdigit() for char in name)
+
+
+def _get_similar_entities_by_staging_id(
+    db_session: Session,
+    entity_type_id_name: str,
+    staging_id_to_name: dict[str, tuple[str, bool]],
+) -> dict[str, list[KGEntity]]:
+    """Finds the entities of the given type with a name similar to each of the staged
+    entities' names, with a single trigram join (uses the GIN index).
+
+    staging_id_to_name maps the staged entity to its name and whether it has a
+    document, entities with a document are only matched to entities without one.
     """
-    Cluster a single grounded entity.
+    batch_names = values(
+        column("staging_id_name", String),
+        column("name", String),
+        column("has_document", Boolean),
+        name="batch_names",
+    ).data(
+        [
+            (staging_id, name, has_document)
+            for staging_id, (name, has_document) in staging_id_to_name.items()
+        ]
+    )
+    rows = db_session.execute(
+        select(batch_names.c.staging_id_name, KGEntity).join(
+            KGEntity,
+            and_(
+                KGEntity.entity_type_id_name == entity_type_id_name,
+                getattr(func, POSTGRES_DEFAULT_SCHEMA).similarity_op(
+                    KGEntity.name, batch_names.c.name
+                ),
+                or_(
+                    batch_names.c.has_document.is_(False),
+                    KGEntity.document_id.is_(None),
+                ),
+            ),
+        )
+    ).all()
+
+    similar_entities: dict[str, list[KGEntity]] = defaultdict(list)
+    for staging_id, similar in rows:
+        similar_entities[staging_id].append(similar)
+    return similar_entities
+
+
+def _cluster_grounded_entities(
+    entities: list[KGEntityExtractionStaging],
+) -> tuple[int, int]:
     """
+    Cluster a batch of grounded entities: each one is merged into the most similar
+    existing entity of its type, or transferred as a new entity if there is none.
+
+    Candidates are fetched with one query per entity type and scored in process.
+    Entities transferred or merged earlier in the batch are candidates for the later
+    ones, just like when clustering one entity at a time.
+
+    Returns the number of merged and transferred entities.
+    """
+    num_merged = 0
+    num_transferred = 0
+
     with get_session_with_current_tenant() as db_session:
-        # get entity name and filtering conditions
-        if entity.document_id is not None:
-            entity_name = cast(
-                str,
-                db_session.query(Document.semantic_id)
-                .filter(Document.id == entity.document_id)
-                .scalar(),
-            ).lower()
-            filtering = [KGEntity.document_id.is_(None)]
-        else:
-            entity_name = entity.name.lower()
-            filtering = []
-
-        # skip those with numbers so we don't cluster version1 and version2, etc.
-        similar_entities: list[KGEntity] = []
-        if not any(char.isdigit() for char in entity_name):
-            # find similar entities, uses GIN index, very efficient
-            db_session.execute(
-                text(
-                    "SET pg_trgm.similarity_threshold = "
-                    + str(KG_CLUSTERING_RETRIEVE_THRESHOLD)
-                )
-            )
-            similar_entities = (
-                db_session.query(KGEntity)
-                .filter(
-                    # find entities of the same type with a similar name
-                    *filtering,
-                    KGEntity.entity_type_id_name == entity.entity_type_id_name,
-                    getattr(func, POSTGRES_DEFAULT_SCHEMA).similarity_op(
-                        KGEntity.name, entity_name
-                    ),
-                )
-                .all()
+        # get entity names and filtering conditions
+        document_ids = {
+            entity.document_id for entity in entities if entity.document_id is not None
+        }
+        document_id_to_name: dict[str, str] = {
+            document_id: cast(str, semantic_id).lower()
+            for document_id, semantic_id in db_session.query(
+                Document.id, Document.semantic_id
+            ).filter(Document.id.in_(document_ids))
+        }
+        staging_id_to_name: dict[str, str] = {
+            entity.id_name: (
+                document_id_to_name[entity.document_id]
+                if entity.document_id is not None
+                else entity.name.lower()
             )
+            for entity in entities
+        }
 
-    # find best match
-    best_score = -1.0
-    best_entity = None
-    for similar in similar_entities:
-        # skip those with numbers so we don't cluster version1 and version2, etc.
-        if any(char.isdigit() for char in similar.name):
-            continue
-        score = ratio(similar.name, entity_name)
-        if score >= KG_CLUSTERING_THRESHOLD * 100 and score > best_score:
-            best_score = score
-            best_entity = similar
-
-    # if there is a match, update the entity, otherwise create a new one
-    with get_session_with_current_tenant() as db_session:
-        if best_entity:
-            logger.debug(f"Merged {entity.name} with {best_entity.name}")
-            update_vespa = (
-                best_entity.document_id is None and entity.document_id is not None
+        # find similar entities, one query per entity type
+        db_session.execute(
+            text(
+                "SET LOCAL pg_trgm.similarity_threshold = "
+                + str(KG_CLUSTERING_RETRIEVE_THRESHOLD)
             )
-            transferred_entity = merge_entities(
-                db_session=db_session, parent=best_entity, child=entity
+        )
+        entity_type_to_names: dict[str, dict[str, tuple[str, bool]]] = defaultdict(dict)
+        for entity in entities:
+            entity_name = staging_id_to_name[entity.id_name]
+            if not _has_digits(entity_name):
+                entity_type_to_names[entity.entity_type_id_name][entity.id_name] = (
+                    entity_name,
+                    entity.document_id is not None,
+                )
+        similar_entities: dict[str, list[KGEntity]] = {}
+        for entity_type_id_name, names in entity_type_to_names.items():
+            similar_entities.update(
+                _get_similar_entities_by_staging_id(
+                    db_session, entity_type_id_name, names
+                )
             )
-        else:
-            update_vespa = entity.document_id is not None
-            transferred_entity = transfer_entity(db_session=db_session, entity=entity)
+
+        # the latest version of the entities transferred or merged in this batch
+        batch_entities: dict[str, KGEntity] = {}
+
+        for entity in entities:
+            entity_name = staging_id_to_name[entity.id_name]
+
+            # find best match
+            best_entity: KGEntity | None = None
+            if not _has_digits(entity_name):
+                candidates = {
+                    similar.id_name: similar
+                    for similar in similar_entities.get(entity.id_name, [])
+                }
+                candidates.update(batch_entities)
+                candidate_list = [
+                    candidate
+                    for candidate in candidates.values()
+                    if candidate.entity_type_id_name == entity.entity_type_id_name
+                    and (entity.document_id is None or candidate.document_id is None)
+                    and not _has_digits(candidate.name)
+                ]
+                match = process.extractOne(
+                    entity_name,
+                    [candidate.name for candidate in candidate_list],
+                    scorer=ratio,
+                    score_cutoff=KG_CLUSTERING_THRESHOLD * 100,
+                )
+                if match is not None:
+                    best_entity = candidate_list[match[2]]
+
+            # if there is a match, update the entity, otherwise create a new one
+            if best_entity:
+                logger.debug(f"Merged {entity.name} with {best_entity.name}")
+                transferred_entity = merge_entities(
+                    db_session=db_session, parent=best_entity, child=entity
+                )
+                num_merged += 1
+            else:
+                transferred_entity = transfer_entity(
+                    db_session=db_session, entity=entity
+                )
+                num_transferred += 1
+            batch_entities[transferred_entity.id_name] = transferred_entity
 
         db_session.commit()
 
-    return transferred_entity, update_vespa
+    return num_merged, num_transferred
 
 
 def _create_one_parent_child_relationship(entity: KGEntityExtractionStaging) -> None:
@@ -319,20 +413,30 @@ def kg_clustering(
 
     last_lock_time = time.monotonic()
 
-    # Cluster and transfer grounded entities sequentially
+    # Cluster and transfer grounded entities, batch by batch
     start_time = time.monotonic()
     i_batch = 0
     for i_batch, untransferred_grounded_entities in enumerate(
         _get_batch_untransferred_grounded_entities(
-            batch_size=processing_chunk_batch_size
+            batch_size=KG_CLUSTERING_ENTITY_BATCH_SIZE
         )
     ):
-        for entity in untransferred_grounded_entities:
-            _cluster_one_grounded_entity(entity)
+        batch_start_time = time.monotonic()
+        num_merged, num_transferred = _cluster_grounded_entities(
+            untransferred_grounded_entities
+        )
+        batch_time_delta = time.monotonic() - batch_start_time
+        logger.info(
+            f"Clustered entity batch {i_batch}: "
+            f"entities={len(untransferred_grounded_entities)} "
+            f"merged={num_merged} "
+            f"transferred={num_transferred} "
+            f"elapsed={batch_time_delta:.2f}s "
+            f"entities_per_sec={len(untransferred_grounded_entities) / max(batch_time_delta, 1e-6):.1f}"
+        )
         last_lock_time = extend_lock(
             lock, CELERY_GENERIC_BEAT_LOCK_TIMEOUT, last_lock_time
         )
-        # logger.debug(f"Transferred entities batch {i}")
     # NOTE: we assume every entity is transferred, as we currently only have grounded entities
     time_delta = time.monotonic() - start_time
     logger.info(
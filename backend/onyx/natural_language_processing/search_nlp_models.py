@@ -29,7 +29,10 @@ from onyx.configs.model_configs import BATCH_SIZE_ENCODE_CHUNKS
 from onyx.configs.model_configs import (
     BATCH_SIZE_ENCODE_CHUNKS_FOR_API_EMBEDDING_SERVICES,
 )
+from onyx.configs.model_configs import BINARY_EMBEDDING_TRANSPORT_DTYPE
+from onyx.configs.model_configs import DISABLE_EMBEDDING_LENGTH_BUCKETING
 from onyx.configs.model_configs import DOC_EMBEDDING_CONTEXT_SIZE
+from onyx.configs.model_configs import USE_BINARY_EMBEDDING_TRANSPORT
 from onyx.connectors.models import ConnectorStopSignal
 from onyx.db.models import SearchSettings
 from onyx.indexing.indexing_heartbeat import IndexingHeartbeatInterface
@@ -54,6 +57,9 @@ from shared_configs.configs import MODEL_SERVER_PORT
 from shared_configs.configs import OPENAI_EMBEDDING_TIMEOUT
 from shared_configs.configs import SKIP_WARM_UP
 from shared_configs.configs import VERTEXAI_EMBEDDING_LOCAL_BATCH_SIZE
+from shared_configs.embedding_transport import decode_embeddings
+from shared_configs.embedding_transport import EMBEDDING_BINARY_CONTENT_TYPE
+from shared_configs.embedding_transport import EMBEDDING_BINARY_DTYPE_HEADER
 from shared_configs.enums import EmbeddingProvider
 from shared_configs.enums import EmbedTextType
 from shared_configs.enums import RerankerProvider
@@ -496,6 +502,17 @@ async def litellm_rerank(
         ]
 
 
+def padding_efficiency(token_lengths: list[int], batch_size: int) -> float:
+    """Share of the padded token slots that hold real tokens when texts of the given
+    lengths are embedded in this order, `batch_size` at a time."""
+    real_tokens = 0
+    padded_tokens = 0
+    for batch_lengths in batch_list(token_lengths, batch_size):
+        real_tokens += sum(batch_lengths)
+        padded_tokens += max(batch_lengths) * len(batch_lengths)
+    return real_tokens / padded_tokens if padded_tokens else 1.0
+
+
 class EmbeddingModel:
     def __init__(
         self,
@@ -628,6 +645,15 @@ class EmbeddingModel:
             if request_id:
                 headers["X-Onyx-Request-ID"] = request_id
 
+            if USE_BINARY_EMBEDDING_TRANSPORT:
+                # older model servers ignore this and still answer with JSON
+                headers["Accept"] = (
+                    f"{EMBEDDING_BINARY_CONTENT_TYPE}, application/json;q=0.9"
+                )
+                headers[EMBEDDING_BINARY_DTYPE_HEADER] = (
+                    BINARY_EMBEDDING_TRANSPORT_DTYPE.value
+                )
+
             response = requests.post(
                 endpoint,
                 headers=headers,
@@ -659,6 +685,13 @@ class EmbeddingModel:
 
         try:
             response = final_make_request_func()
+            if response.headers.get("content-type", "").startswith(
+                EMBEDDING_BINARY_CONTENT_TYPE
+            ):
+                # already a validated float matrix, skip per-float pydantic validation
+                return EmbedResponse.model_construct(
+                    embeddings=decode_embeddings(response.content).tolist()
+                )
             return EmbedResponse(**response.json())
         except requests.HTTPError as e:
             if not response:
@@ -831,6 +864,22 @@ class EmbeddingModel:
             else local_embedding_batch_size
         )
 
+        # Padding only costs compute on our own model server, API providers bill
+        # per token regardless of how the texts are batched
+        if (
+            self.provider_type is None
+            and not DISABLE_EMBEDDING_LENGTH_BUCKETING
+            and len(texts) > batch_size
+        ):
+            return self._length_bucketed_encode(
+                texts=texts,
+                text_type=text_type,
+                batch_size=batch_size,
+                max_seq_length=max_seq_length,
+                tenant_id=tenant_id,
+                request_id=request_id,
+            )
+
         return self._batch_encode_texts(
             texts=texts,
             text_type=text_type,
@@ -840,6 +889,44 @@ class EmbeddingModel:
             request_id=request_id,
         )
 
+    def _length_bucketed_encode(
+        self,
+        texts: list[str],
+        text_type: EmbedTextType,
+        batch_size: int,
+        max_seq_length: int,
+        tenant_id: str | None = None,
+        request_id: str | None = None,
+    ) -> list[Embedding]:
+        """Embeds the texts sorted by token length so every batch holds texts of
+        similar length (full chunks, mini chunks and titles no longer share a batch)
+        and the model pads as little as possible. Returns the original order."""
+        token_lengths = [
+            min(len(self.tokenizer.encode(text)), max_seq_length) for text in texts
+        ]
+        order = sorted(range(len(texts)), key=lambda ind: token_lengths[ind])
+        sorted_lengths = [token_lengths[ind] for ind in order]
+
+        logger.info(
+            f"Embedding {len(texts)} texts in length sorted batches: "
+            f"padding_efficiency={padding_efficiency(sorted_lengths, batch_size):.2f} "
+            f"(arrival order {padding_efficiency(token_lengths, batch_size):.2f})"
+        )
+
+        sorted_embeddings = self._batch_encode_texts(
+            texts=[texts[ind] for ind in order],
+            text_type=text_type,
+            batch_size=batch_size,
+            max_seq_length=max_seq_length,
+            tenant_id=tenant_id,
+            request_id=request_id,
+        )
+
+        embeddings: list[Embedding] = [[] for _ in texts]
+        for ind, embedding in zip(order, sorted_embeddings):
+            embeddings[ind] = embedding
+        return embeddings
+
     @classmethod
     def from_db_model(
         cls,
@@ -1,4 +1,5 @@
 import time
+from collections.abc import Iterable
 from datetime import datetime
 from typing import cast
 from uuid import uuid4
@@ -9,6 +10,7 @@ from pydantic import BaseModel
 from redis.lock import Lock as RedisLock
 from sqlalchemy.orm import Session
 
+from onyx.configs.app_configs import PRUNING_CLEANUP_BATCH_SIZE
 from onyx.configs.constants import CELERY_GENERIC_BEAT_LOCK_TIMEOUT
 from onyx.configs.constants import CELERY_PRUNING_LOCK_TIMEOUT
 from onyx.configs.constants import OnyxCeleryPriority
@@ -17,6 +19,7 @@ from onyx.configs.constants import OnyxCeleryTask
 from onyx.configs.constants import OnyxRedisConstants
 from onyx.db.connector_credential_pair import get_connector_credential_pair_from_id
 from onyx.redis.redis_pool import SCAN_ITER_COUNT_DEFAULT
+from onyx.utils.batching import batch_generator
 
 
 class RedisConnectorPrunePayload(BaseModel):
@@ -46,6 +49,9 @@ class RedisConnectorPrune:
     TASKSET_PREFIX = f"{PREFIX}_taskset"  # connectorpruning_taskset
     SUBTASK_PREFIX = f"{PREFIX}+sub"  # connectorpruning+sub
 
+    # number of task ids added to the taskset per redis round trip
+    TASKSET_BATCH_SIZE = 64
+
     # used to signal the overall workflow is still active
     # it's impossible to get the exact state of the system at a single point in time
     # so we need a signal with a TTL to bridge gaps in our checks
@@ -152,11 +158,14 @@ class RedisConnectorPrune:
 
     def generate_tasks(
         self,
-        documents_to_prune: set[str],
+        documents_to_prune: Iterable[str],
         celery_app: Celery,
         db_session: Session,
         lock: RedisLock | None,
     ) -> int | None:
+        """Sends one cleanup task per PRUNING_CLEANUP_BATCH_SIZE documents and returns
+        the number of tasks sent. documents_to_prune is consumed lazily, tasks are sent
+        while it is still being produced."""
         last_lock_time = time.monotonic()
 
         async_results = []
@@ -167,39 +176,50 @@ class RedisConnectorPrune:
         if not cc_pair:
             return None
 
-        for doc_id in documents_to_prune:
-            current_time = time.monotonic()
-            if lock and current_time - last_lock_time >= (
-                CELERY_GENERIC_BEAT_LOCK_TIMEOUT / 4
-            ):
-                lock.reacquire()
-                last_lock_time = current_time
-
-            # celery's default task id format is "dd32ded3-00aa-4884-8b21-42f8332e7fac"
-            # the actual redis key is "celery-task-meta-dd32ded3-00aa-4884-8b21-42f8332e7fac"
-            # we prefix the task id so it's easier to keep track of who created the task
-            # aka "documentset_1_6dd32ded3-00aa-4884-8b21-42f8332e7fac"
-            custom_task_id = f"{self.subtask_prefix}_{uuid4()}"
-
-            # add to the tracking taskset in redis BEFORE creating the celery task.
-            self.redis.sadd(self.taskset_key, custom_task_id)
-
-            # Priority on sync's triggered by new indexing should be medium
-            result = celery_app.send_task(
-                OnyxCeleryTask.DOCUMENT_BY_CC_PAIR_CLEANUP_TASK,
-                kwargs=dict(
-                    document_id=doc_id,
-                    connector_id=cc_pair.connector_id,
-                    credential_id=cc_pair.credential_id,
-                    tenant_id=self.tenant_id,
-                ),
-                queue=OnyxCeleryQueues.CONNECTOR_DELETION,
-                task_id=custom_task_id,
-                priority=OnyxCeleryPriority.MEDIUM,
-                ignore_result=True,
+        # celery's default task id format is "dd32ded3-00aa-4884-8b21-42f8332e7fac"
+        # the actual redis key is "celery-task-meta-dd32ded3-00aa-4884-8b21-42f8332e7fac"
+        # we prefix the task id so it's easier to keep track of who created the task
+        # aka "documentset_1_6dd32ded3-00aa-4884-8b21-42f8332e7fac"
+        for doc_id_batches in batch_generator(
+            batch_generator(documents_to_prune, PRUNING_CLEANUP_BATCH_SIZE),
+            self.TASKSET_BATCH_SIZE,
+        ):
+            batches = [
+                (f"{self.subtask_prefix}_{uuid4()}", doc_ids)
+                for doc_ids in doc_id_batches
+            ]
+
+            # add to the tracking taskset in redis BEFORE creating the celery tasks.
+            # NOTE: a single SADD instead of a pipeline, since commands on a pipeline
+            # are not tenant prefixed and get_remaining reads the prefixed taskset
+            self.redis.sadd(
+                self.taskset_key, *[custom_task_id for custom_task_id, _ in batches]
             )
 
-            async_results.append(result)
+            for custom_task_id, doc_ids in batches:
+                current_time = time.monotonic()
+                if lock and current_time - last_lock_time >= (
+                    CELERY_GENERIC_BEAT_LOCK_TIMEOUT / 4
+                ):
+                    lock.reacquire()
+                    last_lock_time = current_time
+
+                # Priority on sync's triggered by new indexing should be medium
+                result = celery_app.send_task(
+                    OnyxCeleryTask.DOCUMENT_BY_CC_PAIR_CLEANUP_BATCH_TASK,
+                    kwargs=dict(
+                        document_ids=doc_ids,
+                        connector_id=cc_pair.connector_id,
+                        credential_id=cc_pair.credential_id,
+                        tenant_id=self.tenant_id,
+                    ),
+                    queue=OnyxCeleryQueues.CONNECTOR_DELETION,
+                    task_id=custom_task_id,
+                    priority=OnyxCeleryPriority.MEDIUM,
+                    ignore_result=True,
+                )
+
+                async_results.append(result)
 
         return len(async_results)
 
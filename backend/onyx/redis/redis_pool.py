@@ -38,6 +38,43 @@ logger = setup_logger()
 
 SCAN_ITER_COUNT_DEFAULT = 4096
 
+# Regular methods of TenantRedis that need simple prefixing (of their first argument).
+# Everything else, including commands queued on a pipeline, uses the key as given
+TENANT_PREFIXED_METHODS = [
+    "lock",
+    "unlock",
+    "get",
+    "set",
+    "delete",
+    "exists",
+    "incrby",
+    "hset",
+    "hget",
+    "getset",
+    "owned",
+    "reacquire",
+    "create_lock",
+    "startswith",
+    "smembers",
+    "sismember",
+    "sadd",
+    "srem",
+    "scard",
+    "hexists",
+    "hset",
+    "hdel",
+    "ttl",
+    "pttl",
+]
+
+
+def tenant_key(tenant_id: str, key: str) -> str:
+    """The key as TenantRedis prefixes it. Commands that TenantRedis doesn't prefix
+    (anything not in TENANT_PREFIXED_METHODS, e.g. incr, mget, hgetall, zadd and every
+    command on a pipeline) must be given keys built with this, so that they use the same
+    keys as the prefixed commands. Prefixed commands leave such keys as they are."""
+    return f"{tenant_id}:{key}"
+
 
 class TenantRedis(redis.Redis):
     def __init__(self, tenant_id: str, *args: Any, **kwargs: Any) -> None:
@@ -104,36 +141,9 @@ class TenantRedis(redis.Redis):
 
     def __getattribute__(self, item: str) -> Any:
         original_attr = super().__getattribute__(item)
-        methods_to_wrap = [
-            "lock",
-            "unlock",
-            "get",
-            "set",
-            "delete",
-            "exists",
-            "incrby",
-            "hset",
-            "hget",
-            "getset",
-            "owned",
-            "reacquire",
-            "create_lock",
-            "startswith",
-            "smembers",
-            "sismember",
-            "sadd",
-            "srem",
-            "scard",
-            "hexists",
-            "hset",
-            "hdel",
-            "ttl",
-            "pttl",
-        ]  # Regular methods that need simple prefixing
-
         if item == "scan_iter" or item == "sscan_iter":
             return self._prefix_scan_iter(original_attr)
-        elif item in methods_to_wrap and callable(original_attr):
+        elif item in TENANT_PREFIXED_METHODS and callable(original_attr):
             return self._prefix_method(original_attr)
         return original_attr
 
@@ -0,0 +1,187 @@
+"""Minute bucketed token usage counters for token rate limits.
+
+Checking a token rate limit in SQL aggregates every chat message sent within the
+longest rate limit period. Instead, the tokens of every recorded chat message are
+added to per scope (global, user, user group) counters in Redis, so a check only
+reads the minute buckets of the period.
+
+Every scope has one hash per UTC day, mapping the minute (since the epoch) to the
+number of tokens used in it. Day keys expire after the retention period, so nothing
+has to be pruned on the hot path.
+
+The counters of a scope are only trusted while a reconciliation job regularly rebuilds
+its completed minutes from the chat message table (see `replace_token_usage`), which
+also backfills usage from before the counters existed. Otherwise callers fall back to
+SQL.
+"""
+
+from collections.abc import Sequence
+from datetime import datetime
+from datetime import timedelta
+from datetime import timezone
+from typing import cast
+from uuid import UUID
+
+from redis import Redis
+
+from onyx.configs.app_configs import TOKEN_USAGE_COUNTER_RETENTION_DAYS
+from onyx.configs.constants import TOKEN_USAGE_RECONCILED_TTL
+from onyx.redis.redis_pool import tenant_key
+
+_KEY_PREFIX = "token_usage"
+
+_SECONDS_PER_DAY = 24 * 60 * 60
+
+TOKEN_USAGE_GLOBAL_SCOPE = "global"
+
+
+def get_user_token_usage_scope(user_id: UUID) -> str:
+    return f"user:{user_id}"
+
+
+def get_user_group_token_usage_scope(user_group_id: int) -> str:
+    return f"user_group:{user_group_id}"
+
+
+def get_token_usage_scopes(user_id: UUID | None) -> list[str]:
+    """Scopes whose counters the tokens of a user's messages are added to, the
+    enterprise edition adds the user's groups."""
+    scopes = [TOKEN_USAGE_GLOBAL_SCOPE]
+    if user_id is not None:
+        scopes.append(get_user_token_usage_scope(user_id))
+    return scopes
+
+
+def _to_minute(time: datetime) -> int:
+    return int(time.timestamp()) // 60
+
+
+def _reconciled_key(tenant_id: str, scope: str) -> str:
+    return tenant_key(tenant_id, f"{_KEY_PREFIX}:{scope}:reconciled")
+
+
+def _day_key(tenant_id: str, scope: str, minute: int) -> str:
+    return tenant_key(
+        tenant_id, f"{_KEY_PREFIX}:{scope}:{minute * 60 // _SECONDS_PER_DAY}"
+    )
+
+
+def _day_keys(
+    tenant_id: str, scope: str, first_minute: int, last_minute: int
+) -> list[str]:
+    first_day = first_minute * 60 // _SECONDS_PER_DAY
+    last_day = last_minute * 60 // _SECONDS_PER_DAY
+    return [
+        tenant_key(tenant_id, f"{_KEY_PREFIX}:{scope}:{day}")
+        for day in range(first_day, last_day + 1)
+    ]
+
+
+def _retention_seconds() -> int:
+    # the key of a day has to outlive the day by the retention period
+    return (TOKEN_USAGE_COUNTER_RETENTION_DAYS + 1) * _SECONDS_PER_DAY
+
+
+def record_token_usage(
+    redis_client: Redis,
+    tenant_id: str,
+    scopes: Sequence[str],
+    token_count: int,
+    time: datetime | None = None,
+) -> None:
+    if not token_count or not scopes:
+        return
+
+    minute = _to_minute(time or datetime.now(tz=timezone.utc))
+    pipe = redis_client.pipeline(transaction=False)
+    for scope in scopes:
+        key = _day_key(tenant_id, scope, minute)
+        pipe.hincrby(key, str(minute), token_count)
+        pipe.expire(key, _retention_seconds())
+    pipe.execute()
+
+
+def fetch_token_usage(
+    redis_client: Redis, tenant_id: str, scope: str, cutoff_time: datetime
+) -> list[tuple[datetime, int]] | None:
+    """Token usage of the scope since cutoff_time by minute, in the same shape as the
+    SQL aggregate. None if the counters can't be trusted (the scope was not reconciled
+    recently or the cutoff is past the retention period)."""
+    now = datetime.now(tz=timezone.utc)
+    if cutoff_time < now - timedelta(days=TOKEN_USAGE_COUNTER_RETENTION_DAYS):
+        return None
+
+    cutoff_minute = _to_minute(cutoff_time)
+    pipe = redis_client.pipeline(transaction=False)
+    pipe.exists(_reconciled_key(tenant_id, scope))
+    for key in _day_keys(tenant_id, scope, cutoff_minute, _to_minute(now)):
+        pipe.hgetall(key)
+    reconciled, *day_buckets = pipe.execute()
+    if not reconciled:
+        return None
+
+    usage: list[tuple[datetime, int]] = []
+    for buckets in day_buckets:
+        for minute, token_count in cast(dict[bytes, bytes], buckets).items():
+            if int(minute) < cutoff_minute:
+                continue
+            usage.append(
+                (
+                    datetime.fromtimestamp(int(minute) * 60, tz=timezone.utc),
+                    int(token_count),
+                )
+            )
+    return usage
+
+
+def replace_token_usage(
+    redis_client: Redis,
+    tenant_id: str,
+    scope: str,
+    usage: Sequence[tuple[datetime, int]],
+    cutoff_time: datetime,
+) -> None:
+    """Overwrites the completed minutes since cutoff_time with the usage computed from
+    the chat message table. The current minute is left alone since messages recorded
+    while the usage was computed would be lost otherwise."""
+    current_minute = _to_minute(datetime.now(tz=timezone.utc))
+    cutoff_minute = _to_minute(cutoff_time)
+
+    minute_to_tokens: dict[str, int] = {}
+    for time, token_count in usage:
+        minute = _to_minute(time)
+        if cutoff_minute <= minute < current_minute and token_count:
+            minute_to_tokens[str(minute)] = (
+                minute_to_tokens.get(str(minute), 0) + token_count
+            )
+
+    keys = _day_keys(tenant_id, scope, cutoff_minute, current_minute)
+    pipe = redis_client.pipeline(transaction=False)
+    for key in keys:
+        pipe.hkeys(key)
+    existing_minutes_by_key = pipe.execute()
+
+    pipe = redis_client.pipeline(transaction=False)
+    for key, existing_minutes in zip(keys, existing_minutes_by_key):
+        stale_minutes = [
+            minute
+            for minute in (m.decode() for m in existing_minutes)
+            if cutoff_minute <= int(minute) < current_minute
+            and minute not in minute_to_tokens
+        ]
+        if stale_minutes:
+            pipe.hdel(key, *stale_minutes)
+
+    for minute, token_count in minute_to_tokens.items():
+        key = _day_key(tenant_id, scope, int(minute))
+        pipe.hset(key, minute, token_count)
+        pipe.expire(key, _retention_seconds())
+    pipe.execute()
+
+
+def mark_token_usage_reconciled(
+    redis_client: Redis, tenant_id: str, scope: str
+) -> None:
+    pipe = redis_client.pipeline(transaction=False)
+    pipe.set(_reconciled_key(tenant_id, scope), 1, ex=TOKEN_USAGE_RECONCILED_TTL)
+    pipe.execute()
@@ -0,0 +1,83 @@
+"""Per user cache of the ACL entries from `get_acl_for_user`.
+
+With permission synced sources a user can be in thousands of external groups, which
+would otherwise be loaded from Postgres for every search. Every tenant has a
+generation counter that is incremented whenever the cached ACLs may have become stale
+(after an external group sync or any change of user group memberships, see
+`invalidate_current_tenant_user_acl_cache`), cached ACLs of an older generation are
+ignored and expire on their own.
+"""
+
+import json
+from typing import cast
+from uuid import UUID
+
+from redis import Redis
+
+from onyx.configs.app_configs import USER_ACL_CACHE_TTL_SECONDS
+from onyx.redis.redis_pool import get_redis_client
+from onyx.redis.redis_pool import tenant_key
+from onyx.utils.logger import setup_logger
+from shared_configs.contextvars import get_current_tenant_id
+
+logger = setup_logger()
+
+_KEY_PREFIX = "user_acl"
+
+
+def _generation_key(tenant_id: str) -> str:
+    return tenant_key(tenant_id, f"{_KEY_PREFIX}:generation")
+
+
+def _user_key(tenant_id: str, user_id: UUID) -> str:
+    return tenant_key(tenant_id, f"{_KEY_PREFIX}:{user_id}")
+
+
+def fetch_cached_user_acl(
+    redis_client: Redis, tenant_id: str, user_id: UUID
+) -> tuple[set[str] | None, int]:
+    """The cached ACL of the user (None if there is no current one) and the current
+    generation, which a freshly computed ACL has to be cached with."""
+    pipe = redis_client.pipeline(transaction=False)
+    pipe.get(_generation_key(tenant_id))
+    pipe.get(_user_key(tenant_id, user_id))
+    raw_generation, raw_entry = cast(list[bytes | None], pipe.execute())
+
+    generation = int(raw_generation) if raw_generation is not None else 0
+    if raw_entry is None:
+        return None, generation
+
+    entry = json.loads(raw_entry)
+    if entry["generation"] != generation:
+        return None, generation
+    return set(entry["acl"]), generation
+
+
+def cache_user_acl(
+    redis_client: Redis,
+    tenant_id: str,
+    user_id: UUID,
+    acl: set[str],
+    generation: int,
+) -> None:
+    """generation has to be the one fetched before the ACL was computed, so an ACL
+    computed while the cache was invalidated is never used."""
+    redis_client.set(
+        _user_key(tenant_id, user_id),
+        json.dumps({"generation": generation, "acl": sorted(acl)}),
+        ex=USER_ACL_CACHE_TTL_SECONDS,
+    )
+
+
+def invalidate_user_acl_cache(redis_client: Redis, tenant_id: str) -> None:
+    redis_client.incr(_generation_key(tenant_id))
+
+
+def invalidate_current_tenant_user_acl_cache() -> None:
+    """Has to be called after every committed change of the group memberships of users
+    (external or user groups). Redis failures are only logged."""
+    tenant_id = get_current_tenant_id()
+    try:
+        invalidate_user_acl_cache(get_redis_client(tenant_id=tenant_id), tenant_id)
+    except Exception:
+        logger.exception("Failed to invalidate the cached user ACLs")
@@ -7,19 +7,20 @@ from functools import lru_cache
 from dateutil import tz
 from fastapi import Depends
 from fastapi import HTTPException
-from sqlalchemy import func
 from sqlalchemy import select
-from sqlalchemy.orm import Session
 
 from onyx.auth.users import current_chat_accessible_user
 from onyx.db.engine.sql_engine import get_session_with_current_tenant
-from onyx.db.models import ChatMessage
-from onyx.db.models import ChatSession
 from onyx.db.models import TokenRateLimit
 from onyx.db.models import User
 from onyx.db.token_limit import fetch_all_global_token_rate_limits
+from onyx.db.token_limit import fetch_global_token_usage
+from onyx.redis.redis_pool import get_redis_client
+from onyx.redis.redis_token_usage import fetch_token_usage
+from onyx.redis.redis_token_usage import TOKEN_USAGE_GLOBAL_SCOPE
 from onyx.utils.logger import setup_logger
 from onyx.utils.variable_functionality import fetch_versioned_implementation
+from shared_configs.contextvars import get_current_tenant_id
 
 
 logger = setup_logger()
@@ -59,7 +60,11 @@ def _user_is_rate_limited_by_global() -> None:
 
         if global_rate_limits:
             global_cutoff_time = _get_cutoff_time(global_rate_limits)
-            global_usage = _fetch_global_usage(global_cutoff_time, db_session)
+            global_usage = fetch_usage_from_counters(
+                TOKEN_USAGE_GLOBAL_SCOPE, global_cutoff_time
+            )
+            if global_usage is None:
+                global_usage = fetch_global_token_usage(db_session, global_cutoff_time)
 
             if _is_rate_limited(global_rate_limits, global_usage):
                 raise HTTPException(
@@ -68,32 +73,26 @@ def _user_is_rate_limited_by_global() -> None:
                 )
 
 
-def _fetch_global_usage(
-    cutoff_time: datetime, db_session: Session
-) -> Sequence[tuple[datetime, int]]:
-    """
-    Fetch global token usage within the cutoff time, grouped by minute
-    """
-    result = db_session.execute(
-        select(
-            func.date_trunc("minute", ChatMessage.time_sent),
-            func.sum(ChatMessage.token_count),
-        )
-        .join(ChatSession, ChatMessage.chat_session_id == ChatSession.id)
-        .filter(
-            ChatMessage.time_sent >= cutoff_time,
-        )
-        .group_by(func.date_trunc("minute", ChatMessage.time_sent))
-    ).all()
-
-    return [(row[0], row[1]) for row in result]
-
-
 """
 Common functions
 """
 
 
+def fetch_usage_from_counters(
+    scope: str, cutoff_time: datetime
+) -> Sequence[tuple[datetime, int]] | None:
+    """Token usage by minute from the Redis counters, None if they can't be used and
+    the usage has to be aggregated from the chat messages instead."""
+    tenant_id = get_current_tenant_id()
+    try:
+        return fetch_token_usage(
+            get_redis_client(tenant_id=tenant_id), tenant_id, scope, cutoff_time
+        )
+    except Exception:
+        logger.exception("Failed to read token usage counters from Redis")
+        return None
+
+
 def _get_cutoff_time(rate_limits: Sequence[TokenRateLimit]) -> datetime:
     max_period_hours = max(rate_limit.period_hours for rate_limit in rate_limits)
     return datetime.now(tz=timezone.utc) - timedelta(hours=max_period_hours)
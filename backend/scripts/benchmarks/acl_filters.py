@@ -0,0 +1,82 @@
+"""
+Compares the ACL filter as an OR of `contains` clauses in the YQL (the previous
+behavior) with the compact ACL filter passed as a weightedSet query input, for ACLs of
+10, 1k and 10k entries: time to build the filters and the request body and the size
+of the request body. With --index-name the queries are also sent to the configured
+Vespa to measure the query latency, otherwise no services are needed.
+
+Usage:
+    python -m scripts.benchmarks.acl_filters --sizes 10 1000 10000
+"""
+
+import argparse
+import json
+import time
+from collections.abc import Callable
+from typing import Any
+
+from onyx.context.search.models import IndexFilters
+from onyx.document_index.vespa.chunk_retrieval import query_vespa
+from onyx.document_index.vespa.shared_utils import vespa_request_builders
+from onyx.document_index.vespa.shared_utils.vespa_request_builders import (
+    build_vespa_filter_params,
+)
+from onyx.document_index.vespa.shared_utils.vespa_request_builders import (
+    build_vespa_filters,
+)
+from onyx.document_index.vespa_constants import YQL_BASE
+
+
+def _time_it(func: Callable[[], object], iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    return (time.perf_counter() - start) / iterations * 1000
+
+
+def _build_request(filters: IndexFilters, index_name: str) -> dict[str, Any]:
+    return {
+        "yql": YQL_BASE.format(index_name=index_name)
+        + build_vespa_filters(filters, remove_trailing_and=True),
+        "hits": 10,
+        **build_vespa_filter_params(filters),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 1000, 10000])
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--index-name", default=None)
+    args = parser.parse_args()
+
+    index_name = args.index_name or "danswer_chunk"
+    for size in args.sizes:
+        filters = IndexFilters(
+            access_control_list=["user_email:user@example.com", "PUBLIC"]
+            + [f"external_group:confluence_group_{i}" for i in range(size - 2)]
+        )
+
+        # 0 always uses the OR of `contains` clauses
+        for name, min_entries in [("or clauses", 0), ("weightedSet", 1)]:
+            vespa_request_builders.VESPA_COMPACT_ACL_FILTER_MIN_ENTRIES = min_entries
+
+            request = _build_request(filters, index_name)
+            build_ms = _time_it(
+                lambda: json.dumps(_build_request(filters, index_name)),
+                args.iterations,
+            )
+            line = (
+                f"acl={size:>6} {name:<11} "
+                f"body_bytes={len(json.dumps(request).encode()):>9} "
+                f"build={build_ms:8.3f}ms"
+            )
+
+            if args.index_name:
+                query_ms = _time_it(lambda: query_vespa(request), args.iterations)
+                line += f" query={query_ms:8.2f}ms"
+            print(line)
+
+
+if __name__ == "__main__":
+    main()
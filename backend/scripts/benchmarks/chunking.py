@@ -0,0 +1,139 @@
+"""
+Compares chunking a batch into a list without the token count cache (the previous
+behavior) with the streaming chunk_iter mode and its shared token count cache:
+chunking time and peak memory for a large mixed corpus (short tickets, long wiki
+pages, pages with many small sections and code heavy files). Only the tokenizer of
+the document encoder is needed, no services.
+
+Usage:
+    python -m scripts.benchmarks.chunking --docs 500 --multipass
+"""
+
+import argparse
+import random
+import string
+import time
+import tracemalloc
+from collections.abc import Callable
+
+from onyx.configs.constants import DocumentSource
+from onyx.configs.model_configs import DOCUMENT_ENCODER_MODEL
+from onyx.connectors.models import IndexingDocument
+from onyx.connectors.models import Section
+from onyx.connectors.models import TextSection
+from onyx.indexing.chunker import Chunker
+from onyx.natural_language_processing.utils import get_tokenizer
+
+
+def _build_documents(num_docs: int) -> list[IndexingDocument]:
+    rng = random.Random(0)
+    words = [
+        "".join(rng.choices(string.ascii_lowercase, k=rng.randint(2, 10)))
+        for _ in range(5000)
+    ]
+
+    def _sentence() -> str:
+        return " ".join(rng.choices(words, k=rng.randint(5, 30))).capitalize() + "."
+
+    def _paragraph(num_sentences: int) -> str:
+        return " ".join(_sentence() for _ in range(num_sentences))
+
+    def _code(num_lines: int) -> str:
+        return "\n".join(
+            f"    {rng.choice(words)} = {rng.choice(words)}({rng.randint(0, 99)})"
+            for _ in range(num_lines)
+        )
+
+    documents: list[IndexingDocument] = []
+    for ind in range(num_docs):
+        kind = ind % 4
+        if kind == 0:
+            # short tickets
+            sections = [TextSection(text=_paragraph(rng.randint(1, 5)), link=None)]
+        elif kind == 1:
+            # long wiki pages
+            sections = [
+                TextSection(text=_paragraph(rng.randint(20, 60)), link=f"#{s}")
+                for s in range(rng.randint(3, 10))
+            ]
+        elif kind == 2:
+            # many small sections, e.g. chat threads
+            sections = [
+                TextSection(text=_sentence(), link=f"#{s}")
+                for s in range(rng.randint(50, 200))
+            ]
+        else:
+            # code heavy files
+            sections = [
+                TextSection(text=_code(rng.randint(50, 300)), link=None),
+                TextSection(text=_paragraph(5), link=None),
+            ]
+
+        documents.append(
+            IndexingDocument(
+                id=f"doc_{ind}",
+                source=DocumentSource.CONFLUENCE,
+                semantic_identifier=f"Document {ind}",
+                metadata={"space": "ENG", "labels": ["design", "backend"]},
+                sections=list(sections),
+                processed_sections=[
+                    Section(text=section.text, link=section.link)
+                    for section in sections
+                ],
+            )
+        )
+
+    return documents
+
+
+def _measure(run: Callable[[], int]) -> tuple[int, float, float]:
+    start = time.perf_counter()
+    num_chunks = run()
+    seconds = time.perf_counter() - start
+
+    # measured separately since tracing slows everything down
+    tracemalloc.start()
+    run()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return num_chunks, seconds, peak / 1024 / 1024
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--docs", type=int, default=500)
+    parser.add_argument("--multipass", action="store_true")
+    args = parser.parse_args()
+
+    tokenizer = get_tokenizer(model_name=DOCUMENT_ENCODER_MODEL, provider_type=None)
+    documents = _build_documents(args.docs)
+
+    def _list_without_cache() -> int:
+        chunker = Chunker(
+            tokenizer=tokenizer,
+            enable_multipass=args.multipass,
+            token_count_cache_size=0,
+        )
+        return len(chunker.chunk(documents))
+
+    stream_chunker = Chunker(tokenizer=tokenizer, enable_multipass=args.multipass)
+
+    def _stream_with_cache() -> int:
+        # the chunks are only counted and dropped right away, so this measures the
+        # memory of chunking alone. The indexing pipeline keeps every embedded chunk
+        # of the batch until the batch is written to the document index.
+        return sum(len(chunks) for chunks in stream_chunker.chunk_iter(documents))
+
+    for name, run in [
+        ("list, no cache", _list_without_cache),
+        ("stream, cache", _stream_with_cache),
+    ]:
+        num_chunks, seconds, peak_mb = _measure(run)
+        print(
+            f"{name:<16} chunks={num_chunks:>7} time={seconds:8.2f}s "
+            f"peak_memory={peak_mb:8.1f}MB"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Measures the per token cost of the streaming citation processors over long answers
+with code blocks and citations. The cost per token should stay flat as the answer
+grows. No services are needed.
+
+Usage:
+    python -m scripts.benchmarks.citation_processing --tokens 20000
+"""
+
+import argparse
+import random
+import time
+from datetime import datetime
+
+from onyx.chat.models import LlmDoc
+from onyx.chat.stream_processing.citation_processing import CitationProcessor
+from onyx.chat.stream_processing.citation_processing import CitationProcessorGraph
+from onyx.chat.stream_processing.utils import DocumentIdOrderMapping
+from onyx.configs.constants import DocumentSource
+
+_NUM_DOCS = 10
+
+
+def _build_docs() -> list[LlmDoc]:
+    return [
+        LlmDoc(
+            document_id=f"doc_{ind}",
+            content="",
+            blurb="",
+            semantic_identifier=f"Doc {ind}",
+            source_type=DocumentSource.WEB,
+            metadata={},
+            updated_at=datetime.now(),
+            link=f"https://{ind}.com",
+            source_links=None,
+            match_highlights=[],
+        )
+        for ind in range(1, _NUM_DOCS + 1)
+    ]
+
+
+def _build_tokens(num_tokens: int) -> list[str]:
+    rng = random.Random(0)
+    words = ["the", " answer", " is", " that", " onyx", " indexes", ",", "."]
+    tokens: list[str] = []
+    while len(tokens) < num_tokens:
+        tokens.extend(rng.choice(words) for _ in range(rng.randint(20, 60)))
+        tokens.extend(["[", str(rng.randint(1, _NUM_DOCS)), "]"])
+        if rng.random() < 0.2:
+            tokens.extend(["```", "python\n", "x = [1]\n", "```", "\n"])
+    return tokens[:num_tokens]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tokens", type=int, default=20000)
+    parser.add_argument("--windows", type=int, default=5)
+    args = parser.parse_args()
+
+    docs = _build_docs()
+    tokens = _build_tokens(args.tokens)
+    window = max(len(tokens) // args.windows, 1)
+
+    processor = CitationProcessor(
+        context_docs=docs,
+        doc_id_to_rank_map=DocumentIdOrderMapping(
+            order_mapping={doc.document_id: ind for ind, doc in enumerate(docs, 1)}
+        ),
+    )
+    graph_processor = CitationProcessorGraph(context_docs=docs)
+
+    for name, process in [
+        ("CitationProcessor", lambda token: list(processor.process_token(token))),
+        ("CitationProcessorGraph", graph_processor.process_token),
+    ]:
+        per_window_us: list[float] = []
+        for start in range(0, len(tokens), window):
+            window_start = time.perf_counter()
+            for token in tokens[start : start + window]:
+                process(token)
+            elapsed = time.perf_counter() - window_start
+            per_window_us.append(elapsed / window * 1_000_000)
+        process(None)
+
+        # flat means the last window costs about as much per token as the first
+        print(
+            f"{name:<24} us/token per window: "
+            + " ".join(f"{cost:6.2f}" for cost in per_window_us)
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Compares the legacy pretty printed JSON document batches with the gzipped newline
+delimited format used by DocumentBatchStorage: bytes stored, encode and decode time
+per batch. No services are needed.
+
+Usage:
+    python -m scripts.benchmarks.document_batch_storage --docs 100 --section-chars 4000
+"""
+
+import argparse
+import json
+import random
+import string
+import time
+from collections.abc import Callable
+from io import BytesIO
+from typing import cast
+
+from onyx.configs.constants import DocumentSource
+from onyx.connectors.models import Document
+from onyx.connectors.models import TextSection
+from onyx.file_store.document_batch_storage import FileStoreDocumentBatchStorage
+from onyx.file_store.file_store import FileStore
+
+
+def _time_it(func: Callable[[], object], iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    return (time.perf_counter() - start) / iterations * 1000
+
+
+def _build_documents(num_docs: int, section_chars: int) -> list[Document]:
+    rng = random.Random(0)
+    words = [
+        "".join(rng.choices(string.ascii_lowercase, k=rng.randint(2, 10)))
+        for _ in range(2000)
+    ]
+
+    def _text() -> str:
+        text = ""
+        while len(text) < section_chars:
+            text += " ".join(rng.choices(words, k=20)) + ".\n"
+        return text
+
+    return [
+        Document(
+            id=f"https://wiki.example.com/page/{ind}",
+            source=DocumentSource.CONFLUENCE,
+            semantic_identifier=f"Page {ind}",
+            metadata={"space": "ENG", "labels": ["design", "backend"]},
+            sections=[
+                TextSection(text=_text(), link=f"https://wiki.example.com/{ind}#{s}")
+                for s in range(3)
+            ],
+        )
+        for ind in range(num_docs)
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--docs", type=int, default=100)
+    parser.add_argument("--section-chars", type=int, default=4000)
+    parser.add_argument("--iterations", type=int, default=10)
+    args = parser.parse_args()
+
+    documents = _build_documents(args.docs, args.section_chars)
+    # only the (de)serialization helpers are used, no file store is needed
+    storage = FileStoreDocumentBatchStorage(0, 0, file_store=cast(FileStore, None))
+
+    def _legacy_encode() -> bytes:
+        return json.dumps(
+            [doc.model_dump(mode="json") for doc in documents], indent=2
+        ).encode()
+
+    def _encode() -> bytes:
+        buffer = BytesIO()
+        storage._write_documents(documents, buffer)
+        return buffer.getvalue()
+
+    legacy_payload = _legacy_encode()
+    payload = _encode()
+
+    legacy_encode_ms = _time_it(_legacy_encode, args.iterations)
+    legacy_decode_ms = _time_it(
+        lambda: storage._deserialize_documents(legacy_payload.decode("utf-8")),
+        args.iterations,
+    )
+    encode_ms = _time_it(_encode, args.iterations)
+    decode_ms = _time_it(
+        lambda: list(storage._iter_documents(BytesIO(payload))), args.iterations
+    )
+
+    print(
+        f"legacy json   bytes={len(legacy_payload):>10} "
+        f"encode={legacy_encode_ms:8.2f}ms decode={legacy_decode_ms:8.2f}ms"
+    )
+    print(
+        f"jsonl.gz      bytes={len(payload):>10} "
+        f"encode={encode_ms:8.2f}ms decode={decode_ms:8.2f}ms"
+    )
+
+
+if __name__ == "__main__":
+    main()
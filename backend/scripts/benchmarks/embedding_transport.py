@@ -0,0 +1,73 @@
+"""
+Compares the JSON and binary encodings used between EmbeddingModel and the model
+server's /encoder/bi-encoder-embed endpoint. No services are needed.
+
+Usage:
+    python -m scripts.benchmarks.embedding_transport --rows 128 --dims 768
+"""
+
+import argparse
+import json
+import time
+from collections.abc import Callable
+
+import numpy as np
+
+from shared_configs.embedding_transport import decode_embeddings
+from shared_configs.embedding_transport import encode_embeddings
+from shared_configs.enums import EmbeddingTransportDtype
+from shared_configs.model_server_models import EmbedResponse
+
+
+def _time_it(func: Callable[[], object], iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    return (time.perf_counter() - start) / iterations * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=128)
+    parser.add_argument("--dims", type=int, default=768)
+    parser.add_argument("--iterations", type=int, default=20)
+    args = parser.parse_args()
+
+    matrix = np.random.default_rng(0).standard_normal(
+        (args.rows, args.dims), dtype=np.float32
+    )
+
+    # mirrors what the server / client did before: tolist + JSON + pydantic
+    json_payload = EmbedResponse(embeddings=matrix.tolist()).model_dump_json()
+    json_encode_ms = _time_it(
+        lambda: EmbedResponse(embeddings=matrix.tolist()).model_dump_json(),
+        args.iterations,
+    )
+    json_decode_ms = _time_it(
+        lambda: EmbedResponse(**json.loads(json_payload)), args.iterations
+    )
+    print(
+        f"json     bytes={len(json_payload.encode()):>10} "
+        f"encode={json_encode_ms:8.2f}ms decode={json_decode_ms:8.2f}ms"
+    )
+
+    for dtype in EmbeddingTransportDtype:
+        payload = encode_embeddings(matrix, dtype=dtype)
+        encode_ms = _time_it(
+            lambda: encode_embeddings(matrix, dtype=dtype), args.iterations
+        )
+        # the client still hands lists to the rest of the pipeline
+        decode_ms = _time_it(
+            lambda: EmbedResponse.model_construct(
+                embeddings=decode_embeddings(payload).tolist()
+            ),
+            args.iterations,
+        )
+        print(
+            f"{dtype.value:<8} bytes={len(payload):>10} "
+            f"encode={encode_ms:8.2f}ms decode={decode_ms:8.2f}ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
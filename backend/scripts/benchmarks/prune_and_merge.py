@@ -0,0 +1,178 @@
+"""
+Compares pruning retrieved sections the previous way (deep copying every section and
+encoding every fully serialized section) with the current pruning, which works on the
+retrieved sections directly and reuses the cached token counts of their contents. The
+current pruning is measured on a cold cache (the first chat turn) and on a warm cache
+(later turns and agent sub-searches over the same sections). Only the tokenizer of the
+LLM is needed, no services.
+
+Usage:
+    python -m scripts.benchmarks.prune_and_merge --sections 75 --tool-message
+"""
+
+import argparse
+import json
+import random
+import string
+import time
+from collections.abc import Callable
+from copy import deepcopy
+from datetime import datetime
+from unittest.mock import Mock
+
+from onyx.chat.prune_and_merge import _apply_pruning
+from onyx.chat.prune_and_merge import _CONTENT_TOKEN_COUNT_CACHE
+from onyx.configs.constants import DocumentSource
+from onyx.context.search.models import InferenceChunk
+from onyx.context.search.models import InferenceSection
+from onyx.natural_language_processing.utils import BaseTokenizer
+from onyx.natural_language_processing.utils import get_tokenizer
+from onyx.prompts.prompt_utils import build_doc_context_str
+from onyx.tools.tool_implementations.search.search_utils import section_to_dict
+
+
+def _build_sections(num_sections: int) -> list[InferenceSection]:
+    rng = random.Random(0)
+    words = [
+        "".join(rng.choices(string.ascii_lowercase, k=rng.randint(2, 10)))
+        for _ in range(5000)
+    ]
+
+    sections: list[InferenceSection] = []
+    for ind in range(num_sections):
+        # a center chunk expanded by a few neighbouring chunks of the document
+        chunks = [
+            InferenceChunk(
+                chunk_id=chunk_id,
+                document_id=f"doc_{ind}",
+                semantic_identifier=f"Document {ind}",
+                title=f"Document {ind}",
+                blurb="",
+                content=" ".join(rng.choices(words, k=rng.randint(200, 400))),
+                source_links={0: f"https://example.com/doc_{ind}"},
+                section_continuation=chunk_id > 0,
+                source_type=DocumentSource.CONFLUENCE,
+                boost=0,
+                recency_bias=1.0,
+                score=1.0 - ind / num_sections,
+                hidden=False,
+                metadata={"space": "ENG", "labels": ["design", "backend"]},
+                match_highlights=[],
+                updated_at=datetime(2024, 1, 1),
+                image_file_id=None,
+                doc_summary="",
+                chunk_context="",
+            )
+            for chunk_id in range(rng.randint(1, 4))
+        ]
+        sections.append(
+            InferenceSection(
+                center_chunk=chunks[0],
+                chunks=chunks,
+                combined_content="\n".join(chunk.content for chunk in chunks),
+            )
+        )
+
+    return sections
+
+
+def _previous_pruning(
+    sections: list[InferenceSection],
+    token_limit: int,
+    using_tool_message: bool,
+    tokenizer: BaseTokenizer,
+) -> list[InferenceSection]:
+    """The copying and token counting of the previous pruning, without the
+    (unchanged) trimming of the final section"""
+    sections = deepcopy(sections)
+    total_tokens = 0
+    for ind, section in enumerate(sections):
+        section_str = (
+            json.dumps(section_to_dict(section, ind))
+            if using_tool_message
+            else build_doc_context_str(
+                semantic_identifier=section.center_chunk.semantic_identifier,
+                source_type=section.center_chunk.source_type,
+                content=section.combined_content,
+                metadata_dict=section.center_chunk.metadata,
+                updated_at=section.center_chunk.updated_at,
+                ind=ind,
+            )
+        )
+        total_tokens += len(tokenizer.encode(section_str))
+        if total_tokens > token_limit:
+            return sections[: ind + 1]
+    return sections
+
+
+def _measure(run: Callable[[], int], runs: int) -> tuple[int, float]:
+    num_sections = 0
+    start = time.perf_counter()
+    for _ in range(runs):
+        num_sections = run()
+    return num_sections, (time.perf_counter() - start) / runs
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sections", type=int, default=75)
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--model-provider", default="openai")
+    parser.add_argument("--model-name", default="gpt-4o")
+    parser.add_argument(
+        "--token-limit",
+        type=int,
+        default=10**9,
+        help="the default keeps every section so that all of them are counted",
+    )
+    parser.add_argument("--tool-message", action="store_true")
+    args = parser.parse_args()
+
+    tokenizer = get_tokenizer(
+        model_name=args.model_name, provider_type=args.model_provider
+    )
+    llm_config = Mock(model_provider=args.model_provider, model_name=args.model_name)
+    sections = _build_sections(args.sections)
+
+    def _previous() -> int:
+        return len(
+            _previous_pruning(
+                sections, args.token_limit, args.tool_message, tokenizer
+            )
+        )
+
+    def _current() -> int:
+        return len(
+            _apply_pruning(
+                sections=sections,
+                section_relevance_list=None,
+                keep_sections=[],
+                token_limit=args.token_limit,
+                is_manually_selected_docs=False,
+                use_sections=True,
+                using_tool_message=args.tool_message,
+                llm_config=llm_config,
+            )
+        )
+
+    def _current_cold() -> int:
+        _CONTENT_TOKEN_COUNT_CACHE.clear()
+        return _current()
+
+    _CONTENT_TOKEN_COUNT_CACHE.clear()
+    for name, run in [
+        ("previous", _previous),
+        ("current, cold", _current_cold),
+        ("current, warm", _current),
+    ]:
+        num_sections, seconds = _measure(run, args.runs)
+        print(f"{name:<14} sections={num_sections:>4} time={seconds * 1000:8.2f}ms")
+
+    print(
+        f"content token count cache hits={_CONTENT_TOKEN_COUNT_CACHE.hits} "
+        f"misses={_CONTENT_TOKEN_COUNT_CACHE.misses}"
+    )
+
+
+if __name__ == "__main__":
+    main()
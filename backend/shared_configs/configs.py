@@ -54,6 +54,23 @@ DISABLE_RERANK_FOR_STREAMING = (
 # model. If torch finds more threads on its own, this value is not used.
 MIN_THREADS_ML_MODELS = int(os.environ.get("MIN_THREADS_ML_MODELS") or 1)
 
+# Coalesce concurrent embed / rerank requests for the same model into shared forward
+# passes that run on one dedicated inference thread per model
+MODEL_SERVER_DYNAMIC_BATCHING = (
+    os.environ.get("MODEL_SERVER_DYNAMIC_BATCHING", "").lower() == "true"
+)
+# How long the first request of a batch waits for others to join it
+MODEL_SERVER_BATCH_MAX_WAIT_MS = float(
+    os.environ.get("MODEL_SERVER_BATCH_MAX_WAIT_MS") or 5
+)
+# Max number of texts (or query/doc pairs) coalesced into one batch
+MODEL_SERVER_BATCH_MAX_SIZE = int(os.environ.get("MODEL_SERVER_BATCH_MAX_SIZE") or 128)
+# Texts of a coalesced batch are sorted by length and run in forward passes of this size
+# so short queries are not padded to the length of long passages
+MODEL_SERVER_BATCH_FORWARD_SIZE = int(
+    os.environ.get("MODEL_SERVER_BATCH_FORWARD_SIZE") or 32
+)
+
 # Model server that has indexing only set will throw exception if used for reranking
 # or intent classification
 INDEXING_ONLY = os.environ.get("INDEXING_ONLY", "").lower() == "true"
@@ -0,0 +1,82 @@
+"""Binary wire format for embeddings returned by the model server.
+
+JSON encoding of embeddings means building and parsing one Python float object per
+dimension on both sides. Clients that send
+`Accept: application/vnd.onyx.embeddings` instead receive the raw little-endian
+matrix prefixed with a small fixed size header:
+
+    magic (4 bytes) | version (u8) | dtype (u8) | reserved (u16) | rows (u32) | dims (u32)
+
+Clients that don't ask for it keep getting the JSON `EmbedResponse`.
+
+Single embeddings cached in Redis are stored as the same raw little-endian float32
+values, without the header.
+"""
+
+import struct
+
+import numpy as np
+
+from shared_configs.enums import EmbeddingTransportDtype
+from shared_configs.model_server_models import Embedding
+
+EMBEDDING_BINARY_CONTENT_TYPE = "application/vnd.onyx.embeddings"
+# header the client sets to pick the element type of the binary payload
+EMBEDDING_BINARY_DTYPE_HEADER = "X-Onyx-Embedding-Dtype"
+
+_MAGIC = b"ONXE"
+_VERSION = 1
+_HEADER = struct.Struct("<4sBBHII")
+
+_DTYPE_CODES: dict[EmbeddingTransportDtype, int] = {
+    EmbeddingTransportDtype.FLOAT32: 0,
+    EmbeddingTransportDtype.FLOAT16: 1,
+}
+_NUMPY_DTYPES: dict[int, str] = {
+    0: "<f4",
+    1: "<f2",
+}
+
+
+def encode_embeddings(
+    embeddings: np.ndarray | list[list[float]],
+    dtype: EmbeddingTransportDtype = EmbeddingTransportDtype.FLOAT32,
+) -> bytes:
+    dtype_code = _DTYPE_CODES[dtype]
+    matrix = np.ascontiguousarray(embeddings, dtype=_NUMPY_DTYPES[dtype_code])
+    if matrix.ndim != 2:
+        raise ValueError(f"Expected a 2D embedding matrix, got shape {matrix.shape}")
+
+    rows, dims = matrix.shape
+    return _HEADER.pack(_MAGIC, _VERSION, dtype_code, 0, rows, dims) + matrix.tobytes()
+
+
+def decode_embeddings(payload: bytes) -> np.ndarray:
+    """Decodes a binary payload into a float32 (rows, dims) matrix without copying
+    when the payload is already float32."""
+    if len(payload) < _HEADER.size:
+        raise ValueError("Embedding payload is shorter than its header")
+
+    magic, version, dtype_code, _, rows, dims = _HEADER.unpack_from(payload)
+    if magic != _MAGIC or version != _VERSION:
+        raise ValueError(
+            f"Unrecognized embedding payload (magic={magic!r}, version={version})"
+        )
+    if dtype_code not in _NUMPY_DTYPES:
+        raise ValueError(f"Unknown embedding dtype code {dtype_code}")
+
+    matrix = np.frombuffer(
+        payload,
+        dtype=_NUMPY_DTYPES[dtype_code],
+        count=rows * dims,
+        offset=_HEADER.size,
+    ).reshape(rows, dims)
+    return matrix.astype(np.float32, copy=False)
+
+
+def pack_embedding(embedding: Embedding) -> bytes:
+    return np.asarray(embedding, dtype="<f4").tobytes()
+
+
+def unpack_embedding(data: bytes) -> Embedding:
+    return np.frombuffer(data, dtype="<f4").tolist()
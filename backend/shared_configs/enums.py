@@ -19,3 +19,8 @@ class RerankerProvider(str, Enum):
 class EmbedTextType(str, Enum):
     QUERY = "query"
     PASSAGE = "passage"
+
+
+class EmbeddingTransportDtype(str, Enum):
+    FLOAT32 = "float32"
+    FLOAT16 = "float16"
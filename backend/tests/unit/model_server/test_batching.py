@@ -0,0 +1,62 @@
+import asyncio
+import threading
+
+import pytest
+
+from model_server.batching import DynamicBatcher
+
+
+@pytest.mark.asyncio
+async def test_concurrent_requests_are_coalesced_and_ordered() -> None:
+    forward_passes: list[list[str]] = []
+    threads: set[int] = set()
+
+    def run_batch(texts: list[str]) -> list[str]:
+        forward_passes.append(texts)
+        threads.add(threading.get_ident())
+        return [text.upper() for text in texts]
+
+    batcher: DynamicBatcher[str] = DynamicBatcher(
+        name="test",
+        run_batch=run_batch,
+        item_length=len,
+        max_batch_size=64,
+        max_wait_ms=50,
+        forward_batch_size=2,
+    )
+
+    results = await asyncio.gather(
+        batcher.submit(["ccc", "a"]),
+        batcher.submit(["bb"]),
+        batcher.submit(["dddd", "e"]),
+    )
+
+    assert results == [["CCC", "A"], ["BB"], ["DDDD", "E"]]
+    # all 5 texts in one coalesced batch, split into length sorted forward passes
+    assert forward_passes == [["a", "e"], ["bb", "ccc"], ["dddd"]]
+    assert len(threads) == 1
+
+    stats = batcher.get_stats()
+    assert stats["batches"] == 1
+    assert stats["requests"] == 3
+    assert stats["last_batch_size"] == 5
+    assert stats["queue_depth"] == 0
+
+
+@pytest.mark.asyncio
+async def test_failures_propagate_to_every_request() -> None:
+    def run_batch(texts: list[str]) -> list[str]:
+        raise RuntimeError("model exploded")
+
+    batcher: DynamicBatcher[str] = DynamicBatcher(
+        name="failing", run_batch=run_batch, item_length=len, max_wait_ms=20
+    )
+
+    results = await asyncio.gather(
+        batcher.submit(["a"]), batcher.submit(["b"]), return_exceptions=True
+    )
+    assert all(isinstance(result, RuntimeError) for result in results)
+
+    # the consumer keeps serving after a failed batch
+    with pytest.raises(RuntimeError):
+        await batcher.submit(["c"])
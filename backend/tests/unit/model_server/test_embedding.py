@@ -103,3 +103,127 @@ async def test_concurrent_embeddings() -> None:
         # However, the developer may still introduce unnecessary blocking above the mock and this test will
         # still pass as long as it's less than (7 - 5) / 5 seconds
         assert end_time - start_time < 7
+
+
+@pytest.fixture
+def dynamic_batching() -> Any:
+    with (
+        patch("model_server.encoders.MODEL_SERVER_DYNAMIC_BATCHING", True),
+        patch.dict("model_server.batching._BATCHERS", clear=True),
+    ):
+        yield
+
+
+@pytest.mark.asyncio
+async def test_embed_text_dynamic_batching(dynamic_batching: None) -> None:
+    def mock_encode(texts: list[str], **kwargs: Any) -> List[List[float]]:
+        return [[float(len(text))] for text in texts]
+
+    with patch("model_server.encoders.get_embedding_model") as mock_get_model:
+        mock_model = MagicMock()
+        mock_model.encode.side_effect = mock_encode
+        mock_get_model.return_value = mock_model
+
+        results = await asyncio.gather(
+            *[
+                embed_text(
+                    texts=texts,
+                    model_name="fake-local-model",
+                    max_context_length=512,
+                    normalize_embeddings=True,
+                    prefix=None,
+                )
+                for texts in (["ccc", "a"], ["bbbb"], ["dd", "eeeee"])
+            ]
+        )
+
+        assert results == [[[3.0], [1.0]], [[4.0]], [[2.0], [5.0]]]
+        # all concurrent requests share one forward pass, sorted by length
+        mock_model.encode.assert_called_once()
+        assert mock_model.encode.call_args.args[0] == [
+            "a",
+            "dd",
+            "ccc",
+            "bbbb",
+            "eeeee",
+        ]
+
+
+@pytest.mark.asyncio
+async def test_embed_text_dynamic_batching_groups_settings(
+    dynamic_batching: None,
+) -> None:
+    with patch("model_server.encoders.get_embedding_model") as mock_get_model:
+        mock_model = MagicMock()
+        mock_model.encode.side_effect = lambda texts, **kwargs: [
+            [1.0 if kwargs["normalize_embeddings"] else 0.0] for _ in texts
+        ]
+        mock_get_model.return_value = mock_model
+
+        normalized, raw = await asyncio.gather(
+            *[
+                embed_text(
+                    texts=["test"],
+                    model_name="fake-local-model",
+                    max_context_length=512,
+                    normalize_embeddings=normalize,
+                    prefix=None,
+                )
+                for normalize in (True, False)
+            ]
+        )
+
+        assert normalized == [[1.0]]
+        assert raw == [[0.0]]
+        assert mock_model.encode.call_count == 2
+
+
+@pytest.mark.asyncio
+async def test_local_rerank_dynamic_batching(dynamic_batching: None) -> None:
+    with patch("model_server.encoders.get_local_reranking_model") as mock_get_model:
+        mock_model = MagicMock()
+        mock_model.predict.side_effect = lambda pairs, **kwargs: [
+            float(len(doc)) for _, doc in pairs
+        ]
+        mock_get_model.return_value = mock_model
+
+        first, second = await asyncio.gather(
+            local_rerank(query="q", docs=["aaa", "b"], model_name="fake-rerank"),
+            local_rerank(query="q", docs=["cc"], model_name="fake-rerank"),
+        )
+
+        assert first == [3.0, 1.0]
+        assert second == [2.0]
+        mock_model.predict.assert_called_once()
+
+
+def test_batching_stats_endpoint(dynamic_batching: None) -> None:
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+
+    from model_server.management_endpoints import router as management_router
+
+    with patch("model_server.encoders.get_embedding_model") as mock_get_model:
+        mock_model = MagicMock()
+        mock_model.encode.side_effect = lambda texts, **kwargs: [[0.0] for _ in texts]
+        mock_get_model.return_value = mock_model
+
+        asyncio.run(
+            embed_text(
+                texts=["a", "b"],
+                model_name="fake-local-model",
+                max_context_length=512,
+                normalize_embeddings=True,
+                prefix=None,
+            )
+        )
+
+    app = FastAPI()
+    app.include_router(management_router)
+    response = TestClient(app).get("/api/batching-stats")
+
+    assert response.status_code == 200
+    stats = response.json()["embed:fake-local-model"]
+    assert stats["batches"] == 1
+    assert stats["items"] == 2
+    assert stats["queue_depth"] == 0
@@ -0,0 +1,125 @@
+from collections.abc import Iterator
+from unittest.mock import MagicMock
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from model_server.encoders import router as encoder_router
+from shared_configs.embedding_transport import decode_embeddings
+from shared_configs.embedding_transport import EMBEDDING_BINARY_CONTENT_TYPE
+from shared_configs.embedding_transport import EMBEDDING_BINARY_DTYPE_HEADER
+from shared_configs.embedding_transport import encode_embeddings
+from shared_configs.embedding_transport import pack_embedding
+from shared_configs.embedding_transport import unpack_embedding
+from shared_configs.enums import EmbeddingTransportDtype
+from shared_configs.enums import EmbedTextType
+from shared_configs.model_server_models import EmbedRequest
+
+
+def test_float32_roundtrip_is_exact() -> None:
+    matrix = np.random.default_rng(0).standard_normal((4, 16), dtype=np.float32)
+
+    decoded = decode_embeddings(encode_embeddings(matrix))
+
+    assert decoded.dtype == np.float32
+    assert decoded.shape == (4, 16)
+    assert np.array_equal(decoded, matrix)
+
+
+def test_pack_roundtrip() -> None:
+    embedding = [0.5, -1.25, 3.0]
+    assert unpack_embedding(pack_embedding(embedding)) == embedding
+
+
+def test_float16_roundtrip_from_lists() -> None:
+    embeddings = [[0.1, 0.2, 0.3], [0.4, 0.5, 0.6]]
+
+    payload = encode_embeddings(embeddings, dtype=EmbeddingTransportDtype.FLOAT16)
+    decoded = decode_embeddings(payload)
+
+    assert decoded.dtype == np.float32
+    assert np.allclose(decoded, embeddings, atol=1e-3)
+    # 2 bytes per element after the header
+    assert len(payload) == len(encode_embeddings([[0.0]])) - 4 + 2 * 6
+
+
+def test_decode_rejects_garbage() -> None:
+    with pytest.raises(ValueError):
+        decode_embeddings(b'{"embeddings": [[0.1]]}')
+
+
+@pytest.fixture
+def encoder_client() -> Iterator[tuple[TestClient, MagicMock]]:
+    app = FastAPI()
+    app.include_router(encoder_router)
+    app.state.gpu_type = "UNKNOWN"
+
+    with patch("model_server.encoders.get_embedding_model") as mock_get_model:
+        mock_model = MagicMock()
+        mock_model.encode.side_effect = lambda texts, **kwargs: np.array(
+            [[float(len(text)), 0.5] for text in texts], dtype=np.float32
+        )
+        mock_get_model.return_value = mock_model
+        yield TestClient(app), mock_model
+
+
+def _embed_body() -> dict:
+    return EmbedRequest(
+        texts=["a", "bb"],
+        model_name="fake-local-model",
+        max_context_length=512,
+        normalize_embeddings=True,
+        text_type=EmbedTextType.PASSAGE,
+    ).model_dump()
+
+
+def test_endpoint_returns_binary_when_accepted(
+    encoder_client: tuple[TestClient, MagicMock],
+) -> None:
+    client, _ = encoder_client
+
+    response = client.post(
+        "/encoder/bi-encoder-embed",
+        json=_embed_body(),
+        headers={
+            "Accept": f"{EMBEDDING_BINARY_CONTENT_TYPE}, application/json;q=0.9",
+            EMBEDDING_BINARY_DTYPE_HEADER: EmbeddingTransportDtype.FLOAT16.value,
+        },
+    )
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith(EMBEDDING_BINARY_CONTENT_TYPE)
+    assert decode_embeddings(response.content).tolist() == [[1.0, 0.5], [2.0, 0.5]]
+
+
+def test_endpoint_rejects_unknown_dtype(
+    encoder_client: tuple[TestClient, MagicMock],
+) -> None:
+    client, mock_model = encoder_client
+
+    response = client.post(
+        "/encoder/bi-encoder-embed",
+        json=_embed_body(),
+        headers={
+            "Accept": EMBEDDING_BINARY_CONTENT_TYPE,
+            EMBEDDING_BINARY_DTYPE_HEADER: "int8",
+        },
+    )
+
+    assert response.status_code == 400
+    mock_model.encode.assert_not_called()
+
+
+def test_endpoint_defaults_to_json(
+    encoder_client: tuple[TestClient, MagicMock],
+) -> None:
+    client, _ = encoder_client
+
+    response = client.post("/encoder/bi-encoder-embed", json=_embed_body())
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/json")
+    assert response.json() == {"embeddings": [[1.0, 0.5], [2.0, 0.5]]}
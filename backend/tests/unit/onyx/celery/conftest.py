@@ -0,0 +1,8 @@
+import pytest
+
+from tests.unit.onyx.celery.fake_retry_index import FakeRetryIndex
+
+
+@pytest.fixture
+def retry_index() -> FakeRetryIndex:
+    return FakeRetryIndex()
@@ -0,0 +1,35 @@
+from typing import Any
+
+from onyx.document_index.interfaces import VespaDocumentFields
+
+
+class FakeRetryIndex:
+    """Stand-in for the RetryDocumentIndex of the celery tasks. Documents in failures
+    raise the given exception."""
+
+    def __init__(self) -> None:
+        self.failures: dict[str, Exception] = {}
+        self.deleted: list[str] = []
+        self.updated: dict[str, VespaDocumentFields | None] = {}
+
+    def delete_single(
+        self, doc_id: str, *, tenant_id: str, chunk_count: int | None
+    ) -> int:
+        if doc_id in self.failures:
+            raise self.failures[doc_id]
+        self.deleted.append(doc_id)
+        return chunk_count or 0
+
+    def update_single(
+        self,
+        doc_id: str,
+        *,
+        tenant_id: str,
+        chunk_count: int | None,
+        fields: VespaDocumentFields | None,
+        user_fields: Any,
+    ) -> int:
+        if doc_id in self.failures:
+            raise self.failures[doc_id]
+        self.updated[doc_id] = fields
+        return chunk_count or 0
@@ -0,0 +1,56 @@
+import os
+
+import pytest
+
+from onyx.background.celery.tasks.pruning.utils import iter_ids_to_prune
+from onyx.background.celery.tasks.pruning.utils import SortedIdSpool
+
+
+def test_sorted_id_spool_in_memory() -> None:
+    with SortedIdSpool(max_in_memory=100) as spool:
+        spool.add_all({"b", "a"})
+        spool.add_all({"c", "a"})
+
+        assert list(spool) == ["a", "b", "c"]
+        assert spool.num_runs == 0
+
+
+def test_sorted_id_spool_spills_to_disk() -> None:
+    ids = [f"doc_{i}" for i in range(50)] + ["line\nbreak", "ünïcode"]
+    with SortedIdSpool(max_in_memory=7) as spool:
+        for i in range(0, len(ids), 3):
+            spool.add_all(set(ids[i : i + 3]))
+        # duplicates across runs are only returned once
+        spool.add_all({"doc_0", "doc_49"})
+
+        assert spool.num_runs > 1
+        run_paths = list(spool._runs)
+        assert all(os.path.exists(path) for path in run_paths)
+        assert list(spool) == sorted(ids)
+
+    assert not any(os.path.exists(path) for path in run_paths)
+
+
+def test_iter_ids_to_prune() -> None:
+    indexed_ids = ["a", "b", "c", "d", "f"]
+    source_ids = ["b", "d", "e", "f", "g"]
+
+    assert list(iter_ids_to_prune(indexed_ids, source_ids)) == ["a", "c"]
+    assert list(iter_ids_to_prune(indexed_ids, [])) == indexed_ids
+    assert list(iter_ids_to_prune([], source_ids)) == []
+
+
+def test_iter_ids_to_prune_matches_set_difference() -> None:
+    indexed_ids = {f"doc_{i}" for i in range(0, 300, 2)}
+    source_ids = {f"doc_{i}" for i in range(0, 300, 3)}
+
+    with SortedIdSpool(max_in_memory=16) as spool:
+        spool.add_all(source_ids)
+        to_prune = list(iter_ids_to_prune(sorted(indexed_ids), spool))
+
+    assert to_prune == sorted(indexed_ids - source_ids)
+
+
+def test_iter_ids_to_prune_rejects_unsorted_input() -> None:
+    with pytest.raises(RuntimeError):
+        list(iter_ids_to_prune(["b", "a"], ["a"]))
@@ -0,0 +1,163 @@
+from collections.abc import Iterator
+from contextlib import contextmanager
+from typing import cast
+from unittest.mock import MagicMock
+from unittest.mock import patch
+
+import pytest
+from celery.exceptions import Retry
+from redis import Redis
+
+from onyx.access.access import get_null_document_access
+from onyx.background.celery.tasks.shared.tasks import (
+    document_by_cc_pair_cleanup_batch_task,
+)
+from onyx.configs.constants import OnyxCeleryTask
+from onyx.document_index.interfaces import VespaDocumentFields
+from onyx.redis.redis_connector_prune import RedisConnectorPrune
+from tests.unit.onyx.celery.fake_retry_index import FakeRetryIndex
+from tests.unit.onyx.fake_redis import FakeTenantRedis
+
+_TASKS_MODULE = "onyx.background.celery.tasks.shared.tasks"
+_PRUNE_MODULE = "onyx.redis.redis_connector_prune"
+
+
+@contextmanager
+def _patched_cleanup_task(
+    retry_index: FakeRetryIndex, connector_counts: dict[str, int]
+) -> Iterator[dict[str, MagicMock]]:
+    docs = [
+        MagicMock(id=doc_id, boost=0, hidden=False, chunk_count=2)
+        for doc_id in connector_counts
+    ]
+    with (
+        patch(f"{_TASKS_MODULE}.get_session_with_current_tenant") as get_session,
+        patch(f"{_TASKS_MODULE}.get_active_search_settings"),
+        patch(f"{_TASKS_MODULE}.get_default_document_index"),
+        patch(f"{_TASKS_MODULE}.HttpxPool"),
+        patch(f"{_TASKS_MODULE}.RetryDocumentIndex", return_value=retry_index),
+        patch(
+            f"{_TASKS_MODULE}.get_document_connector_counts",
+            return_value=list(connector_counts.items()),
+        ),
+        patch(f"{_TASKS_MODULE}.get_documents_by_ids", return_value=docs),
+        patch(
+            f"{_TASKS_MODULE}.fetch_document_sets_for_documents",
+            side_effect=lambda doc_ids, _: [(doc_id, ["set"]) for doc_id in doc_ids],
+        ),
+        patch(
+            f"{_TASKS_MODULE}.get_access_for_documents",
+            side_effect=lambda doc_ids, _: {
+                doc_id: get_null_document_access() for doc_id in doc_ids
+            },
+        ),
+        patch(f"{_TASKS_MODULE}.delete_documents_complete__no_commit") as delete,
+        patch(
+            f"{_TASKS_MODULE}.delete_documents_by_connector_credential_pair__no_commit"
+        ) as delete_relationship,
+        patch(f"{_TASKS_MODULE}.mark_documents_as_synced") as mark_synced,
+        patch(f"{_TASKS_MODULE}.mark_documents_as_modified") as mark_modified,
+    ):
+        yield {
+            "get_session": get_session,
+            "delete": delete,
+            "delete_relationship": delete_relationship,
+            "mark_synced": mark_synced,
+            "mark_modified": mark_modified,
+        }
+
+
+def test_cleanup_batch_task_deletes_and_updates(retry_index: FakeRetryIndex) -> None:
+    # doc_3 is no longer referenced by any cc pair and is skipped
+    with _patched_cleanup_task(
+        retry_index, {"doc_1": 1, "doc_2": 2, "doc_3": 0}
+    ) as mocks:
+        succeeded = document_by_cc_pair_cleanup_batch_task.run(
+            document_ids=["doc_1", "doc_2", "doc_3"],
+            connector_id=1,
+            credential_id=2,
+            tenant_id="tenant",
+        )
+
+    assert succeeded
+    assert retry_index.deleted == ["doc_1"]
+    assert list(retry_index.updated) == ["doc_2"]
+    assert retry_index.updated["doc_2"] == VespaDocumentFields(
+        document_sets={"set"},
+        access=get_null_document_access(),
+        boost=0,
+        hidden=False,
+    )
+    assert mocks["delete"].call_args.kwargs["document_ids"] == ["doc_1"]
+    assert mocks["delete_relationship"].call_args.kwargs["document_ids"] == ["doc_2"]
+    assert mocks["mark_synced"].call_args.args[0] == ["doc_2"]
+    # the refcounts are read in the same session (and transaction) as the writes
+    assert mocks["get_session"].call_count == 1
+    db_session = mocks["get_session"].return_value.__enter__.return_value
+    db_session.commit.assert_called_once()
+
+
+def test_cleanup_batch_task_retries_failed_documents(
+    retry_index: FakeRetryIndex,
+) -> None:
+    retry_index.failures = {"doc_2": ValueError("boom")}
+
+    with (
+        _patched_cleanup_task(retry_index, {"doc_1": 1, "doc_2": 1}) as mocks,
+        patch.object(
+            document_by_cc_pair_cleanup_batch_task, "retry", side_effect=Retry()
+        ) as retry,
+        pytest.raises(Retry),
+    ):
+        document_by_cc_pair_cleanup_batch_task.run(
+            document_ids=["doc_1", "doc_2"],
+            connector_id=1,
+            credential_id=2,
+            tenant_id="tenant",
+        )
+
+    assert mocks["delete"].call_args.kwargs["document_ids"] == ["doc_1"]
+    assert retry.call_args.kwargs["kwargs"]["document_ids"] == ["doc_2"]
+    mocks["mark_modified"].assert_not_called()
+
+
+def test_prune_generate_tasks_batches_documents() -> None:
+    r = FakeTenantRedis("tenant")
+    celery_app = MagicMock()
+    cc_pair = MagicMock(connector_id=1, credential_id=2)
+    prune = RedisConnectorPrune("tenant", 7, cast(Redis, r))
+
+    with (
+        patch(
+            f"{_PRUNE_MODULE}.get_connector_credential_pair_from_id",
+            return_value=cc_pair,
+        ),
+        patch(f"{_PRUNE_MODULE}.PRUNING_CLEANUP_BATCH_SIZE", 2),
+        patch.object(RedisConnectorPrune, "TASKSET_BATCH_SIZE", 2),
+    ):
+        tasks_generated = prune.generate_tasks(
+            (f"doc_{i}" for i in range(5)), celery_app, MagicMock(), None
+        )
+
+    assert tasks_generated == 3
+
+    # the monitor sees every task that was sent, in the tenant's taskset
+    sent = celery_app.send_task.call_args_list
+    task_ids = [call.kwargs["task_id"] for call in sent]
+    assert prune.get_remaining() == 3
+    assert r.sets == {
+        f"tenant:{prune.taskset_key}": {task_id.encode() for task_id in task_ids}
+    }
+    assert all(task_id.startswith(prune.subtask_prefix) for task_id in task_ids)
+    assert all(
+        call.args[0] == OnyxCeleryTask.DOCUMENT_BY_CC_PAIR_CLEANUP_BATCH_TASK
+        for call in sent
+    )
+    assert [call.kwargs["kwargs"]["document_ids"] for call in sent] == [
+        ["doc_0", "doc_1"],
+        ["doc_2", "doc_3"],
+        ["doc_4"],
+    ]
+
+    RedisConnectorPrune.remove_from_taskset(7, task_ids[0], cast(Redis, r))
+    assert prune.get_remaining() == 2
@@ -0,0 +1,164 @@
+from collections.abc import Iterator
+from contextlib import contextmanager
+from unittest.mock import MagicMock
+from unittest.mock import patch
+
+import httpx
+import pytest
+from celery.exceptions import Retry
+from tenacity import Future
+from tenacity import RetryError
+
+from onyx.access.access import get_null_document_access
+from onyx.background.celery.tasks.shared.tasks import apply_to_documents_concurrently
+from onyx.background.celery.tasks.vespa.document_sync import (
+    generate_document_sync_tasks,
+)
+from onyx.background.celery.tasks.vespa.tasks import vespa_metadata_sync_batch_task
+from onyx.configs.constants import OnyxCeleryTask
+from onyx.document_index.interfaces import VespaDocumentFields
+from tests.unit.onyx.celery.fake_retry_index import FakeRetryIndex
+
+_TASKS_MODULE = "onyx.background.celery.tasks.vespa.tasks"
+
+
+def _bad_request() -> httpx.HTTPStatusError:
+    request = httpx.Request("PUT", "http://vespa")
+    return httpx.HTTPStatusError(
+        "bad request", request=request, response=httpx.Response(400, request=request)
+    )
+
+
+def _retry_error(e: Exception) -> RetryError:
+    last_attempt = Future(attempt_number=1)
+    last_attempt.set_exception(e)
+    return RetryError(last_attempt)
+
+
+def test_apply_to_documents_concurrently_collects_failures() -> None:
+    def _fn(doc_id: str) -> int:
+        if doc_id == "doc_2":
+            raise ValueError("boom")
+        if doc_id == "doc_3":
+            # RetryDocumentIndex gives up with a RetryError
+            raise _retry_error(KeyError(doc_id))
+        return int(doc_id.split("_")[1])
+
+    chunks, succeeded, failures = apply_to_documents_concurrently(
+        _fn, [f"doc_{i}" for i in range(1, 5)], max_workers=2
+    )
+
+    assert chunks == 1 + 4
+    assert sorted(succeeded) == ["doc_1", "doc_4"]
+    assert isinstance(failures["doc_2"], ValueError)
+    assert isinstance(failures["doc_3"], KeyError)
+
+
+def test_generate_document_sync_tasks_batches_documents() -> None:
+    db_session = MagicMock()
+    db_session.scalars.return_value.yield_per.return_value = iter(
+        [f"doc_{i}" for i in range(5)]
+    )
+    celery_app = MagicMock()
+
+    with patch(
+        "onyx.background.celery.tasks.vespa.document_sync.VESPA_METADATA_SYNC_BATCH_SIZE",
+        2,
+    ):
+        result = generate_document_sync_tasks(
+            MagicMock(), 100, celery_app, db_session, MagicMock(), "tenant"
+        )
+
+    assert result == (3, 5)
+    sent = [call.kwargs for call in celery_app.send_task.call_args_list]
+    assert all(
+        call.args[0] == OnyxCeleryTask.VESPA_METADATA_SYNC_BATCH_TASK
+        for call in celery_app.send_task.call_args_list
+    )
+    assert [kwargs["kwargs"]["document_ids"] for kwargs in sent] == [
+        ["doc_0", "doc_1"],
+        ["doc_2", "doc_3"],
+        ["doc_4"],
+    ]
+
+
+@contextmanager
+def _patched_sync_task(
+    retry_index: FakeRetryIndex, doc_ids: list[str]
+) -> Iterator[MagicMock]:
+    docs = [
+        MagicMock(id=doc_id, boost=0, hidden=False, chunk_count=1) for doc_id in doc_ids
+    ]
+    with (
+        patch(f"{_TASKS_MODULE}.get_session_with_current_tenant"),
+        patch(f"{_TASKS_MODULE}.get_active_search_settings"),
+        patch(f"{_TASKS_MODULE}.get_default_document_index"),
+        patch(f"{_TASKS_MODULE}.HttpxPool"),
+        patch(f"{_TASKS_MODULE}.RetryDocumentIndex", return_value=retry_index),
+        patch(f"{_TASKS_MODULE}.get_documents_by_ids", return_value=docs),
+        patch(
+            f"{_TASKS_MODULE}.fetch_document_sets_for_documents",
+            return_value=[(doc_id, ["set"]) for doc_id in doc_ids],
+        ),
+        patch(
+            f"{_TASKS_MODULE}.get_access_for_documents",
+            return_value={doc_id: get_null_document_access() for doc_id in doc_ids},
+        ),
+        patch(f"{_TASKS_MODULE}.mark_documents_as_synced") as mark_synced,
+    ):
+        yield mark_synced
+
+
+def test_vespa_metadata_sync_batch_task(retry_index: FakeRetryIndex) -> None:
+    # doc_3 no longer exists and is skipped
+    with _patched_sync_task(retry_index, ["doc_1", "doc_2"]) as mark_synced:
+        succeeded = vespa_metadata_sync_batch_task.run(
+            document_ids=["doc_1", "doc_2", "doc_3"], tenant_id="tenant"
+        )
+
+    assert succeeded
+    assert sorted(mark_synced.call_args.args[0]) == ["doc_1", "doc_2"]
+    assert retry_index.updated["doc_1"] == VespaDocumentFields(
+        document_sets={"set"},
+        access=get_null_document_access(),
+        boost=0,
+        hidden=False,
+    )
+
+
+def test_vespa_metadata_sync_batch_task_skips_failed_documents(
+    retry_index: FakeRetryIndex,
+) -> None:
+    retry_index.failures = {"doc_2": _bad_request()}
+
+    with _patched_sync_task(retry_index, ["doc_1", "doc_2"]) as mark_synced:
+        succeeded = vespa_metadata_sync_batch_task.run(
+            document_ids=["doc_1", "doc_2"], tenant_id="tenant"
+        )
+
+    assert not succeeded
+    assert mark_synced.call_args.args[0] == ["doc_1"]
+
+
+def test_vespa_metadata_sync_batch_task_retries_failed_documents(
+    retry_index: FakeRetryIndex,
+) -> None:
+    retry_index.failures = {"doc_2": ValueError("boom"), "doc_3": _bad_request()}
+
+    with (
+        _patched_sync_task(retry_index, ["doc_1", "doc_2", "doc_3"]) as mark_synced,
+        patch.object(
+            vespa_metadata_sync_batch_task, "retry", side_effect=Retry()
+        ) as retry,
+        pytest.raises(Retry),
+    ):
+        vespa_metadata_sync_batch_task.run(
+            document_ids=["doc_1", "doc_2", "doc_3"], tenant_id="tenant"
+        )
+
+    assert mark_synced.call_args.args[0] == ["doc_1"]
+    # a 400 won't get better by retrying
+    assert retry.call_args.kwargs["kwargs"] == {
+        "document_ids": ["doc_2"],
+        "tenant_id": "tenant",
+    }
@@ -5,6 +5,8 @@ import pytest
 from onyx.chat.models import LlmDoc
 from onyx.chat.models import OnyxAnswerPiece
 from onyx.chat.stream_processing.citation_processing import CitationProcessor
+from onyx.chat.stream_processing.citation_processing import CodeFenceTracker
+from onyx.chat.stream_processing.citation_processing import in_code_block
 from onyx.chat.stream_processing.utils import DocumentIdOrderMapping
 from onyx.configs.constants import DocumentSource
 from onyx.server.query_and_chat.streaming_models import CitationInfo
@@ -535,3 +537,22 @@ def test_citation_extraction(
     ] == expected_citations, (
         f"Test '{test_name}' failed: Citations do not match expected output."
     )
+
+
+@pytest.mark.parametrize(
+    "tokens",
+    [
+        ["```", "python\n", "x = 1\n", "```"],
+        ["`", "``", "\ncode", "`", "`", "`\n"],
+        ["``", "``", "`", "`"],  # a run of six backticks is two fences
+        ["text ```", "`", "more ``", "` end"],
+        ["inline `code` and ```\nblock```\n"],
+    ],
+)
+def test_code_fence_tracker_matches_full_scan(tokens: list[str]) -> None:
+    tracker = CodeFenceTracker()
+    llm_out = ""
+    for token in tokens:
+        tracker.feed(token)
+        llm_out += token
+        assert tracker.in_code_block == in_code_block(llm_out)
@@ -1,5 +1,12 @@
+from typing import Any
+from typing import cast
+from unittest.mock import Mock
+from unittest.mock import patch
+
 import pytest
 
+from onyx.chat.prune_and_merge import _apply_pruning
+from onyx.chat.prune_and_merge import _CONTENT_TOKEN_COUNT_CACHE
 from onyx.chat.prune_and_merge import _merge_sections
 from onyx.configs.constants import DocumentSource
 from onyx.context.search.models import InferenceChunk
@@ -224,3 +231,66 @@ def test_merge_minimal_sections(
     merged_sections = _merge_sections(sections)
     assert merged_sections[0].combined_content == expected_content
     assert merged_sections[0].center_chunk == expected_center_chunk
+
+
+class _WordTokenizer:
+    """Counts words as tokens and remembers every text it encoded"""
+
+    def __init__(self) -> None:
+        self.encoded_texts: list[str] = []
+
+    def encode(self, string: str) -> list[str]:
+        self.encoded_texts.append(string)
+        return string.split()
+
+    def decode(self, tokens: list[str]) -> str:
+        return " ".join(tokens)
+
+
+def test_apply_pruning_reuses_content_token_counts() -> None:
+    _CONTENT_TOKEN_COUNT_CACHE.clear()
+    tokenizer = _WordTokenizer()
+    llm_config = Mock(model_provider="fake_provider", model_name="fake_model")
+
+    sections: list[InferenceSection] = []
+    for chunk_id in range(4):
+        chunk = create_inference_chunk(
+            "doc3", chunk_id, " ".join(["word"] * 100), float(10 - chunk_id)
+        )
+        sections.append(
+            InferenceSection(
+                center_chunk=chunk, chunks=[chunk], combined_content=chunk.content
+            )
+        )
+
+    def _prune() -> list[InferenceSection]:
+        return _apply_pruning(
+            sections=sections,
+            section_relevance_list=None,
+            keep_sections=[],
+            # every section is 100 words of content plus 7 for the wrapper
+            token_limit=250,
+            is_manually_selected_docs=False,
+            use_sections=True,
+            using_tool_message=False,
+            llm_config=llm_config,
+        )
+
+    with patch(
+        "onyx.chat.prune_and_merge.get_tokenizer", return_value=cast(Any, tokenizer)
+    ):
+        pruned_sections = _prune()
+
+        # the final section is trimmed to what is left of the limit, on a copy
+        assert len(pruned_sections) == 3
+        assert pruned_sections[0] is sections[0]
+        assert pruned_sections[1] is sections[1]
+        assert pruned_sections[2] is not sections[2]
+        assert len(pruned_sections[2].combined_content.split()) == 250 - 2 * 107 - 7
+        assert sections[2].combined_content == " ".join(["word"] * 100)
+
+        tokenizer.encoded_texts.clear()
+        assert _prune() == pruned_sections
+
+    # only the wrappers and the content of the trimmed section are encoded again
+    assert sum("word" in text for text in tokenizer.encoded_texts) == 1
@@ -0,0 +1,8 @@
+import pytest
+
+from tests.unit.onyx.fake_redis import FakeRedis
+
+
+@pytest.fixture
+def fake_redis() -> FakeRedis:
+    return FakeRedis()
@@ -9,6 +9,7 @@ from datetime import datetime
 from datetime import timezone
 from pathlib import Path
 from typing import cast
+from unittest.mock import patch
 
 import pytest
 
@@ -813,6 +814,55 @@ def test_salesforce_sqlite() -> None:
         _clear_sf_db(directory)
 
 
+def test_update_from_csv_in_batches() -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        sf_db = OnyxSalesforceSQLite(os.path.join(directory, "salesforce_db.sqlite"))
+        sf_db.connect()
+        sf_db.apply_schema()
+
+        contact_id = _VALID_SALESFORCE_IDS[40]
+        accounts = [
+            {"Id": _VALID_SALESFORCE_IDS[i], "Name": f"Account {i}"} for i in range(3)
+        ]
+        contacts = [
+            {"Id": contact_id, "AccountId": _VALID_SALESFORCE_IDS[0]},
+            {"Id": _VALID_SALESFORCE_IDS[41], "AccountId": _VALID_SALESFORCE_IDS[2]},
+            {"Id": _VALID_SALESFORCE_IDS[42], "AccountId": _VALID_SALESFORCE_IDS[2]},
+            # the same contact again in a later batch, it replaces the first row
+            {"Id": contact_id, "AccountId": _VALID_SALESFORCE_IDS[1]},
+        ]
+
+        with patch.object(OnyxSalesforceSQLite, "CSV_INSERT_BATCH_SIZE", 2):
+            # children are loaded before their parents
+            _create_csv_file_and_update_db(sf_db, "Contact", contacts, "contacts.csv")
+            _create_csv_file_and_update_db(
+                sf_db, ACCOUNT_OBJECT_TYPE, accounts, "accounts.csv"
+            )
+            # relationships are typed once the parents are loaded
+            _create_csv_file_and_update_db(sf_db, "Contact", contacts, "contacts.csv")
+
+        assert sf_db.object_type_count("Contact") == 3
+        assert sf_db.get_child_ids(_VALID_SALESFORCE_IDS[0]) == set()
+        assert sf_db.get_child_ids(_VALID_SALESFORCE_IDS[1]) == {contact_id}
+        assert sf_db.get_child_ids(_VALID_SALESFORCE_IDS[2]) == {
+            _VALID_SALESFORCE_IDS[41],
+            _VALID_SALESFORCE_IDS[42],
+        }
+        affected = {
+            (parent_type, parent_id)
+            for parent_type, parent_id, _ in sf_db.get_changed_parent_ids_by_type(
+                [contact_id], {ACCOUNT_OBJECT_TYPE}
+            )
+        }
+        assert affected == {(ACCOUNT_OBJECT_TYPE, _VALID_SALESFORCE_IDS[1])}
+
+        # the connection settings are applied to existing dbs too
+        sf_db.connect()
+        cursor = sf_db.cursor()
+        assert cursor.execute("PRAGMA synchronous").fetchone()[0] == 0
+        sf_db.close()
+
+
 @pytest.mark.skip(reason="Enable when credentials are available")
 def test_salesforce_bulk_retrieve() -> None:
 
@@ -0,0 +1,205 @@
+from collections.abc import Generator
+from pathlib import Path
+from typing import Any
+from unittest.mock import MagicMock
+from unittest.mock import patch
+
+import pytest
+from requests.structures import CaseInsensitiveDict
+
+from onyx.configs.constants import DocumentSource
+from onyx.connectors.models import Document
+from onyx.connectors.web.connector import ScrapeResult
+from onyx.connectors.web.connector import WEB_CONNECTOR_VALID_SETTINGS
+from onyx.connectors.web.connector import WebConnector
+from onyx.indexing.content_hash import compute_document_content_hash
+from tests.unit.onyx.fake_redis import FakeRedis
+
+BASE_URL = "https://docs.example.com"
+LONG_TEXT = "Some documentation text. " * 20
+
+
+class IndexedDocs:
+    """The content hashes the indexing pipeline recorded, per cc pair"""
+
+    def __init__(self) -> None:
+        self.content_hashes: dict[int, dict[str, str]] = {}
+
+    def mark_indexed(self, cc_pair_id: int, docs: list[Document]) -> None:
+        self.content_hashes.setdefault(cc_pair_id, {}).update(
+            {doc.id: compute_document_content_hash(doc) for doc in docs}
+        )
+
+    def get(self, db_session: Any, cc_pair_id: int) -> dict[str, str]:
+        return dict(self.content_hashes.get(cc_pair_id, {}))
+
+
+class FakeSite:
+    def __init__(self, pages: dict[str, tuple[str, str]]) -> None:
+        # url -> (html, etag)
+        self.pages = pages
+        self.requests: list[str] = []
+
+    def get(self, url: str, headers: dict[str, str], **kwargs: Any) -> MagicMock:
+        self.requests.append(url)
+        html, etag = self.pages[url]
+        response = MagicMock()
+        response.url = url
+        response.headers = CaseInsensitiveDict(
+            {"ETag": etag, "Content-Type": "text/html"}
+        )
+        response.status_code = 304 if headers.get("If-None-Match") == etag else 200
+        response.text = html
+        return response
+
+
+def _html(title: str, body: str, links: list[str] | None = None) -> str:
+    anchors = "".join(f'<a href="{link}">{link}</a>' for link in links or [])
+    return f"<html><head><title>{title}</title></head><body><p>{body}</p>{anchors}</body></html>"
+
+
+@pytest.fixture
+def indexed_docs(fake_redis: FakeRedis) -> Generator[IndexedDocs, None, None]:
+    indexed = IndexedDocs()
+    with (
+        patch(
+            "onyx.connectors.web.crawl_cache.get_redis_client",
+            return_value=fake_redis,
+        ),
+        patch("onyx.connectors.web.crawl_cache.get_session_with_current_tenant"),
+        patch(
+            "onyx.connectors.web.crawl_cache.get_indexed_content_hashes_for_cc_pair",
+            side_effect=indexed.get,
+        ),
+        patch("onyx.connectors.web.connector.check_internet_connection"),
+    ):
+        yield indexed
+
+
+def _crawl(connector: WebConnector, site: FakeSite) -> list[Document]:
+    with patch("onyx.connectors.web.connector._get_http_session", return_value=site):
+        return [doc for batch in connector.load_from_state() for doc in batch]
+
+
+def _upload_connector(
+    tmp_path: Path, urls: list[str], cc_pair_id: int | None = 1
+) -> WebConnector:
+    urls_file = tmp_path / "urls.txt"
+    urls_file.write_text("\n".join(urls))
+    connector = WebConnector(
+        base_url=str(urls_file),
+        web_connector_type=WEB_CONNECTOR_VALID_SETTINGS.UPLOAD.value,
+        crawler_mode=True,
+        crawl_concurrency=4,
+    )
+    if cc_pair_id is not None:
+        connector.set_cc_pair_id(cc_pair_id)
+    return connector
+
+
+def test_crawler_skips_unchanged_pages(
+    indexed_docs: IndexedDocs, tmp_path: Path
+) -> None:
+    urls = [f"{BASE_URL}/a", f"{BASE_URL}/b"]
+    site = FakeSite(
+        {
+            urls[0]: (_html("A", f"a {LONG_TEXT}"), '"a1"'),
+            urls[1]: (_html("B", f"b {LONG_TEXT}"), '"b1"'),
+        }
+    )
+
+    docs = _crawl(_upload_connector(tmp_path, urls), site)
+    assert sorted(doc.id for doc in docs) == urls
+    assert sorted(doc.semantic_identifier for doc in docs) == ["A", "B"]
+    indexed_docs.mark_indexed(1, docs)
+
+    # nothing changed, every page gets a 304
+    assert _crawl(_upload_connector(tmp_path, urls), site) == []
+
+    # pruning still sees the unchanged pages
+    connector = _upload_connector(tmp_path, urls)
+    with patch("onyx.connectors.web.connector._get_http_session", return_value=site):
+        slim_ids = [
+            doc.id for batch in connector.retrieve_all_slim_docs() for doc in batch
+        ]
+    assert sorted(slim_ids) == urls
+
+    # a new etag with the same content is skipped by the content hash
+    site.pages[urls[0]] = (_html("A", f"a {LONG_TEXT}"), '"a2"')
+    site.pages[urls[1]] = (_html("B", f"b changed {LONG_TEXT}"), '"b2"')
+    docs = _crawl(_upload_connector(tmp_path, urls), site)
+    assert [doc.id for doc in docs] == [urls[1]]
+    indexed_docs.mark_indexed(1, docs)
+
+    assert _crawl(_upload_connector(tmp_path, urls), site) == []
+
+
+def test_crawler_only_skips_pages_indexed_for_the_cc_pair(
+    indexed_docs: IndexedDocs, tmp_path: Path
+) -> None:
+    urls = [f"{BASE_URL}/a", f"{BASE_URL}/b"]
+    site = FakeSite(
+        {
+            urls[0]: (_html("A", f"a {LONG_TEXT}"), '"a1"'),
+            urls[1]: (_html("B", f"b {LONG_TEXT}"), '"b1"'),
+        }
+    )
+
+    docs = _crawl(_upload_connector(tmp_path, urls), site)
+    # indexing of the second page failed
+    indexed_docs.mark_indexed(1, [doc for doc in docs if doc.id == urls[0]])
+
+    # so it is returned again
+    docs = _crawl(_upload_connector(tmp_path, urls), site)
+    assert [doc.id for doc in docs] == [urls[1]]
+
+    # other cc pairs for the same site don't share the cache
+    docs = _crawl(_upload_connector(tmp_path, urls, cc_pair_id=2), site)
+    assert sorted(doc.id for doc in docs) == urls
+
+    # neither do runs that need every document (e.g. re-indexes from the beginning)
+    docs = _crawl(_upload_connector(tmp_path, urls, cc_pair_id=None), site)
+    assert sorted(doc.id for doc in docs) == urls
+
+
+def test_crawler_recursive_renders_pages_that_need_javascript(
+    indexed_docs: IndexedDocs,
+) -> None:
+    site = FakeSite(
+        {
+            f"{BASE_URL}/": (
+                _html("Home", LONG_TEXT, ["/static", "/app", "https://other.com/"]),
+                '"home"',
+            ),
+            f"{BASE_URL}/static": (_html("Static", f"static {LONG_TEXT}"), '"s"'),
+            f"{BASE_URL}/app": (_html("App", "Loading..."), '"app"'),
+        }
+    )
+    rendered = ScrapeResult()
+    rendered.doc = Document(
+        id=f"{BASE_URL}/app",
+        sections=[],
+        source=DocumentSource.WEB,
+        semantic_identifier="App",
+        metadata={},
+    )
+    rendered.content_hash = "rendered"
+
+    connector = WebConnector(base_url=f"{BASE_URL}/", crawler_mode=True)
+    with (
+        patch("onyx.connectors.web.connector.ScrapeSessionContext.initialize"),
+        patch.object(
+            WebConnector, "_scrape_with_retries", return_value=rendered
+        ) as scrape_mock,
+    ):
+        docs = _crawl(connector, site)
+
+    assert sorted(doc.id for doc in docs) == [
+        f"{BASE_URL}/",
+        f"{BASE_URL}/app",
+        f"{BASE_URL}/static",
+    ]
+    # only the page without enough static text went through the browser
+    assert scrape_mock.call_count == 1
+    assert scrape_mock.call_args.args[1] == f"{BASE_URL}/app"
+    assert "https://other.com/" not in site.requests
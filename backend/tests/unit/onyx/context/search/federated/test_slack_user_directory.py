@@ -0,0 +1,127 @@
+from datetime import datetime
+from typing import Any
+from unittest.mock import MagicMock
+from unittest.mock import patch
+
+import pytest
+from slack_sdk import WebClient
+from slack_sdk.errors import SlackApiError
+
+from onyx.context.search.federated.models import SlackMessage
+from onyx.context.search.federated.slack_search import get_contextualized_thread_text
+from onyx.context.search.federated.slack_search import replace_user_ids_with_names
+from onyx.context.search.federated.slack_user_directory import SlackUserDirectory
+
+
+def _profile_client(
+    names: dict[str, str], errors: dict[str, str] | None = None
+) -> MagicMock:
+    errors = errors or {}
+
+    def _users_profile_get(user: str) -> MagicMock:
+        if user in errors:
+            raise SlackApiError("error", response={"ok": False, "error": errors[user]})
+        response = MagicMock()
+        response.get.side_effect = lambda key, default=None: (
+            {"real_name": names[user]} if key == "profile" else default
+        )
+        return response
+
+    client = MagicMock(spec=WebClient)
+    client.users_profile_get.side_effect = _users_profile_get
+    return client
+
+
+def _message(text: str, thread_id: str | None = "1.0") -> SlackMessage:
+    return SlackMessage(
+        document_id="C1_1.1",
+        channel_id="C1",
+        message_id="1.1",
+        thread_id=thread_id,
+        link="https://acme.slack.com/archives/C1/p11?thread_ts=1.0",
+        metadata={},
+        timestamp=datetime(2024, 1, 1),
+        recency_bias=1.0,
+        semantic_identifier="sem",
+        text=text,
+        highlighted_texts=set(),
+        slack_score=1.0,
+    )
+
+
+def test_get_names_caches_users() -> None:
+    directory = SlackUserDirectory(ttl_seconds=60, max_entries=100)
+    client = _profile_client({"U1": "Ada", "U2": "Grace"})
+
+    assert directory.get_names("acme", {"U1", "U2"}, client, 4) == {
+        "U1": "Ada",
+        "U2": "Grace",
+    }
+    assert directory.get_names("acme", {"U1"}, client, 4) == {"U1": "Ada"}
+    assert client.users_profile_get.call_count == 2
+
+    # other workspaces don't share the cache
+    directory.get_names("other", {"U1"}, client, 4)
+    assert client.users_profile_get.call_count == 3
+
+
+def test_get_names_expires_and_evicts() -> None:
+    directory = SlackUserDirectory(ttl_seconds=60, max_entries=1)
+    client = _profile_client({"U1": "Ada", "U2": "Grace"})
+
+    directory.get_names("acme", {"U1"}, client, 4)
+    directory.get_names("acme", {"U2"}, client, 4)
+    # U1 was evicted to make room for U2
+    directory.get_names("acme", {"U1"}, client, 4)
+    assert client.users_profile_get.call_count == 3
+
+    with patch(
+        "onyx.context.search.federated.slack_user_directory.time.monotonic",
+        return_value=float("inf"),
+    ):
+        directory.get_names("acme", {"U1"}, client, 4)
+    assert client.users_profile_get.call_count == 4
+
+
+@pytest.mark.parametrize(
+    "error, expected_calls", [("user_not_found", 1), ("ratelimited", 2)]
+)
+def test_get_names_errors(error: str, expected_calls: int) -> None:
+    directory = SlackUserDirectory(ttl_seconds=60, max_entries=100)
+    client = _profile_client({}, errors={"U1": error})
+
+    assert directory.get_names("acme", {"U1"}, client, 4) == {}
+    assert directory.get_names("acme", {"U1"}, client, 4) == {}
+    # only permanent errors are remembered
+    assert client.users_profile_get.call_count == expected_calls
+
+
+def test_replace_user_ids_with_names() -> None:
+    directory = SlackUserDirectory(ttl_seconds=60, max_entries=100)
+    client = _profile_client({"U1": "Ada"}, errors={"U2": "user_not_found"})
+    thread = _message("<@U1>: hi\n\nReplies:\n<@U2>: hello <@U1>")
+    not_a_thread = _message("<@U1>: hi", thread_id=None)
+
+    with patch(
+        "onyx.context.search.federated.slack_search.get_slack_user_directory",
+        return_value=directory,
+    ):
+        replace_user_ids_with_names([thread, not_a_thread], client)
+
+    assert thread.text == "Ada: hi\n\nReplies:\n<@U2>: hello Ada"
+    assert not_a_thread.text == "<@U1>: hi"
+    assert client.users_profile_get.call_count == 2
+
+
+def test_get_contextualized_thread_text_uses_given_client() -> None:
+    replies: list[dict[str, Any]] = [
+        {"ts": "1.0", "user": "U1", "text": "question"},
+        {"ts": "1.1", "user": "U2", "text": "answer"},
+    ]
+    client = MagicMock(spec=WebClient)
+    client.conversations_replies.return_value.get.return_value = replies
+
+    text = get_contextualized_thread_text(_message("U2: answer"), client)
+
+    assert text == "<@U1>: question\n\nReplies:\n<@U2>: answer"
+    client.conversations_replies.assert_called_once_with(channel="C1", ts="1.0")
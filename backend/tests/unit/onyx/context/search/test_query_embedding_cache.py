@@ -0,0 +1,115 @@
+from unittest.mock import MagicMock
+from unittest.mock import patch
+
+from onyx.context.search.query_embedding_cache import QueryEmbeddingCache
+from onyx.context.search.utils import get_query_embeddings
+from tests.unit.onyx.fake_redis import FakeRedis
+
+
+def _search_settings(settings_id: int = 1, query_prefix: str = "") -> MagicMock:
+    search_settings = MagicMock()
+    search_settings.id = settings_id
+    search_settings.model_name = "nomic-ai/nomic-embed-text-v1"
+    search_settings.provider_type = None
+    search_settings.normalize = True
+    search_settings.query_prefix = query_prefix
+    search_settings.reduced_dimension = None
+    search_settings.api_url = None
+    search_settings.deployment_name = None
+    return search_settings
+
+
+def test_cache_tiers_and_settings_isolation(fake_redis: FakeRedis) -> None:
+    with (
+        patch(
+            "onyx.context.search.query_embedding_cache.get_redis_client",
+            return_value=fake_redis,
+        ),
+        patch(
+            "onyx.context.search.query_embedding_cache.get_current_tenant_id",
+            return_value="public",
+        ),
+    ):
+        writer = QueryEmbeddingCache(max_entries=10)
+        settings = _search_settings()
+        writer.set_many(settings, {"what is onyx": [1.0, 2.0]})
+        assert writer.get_many(settings, ["what is onyx", "other"]) == {
+            "what is onyx": [1.0, 2.0]
+        }
+
+        # another worker only has the Redis tier available
+        reader = QueryEmbeddingCache(max_entries=10)
+        assert reader.get_many(settings, ["what is onyx"]) == {
+            "what is onyx": [1.0, 2.0]
+        }
+
+        # new search settings (e.g. after an index swap) never hit old entries
+        assert reader.get_many(_search_settings(settings_id=2), ["what is onyx"]) == {}
+        assert (
+            reader.get_many(_search_settings(query_prefix="q: "), ["what is onyx"])
+            == {}
+        )
+
+
+def test_local_tier_is_bounded(fake_redis: FakeRedis) -> None:
+    with (
+        patch(
+            "onyx.context.search.query_embedding_cache.get_redis_client",
+            return_value=fake_redis,
+        ),
+        patch(
+            "onyx.context.search.query_embedding_cache.get_current_tenant_id",
+            return_value="public",
+        ),
+    ):
+        cache = QueryEmbeddingCache(max_entries=2)
+        settings = _search_settings()
+        cache.set_many(settings, {"a": [1.0], "b": [2.0], "c": [3.0]})
+
+        fake_redis.store.clear()
+        assert cache.get_many(settings, ["a", "b", "c"]) == {"b": [2.0], "c": [3.0]}
+
+
+def test_get_query_embeddings_only_encodes_misses(fake_redis: FakeRedis) -> None:
+    settings = _search_settings()
+    cache = QueryEmbeddingCache(max_entries=10)
+    mock_model = MagicMock()
+    mock_model.encode.side_effect = lambda texts, text_type: [
+        [float(len(text))] for text in texts
+    ]
+
+    with (
+        patch(
+            "onyx.context.search.query_embedding_cache.get_redis_client",
+            return_value=fake_redis,
+        ),
+        patch(
+            "onyx.context.search.query_embedding_cache.get_current_tenant_id",
+            return_value="public",
+        ),
+        patch(
+            "onyx.context.search.utils.get_current_search_settings",
+            return_value=settings,
+        ),
+        patch(
+            "onyx.context.search.utils.get_query_embedding_cache",
+            return_value=cache,
+        ),
+        patch(
+            "onyx.context.search.utils.EmbeddingModel.from_db_model",
+            return_value=mock_model,
+        ),
+    ):
+        cache.set_many(settings, {"bb": [-1.0]})
+
+        embeddings = get_query_embeddings(["a", "bb", "ccc", "a"], MagicMock())
+
+        # hits and misses come back in input order, duplicates are only encoded once
+        assert embeddings == [[1.0], [-1.0], [3.0], [1.0]]
+        mock_model.encode.assert_called_once()
+        assert mock_model.encode.call_args.args[0] == ["a", "ccc"]
+
+        # the freshly computed embeddings are now cached as well
+        mock_model.encode.reset_mock()
+        assert get_query_embeddings(["ccc", "a"], MagicMock()) == [[3.0], [1.0]]
+        mock_model.encode.assert_not_called()
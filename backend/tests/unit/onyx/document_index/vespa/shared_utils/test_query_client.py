@@ -0,0 +1,72 @@
+import asyncio
+import os
+from unittest.mock import patch
+
+import httpx
+
+from onyx.document_index.vespa.shared_utils.query_client import VespaQueryClientPool
+
+
+def _ok(request: httpx.Request) -> httpx.Response:
+    return httpx.Response(200, json={"path": request.url.path})
+
+
+def _make_pool() -> VespaQueryClientPool:
+    return VespaQueryClientPool(http2=False, transport=httpx.MockTransport(_ok))
+
+
+def test_client_is_reused() -> None:
+    pool = _make_pool()
+
+    client = pool.get_client()
+
+    assert pool.get_client() is client
+    assert client.get("http://vespa/search/").json() == {"path": "/search/"}
+
+    # a closed client is replaced instead of handed out
+    pool.close()
+    assert client.is_closed
+    assert pool.get_client() is not client
+
+
+def test_client_is_not_shared_across_fork() -> None:
+    pool = _make_pool()
+    parent_client = pool.get_client()
+
+    with patch(
+        "onyx.document_index.vespa.shared_utils.query_client.os.getpid",
+        return_value=os.getpid() + 1,
+    ):
+        child_client = pool.get_client()
+
+    assert child_client is not parent_client
+    # the parent's connections must be left alone
+    assert not parent_client.is_closed
+
+
+def test_async_client_per_event_loop() -> None:
+    pool = VespaQueryClientPool(http2=False, transport=httpx.MockTransport(_ok))
+
+    async def _get_clients() -> tuple[httpx.AsyncClient, httpx.AsyncClient]:
+        first = pool.get_async_client()
+        second = pool.get_async_client()
+        response = await first.get("http://vespa/document/v1/")
+        assert response.json() == {"path": "/document/v1/"}
+        return first, second
+
+    first, second = asyncio.run(_get_clients())
+    other_loop_client, _ = asyncio.run(_get_clients())
+
+    assert first is second
+    assert other_loop_client is not first
+
+
+def test_pool_stats() -> None:
+    pool = VespaQueryClientPool(http2=False, limits=httpx.Limits(max_connections=7))
+    pool.get_client()
+
+    assert pool.get_stats() == {
+        "active_connections": 0,
+        "idle_connections": 0,
+        "max_connections": 7,
+    }
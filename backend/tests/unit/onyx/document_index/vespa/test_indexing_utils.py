@@ -0,0 +1,104 @@
+from typing import Any
+from unittest.mock import MagicMock
+from unittest.mock import patch
+
+import httpx
+
+from onyx.document_index.vespa.indexing_utils import get_final_chunk_indices
+
+
+def _grouping_response(max_chunk_ids: dict[str, int]) -> dict[str, Any]:
+    return {
+        "root": {
+            "id": "toplevel",
+            "children": [
+                {
+                    "id": "group:root:0",
+                    "children": [
+                        {
+                            "id": "grouplist:document_id",
+                            "label": "document_id",
+                            "children": [
+                                {
+                                    "id": f"group:string:{doc_id}",
+                                    "value": doc_id,
+                                    "fields": {"max(chunk_id)": max_chunk_id},
+                                }
+                                for doc_id, max_chunk_id in max_chunk_ids.items()
+                            ],
+                        }
+                    ],
+                }
+            ],
+        }
+    }
+
+
+def test_get_final_chunk_indices_uses_grouping_results() -> None:
+    http_client = MagicMock(spec=httpx.Client)
+    response = MagicMock()
+    response.json.return_value = _grouping_response({"doc_a": 9, "doc_b": 1})
+    http_client.post.return_value = response
+
+    final_indices = get_final_chunk_indices(
+        doc_id_to_start_index={"doc_a": 4, "doc_b": 5, "doc_c": 3},
+        index_name="danswer_chunk",
+        http_client=http_client,
+    )
+
+    # one past the last existing chunk, but never below the start index
+    assert final_indices == {"doc_a": 10, "doc_b": 5, "doc_c": 3}
+    assert http_client.post.call_count == 1
+    yql = http_client.post.call_args.kwargs["json"]["yql"]
+    assert 'document_id contains "doc_a"' in yql
+    assert "group(document_id)" in yql
+
+
+def test_get_final_chunk_indices_empty() -> None:
+    http_client = MagicMock(spec=httpx.Client)
+
+    assert (
+        get_final_chunk_indices(
+            doc_id_to_start_index={},
+            index_name="danswer_chunk",
+            http_client=http_client,
+        )
+        == {}
+    )
+    http_client.post.assert_not_called()
+
+
+def test_get_final_chunk_indices_falls_back_per_group() -> None:
+    http_client = MagicMock(spec=httpx.Client)
+
+    def _post(url: str, json: dict[str, Any], **kwargs: Any) -> MagicMock:
+        if "doc_b" in json["yql"]:
+            raise httpx.ReadTimeout("timed out")
+        response = MagicMock()
+        response.json.return_value = _grouping_response({"doc_a": 9})
+        return response
+
+    http_client.post.side_effect = _post
+
+    with (
+        patch(
+            "onyx.document_index.vespa.indexing_utils.ENRICH_CHUNK_INFO_GROUP_SIZE", 1
+        ),
+        # skip the retry backoff of the grouping query
+        patch("retry.api.time.sleep"),
+        patch(
+            "onyx.document_index.vespa.indexing_utils.check_for_final_chunk_existence",
+            return_value=7,
+        ) as mock_probe,
+    ):
+        final_indices = get_final_chunk_indices(
+            doc_id_to_start_index={"doc_a": 4, "doc_b": 5},
+            index_name="danswer_chunk",
+            http_client=http_client,
+        )
+
+    # only the failed group is resolved by probing chunk ids one by one
+    assert final_indices == {"doc_a": 10, "doc_b": 7}
+    mock_probe.assert_called_once()
+    assert mock_probe.call_args.kwargs["minimal_doc_info"].doc_id == "doc_b"
+    assert mock_probe.call_args.kwargs["start_index"] == 5
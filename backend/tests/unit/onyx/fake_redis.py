@@ -0,0 +1,151 @@
+from typing import Any
+
+from onyx.redis.redis_pool import TENANT_PREFIXED_METHODS
+
+
+def _encode(value: Any) -> bytes:
+    # like redis-py, values are stored as bytes and numbers as their string
+    return value if isinstance(value, bytes) else str(value).encode()
+
+
+class FakeRedisPipeline:
+    """Runs every command right away and returns their results on execute"""
+
+    def __init__(self, redis_client: "FakeRedis") -> None:
+        self._redis_client = redis_client
+        self._results: list[Any] = []
+
+    def __getattr__(self, name: str) -> Any:
+        # like on a TenantRedis pipeline, keys are never prefixed
+        method = object.__getattribute__(self._redis_client, name)
+
+        def _queue(*args: Any, **kwargs: Any) -> "FakeRedisPipeline":
+            self._results.append(method(*args, **kwargs))
+            return self
+
+        return _queue
+
+    def execute(self) -> list[Any]:
+        results, self._results = self._results, []
+        return results
+
+
+class FakeRedis:
+    """In memory stand-in for the strings, counters, hashes, sets, sorted sets and
+    pipelines of Redis. TTLs are ignored."""
+
+    def __init__(self) -> None:
+        self.store: dict[str, bytes] = {}
+        self.hashes: dict[str, dict[bytes, bytes]] = {}
+        self.sets: dict[str, set[bytes]] = {}
+        self.sorted_sets: dict[str, dict[Any, float]] = {}
+
+    def _keyspaces(self) -> list[dict[str, Any]]:
+        return [self.store, self.hashes, self.sets, self.sorted_sets]
+
+    def get(self, key: str) -> bytes | None:
+        return self.store.get(key)
+
+    def mget(self, keys: list[str]) -> list[bytes | None]:
+        return [self.store.get(key) for key in keys]
+
+    def set(self, key: str, value: Any, ex: int | None = None) -> None:
+        self.store[key] = _encode(value)
+
+    def _add(self, key: str, amount: int) -> int:
+        value = int(self.store.get(key, b"0")) + amount
+        self.store[key] = _encode(value)
+        return value
+
+    def incr(self, key: str) -> int:
+        return self._add(key, 1)
+
+    def incrby(self, key: str, amount: int) -> int:
+        return self._add(key, amount)
+
+    def exists(self, key: str) -> int:
+        return int(any(key in values for values in self._keyspaces()))
+
+    def delete(self, *keys: str) -> int:
+        num_deleted = 0
+        for key in keys:
+            for values in self._keyspaces():
+                if values.pop(key, None) is not None:
+                    num_deleted += 1
+        return num_deleted
+
+    def expire(self, key: str, seconds: int) -> None:
+        pass
+
+    def hset(self, key: str, field: Any, value: Any) -> None:
+        self.hashes.setdefault(key, {})[_encode(field)] = _encode(value)
+
+    def hincrby(self, key: str, field: Any, amount: int) -> int:
+        fields = self.hashes.setdefault(key, {})
+        value = int(fields.get(_encode(field), b"0")) + amount
+        fields[_encode(field)] = _encode(value)
+        return value
+
+    def hdel(self, key: str, *fields: Any) -> None:
+        for field in fields:
+            self.hashes.get(key, {}).pop(_encode(field), None)
+
+    def hkeys(self, key: str) -> list[bytes]:
+        return list(self.hashes.get(key, {}))
+
+    def hgetall(self, key: str) -> dict[bytes, bytes]:
+        return dict(self.hashes.get(key, {}))
+
+    def sadd(self, key: str, *members: Any) -> int:
+        values = self.sets.setdefault(key, set())
+        new_members = {_encode(member) for member in members} - values
+        values |= new_members
+        return len(new_members)
+
+    def srem(self, key: str, *members: Any) -> int:
+        values = self.sets.get(key, set())
+        removed = {_encode(member) for member in members} & values
+        values -= removed
+        return len(removed)
+
+    def scard(self, key: str) -> int:
+        return len(self.sets.get(key, set()))
+
+    def zadd(self, key: str, mapping: dict[Any, float]) -> None:
+        self.sorted_sets.setdefault(key, {}).update(mapping)
+
+    def zcard(self, key: str) -> int:
+        return len(self.sorted_sets.get(key, {}))
+
+    def zpopmin(self, key: str, count: int) -> list[tuple[Any, float]]:
+        members = sorted(self.sorted_sets.get(key, {}).items(), key=lambda m: m[1])
+        popped = members[:count]
+        for member, _ in popped:
+            del self.sorted_sets[key][member]
+        return popped
+
+    def pipeline(self, transaction: bool = True) -> FakeRedisPipeline:
+        return FakeRedisPipeline(self)
+
+
+class FakeTenantRedis(FakeRedis):
+    """A FakeRedis that prefixes keys the way TenantRedis does: only the first argument
+    of the methods in TENANT_PREFIXED_METHODS, and nothing on pipelines"""
+
+    def __init__(self, tenant_id: str) -> None:
+        super().__init__()
+        self.tenant_id = tenant_id
+
+    def __getattribute__(self, item: str) -> Any:
+        attr = super().__getattribute__(item)
+        if item not in TENANT_PREFIXED_METHODS or not callable(attr):
+            return attr
+
+        prefix = f"{super().__getattribute__('tenant_id')}:"
+
+        def _prefixed(key: Any, *args: Any, **kwargs: Any) -> Any:
+            if isinstance(key, str) and not key.startswith(prefix):
+                key = prefix + key
+            return attr(key, *args, **kwargs)
+
+        return _prefixed
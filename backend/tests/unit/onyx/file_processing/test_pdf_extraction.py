@@ -0,0 +1,111 @@
+import io
+from unittest.mock import patch
+
+import pytest
+from pypdf import PdfReader
+
+from onyx.file_processing.extract_file_text import read_pdf_file
+from onyx.file_processing.pdf_extraction import iter_pdf_pages
+from onyx.file_processing.pdf_extraction import PdfExtractionBudgetExceededError
+
+
+def _make_pdf(page_texts: list[str]) -> io.BytesIO:
+    """Builds a minimal pdf with one line of text per page."""
+    num_pages = len(page_texts)
+    # 1: catalog, 2: pages, 3: font, then a page and a content stream per page
+    page_ids = [4 + 2 * i for i in range(num_pages)]
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids ["
+        + b" ".join(f"{page_id} 0 R".encode() for page_id in page_ids)
+        + f"] /Count {num_pages} >>".encode(),
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    for page_id, text in zip(page_ids, page_texts):
+        stream = f"BT /F1 12 Tf 72 720 Td ({text}) Tj ET".encode()
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {page_id + 1} 0 R >>".encode()
+        )
+        objects.append(
+            f"<< /Length {len(stream)} >>\nstream\n".encode() + stream + b"\nendstream"
+        )
+
+    pdf = b"%PDF-1.4\n"
+    offsets = []
+    for i, obj in enumerate(objects, start=1):
+        offsets.append(len(pdf))
+        pdf += f"{i} 0 obj\n".encode() + obj + b"\nendobj\n"
+
+    xref_offset = len(pdf)
+    pdf += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    for offset in offsets:
+        pdf += f"{offset:010d} 00000 n \n".encode()
+    pdf += (
+        f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\n"
+        f"startxref\n{xref_offset}\n%%EOF\n"
+    ).encode()
+    return io.BytesIO(pdf)
+
+
+def test_iter_pdf_pages() -> None:
+    texts = [f"page {i}" for i in range(5)]
+    file = _make_pdf(texts)
+
+    pages = list(iter_pdf_pages(PdfReader(file)))
+
+    assert [page.page_number for page in pages] == [1, 2, 3, 4, 5]
+    assert [page.text for page in pages] == texts
+
+
+def test_iter_pdf_pages_fails_over_max_chars() -> None:
+    texts = [f"page {i}" for i in range(5)]
+    file = _make_pdf(texts)
+
+    pages: list[str] = []
+    with pytest.raises(PdfExtractionBudgetExceededError):
+        for page in iter_pdf_pages(PdfReader(file), max_chars=10):
+            pages.append(page.text)
+
+    # fails right after going over the budget
+    assert pages == texts[:2]
+
+
+def test_iter_pdf_pages_fails_over_time_budget() -> None:
+    texts = [f"page {i}" for i in range(5)]
+    file = _make_pdf(texts)
+
+    pages: list[str] = []
+    with (
+        patch(
+            "onyx.file_processing.pdf_extraction.time.monotonic",
+            side_effect=[0.0, 1.0, 20.0],
+        ),
+        pytest.raises(PdfExtractionBudgetExceededError),
+    ):
+        for page in iter_pdf_pages(PdfReader(file), timeout_seconds=10):
+            pages.append(page.text)
+
+    assert pages == texts[:2]
+
+
+def test_read_pdf_file_joins_pages() -> None:
+    text, _, images = read_pdf_file(_make_pdf(["first", "second"]))
+
+    assert text == "first\n\nsecond"
+    assert images == []
+
+
+def test_read_pdf_file_returns_no_partial_text_over_budget() -> None:
+    file = _make_pdf(["first page", "second page"])
+
+    with patch(
+        "onyx.file_processing.extract_file_text.iter_pdf_pages",
+        side_effect=lambda pdf_reader, extract_images: iter_pdf_pages(
+            pdf_reader, extract_images, max_chars=5
+        ),
+    ):
+        text, _, images = read_pdf_file(file)
+
+    assert text == ""
+    assert images == []
@@ -0,0 +1,108 @@
+import json
+from io import BytesIO
+from typing import Any
+from typing import cast
+from typing import IO
+
+from onyx.configs.constants import DocumentSource
+from onyx.configs.constants import FileOrigin
+from onyx.connectors.models import Document
+from onyx.connectors.models import TextSection
+from onyx.file_store.document_batch_storage import BATCH_FILE_TYPE
+from onyx.file_store.document_batch_storage import FileStoreDocumentBatchStorage
+from onyx.file_store.document_batch_storage import LEGACY_BATCH_FILE_TYPE
+from onyx.file_store.file_store import FileStore
+
+
+class _InMemoryFileStore:
+    def __init__(self) -> None:
+        self.files: dict[str, tuple[bytes, str]] = {}
+
+    def save_file(
+        self, content: IO, file_type: str, file_id: str, **kwargs: Any
+    ) -> str:
+        self.files[file_id] = (content.read(), file_type)
+        return file_id
+
+    def has_file(self, file_id: str, file_origin: FileOrigin, file_type: str) -> bool:
+        return file_id in self.files and self.files[file_id][1] == file_type
+
+    def read_file(self, file_id: str, mode: str | None = None) -> IO[bytes]:
+        return BytesIO(self.files[file_id][0])
+
+    def read_file_stream(self, file_id: str) -> IO[bytes]:
+        return BytesIO(self.files[file_id][0])
+
+    def delete_file(self, file_id: str) -> None:
+        del self.files[file_id]
+
+    def change_file_id(self, old_file_id: str, new_file_id: str) -> None:
+        self.files[new_file_id] = self.files.pop(old_file_id)
+
+
+def _documents(count: int) -> list[Document]:
+    return [
+        Document(
+            id=f"doc_{ind}",
+            source=DocumentSource.WEB,
+            semantic_identifier=f"Doc {ind}",
+            metadata={"tag": "value"},
+            sections=[TextSection(text=f"line one\nline two {ind}", link="link")],
+        )
+        for ind in range(count)
+    ]
+
+
+def _storage(
+    file_store: _InMemoryFileStore, index_attempt_id: int = 2
+) -> FileStoreDocumentBatchStorage:
+    return FileStoreDocumentBatchStorage(
+        cc_pair_id=1,
+        index_attempt_id=index_attempt_id,
+        file_store=cast(FileStore, file_store),
+    )
+
+
+def test_store_and_get_batch_roundtrip() -> None:
+    file_store = _InMemoryFileStore()
+    storage = _storage(file_store)
+    documents = _documents(3)
+
+    storage.store_batch(5, documents)
+
+    content, file_type = file_store.files["iab/1/2/5.jsonl.gz"]
+    assert file_type == BATCH_FILE_TYPE
+    assert content[:2] == b"\x1f\x8b"  # gzip
+    assert storage.get_batch(5) == documents
+    assert storage.get_batch(6) is None
+
+
+def test_legacy_json_batches_still_load() -> None:
+    file_store = _InMemoryFileStore()
+    storage = _storage(file_store)
+    documents = _documents(2)
+    file_store.files["iab/1/2/0.json"] = (
+        json.dumps(
+            [doc.model_dump(mode="json") for doc in documents], indent=2
+        ).encode(),
+        LEGACY_BATCH_FILE_TYPE,
+    )
+
+    assert storage.get_batch(0) == documents
+
+    storage.delete_batch_by_num(0)
+    assert file_store.files == {}
+
+
+def test_moving_batches_keeps_their_format() -> None:
+    file_store = _InMemoryFileStore()
+    old_storage = _storage(file_store, index_attempt_id=2)
+    old_storage.store_batch(0, _documents(1))
+    file_store.files["iab/1/2/1.json"] = (b"[]", LEGACY_BATCH_FILE_TYPE)
+
+    new_storage = _storage(file_store, index_attempt_id=3)
+    new_storage.update_old_batches_to_new_index_attempt(list(file_store.files))
+
+    assert set(file_store.files) == {"iab/1/3/0.jsonl.gz", "iab/1/3/1.json"}
+    assert new_storage.get_batch(0) == _documents(1)
+    assert new_storage.get_batch(1) == []
@@ -0,0 +1,116 @@
+from typing import Any
+from unittest.mock import patch
+
+from onyx.indexing.chunk_embedding_cache import ChunkEmbeddingCache
+from onyx.indexing.chunk_embedding_cache import get_embedding_model_fingerprint
+from onyx.indexing.embedder import DefaultIndexingEmbedder
+from tests.unit.onyx.fake_redis import FakeRedis
+
+
+def _patch_redis(fake_redis: FakeRedis) -> Any:
+    return patch(
+        "onyx.indexing.chunk_embedding_cache.get_redis_client",
+        return_value=fake_redis,
+    )
+
+
+def test_least_recently_used_entries_are_evicted(fake_redis: FakeRedis) -> None:
+    fingerprint = get_embedding_model_fingerprint(
+        model_name="test-model",
+        provider_type=None,
+        normalize=True,
+        passage_prefix=None,
+        reduced_dimension=None,
+        api_url=None,
+        deployment_name=None,
+        large_chunks_present=False,
+    )
+
+    with (
+        _patch_redis(fake_redis),
+        patch("onyx.indexing.chunk_embedding_cache.time.time") as mock_time,
+    ):
+        cache = ChunkEmbeddingCache(max_entries=2)
+        mock_time.return_value = 1.0
+        cache.set_many(fingerprint, {"a": [1.0], "b": [2.0]})
+
+        # "a" was used since, so "b" is the one to go
+        mock_time.return_value = 2.0
+        assert cache.get_many(fingerprint, ["a"]) == {"a": [1.0]}
+        mock_time.return_value = 3.0
+        cache.set_many(fingerprint, {"c": [3.0]})
+
+        assert cache.get_many(fingerprint, ["a", "b", "c"]) == {
+            "a": [1.0],
+            "c": [3.0],
+        }
+        assert len(fake_redis.store) == 2
+
+        # the maximum is shared by all tenants
+        mock_time.return_value = 3.5
+        assert cache.get_many(fingerprint, ["c"]) == {"c": [3.0]}
+        with patch(
+            "onyx.indexing.chunk_embedding_cache.get_current_tenant_id",
+            return_value="other_tenant",
+        ):
+            mock_time.return_value = 4.0
+            cache.set_many(fingerprint, {"d": [4.0]})
+        assert cache.get_many(fingerprint, ["a", "c"]) == {"c": [3.0]}
+        assert len(fake_redis.store) == 2
+
+
+def test_fingerprint_isolates_models(fake_redis: FakeRedis) -> None:
+    kwargs: dict[str, Any] = dict(
+        model_name="test-model",
+        provider_type=None,
+        normalize=True,
+        passage_prefix=None,
+        reduced_dimension=None,
+        api_url=None,
+    )
+
+    with _patch_redis(fake_redis):
+        cache = ChunkEmbeddingCache()
+        cache.set_many(
+            get_embedding_model_fingerprint(
+                **kwargs, deployment_name=None, large_chunks_present=False
+            ),
+            {"a": [1.0]},
+        )
+
+        for deployment_name, large_chunks_present in [(None, True), ("other", False)]:
+            fingerprint = get_embedding_model_fingerprint(
+                **kwargs,
+                deployment_name=deployment_name,
+                large_chunks_present=large_chunks_present,
+            )
+            assert cache.get_many(fingerprint, ["a"]) == {}
+
+
+def test_embedder_only_encodes_uncached_texts(fake_redis: FakeRedis) -> None:
+    with (
+        _patch_redis(fake_redis),
+        patch("onyx.indexing.embedder.ENABLE_CHUNK_EMBEDDING_CACHE", True),
+        patch("onyx.indexing.embedder.EmbeddingModel") as mock_embedding_model,
+    ):
+        mock_encode = mock_embedding_model.return_value.encode
+        mock_encode.side_effect = lambda texts, **kwargs: [
+            [float(len(text))] for text in texts
+        ]
+        embedder = DefaultIndexingEmbedder(
+            model_name="test-model",
+            normalize=True,
+            query_prefix=None,
+            passage_prefix=None,
+        )
+
+        assert embedder._encode_passages(["a", "bb"], large_chunks_present=False) == [
+            [1.0],
+            [2.0],
+        ]
+        assert embedder._encode_passages(
+            ["bb", "ccc", "ccc"], large_chunks_present=False
+        ) == [[2.0], [3.0], [3.0]]
+
+        assert mock_encode.call_count == 2
+        assert mock_encode.call_args.kwargs["texts"] == ["ccc"]
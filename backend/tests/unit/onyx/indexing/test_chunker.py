@@ -9,6 +9,7 @@ from onyx.configs.constants import DocumentSource
 from onyx.connectors.models import Document
 from onyx.connectors.models import TextSection
 from onyx.indexing.chunker import Chunker
+from onyx.indexing.chunker import TokenCountCache
 from onyx.indexing.embedder import DefaultIndexingEmbedder
 from onyx.indexing.indexing_pipeline import process_image_sections
 from onyx.llm.utils import MAX_CONTEXT_TOKENS
@@ -105,3 +106,70 @@ def test_chunker_heartbeat(
 
     assert mock_heartbeat.call_count == 1
     assert len(chunks) > 0
+
+
+def test_chunk_iter_matches_chunk(embedder: DefaultIndexingEmbedder) -> None:
+    documents = [
+        Document(
+            id=f"test_doc_{ind}",
+            source=DocumentSource.WEB,
+            semantic_identifier=f"Test Document {ind}",
+            metadata={},
+            doc_updated_at=None,
+            sections=[
+                TextSection(
+                    text="This is a section that repeats itself. " * 50 * (ind + 1),
+                    link="link1",
+                ),
+            ],
+        )
+        for ind in range(3)
+    ]
+    indexing_documents = process_image_sections(documents)
+
+    tokenizer = embedder.embedding_model.tokenizer
+    uncached_tokenizer = Mock(wraps=tokenizer)
+    uncached_chunker = Chunker(
+        tokenizer=uncached_tokenizer,
+        enable_multipass=True,
+        enable_contextual_rag=False,
+        token_count_cache_size=0,
+    )
+    chunks = uncached_chunker.chunk(indexing_documents)
+
+    cached_tokenizer = Mock(wraps=tokenizer)
+    chunker = Chunker(
+        tokenizer=cached_tokenizer,
+        enable_multipass=True,
+        enable_contextual_rag=False,
+    )
+    chunks_per_doc = list(chunker.chunk_iter(indexing_documents))
+
+    assert len(chunks_per_doc) == len(documents)
+    for document, doc_chunks in zip(documents, chunks_per_doc):
+        assert all(chunk.source_document.id == document.id for chunk in doc_chunks)
+    assert [
+        chunk.content for doc_chunks in chunks_per_doc for chunk in doc_chunks
+    ] == [chunk.content for chunk in chunks]
+
+    # the repeated sentences are only encoded once
+    assert 0 < cached_tokenizer.encode.call_count < uncached_tokenizer.encode.call_count
+    # and the cache is dropped after the batch
+    assert len(chunker.token_counts._counts) == 0
+
+
+def test_token_count_cache() -> None:
+    tokenizer = Mock()
+    tokenizer.encode.side_effect = lambda text: text.split()
+    cache = TokenCountCache(tokenizer, max_entries=2)
+
+    assert cache.count("a b") == 2
+    assert cache.count("a b") == 2
+    assert tokenizer.encode.call_count == 1
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    cache.count("c")
+    cache.count("d e f")
+    # "a b" was the least recently used entry
+    assert cache.count("a b") == 2
+    assert tokenizer.encode.call_count == 4
@@ -103,3 +103,60 @@ def test_default_indexing_embedder_embed_chunks(
         tenant_id=None,
         request_id=None,
     )
+
+
+def test_local_embedder_embeds_titles_with_chunks(mock_embedding_model: Mock) -> None:
+    embedder = DefaultIndexingEmbedder(
+        model_name="test-model",
+        normalize=True,
+        query_prefix=None,
+        passage_prefix=None,
+        provider_type=None,
+    )
+    mock_embedding_model.return_value.encode.return_value = [
+        [1.0],  # chunk
+        [2.0],  # mini chunk
+        [3.0],  # title
+    ]
+
+    source_doc = Document(
+        id="test_doc",
+        source=DocumentSource.WEB,
+        semantic_identifier="Test Document",
+        metadata={},
+        doc_updated_at=None,
+        sections=[TextSection(text="This is a short section.", link="link1")],
+    )
+    chunk = DocAwareChunk(
+        chunk_id=0,
+        blurb="This is a short section.",
+        content="Test chunk",
+        source_links={0: "link1"},
+        section_continuation=False,
+        source_document=source_doc,
+        title_prefix="",
+        metadata_suffix_semantic="",
+        metadata_suffix_keyword="",
+        mini_chunk_texts=["Test"],
+        large_chunk_reference_ids=[],
+        large_chunk_id=None,
+        image_file_id=None,
+        chunk_context="",
+        doc_summary="",
+        contextual_rag_reserved_tokens=0,
+    )
+
+    result = embedder.embed_chunks([chunk])
+
+    # a single call so the titles are length bucketed together with the chunks
+    mock_embedding_model.return_value.encode.assert_called_once_with(
+        texts=["Test chunk", "Test", "Test Document"],
+        text_type=EmbedTextType.PASSAGE,
+        large_chunks_present=False,
+        tenant_id=None,
+        request_id=None,
+    )
+    assert result[0].embeddings == ChunkEmbedding(
+        full_embedding=[1.0], mini_chunk_embeddings=[[2.0]]
+    )
+    assert result[0].title_embedding == [3.0]
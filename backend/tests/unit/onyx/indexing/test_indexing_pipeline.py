@@ -6,16 +6,21 @@ from unittest.mock import patch
 
 import pytest
 
+from onyx.access.models import ExternalAccess
 from onyx.configs.app_configs import MAX_DOCUMENT_CHARS
 from onyx.connectors.models import Document
 from onyx.connectors.models import DocumentSource
 from onyx.connectors.models import ImageSection
 from onyx.connectors.models import TextSection
 from onyx.indexing.chunker import Chunker
+from onyx.indexing.content_hash import compute_document_content_hash
 from onyx.indexing.embedder import DefaultIndexingEmbedder
 from onyx.indexing.indexing_pipeline import _get_aggregated_chunk_boost_factor
+from onyx.db.models import Document as DBDocument
+from onyx.file_processing.image_summarization import hash_image
 from onyx.indexing.indexing_pipeline import add_contextual_summaries
 from onyx.indexing.indexing_pipeline import filter_documents
+from onyx.indexing.indexing_pipeline import get_docs_with_changed_content
 from onyx.indexing.indexing_pipeline import process_image_sections
 from onyx.indexing.models import ChunkEmbedding
 from onyx.indexing.models import IndexChunk
@@ -338,3 +343,152 @@ def test_contextual_rag(
             count += 1
         assert chunk.doc_summary == doc_summary
         assert chunk.chunk_context == chunk_context
+
+
+def test_compute_document_content_hash() -> None:
+    doc = create_test_document()
+    content_hash = compute_document_content_hash(doc)
+
+    assert compute_document_content_hash(create_test_document()) == content_hash
+    assert (
+        compute_document_content_hash(
+            create_test_document(sections=[TextSection(text="New", link="test_link")])
+        )
+        != content_hash
+    )
+    assert (
+        compute_document_content_hash(create_test_document(title="New Title"))
+        != content_hash
+    )
+
+    doc.metadata = {"tag": "value"}
+    assert compute_document_content_hash(doc) != content_hash
+
+    # permissions are not part of the content
+    doc.metadata = {}
+    doc.external_access = ExternalAccess(
+        external_user_emails={"a@example.com"},
+        external_user_group_ids=set(),
+        is_public=False,
+    )
+    assert compute_document_content_hash(doc) == content_hash
+
+
+def test_get_docs_with_changed_content() -> None:
+    unchanged = create_test_document(doc_id="unchanged")
+    changed = create_test_document(doc_id="changed")
+    new = create_test_document(doc_id="new")
+    not_indexed_for_cc_pair = create_test_document(doc_id="not_indexed")
+    acl_changed = create_test_document(doc_id="acl_changed")
+    acl_changed.external_access = ExternalAccess(
+        external_user_emails={"a@example.com"},
+        external_user_group_ids=set(),
+        is_public=False,
+    )
+    documents = [unchanged, changed, new, not_indexed_for_cc_pair, acl_changed]
+    id_to_content_hash = {
+        doc.id: compute_document_content_hash(doc) for doc in documents
+    }
+
+    db_docs = [
+        DBDocument(
+            id=doc.id,
+            content_hash=("stale" if doc is changed else id_to_content_hash[doc.id]),
+            is_public=False,
+            external_user_emails=[],
+            external_user_group_ids=[],
+        )
+        for doc in documents
+        if doc is not new
+    ]
+
+    changed_docs = get_docs_with_changed_content(
+        documents=documents,
+        db_docs=db_docs,
+        id_to_content_hash=id_to_content_hash,
+        indexed_doc_ids={"unchanged", "changed", "new", "acl_changed"},
+    )
+
+    assert [doc.id for doc in changed_docs] == [
+        "changed",
+        "new",
+        "not_indexed",
+        "acl_changed",
+    ]
+
+
+def test_process_image_sections_summarizes_each_image_once() -> None:
+    logo = b"logo bytes"
+    screenshot = b"screenshot bytes"
+    file_id_to_data = {
+        "logo_1": logo,
+        "logo_2": logo,
+        "screenshot": screenshot,
+        "chart": b"chart bytes",
+    }
+    documents = [
+        Document(
+            id=f"doc_{ind}",
+            source=DocumentSource.CONFLUENCE,
+            semantic_identifier=f"Page {ind}",
+            metadata={},
+            sections=[
+                TextSection(text="Some text", link="link"),
+                ImageSection(image_file_id=image_file_id, link="link"),
+            ],
+        )
+        for ind, image_file_id in enumerate(file_id_to_data)
+    ]
+
+    file_store = Mock()
+    file_store.read_file_record.side_effect = lambda file_id: Mock(
+        display_name=file_id
+    )
+    file_store.read_file.side_effect = lambda file_id: Mock(
+        read=Mock(return_value=file_id_to_data[file_id])
+    )
+    summarize = Mock(side_effect=lambda llm, image_data, context_name: context_name)
+    upsert = Mock()
+
+    with (
+        patch(
+            "onyx.indexing.indexing_pipeline.get_image_extraction_and_analysis_enabled",
+            return_value=True,
+        ),
+        patch(
+            "onyx.indexing.indexing_pipeline.get_default_llm_with_vision",
+            return_value=Mock(config=Mock(model_provider="openai", model_name="gpt")),
+        ),
+        patch(
+            "onyx.indexing.indexing_pipeline.get_default_file_store",
+            return_value=file_store,
+        ),
+        patch("onyx.indexing.indexing_pipeline.get_session_with_current_tenant"),
+        patch(
+            "onyx.indexing.indexing_pipeline.get_image_summaries",
+            # the chart was summarized by a previous run
+            side_effect=lambda db_session, model_fingerprint, image_hashes: {
+                image_hash: "cached chart summary"
+                for image_hash in image_hashes
+                if image_hash == hash_image(b"chart bytes")
+            },
+        ),
+        patch("onyx.indexing.indexing_pipeline.upsert_image_summaries", upsert),
+        patch(
+            "onyx.indexing.indexing_pipeline.summarize_image_with_error_handling",
+            summarize,
+        ),
+    ):
+        indexing_documents = process_image_sections(documents)
+
+    assert [doc.processed_sections[1].text for doc in indexing_documents] == [
+        "logo_1",
+        "logo_1",
+        "screenshot",
+        "cached chart summary",
+    ]
+    assert summarize.call_count == 2
+    assert upsert.call_args.kwargs["image_hash_to_summary"] == {
+        hash_image(logo): "logo_1",
+        hash_image(screenshot): "screenshot",
+    }
@@ -0,0 +1,50 @@
+import time
+from collections.abc import Iterator
+
+import pytest
+
+from onyx.indexing.stage_pipeline import run_stage_pipeline
+
+
+def test_run_stage_pipeline_keeps_order() -> None:
+    def _slow_double(item: int) -> int:
+        time.sleep(0.01)
+        return item * 2
+
+    outputs, timings = run_stage_pipeline(
+        source=range(10),
+        stages=[("double", _slow_double), ("increment", lambda item: item + 1)],
+        source_name="numbers",
+        queue_size=2,
+    )
+
+    assert outputs == [item * 2 + 1 for item in range(10)]
+    assert [timing.name for timing in timings] == ["numbers", "double", "increment"]
+    assert all(timing.items == 10 for timing in timings)
+    assert timings[1].busy_seconds >= 0.1
+
+
+def test_run_stage_pipeline_raises_stage_failure() -> None:
+    closed = False
+
+    def _source() -> Iterator[int]:
+        nonlocal closed
+        try:
+            yield from range(1000)
+        finally:
+            closed = True
+
+    def _fail_on_three(item: int) -> int:
+        if item == 3:
+            raise ValueError("stage failed")
+        return item
+
+    with pytest.raises(ValueError, match="stage failed"):
+        run_stage_pipeline(
+            source=_source(),
+            stages=[("fail", _fail_on_three), ("identity", lambda item: item)],
+            queue_size=1,
+        )
+
+    # the source generator is stopped instead of producing the remaining items
+    assert closed
@@ -0,0 +1,205 @@
+import json
+from collections.abc import Iterator
+from typing import cast
+from unittest.mock import MagicMock
+from unittest.mock import patch
+
+import pytest
+from redis import Redis
+
+from onyx.key_value_store.local_cache import KV_STORE_INVALIDATION_CHANNEL
+from onyx.key_value_store.local_cache import KVStoreLocalCache
+from onyx.key_value_store.store import PgRedisKVStore
+from onyx.key_value_store.store import REDIS_KEY_PREFIX
+from onyx.key_value_store.store import REDIS_VERSION_KEY_PREFIX
+from tests.unit.onyx.fake_redis import FakeRedis
+from tests.unit.onyx.fake_redis import FakeTenantRedis
+
+
+@pytest.fixture
+def cache() -> Iterator[KVStoreLocalCache]:
+    local_cache = KVStoreLocalCache(max_entries=2, ttl_seconds=30)
+    # no pub/sub listener in unit tests, act as if it was subscribed
+    local_cache._subscribed.set()
+    with patch.object(local_cache, "_ensure_listener", return_value=False):
+        yield local_cache
+
+
+def _fill(cache: KVStoreLocalCache, tenant_id: str, key: str, value: str) -> None:
+    cache.set(tenant_id, key, value, cache.start_fill())
+
+
+def test_local_cache_is_per_tenant(cache: KVStoreLocalCache) -> None:
+    _fill(cache, "tenant_a", "key", '"a"')
+
+    assert cache.get("tenant_a", "key") == '"a"'
+    assert cache.get("tenant_b", "key") is None
+
+
+def test_local_cache_expires_entries(cache: KVStoreLocalCache) -> None:
+    with patch("onyx.key_value_store.local_cache.time.monotonic", return_value=100.0):
+        _fill(cache, "tenant", "key", "1")
+    with patch("onyx.key_value_store.local_cache.time.monotonic", return_value=129.0):
+        assert cache.get("tenant", "key") == "1"
+    with patch("onyx.key_value_store.local_cache.time.monotonic", return_value=130.0):
+        assert cache.get("tenant", "key") is None
+
+
+def test_local_cache_evicts_least_recently_used(cache: KVStoreLocalCache) -> None:
+    _fill(cache, "tenant", "a", "1")
+    _fill(cache, "tenant", "b", "2")
+    assert cache.get("tenant", "a") == "1"
+
+    _fill(cache, "tenant", "c", "3")
+
+    assert cache.get("tenant", "a") == "1"
+    assert cache.get("tenant", "b") is None
+    assert cache.get("tenant", "c") == "3"
+
+
+def test_invalidate_publishes_to_other_processes(cache: KVStoreLocalCache) -> None:
+    _fill(cache, "tenant", "key", "1")
+    redis_client = MagicMock()
+
+    with patch(
+        "onyx.key_value_store.local_cache.get_shared_redis_client",
+        return_value=redis_client,
+    ):
+        cache.invalidate("tenant", "key")
+
+    assert cache.get("tenant", "key") is None
+    channel, message = redis_client.publish.call_args.args
+    assert channel == KV_STORE_INVALIDATION_CHANNEL
+    assert json.loads(message) == {"tenant_id": "tenant", "key": "key"}
+
+
+def test_handle_invalidation_message(cache: KVStoreLocalCache) -> None:
+    _fill(cache, "tenant", "a", "1")
+    _fill(cache, "tenant", "b", "2")
+
+    cache.handle_invalidation_message(
+        json.dumps({"tenant_id": "tenant", "key": "a"}).encode()
+    )
+    assert cache.get("tenant", "a") is None
+    assert cache.get("tenant", "b") == "2"
+
+    # a message we can't make sense of may have been for anything
+    cache.handle_invalidation_message(b"not json")
+    assert cache.get("tenant", "b") is None
+
+
+def test_fill_started_before_an_invalidation_is_not_cached(
+    cache: KVStoreLocalCache,
+) -> None:
+    fill_epoch = cache.start_fill()
+    # another process wrote the key while we were fetching the old value
+    cache.handle_invalidation_message(
+        json.dumps({"tenant_id": "tenant", "key": "key"}).encode()
+    )
+    cache.set("tenant", "key", "old", fill_epoch)
+    assert cache.get("tenant", "key") is None
+
+    _fill(cache, "tenant", "key", "new")
+    assert cache.get("tenant", "key") == "new"
+
+
+def test_nothing_is_cached_before_subscribing() -> None:
+    local_cache = KVStoreLocalCache(max_entries=2, ttl_seconds=30)
+    with (
+        patch.object(local_cache, "_ensure_listener", return_value=False),
+        patch("onyx.key_value_store.local_cache._SUBSCRIBE_TIMEOUT_SECONDS", 0),
+    ):
+        assert local_cache.start_fill() is None
+        local_cache.set("tenant", "key", "1", None)
+    assert local_cache.get("tenant", "key") is None
+
+
+def test_kv_store_load_uses_local_cache(cache: KVStoreLocalCache) -> None:
+    redis_values = {
+        REDIS_KEY_PREFIX + "settings": json.dumps({"setting": True}).encode()
+    }
+    redis_client = MagicMock()
+    redis_client.get.side_effect = redis_values.get
+
+    with (
+        patch("onyx.key_value_store.store.KV_STORE_LOCAL_CACHE_ENABLED", True),
+        patch(
+            "onyx.key_value_store.store.get_kv_store_local_cache", return_value=cache
+        ),
+        patch(
+            "onyx.key_value_store.store.get_current_tenant_id", return_value="tenant"
+        ),
+    ):
+        kv_store = PgRedisKVStore(redis_client=redis_client)
+        first = kv_store.load("settings")
+        cast(dict, first)["setting"] = False
+        second = kv_store.load("settings")
+
+    assert second == {"setting": True}
+    value_reads = [
+        call
+        for call in redis_client.get.call_args_list
+        if call.args == (REDIS_KEY_PREFIX + "settings",)
+    ]
+    assert len(value_reads) == 1
+
+
+def test_kv_store_load_does_not_cache_concurrently_written_value(
+    cache: KVStoreLocalCache,
+) -> None:
+    version_key = REDIS_VERSION_KEY_PREFIX + "settings"
+    redis_values = {REDIS_KEY_PREFIX + "settings": b'"old"'}
+
+    def _get(key: str) -> bytes | None:
+        value = redis_values.get(key)
+        if key == REDIS_KEY_PREFIX + "settings":
+            # a writer bumps the version right after we read the old value
+            redis_values[version_key] = b"1"
+        return value
+
+    redis_client = MagicMock()
+    redis_client.get.side_effect = _get
+
+    with (
+        patch("onyx.key_value_store.store.KV_STORE_LOCAL_CACHE_ENABLED", True),
+        patch(
+            "onyx.key_value_store.store.get_kv_store_local_cache", return_value=cache
+        ),
+        patch(
+            "onyx.key_value_store.store.get_current_tenant_id", return_value="tenant"
+        ),
+    ):
+        assert PgRedisKVStore(redis_client=redis_client).load("settings") == "old"
+
+    assert cache.get("tenant", "settings") is None
+
+
+def test_kv_store_version_is_bumped_on_the_tenant_key(
+    cache: KVStoreLocalCache,
+) -> None:
+    redis_client = FakeTenantRedis("tenant")
+    redis_client.set(REDIS_KEY_PREFIX + "settings", '"old"')
+
+    with (
+        patch("onyx.key_value_store.store.KV_STORE_LOCAL_CACHE_ENABLED", True),
+        patch(
+            "onyx.key_value_store.store.get_kv_store_local_cache", return_value=cache
+        ),
+        patch(
+            "onyx.key_value_store.store.get_current_tenant_id", return_value="tenant"
+        ),
+    ):
+        writer = PgRedisKVStore(redis_client=cast(Redis, redis_client))
+
+        def _get(key: str) -> bytes | None:
+            value = FakeRedis.get(redis_client, key)
+            if key == f"tenant:{REDIS_KEY_PREFIX}settings":
+                # another process writes the key right after we read the old value
+                writer._bump_version("settings")
+            return value
+
+        with patch.object(redis_client, "get", side_effect=_get):
+            reader = PgRedisKVStore(redis_client=cast(Redis, redis_client))
+            assert reader.load("settings") == "old"
+
+    assert cache.get("tenant", "settings") is None
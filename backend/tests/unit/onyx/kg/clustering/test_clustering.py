@@ -0,0 +1,102 @@
+from typing import Any
+from unittest.mock import MagicMock
+from unittest.mock import patch
+
+from onyx.db.models import KGEntity
+from onyx.db.models import KGEntityExtractionStaging
+from onyx.kg.clustering.clustering import _cluster_grounded_entities
+
+_MODULE = "onyx.kg.clustering.clustering"
+
+
+def _staged(id_name: str, name: str, document_id: str | None = None) -> Any:
+    return KGEntityExtractionStaging(
+        id_name=id_name,
+        name=name,
+        entity_type_id_name="ACCOUNT",
+        document_id=document_id,
+    )
+
+
+def _entity(id_name: str, name: str, document_id: str | None = None) -> KGEntity:
+    return KGEntity(
+        id_name=id_name,
+        name=name,
+        entity_type_id_name="ACCOUNT",
+        document_id=document_id,
+    )
+
+
+def test_cluster_grounded_entities() -> None:
+    existing = _entity("ACCOUNT::1", "acme corporation")
+    entities = [
+        # merged into an existing entity
+        _staged("s1", "Acme Corporation"),
+        # names with digits are never clustered
+        _staged("s2", "acme corporation 2"),
+        # transferred, then the next one is merged into it
+        _staged("s3", "globex industries"),
+        _staged("s4", "Globex Industries"),
+    ]
+    globex = _entity("ACCOUNT::2", "globex industries")
+
+    def _merge(db_session: Any, parent: KGEntity, child: Any) -> KGEntity:
+        return parent
+
+    transfer_results = {"s2": _entity("ACCOUNT::3", "acme corporation 2"), "s3": globex}
+
+    with (
+        patch(f"{_MODULE}.get_session_with_current_tenant"),
+        patch(
+            f"{_MODULE}._get_similar_entities_by_staging_id",
+            return_value={"s1": [existing], "s4": []},
+        ) as get_similar,
+        patch(f"{_MODULE}.merge_entities", side_effect=_merge) as merge,
+        patch(
+            f"{_MODULE}.transfer_entity",
+            side_effect=lambda db_session, entity: transfer_results[entity.id_name],
+        ) as transfer,
+    ):
+        num_merged, num_transferred = _cluster_grounded_entities(entities)
+
+    assert (num_merged, num_transferred) == (2, 2)
+    # one candidate query for the whole batch, without the name with digits
+    assert get_similar.call_count == 1
+    assert set(get_similar.call_args.args[2]) == {"s1", "s3", "s4"}
+    assert [
+        (call.kwargs["child"].id_name, call.kwargs["parent"].id_name)
+        for call in merge.call_args_list
+    ] == [("s1", "ACCOUNT::1"), ("s4", "ACCOUNT::2")]
+    assert [call.kwargs["entity"].id_name for call in transfer.call_args_list] == [
+        "s2",
+        "s3",
+    ]
+
+
+def test_cluster_grounded_entities_keeps_documents_apart() -> None:
+    entities = [
+        _staged("s1", "Acme", document_id="doc_1"),
+        _staged("s2", "Acme", document_id="doc_2"),
+    ]
+    session = MagicMock()
+    session.__enter__.return_value.query.return_value.filter.return_value = [
+        ("doc_1", "Acme"),
+        ("doc_2", "Acme"),
+    ]
+
+    with (
+        patch(f"{_MODULE}.get_session_with_current_tenant", return_value=session),
+        patch(f"{_MODULE}._get_similar_entities_by_staging_id", return_value={}),
+        patch(f"{_MODULE}.merge_entities") as merge,
+        patch(
+            f"{_MODULE}.transfer_entity",
+            side_effect=lambda db_session, entity: _entity(
+                f"ACCOUNT::{entity.id_name}", "acme", entity.document_id
+            ),
+        ),
+    ):
+        num_merged, num_transferred = _cluster_grounded_entities(entities)
+
+    # two entities of different documents can't be merged
+    merge.assert_not_called()
+    assert (num_merged, num_transferred) == (0, 2)
@@ -9,8 +9,15 @@ from httpx import AsyncClient
 from litellm.exceptions import RateLimitError
 
 from onyx.natural_language_processing.search_nlp_models import CloudEmbedding
+from onyx.natural_language_processing.search_nlp_models import EmbeddingModel
+from onyx.natural_language_processing.search_nlp_models import padding_efficiency
+from shared_configs.embedding_transport import EMBEDDING_BINARY_CONTENT_TYPE
+from shared_configs.embedding_transport import EMBEDDING_BINARY_DTYPE_HEADER
+from shared_configs.embedding_transport import encode_embeddings
 from shared_configs.enums import EmbeddingProvider
+from shared_configs.enums import EmbeddingTransportDtype
 from shared_configs.enums import EmbedTextType
+from shared_configs.model_server_models import EmbedRequest
 
 
 @pytest.fixture
@@ -81,3 +88,119 @@ async def test_rate_limit_handling() -> None:
                 model_name="fake-model",
                 text_type=EmbedTextType.QUERY,
             )
+
+
+def _local_embedding_model() -> EmbeddingModel:
+    with patch("onyx.natural_language_processing.search_nlp_models.get_tokenizer"):
+        return EmbeddingModel(
+            server_host="localhost",
+            server_port=9000,
+            model_name="fake-local-model",
+            normalize=True,
+            query_prefix=None,
+            passage_prefix=None,
+            api_key=None,
+            api_url=None,
+            provider_type=None,
+        )
+
+
+def _embed_request() -> EmbedRequest:
+    return EmbedRequest(
+        texts=["a", "b"],
+        model_name="fake-local-model",
+        max_context_length=512,
+        normalize_embeddings=True,
+        text_type=EmbedTextType.QUERY,
+    )
+
+
+@pytest.mark.parametrize(
+    "dtype", [EmbeddingTransportDtype.FLOAT32, EmbeddingTransportDtype.FLOAT16]
+)
+def test_model_server_request_binary_transport(
+    sample_embeddings: List[List[float]], dtype: EmbeddingTransportDtype
+) -> None:
+    mock_response = MagicMock()
+    mock_response.status_code = 200
+    mock_response.headers = {"content-type": EMBEDDING_BINARY_CONTENT_TYPE}
+    mock_response.content = encode_embeddings(sample_embeddings, dtype=dtype)
+
+    with (
+        patch(
+            "onyx.natural_language_processing.search_nlp_models.USE_BINARY_EMBEDDING_TRANSPORT",
+            True,
+        ),
+        patch(
+            "onyx.natural_language_processing.search_nlp_models.BINARY_EMBEDDING_TRANSPORT_DTYPE",
+            dtype,
+        ),
+        patch(
+            "onyx.natural_language_processing.search_nlp_models.requests.post",
+            return_value=mock_response,
+        ) as mock_post,
+    ):
+        response = _local_embedding_model()._make_model_server_request(_embed_request())
+
+    headers = mock_post.call_args.kwargs["headers"]
+    assert headers["Accept"].startswith(EMBEDDING_BINARY_CONTENT_TYPE)
+    assert headers[EMBEDDING_BINARY_DTYPE_HEADER] == dtype.value
+    mock_response.json.assert_not_called()
+    assert len(response.embeddings) == 2
+    for embedding, expected in zip(response.embeddings, sample_embeddings):
+        assert embedding == pytest.approx(expected, abs=1e-3)
+
+
+def test_model_server_request_json_fallback(
+    sample_embeddings: List[List[float]],
+) -> None:
+    # e.g. an older model server that doesn't know the binary format
+    mock_response = MagicMock()
+    mock_response.status_code = 200
+    mock_response.headers = {"content-type": "application/json"}
+    mock_response.json.return_value = {"embeddings": sample_embeddings}
+
+    with (
+        patch(
+            "onyx.natural_language_processing.search_nlp_models.USE_BINARY_EMBEDDING_TRANSPORT",
+            True,
+        ),
+        patch(
+            "onyx.natural_language_processing.search_nlp_models.requests.post",
+            return_value=mock_response,
+        ),
+    ):
+        response = _local_embedding_model()._make_model_server_request(_embed_request())
+
+    assert response.embeddings == sample_embeddings
+
+
+def test_local_encode_is_length_bucketed() -> None:
+    model = _local_embedding_model()
+    model.tokenizer = MagicMock()
+    model.tokenizer.encode.side_effect = lambda text: text.split()
+    texts = ["a b c d", "a", "a b c d e f", "a b"]
+
+    with patch.object(
+        EmbeddingModel,
+        "_batch_encode_texts",
+        side_effect=lambda texts, **kwargs: [[float(len(text))] for text in texts],
+    ) as mock_batch_encode:
+        embeddings = model.encode(
+            texts, text_type=EmbedTextType.PASSAGE, local_embedding_batch_size=2
+        )
+
+    # shortest texts are batched together, results come back in the input order
+    assert mock_batch_encode.call_args.kwargs["texts"] == [
+        "a",
+        "a b",
+        "a b c d",
+        "a b c d e f",
+    ]
+    assert embeddings == [[7.0], [1.0], [11.0], [3.0]]
+
+
+def test_padding_efficiency() -> None:
+    assert padding_efficiency([1, 4, 1, 4], batch_size=2) == pytest.approx(10 / 16)
+    assert padding_efficiency([1, 1, 4, 4], batch_size=2) == 1.0
+    assert padding_efficiency([], batch_size=2) == 1.0
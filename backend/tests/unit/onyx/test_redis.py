@@ -4,6 +4,8 @@ import pytest
 import redis
 
 from onyx.redis.redis_pool import RedisPool
+from onyx.redis.redis_pool import tenant_key
+from onyx.redis.redis_pool import TenantRedis
 from onyx.utils.logger import setup_logger
 
 logger = setup_logger()
@@ -37,3 +39,12 @@ def test_redis_ssl() -> None:
 
     r = redis.Redis(connection_pool=pool)
     assert r.ping()
+
+
+def test_tenant_key_matches_tenant_redis_prefixing() -> None:
+    # constructing the client doesn't connect
+    r = TenantRedis("tenant")
+
+    assert r._prefixed("key") == tenant_key("tenant", "key")
+    # prefixed commands don't prefix a tenant key again
+    assert r._prefixed(tenant_key("tenant", "key")) == tenant_key("tenant", "key")
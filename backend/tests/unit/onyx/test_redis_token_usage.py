@@ -0,0 +1,95 @@
+from datetime import datetime
+from datetime import timedelta
+from datetime import timezone
+from typing import Any
+from unittest.mock import patch
+from uuid import uuid4
+
+from onyx.redis.redis_token_usage import fetch_token_usage
+from onyx.redis.redis_token_usage import get_token_usage_scopes
+from onyx.redis.redis_token_usage import get_user_token_usage_scope
+from onyx.redis.redis_token_usage import mark_token_usage_reconciled
+from onyx.redis.redis_token_usage import record_token_usage
+from onyx.redis.redis_token_usage import replace_token_usage
+from onyx.redis.redis_token_usage import TOKEN_USAGE_GLOBAL_SCOPE
+
+_TENANT_ID = "tenant"
+
+
+def _total(usage: list[tuple[datetime, int]] | None) -> int:
+    assert usage is not None
+    return sum(token_count for _, token_count in usage)
+
+
+def test_counters_are_only_used_once_reconciled(fake_redis: Any) -> None:
+    user_id = uuid4()
+    now = datetime.now(tz=timezone.utc)
+    cutoff_time = now - timedelta(hours=1)
+
+    scopes = get_token_usage_scopes(user_id)
+    assert scopes == [TOKEN_USAGE_GLOBAL_SCOPE, get_user_token_usage_scope(user_id)]
+    record_token_usage(fake_redis, _TENANT_ID, scopes, 100)
+    record_token_usage(fake_redis, _TENANT_ID, [TOKEN_USAGE_GLOBAL_SCOPE], 50)
+
+    assert (
+        fetch_token_usage(
+            fake_redis, _TENANT_ID, TOKEN_USAGE_GLOBAL_SCOPE, cutoff_time
+        )
+        is None
+    )
+
+    mark_token_usage_reconciled(fake_redis, _TENANT_ID, TOKEN_USAGE_GLOBAL_SCOPE)
+    usage = fetch_token_usage(
+        fake_redis, _TENANT_ID, TOKEN_USAGE_GLOBAL_SCOPE, cutoff_time
+    )
+    assert _total(usage) == 150
+
+    # the user scope was never reconciled
+    assert fetch_token_usage(fake_redis, _TENANT_ID, scopes[1], cutoff_time) is None
+    # other tenants don't see the usage
+    mark_token_usage_reconciled(fake_redis, "other", TOKEN_USAGE_GLOBAL_SCOPE)
+    usage = fetch_token_usage(
+        fake_redis, "other", TOKEN_USAGE_GLOBAL_SCOPE, cutoff_time
+    )
+    assert _total(usage) == 0
+
+
+def test_replace_token_usage_keeps_current_minute(fake_redis: Any) -> None:
+    now = datetime.now(tz=timezone.utc)
+    cutoff_time = now - timedelta(hours=2)
+
+    with patch(
+        "onyx.redis.redis_token_usage.datetime", wraps=datetime
+    ) as mock_datetime:
+        mock_datetime.now.return_value = now
+
+        # counted twice by accident in an earlier minute, and just now
+        record_token_usage(
+            fake_redis,
+            _TENANT_ID,
+            [TOKEN_USAGE_GLOBAL_SCOPE],
+            500,
+            now - timedelta(minutes=30),
+        )
+        record_token_usage(fake_redis, _TENANT_ID, [TOKEN_USAGE_GLOBAL_SCOPE], 10)
+
+        replace_token_usage(
+            fake_redis,
+            _TENANT_ID,
+            TOKEN_USAGE_GLOBAL_SCOPE,
+            usage=[
+                (now - timedelta(minutes=90), 200),
+                (now - timedelta(minutes=30), 250),
+                # older than the cutoff
+                (now - timedelta(hours=3), 1000),
+            ],
+            cutoff_time=cutoff_time,
+        )
+        mark_token_usage_reconciled(fake_redis, _TENANT_ID, TOKEN_USAGE_GLOBAL_SCOPE)
+
+        usage = fetch_token_usage(
+            fake_redis, _TENANT_ID, TOKEN_USAGE_GLOBAL_SCOPE, cutoff_time
+        )
+
+    # the message of the current minute is not in the chat message table yet
+    assert _total(usage) == 200 + 250 + 10
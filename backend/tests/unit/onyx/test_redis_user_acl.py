@@ -0,0 +1,66 @@
+from typing import Any
+from unittest.mock import patch
+from uuid import uuid4
+
+from onyx.redis.redis_user_acl import cache_user_acl
+from onyx.redis.redis_user_acl import fetch_cached_user_acl
+from onyx.redis.redis_user_acl import invalidate_current_tenant_user_acl_cache
+from onyx.redis.redis_user_acl import invalidate_user_acl_cache
+
+_TENANT_ID = "tenant"
+
+
+def test_cached_acl_is_invalidated_by_group_sync(fake_redis: Any) -> None:
+    user_id = uuid4()
+    acl = {"user_email:a@b.com", "PUBLIC"} | {
+        f"external_group:group_{i}" for i in range(1000)
+    }
+
+    cached_acl, generation = fetch_cached_user_acl(fake_redis, _TENANT_ID, user_id)
+    assert cached_acl is None
+
+    cache_user_acl(fake_redis, _TENANT_ID, user_id, acl, generation)
+    assert fetch_cached_user_acl(fake_redis, _TENANT_ID, user_id) == (
+        acl,
+        generation,
+    )
+    # other users and tenants don't share the entry
+    assert fetch_cached_user_acl(fake_redis, _TENANT_ID, uuid4())[0] is None
+    assert fetch_cached_user_acl(fake_redis, "other", user_id)[0] is None
+
+    invalidate_user_acl_cache(fake_redis, _TENANT_ID)
+    cached_acl, new_generation = fetch_cached_user_acl(
+        fake_redis, _TENANT_ID, user_id
+    )
+    assert cached_acl is None
+    assert new_generation != generation
+
+    # an ACL computed before the invalidation is never used
+    cache_user_acl(fake_redis, _TENANT_ID, user_id, acl, generation)
+    assert fetch_cached_user_acl(fake_redis, _TENANT_ID, user_id)[0] is None
+
+    cache_user_acl(fake_redis, _TENANT_ID, user_id, {"PUBLIC"}, new_generation)
+    assert fetch_cached_user_acl(fake_redis, _TENANT_ID, user_id)[0] == {"PUBLIC"}
+
+
+def test_invalidation_of_current_tenant_ignores_redis_failures(
+    fake_redis: Any,
+) -> None:
+    user_id = uuid4()
+    _, generation = fetch_cached_user_acl(fake_redis, _TENANT_ID, user_id)
+    cache_user_acl(fake_redis, _TENANT_ID, user_id, {"PUBLIC"}, generation)
+
+    with (
+        patch(
+            "onyx.redis.redis_user_acl.get_current_tenant_id", return_value=_TENANT_ID
+        ),
+        patch("onyx.redis.redis_user_acl.get_redis_client", return_value=fake_redis),
+    ):
+        invalidate_current_tenant_user_acl_cache()
+    assert fetch_cached_user_acl(fake_redis, _TENANT_ID, user_id)[0] is None
+
+    with patch(
+        "onyx.redis.redis_user_acl.get_redis_client",
+        side_effect=ConnectionError("redis is down"),
+    ):
+        invalidate_current_tenant_user_acl_cache()
@@ -1,12 +1,20 @@
+import json
 from datetime import datetime
 from datetime import timedelta
 from datetime import timezone
+from unittest.mock import patch
 from uuid import UUID
 
 from onyx.configs.constants import DocumentSource
 from onyx.configs.constants import INDEX_SEPARATOR
 from onyx.context.search.models import IndexFilters
 from onyx.context.search.models import Tag
+from onyx.document_index.vespa.shared_utils.vespa_request_builders import (
+    ACL_FILTER_QUERY_INPUT,
+)
+from onyx.document_index.vespa.shared_utils.vespa_request_builders import (
+    build_vespa_filter_params,
+)
 from onyx.document_index.vespa.shared_utils.vespa_request_builders import (
     build_vespa_filters,
 )
@@ -63,6 +71,39 @@ class TestBuildVespaFilters:
             == f'!({HIDDEN}=true) and (access_control_list contains "user2" or access_control_list contains "group2") and '
         )
 
+    def test_compact_acl(self) -> None:
+        """Test that large ACLs are passed as a weightedSet query input."""
+        with patch(
+            "onyx.document_index.vespa.shared_utils.vespa_request_builders."
+            "VESPA_COMPACT_ACL_FILTER_MIN_ENTRIES",
+            3,
+        ):
+            # Below the threshold
+            filters = IndexFilters(access_control_list=["user1", "group1", ""])
+            result = build_vespa_filters(filters)
+            assert (
+                result
+                == f'!({HIDDEN}=true) and (access_control_list contains "user1" or access_control_list contains "group1") and '
+            )
+            assert build_vespa_filter_params(filters) == {}
+
+            # At the threshold
+            filters = IndexFilters(
+                access_control_list=["user1", "group1", 'group "2"', "gruppe_ü"]
+            )
+            result = build_vespa_filters(filters)
+            assert (
+                result
+                == f"!({HIDDEN}=true) and weightedSet(access_control_list, @{ACL_FILTER_QUERY_INPUT}) and "
+            )
+            params = build_vespa_filter_params(filters)
+            assert json.loads(params[ACL_FILTER_QUERY_INPUT]) == {
+                "user1": 1,
+                "group1": 1,
+                'group "2"': 1,
+                "gruppe_ü": 1,
+            }
+
     def test_tenant_filter(self) -> None:
         """Test tenant ID filtering."""
         # With tenant ID